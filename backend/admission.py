@@ -0,0 +1,129 @@
+"""
+Control de admisión de pedidos según la capacidad de la cocina.
+
+La carga se mide como minutos de preparación en cola (el backlog que ya lleva
+``KitchenLoadModel``) sobre la capacidad configurada. Según esa proporción:
+
+- Por debajo del límite blando se aceptan todos los pedidos.
+- Entre el límite blando y el duro se aceptan con un ETA cotizado más largo
+  y cada zona queda limitada por un token bucket, para que una zona con mucha
+  demanda no acapare el horno.
+- Desde el límite duro se rechazan con 503 y un ``Retry-After`` igual al
+  tiempo estimado para que la cola vuelva por debajo del límite.
+
+Todo se decide en memoria: no agrega consultas a MongoDB al crear un pedido.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+# Bucket shared by every order whose zone the registry could not resolve
+UNRESOLVED_ZONE = "__unresolved__"
+
+
+class AdmissionDecision:
+    """
+    Resultado de evaluar un pedido entrante.
+
+    Attributes:
+        accepted (bool): Si el pedido puede crearse
+        extra_minutes (float): Minutos a sumar al ETA cotizado
+        retry_after (int): Segundos sugeridos antes de reintentar (si se rechaza)
+        reason (str): Motivo: ok, high_load, zone_throttled o overloaded
+    """
+
+    __slots__ = ("accepted", "extra_minutes", "retry_after", "reason")
+
+    def __init__(self, accepted: bool, extra_minutes: float = 0.0, retry_after: int = 0, reason: str = "ok"):
+        self.accepted = accepted
+        self.extra_minutes = extra_minutes
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class AdmissionController:
+    """
+    Decide si aceptar, demorar o rechazar pedidos según el backlog de cocina.
+
+    Attributes:
+        capacity_minutes (float): Minutos de preparación en cola considerados carga plena
+        soft_limit (float): Proporción de carga desde la que se alargan ETAs y se limita por zona
+        hard_limit (float): Proporción de carga desde la que se rechazan pedidos
+        zone_rate_per_minute (float): Pedidos por minuto permitidos por zona bajo carga alta
+        zone_burst (float): Ráfaga máxima de pedidos por zona bajo carga alta
+        max_extra_minutes (float): Margen máximo agregado al ETA al llegar al límite duro
+    """
+
+    def __init__(self, capacity_minutes: float, soft_limit: float = 0.7, hard_limit: float = 1.0,
+                 zone_rate_per_minute: float = 2.0, zone_burst: float = 5.0, max_extra_minutes: float = 20.0):
+        if not 0 < soft_limit <= hard_limit:
+            raise ValueError("Admission limits must satisfy 0 < soft_limit <= hard_limit")
+        self.capacity_minutes = max(1.0, capacity_minutes)
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.zone_rate_per_minute = zone_rate_per_minute
+        self.zone_burst = zone_burst
+        self.max_extra_minutes = max_extra_minutes
+        self._buckets: Dict[str, _TokenBucket] = {}
+
+    def load(self, backlog_minutes: float) -> float:
+        """Devuelve la carga como proporción de la capacidad."""
+        return backlog_minutes / self.capacity_minutes
+
+    def _take_zone_token(self, zone: str, now: float) -> float:
+        """Consume un token de la zona; devuelve 0 si pudo o los segundos hasta el próximo."""
+        bucket = self._buckets.get(zone)
+        if bucket is None:
+            bucket = self._buckets[zone] = _TokenBucket(self.zone_burst, now)
+        else:
+            elapsed = now - bucket.updated_at
+            bucket.tokens = min(self.zone_burst, bucket.tokens + elapsed * self.zone_rate_per_minute / 60)
+            bucket.updated_at = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        if self.zone_rate_per_minute <= 0:
+            return 60.0
+        return (1 - bucket.tokens) * 60 / self.zone_rate_per_minute
+
+    def evaluate(self, backlog_minutes: float, parallelism: int, zone: Optional[str],
+                 now: Optional[float] = None) -> AdmissionDecision:
+        """
+        Evalúa un pedido entrante contra la carga actual.
+
+        Args:
+            backlog_minutes (float): Minutos de preparación en cola
+            parallelism (int): Estaciones trabajando en paralelo (para estimar el drenaje)
+            zone (Optional[str]): Zona de entrega resuelta por el registro de zonas; None (zona
+                desconocida) comparte un único bucket, para que inventar nombres de zona no
+                esquive el límite ni agregue buckets
+            now (Optional[float]): Reloj monotónico en segundos; ahora si es None
+
+        Returns:
+            AdmissionDecision: Decisión para el pedido
+        """
+        now = now if now is not None else time.monotonic()
+        load = self.load(backlog_minutes)
+        if load >= self.hard_limit:
+            excess = backlog_minutes - self.hard_limit * self.capacity_minutes
+            drain_seconds = (excess / max(1, parallelism)) * 60
+            return AdmissionDecision(False, retry_after=max(30, math.ceil(drain_seconds)), reason="overloaded")
+
+        if load < self.soft_limit:
+            return AdmissionDecision(True)
+
+        wait = self._take_zone_token(zone if zone is not None else UNRESOLVED_ZONE, now)
+        if wait > 0:
+            return AdmissionDecision(False, retry_after=math.ceil(wait), reason="zone_throttled")
+
+        pressure = (load - self.soft_limit) / max(self.hard_limit - self.soft_limit, 1e-9)
+        return AdmissionDecision(True, extra_minutes=round(pressure * self.max_extra_minutes), reason="high_load")
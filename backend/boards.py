@@ -0,0 +1,70 @@
+"""
+Caché compartida de snapshots para los tableros de cada rol.
+
+Las tablets de cocina y reparto consultan su tablero cada pocos segundos. En
+lugar de ejecutar una agregación por tablet, cada rol tiene un único snapshot
+ya renderizado que se reutiliza mientras no haya cambios en los pedidos (o
+hasta que venza su TTL). Si varias tablets piden un snapshot vencido al mismo
+tiempo, sólo una lo reconstruye y las demás esperan ese resultado.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SnapshotCache:
+    """
+    Caché de snapshots por clave, invalidada por versión y por tiempo.
+
+    Attributes:
+        ttl_seconds (float): Vida máxima de un snapshot aunque no haya cambios
+        min_age_seconds (float): Edad mínima antes de reconstruir tras un cambio,
+            para que una ráfaga de actualizaciones no dispare una agregación por cada una
+        version (int): Versión de los datos; aumenta con cada cambio de pedidos
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, min_age_seconds: float = 1.0):
+        self.ttl_seconds = ttl_seconds
+        self.min_age_seconds = min_age_seconds
+        self.version = 0
+        # key -> (version, built_at, value)
+        self._entries: Dict[str, Tuple[int, float, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def invalidate(self):
+        """Marca todos los snapshots como desactualizados."""
+        self.version += 1
+
+    def _fresh(self, key: str, now: float) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        version, built_at, _ = entry
+        age = now - built_at
+        if age >= self.ttl_seconds:
+            return False
+        return version == self.version or age < self.min_age_seconds
+
+    async def get(self, key: str, build: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devuelve el snapshot de una clave, reconstruyéndolo si hace falta.
+
+        Args:
+            key (str): Clave del snapshot (p. ej. el rol)
+            build (Callable[[], Awaitable[Any]]): Corrutina que arma un snapshot nuevo
+
+        Returns:
+            Any: Snapshot vigente
+        """
+        if self._fresh(key, time.monotonic()):
+            return self._entries[key][2]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have rebuilt it while we waited for the lock
+            if self._fresh(key, time.monotonic()):
+                return self._entries[key][2]
+            version = self.version
+            value = await build()
+            self._entries[key] = (version, time.monotonic(), value)
+            return value
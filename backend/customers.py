@@ -0,0 +1,110 @@
+"""
+Historial y perfil de clientes por teléfono.
+
+El personal busca a los clientes habituales por teléfono (para repetir un
+pedido o atender un reclamo), pero el mismo número llega escrito de muchas
+formas: "0981 123-456", "+595981123456", "595 981 123456". Cada pedido guarda
+``customer_key``, el teléfono normalizado a dígitos con código de país, y los
+backends lo indexan junto con ``created_at`` para paginar el historial sin
+recorrer todos los pedidos.
+
+El perfil del cliente (último nombre, dirección y zona, cantidad de pedidos y
+unidades pedidas por producto) se arma una vez desde el historial y después
+cada pedido nuevo lo actualiza en el lugar; ver ``storage.add_customer_order``.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# Paraguay; numbers without an international prefix are assumed local
+DEFAULT_COUNTRY_CODE = "595"
+# Shorter digit strings are typos or extensions, not phone numbers
+MIN_PHONE_DIGITS = 6
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(phone: str, country_code: str = DEFAULT_COUNTRY_CODE) -> str:
+    """
+    Normaliza un teléfono a dígitos con código de país ("0981 123-456" -> "595981123456").
+
+    Args:
+        phone (str): Teléfono tal como lo escribió el cliente
+        country_code (str): Código de país de los números locales
+
+    Returns:
+        str: Clave del cliente, o "" si no parece un teléfono
+    """
+    digits = _NON_DIGITS.sub("", phone or "")
+    if len(digits) < MIN_PHONE_DIGITS:
+        return ""
+    if phone.lstrip().startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        return digits[2:]
+    if digits.startswith("0"):
+        # National trunk prefix: 0981... -> 595981...
+        return country_code + digits[1:]
+    if digits.startswith(country_code) and len(digits) > len(country_code) + MIN_PHONE_DIGITS:
+        return digits
+    return country_code + digits
+
+
+def encode_cursor(order: dict) -> str:
+    """Cursor de paginación que apunta después de ``order`` (fecha de creación e ID)."""
+    return f"{order['created_at'].isoformat()}_{order['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Lee un cursor de ``encode_cursor``.
+
+    Raises:
+        ValueError: Si el cursor está mal formado
+    """
+    created_at, separator, order_id = cursor.partition("_")
+    if not separator or not order_id:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return datetime.fromisoformat(created_at), order_id
+
+
+def favourite_items(profile: dict, menu_items: Dict[str, dict], limit: int) -> List[dict]:
+    """
+    Productos más pedidos por el cliente que siguen en el menú.
+
+    Args:
+        profile (dict): Perfil guardado, con ``items`` (ID del producto -> unidades)
+        menu_items (Dict[str, dict]): Productos del menú por ID
+        limit (int): Máximo de productos
+
+    Returns:
+        List[dict]: ``menu_item_id``, ``name``, ``quantity`` y ``available``, de más a menos pedido
+    """
+    ranked = sorted(
+        (item_id for item_id in profile.get("items", {}) if item_id in menu_items),
+        key=lambda item_id: (-profile["items"][item_id], menu_items[item_id]["name"]),
+    )
+    return [
+        {
+            "menu_item_id": item_id,
+            "name": menu_items[item_id]["name"],
+            "quantity": profile["items"][item_id],
+            "available": menu_items[item_id].get("available", True),
+        }
+        for item_id in ranked[:limit]
+    ]
+
+
+def profile_view(profile: dict, menu_items: Dict[str, dict], favourites: int) -> dict:
+    """Perfil listo para la respuesta de la API."""
+    return {
+        "customer_key": profile["id"],
+        "customer_name": profile.get("customer_name", ""),
+        "last_address": profile.get("last_address", ""),
+        "last_zone": profile.get("last_zone", ""),
+        "order_count": profile.get("order_count", 0),
+        "first_order_at": profile.get("first_order_at"),
+        "last_order_at": profile.get("last_order_at"),
+        "favourite_items": favourite_items(profile, menu_items, favourites),
+    }
@@ -0,0 +1,282 @@
+"""
+Motor de asignación automática de repartidores.
+
+Mantiene en memoria un índice espacial (grilla uniforme) con la última posición
+conocida de cada repartidor disponible, de modo que al pasar un pedido a
+``ready`` se pueda elegir al repartidor más cercano con capacidad libre sin
+consultar MongoDB.
+
+La grilla divide el plano lat/lon en celdas de ``cell_size_deg`` grados. La
+búsqueda recorre anillos concéntricos de celdas alrededor del punto objetivo y
+se detiene en cuanto ningún anillo exterior puede contener un candidato más
+cercano que el mejor encontrado, por lo que el costo depende sólo de la
+densidad local de repartidores y no del total.
+"""
+
+import math
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calcula la distancia de gran círculo entre dos coordenadas.
+
+    Args:
+        lat1 (float): Latitud del primer punto
+        lon1 (float): Longitud del primer punto
+        lat2 (float): Latitud del segundo punto
+        lon2 (float): Longitud del segundo punto
+
+    Returns:
+        float: Distancia en kilómetros
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class CourierState:
+    """
+    Estado en memoria de un repartidor dentro del índice.
+
+    Attributes:
+        courier_id (str): ID del repartidor
+        latitude (float): Última latitud conocida
+        longitude (float): Última longitud conocida
+        load (int): Cantidad de pedidos asignados actualmente
+        capacity (int): Máximo de pedidos simultáneos
+        available (bool): Si el repartidor acepta pedidos
+    """
+
+    __slots__ = ("courier_id", "latitude", "longitude", "load", "capacity", "available", "cell")
+
+    def __init__(self, courier_id: str, latitude: float, longitude: float,
+                 load: int, capacity: int, available: bool, cell: Cell):
+        self.courier_id = courier_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.load = load
+        self.capacity = capacity
+        self.available = available
+        self.cell = cell
+
+    @property
+    def has_capacity(self) -> bool:
+        """bool: True si el repartidor está disponible y tiene lugar para otro pedido."""
+        return self.available and self.load < self.capacity
+
+
+class CourierIndex:
+    """
+    Índice espacial de repartidores basado en una grilla uniforme.
+
+    Todas las operaciones son síncronas y no ceden el event loop, por lo que
+    dentro de un worker asyncio cada actualización es atómica respecto de las
+    demás corrutinas.
+
+    Attributes:
+        cell_size_deg (float): Tamaño de celda en grados
+        default_capacity (int): Capacidad usada si no se especifica una
+        free_slots (int): Lugares libres sumando todos los repartidores disponibles
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01, default_capacity: int = 3):
+        """
+        Inicializa un índice vacío.
+
+        Args:
+            cell_size_deg (float): Tamaño de celda en grados (0.01 ≈ 1,1 km)
+            default_capacity (int): Pedidos simultáneos por repartidor por defecto
+        """
+        self.cell_size_deg = cell_size_deg
+        self.default_capacity = default_capacity
+        self._couriers: Dict[str, CourierState] = {}
+        self._cells: Dict[Cell, Set[str]] = {}
+        self.free_slots = 0
+
+    def __len__(self) -> int:
+        return len(self._couriers)
+
+    def __contains__(self, courier_id: str) -> bool:
+        return courier_id in self._couriers
+
+    @staticmethod
+    def _slots(state: CourierState) -> int:
+        return max(0, state.capacity - state.load) if state.available else 0
+
+    def _cell_for(self, latitude: float, longitude: float) -> Cell:
+        return (math.floor(latitude / self.cell_size_deg), math.floor(longitude / self.cell_size_deg))
+
+    def _move(self, state: CourierState, cell: Cell):
+        if state.cell == cell:
+            return
+        bucket = self._cells.get(state.cell)
+        if bucket is not None:
+            bucket.discard(state.courier_id)
+            if not bucket:
+                del self._cells[state.cell]
+        self._cells.setdefault(cell, set()).add(state.courier_id)
+        state.cell = cell
+
+    def upsert(self, courier_id: str, latitude: float, longitude: float,
+               load: Optional[int] = None, capacity: Optional[int] = None,
+               available: Optional[bool] = None) -> CourierState:
+        """
+        Inserta o actualiza la posición y el estado de un repartidor.
+
+        Los argumentos en None conservan el valor anterior (o el valor por
+        defecto si el repartidor es nuevo).
+
+        Args:
+            courier_id (str): ID del repartidor
+            latitude (float): Latitud actual
+            longitude (float): Longitud actual
+            load (Optional[int]): Pedidos asignados actualmente
+            capacity (Optional[int]): Máximo de pedidos simultáneos
+            available (Optional[bool]): Disponibilidad del repartidor
+
+        Returns:
+            CourierState: Estado actualizado
+        """
+        cell = self._cell_for(latitude, longitude)
+        state = self._couriers.get(courier_id)
+        if state is None:
+            state = CourierState(
+                courier_id, latitude, longitude,
+                load if load is not None else 0,
+                capacity if capacity is not None else self.default_capacity,
+                available if available is not None else True,
+                cell,
+            )
+            self._couriers[courier_id] = state
+            self._cells.setdefault(cell, set()).add(courier_id)
+            self.free_slots += self._slots(state)
+            return state
+
+        self.free_slots -= self._slots(state)
+        state.latitude = latitude
+        state.longitude = longitude
+        if load is not None:
+            state.load = load
+        if capacity is not None:
+            state.capacity = capacity
+        if available is not None:
+            state.available = available
+        self.free_slots += self._slots(state)
+        self._move(state, cell)
+        return state
+
+    def update_position(self, courier_id: str, latitude: float, longitude: float) -> bool:
+        """
+        Actualiza sólo la posición de un repartidor ya indexado.
+
+        Args:
+            courier_id (str): ID del repartidor
+            latitude (float): Latitud actual
+            longitude (float): Longitud actual
+
+        Returns:
+            bool: False si el repartidor no está en el índice
+        """
+        state = self._couriers.get(courier_id)
+        if state is None:
+            return False
+        state.latitude = latitude
+        state.longitude = longitude
+        self._move(state, self._cell_for(latitude, longitude))
+        return True
+
+    def get(self, courier_id: str) -> Optional[CourierState]:
+        """Devuelve el estado de un repartidor o None si no está indexado."""
+        return self._couriers.get(courier_id)
+
+    def adjust_load(self, courier_id: str, delta: int):
+        """
+        Suma ``delta`` a la carga de un repartidor, sin bajar de cero.
+
+        Args:
+            courier_id (str): ID del repartidor
+            delta (int): Pedidos a sumar (negativo para liberar)
+        """
+        state = self._couriers.get(courier_id)
+        if state is not None:
+            self.set_load(courier_id, state.load + delta)
+
+    def set_load(self, courier_id: str, load: int):
+        """
+        Fija la carga de un repartidor indexado, sin bajar de cero.
+
+        Args:
+            courier_id (str): ID del repartidor
+            load (int): Pedidos asignados actualmente
+        """
+        state = self._couriers.get(courier_id)
+        if state is not None:
+            self.free_slots -= self._slots(state)
+            state.load = max(0, load)
+            self.free_slots += self._slots(state)
+
+    def nearest(self, latitude: float, longitude: float, max_distance_km: float = 15.0,
+                exclude: Iterable[str] = ()) -> Optional[Tuple[str, float]]:
+        """
+        Busca el repartidor con capacidad libre más cercano a un punto.
+
+        Args:
+            latitude (float): Latitud del punto objetivo
+            longitude (float): Longitud del punto objetivo
+            max_distance_km (float): Radio máximo de búsqueda
+            exclude (Iterable[str]): IDs a ignorar (p. ej. reservas fallidas)
+
+        Returns:
+            Optional[Tuple[str, float]]: (courier_id, distancia_km) o None
+        """
+        if not self._couriers:
+            return None
+        excluded = set(exclude)
+        km_per_deg_lon = KM_PER_DEG_LAT * max(math.cos(math.radians(latitude)), 1e-6)
+        # Smallest distance covered by one ring of cells, used as a lower bound
+        ring_km = self.cell_size_deg * min(KM_PER_DEG_LAT, km_per_deg_lon)
+        max_ring = int(max_distance_km / ring_km) + 1
+        cx, cy = self._cell_for(latitude, longitude)
+
+        best_id: Optional[str] = None
+        best_km = max_distance_km
+        for ring in range(max_ring + 1):
+            # Every courier in ring r is at least (r - 1) cells away from the point
+            if best_id is not None and (ring - 1) * ring_km > best_km:
+                break
+            for cell in _ring_cells(cx, cy, ring):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for courier_id in bucket:
+                    state = self._couriers[courier_id]
+                    if not state.has_capacity or courier_id in excluded:
+                        continue
+                    distance = haversine_km(latitude, longitude, state.latitude, state.longitude)
+                    if distance <= best_km:
+                        best_id, best_km = courier_id, distance
+        if best_id is None:
+            return None
+        return best_id, best_km
+
+
+def _ring_cells(cx: int, cy: int, ring: int) -> Iterable[Cell]:
+    """Genera las celdas del anillo cuadrado de radio ``ring`` alrededor de (cx, cy)."""
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cx + dx, cy - ring)
+        yield (cx + dx, cy + ring)
+    for dy in range(-ring + 1, ring):
+        yield (cx - ring, cy + dy)
+        yield (cx + ring, cy + dy)
@@ -0,0 +1,262 @@
+"""
+Estimación de tiempos de entrega según la carga de la cocina y de reparto.
+
+``KitchenLoadModel`` mantiene en memoria los totales que determinan la espera:
+minutos de preparación en cola (pedidos ``received``/``confirmed`` y la mitad
+de los ``preparing``), cantidad de estaciones trabajando en paralelo y pedidos
+listos que esperan repartidor. Cada alta o cambio de estado ajusta esos
+totales en O(1), y una estimación nueva sólo combina los totales vigentes.
+
+Los pedidos en cola (``received``/``confirmed``) guardan además el ETA que se
+les cotizó: cuando el backlog cambia, ``revise_queued`` los vuelve a estimar
+según el trabajo que tienen delante y devuelve los que se movieron.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+KITCHEN_STATUSES = ("received", "confirmed", "preparing")
+QUEUED_STATUSES = ("received", "confirmed")
+# Orders already in the oven have, on average, half of their work left
+PREPARING_WEIGHT = 0.5
+
+
+def order_work(items: Iterable[Tuple[float, int]], default_minutes: float = 15) -> Tuple[float, float]:
+    """
+    Calcula la carga de cocina de un pedido.
+
+    Args:
+        items (Iterable[Tuple[float, int]]): Pares (preparation_time, quantity)
+        default_minutes (float): Tiempo a usar si un producto no lo informa
+
+    Returns:
+        Tuple[float, float]: (minutos de trabajo totales, producto más lento)
+    """
+    work = 0.0
+    lead = 0.0
+    for minutes, quantity in items:
+        minutes = float(minutes if minutes is not None else default_minutes)
+        work += minutes * quantity
+        lead = max(lead, minutes)
+    return work, lead
+
+
+class KitchenLoadModel:
+    """
+    Modelo incremental del backlog de cocina y de reparto.
+
+    Attributes:
+        parallelism (int): Estaciones o cocineros trabajando en paralelo
+        travel_minutes (float): Tiempo típico de viaje al cliente
+        trip_minutes (float): Duración típica de un viaje completo (ida y vuelta)
+        backlog_minutes (float): Minutos de preparación pendientes en cocina
+        ready_waiting (int): Pedidos listos sin repartidor asignado
+    """
+
+    def __init__(self, parallelism: int = 3, travel_minutes: float = 20, trip_minutes: float = 35):
+        self.parallelism = max(1, parallelism)
+        self.travel_minutes = travel_minutes
+        self.trip_minutes = trip_minutes
+        self.backlog_minutes = 0.0
+        self.ready_waiting = 0
+        # order_id -> (status, work minutes, lead minutes, waiting for courier), in arrival order
+        self._orders: Dict[str, Tuple[str, float, float, bool]] = {}
+        # order_id -> (deadline, quoted ETA, extra minutes added to it, fixed) for queued orders
+        self._quoted: Dict[str, Tuple[datetime, datetime, float, bool]] = {}
+
+    def _contribution(self, status: str, work: float, waiting: bool) -> Tuple[float, int]:
+        if status == "preparing":
+            return work * PREPARING_WEIGHT, 0
+        if status in KITCHEN_STATUSES:
+            return work, 0
+        if status == "ready" and waiting:
+            return 0.0, 1
+        return 0.0, 0
+
+    def _apply(self, status: str, work: float, waiting: bool, sign: int):
+        minutes, ready = self._contribution(status, work, waiting)
+        self.backlog_minutes = max(0.0, self.backlog_minutes + sign * minutes)
+        self.ready_waiting = max(0, self.ready_waiting + sign * ready)
+
+    def track(self, order_id: str, status: str, work: float, lead: float, waiting: bool = False):
+        """
+        Registra un pedido o actualiza su estado.
+
+        Args:
+            order_id (str): ID del pedido
+            status (str): Estado actual
+            work (float): Minutos de trabajo de cocina del pedido
+            lead (float): Minutos del producto más lento
+            waiting (bool): Si está listo y sin repartidor asignado
+        """
+        previous = self._orders.get(order_id)
+        if previous is not None:
+            self._apply(previous[0], previous[1], previous[3], -1)
+        if status not in QUEUED_STATUSES:
+            self._quoted.pop(order_id, None)
+        if status in KITCHEN_STATUSES or status == "ready":
+            # Updating in place keeps the order's place in the queue
+            self._orders[order_id] = (status, work, lead, waiting)
+            self._apply(status, work, waiting, 1)
+        else:
+            self._orders.pop(order_id, None)
+
+    def transition(self, order_id: str, status: str, waiting: bool = False) -> Optional[Tuple[float, float]]:
+        """
+        Mueve un pedido conocido a un nuevo estado.
+
+        Args:
+            order_id (str): ID del pedido
+            status (str): Nuevo estado
+            waiting (bool): Si queda listo y sin repartidor asignado
+
+        Returns:
+            Optional[Tuple[float, float]]: (work, lead) del pedido, o None si no estaba registrado
+        """
+        previous = self._orders.get(order_id)
+        if previous is None:
+            return None
+        _, work, lead, _ = previous
+        self.track(order_id, status, work, lead, waiting)
+        return work, lead
+
+    def quote(self, order_id: str, eta: datetime, extra_minutes: float = 0, fixed: bool = False):
+        """
+        Registra el ETA cotizado a un pedido en cola.
+
+        El primer ETA cotizado es también su plazo: la cocina atiende primero
+        los plazos más cercanos, así que ordena la cola de ``queued_minutes``.
+
+        Args:
+            order_id (str): ID del pedido (ya registrado con ``track``)
+            eta (datetime): ETA cotizado
+            extra_minutes (float): Margen sumado a la estimación, que las revisiones conservan
+            fixed (bool): Si el ETA no se revisa (pedidos programados para una hora)
+        """
+        previous = self._orders.get(order_id)
+        if previous is not None and previous[0] in QUEUED_STATUSES:
+            self._quoted[order_id] = (eta, eta, extra_minutes, fixed)
+
+    def queued_minutes(self, free_slots: int, couriers: int) -> List[Tuple[str, str, float]]:
+        """
+        Estima los minutos hasta la entrega de cada pedido en cola.
+
+        Cada pedido espera el trabajo en preparación y el de los pedidos en
+        cola con plazo anterior (a igual plazo, los que llegaron antes); el
+        último de la cola coincide con ``estimate_minutes`` al momento de su alta.
+
+        Args:
+            free_slots (int): Lugares libres entre los repartidores disponibles
+            couriers (int): Repartidores conocidos en total
+
+        Returns:
+            List[Tuple[str, str, float]]: (order_id, estado, minutos) en el orden de la cola
+        """
+        queued = [(order_id, entry) for order_id, entry in self._orders.items() if entry[0] in QUEUED_STATUSES]
+        ahead = max(0.0, self.backlog_minutes - sum(entry[1] for _, entry in queued))
+        # Stable sort: unquoted orders and equal deadlines keep arrival order
+        queued.sort(key=lambda pair: self._quoted[pair[0]][0] if pair[0] in self._quoted else datetime.max)
+        after_kitchen = self.courier_wait_minutes(free_slots, couriers) + self.travel_minutes
+        estimates = []
+        for order_id, (status, work, lead, _) in queued:
+            cooking = max(lead, work / self.parallelism)
+            estimates.append((order_id, status, ahead / self.parallelism + cooking + after_kitchen))
+            ahead += work
+        return estimates
+
+    def revise_queued(self, free_slots: int, couriers: int, threshold_minutes: float,
+                      now: Optional[datetime] = None) -> List[Tuple[str, str, datetime]]:
+        """
+        Re-estima los pedidos en cola con ETA cotizado, después de un cambio del backlog.
+
+        Args:
+            free_slots (int): Lugares libres entre los repartidores disponibles
+            couriers (int): Repartidores conocidos en total
+            threshold_minutes (float): Diferencia mínima con el ETA cotizado para revisarlo
+            now (Optional[datetime]): Momento de referencia (UTC); ahora si es None
+
+        Returns:
+            List[Tuple[str, str, datetime]]: (order_id, estado, ETA nuevo) de los pedidos
+            revisados, que pasan a ser su ETA cotizado
+        """
+        now = now or datetime.utcnow()
+        revisions = []
+        for order_id, status, minutes in self.queued_minutes(free_slots, couriers):
+            quoted = self._quoted.get(order_id)
+            if quoted is None or quoted[3]:
+                continue
+            deadline, eta, extra_minutes, fixed = quoted
+            revised = eta_from_now(minutes + extra_minutes, now)
+            if abs((revised - eta).total_seconds()) >= threshold_minutes * 60:
+                self._quoted[order_id] = (deadline, revised, extra_minutes, fixed)
+                revisions.append((order_id, status, revised))
+        return revisions
+
+    def courier_wait_minutes(self, free_slots: int, couriers: int) -> float:
+        """
+        Estima cuánto espera un pedido listo hasta que lo retire un repartidor.
+
+        Args:
+            free_slots (int): Lugares libres entre los repartidores disponibles
+            couriers (int): Repartidores conocidos en total
+
+        Returns:
+            float: Minutos de espera estimados
+        """
+        if self.ready_waiting < free_slots:
+            return 0.0
+        queued = self.ready_waiting - free_slots + 1
+        return self.trip_minutes * queued / max(1, couriers)
+
+    def estimate_minutes(self, work: float, lead: float, free_slots: int, couriers: int) -> float:
+        """
+        Estima los minutos hasta la entrega de un pedido nuevo.
+
+        Args:
+            work (float): Minutos de trabajo de cocina del pedido
+            lead (float): Minutos del producto más lento
+            free_slots (int): Lugares libres entre los repartidores disponibles
+            couriers (int): Repartidores conocidos en total
+
+        Returns:
+            float: Minutos estimados hasta la entrega
+        """
+        queue = self.backlog_minutes / self.parallelism
+        cooking = max(lead, work / self.parallelism)
+        return queue + cooking + self.courier_wait_minutes(free_slots, couriers) + self.travel_minutes
+
+    def remaining_minutes(self, status: str, lead: float, free_slots: int, couriers: int) -> Optional[float]:
+        """
+        Estima los minutos restantes de un pedido que acaba de cambiar de estado.
+
+        Args:
+            status (str): Nuevo estado del pedido
+            lead (float): Minutos del producto más lento
+            free_slots (int): Lugares libres entre los repartidores disponibles
+            couriers (int): Repartidores conocidos en total
+
+        Returns:
+            Optional[float]: Minutos restantes, o None si el estado no cambia la estimación
+        """
+        if status == "preparing":
+            return lead + self.courier_wait_minutes(free_slots, couriers) + self.travel_minutes
+        if status == "ready":
+            return self.courier_wait_minutes(free_slots, couriers) + self.travel_minutes
+        if status == "on_route":
+            return self.travel_minutes
+        return None
+
+
+def eta_from_now(minutes: float, now: Optional[datetime] = None) -> datetime:
+    """
+    Convierte minutos estimados en una fecha de entrega redondeada al minuto.
+
+    Args:
+        minutes (float): Minutos hasta la entrega
+        now (Optional[datetime]): Momento de referencia (UTC); ahora si es None
+
+    Returns:
+        datetime: Fecha estimada de entrega
+    """
+    now = now or datetime.utcnow()
+    return (now + timedelta(minutes=round(minutes))).replace(second=0, microsecond=0)
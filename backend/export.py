@@ -0,0 +1,120 @@
+"""
+Exportación de pedidos en streaming (NDJSON o CSV, opcionalmente gzip).
+
+Contabilidad necesita rangos de pedidos que no entran en un listado de 1000
+ni conviene cargar completos en memoria. Este módulo convierte los lotes que
+produce ``OrderRepository.scan`` en bloques de bytes para un
+``StreamingResponse``: cada lote se codifica (y comprime) apenas llega y se
+descarta, así que la memoria usada depende del tamaño de lote y no del
+tamaño de la exportación.
+"""
+
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+import orjson
+
+# Format -> media type of the uncompressed export
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# CSV header -> how the value is read from an order document
+CSV_COLUMNS: List[Tuple[str, Callable[[dict], Any]]] = [
+    ("id", lambda order: order["id"]),
+    ("created_at", lambda order: order["created_at"].isoformat()),
+    ("updated_at", lambda order: order["updated_at"].isoformat()),
+    ("status", lambda order: order["status"]),
+    ("payment_method", lambda order: order.get("payment_method", "cash")),
+    ("customer_name", lambda order: order["delivery_info"].get("customer_name", "")),
+    ("customer_phone", lambda order: order["delivery_info"].get("customer_phone", "")),
+    ("delivery_address", lambda order: order["delivery_info"].get("delivery_address", "")),
+    ("delivery_zone", lambda order: order["delivery_info"].get("delivery_zone", "")),
+    ("items", lambda order: orjson.dumps(order["items"]).decode()),
+    ("item_count", lambda order: sum(item.get("quantity", 0) for item in order["items"])),
+    ("subtotal", lambda order: order["subtotal"]),
+    ("delivery_fee", lambda order: order["delivery_fee"]),
+    ("total", lambda order: order["total"]),
+    ("assigned_delivery_person", lambda order: order.get("assigned_delivery_person") or ""),
+]
+
+
+def encode_ndjson(orders: List[dict]) -> bytes:
+    """Un pedido JSON por línea (orjson serializa los datetimes en ISO 8601)."""
+    return b"".join(orjson.dumps(order, default=str, option=orjson.OPT_APPEND_NEWLINE) for order in orders)
+
+
+class CsvEncoder:
+    """
+    Codificador CSV que reutiliza un único buffer entre lotes.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow([name for name, _ in CSV_COLUMNS])
+        return self._drain()
+
+    def encode(self, orders: List[dict]) -> bytes:
+        self._writer.writerows([extract(order) for _, extract in CSV_COLUMNS] for order in orders)
+        return self._drain()
+
+
+async def stream_export(batches: AsyncIterator[List[dict]], export_format: str,
+                        compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Codifica los lotes de pedidos a medida que llegan.
+
+    Args:
+        batches (AsyncIterator[List[dict]]): Lotes de pedidos (p. ej. de ``storage.orders.scan``)
+        export_format (str): ``"ndjson"`` o ``"csv"``
+        compress (bool): Comprime la salida como un único stream gzip
+
+    Yields:
+        bytes: Bloque listo para enviar (uno por lote, más la cabecera CSV)
+    """
+    if export_format == "csv":
+        encoder = CsvEncoder()
+        header, encode = encoder.header(), encoder.encode
+    else:
+        header, encode = b"", encode_ndjson
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def chunk(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if header:
+        yield chunk(header)
+    async for batch in batches:
+        data = chunk(encode(batch))
+        # The compressor may buffer a whole small batch; skip empty chunks
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def export_headers(export_format: str, compress: bool, filename: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Media type y cabeceras de descarga de una exportación.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: ``(media_type, headers)``
+    """
+    filename = f"{filename}.{export_format}"
+    media_type = EXPORT_FORMATS[export_format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return media_type, {"Content-Disposition": f'attachment; filename="{filename}"'}
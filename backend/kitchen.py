@@ -0,0 +1,245 @@
+"""
+Planificador de tickets de cocina por estación.
+
+Cada pedido se divide en tickets, uno por estación (horno, parrilla, bebidas,
+freidora...), según la categoría de sus productos. Cada estación tiene su
+propia cola de prioridad ordenada para que todos los tickets de un pedido
+terminen juntos: un ticket debería empezar en ``due_at - prep_minutes``, así
+que se prioriza el que tiene el inicio límite más temprano; a igualdad, el de
+preparación más larga y luego el de vencimiento más próximo.
+
+Las colas usan ``heapq`` con borrado diferido: completar o cancelar un ticket
+lo marca y se descarta cuando llega al tope del heap. Cada estación lleva
+además la cuenta de sus tickets activos, así el resumen de estaciones no
+recorre las colas, y ``queue`` con ``limit`` devuelve sólo los primeros
+tickets con ``heapq.nsmallest`` en lugar de ordenar el heap entero.
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_STATION = "general"
+
+STATION_BY_CATEGORY: Dict[str, str] = {
+    "pizzas": "horno",
+    "hamburguesas": "parrilla",
+    "burgers": "parrilla",
+    "acompañamientos": "freidora",
+    "sides": "freidora",
+    "bebidas": "bebidas",
+    "drinks": "bebidas",
+}
+
+TICKET_STATUSES = ("pending", "in_progress", "done")
+
+
+class Ticket:
+    """
+    Ticket de cocina: la parte de un pedido que prepara una estación.
+
+    Attributes:
+        id (str): Identificador ``{order_id}:{station}``
+        order_id (str): ID del pedido
+        station (str): Estación que lo prepara
+        items (List[dict]): Productos del ticket
+        prep_minutes (float): Tiempo del producto más lento del ticket
+        due_at (datetime): Momento en que el pedido completo debería estar listo
+        status (str): pending, in_progress o done
+    """
+
+    __slots__ = ("id", "order_id", "station", "items", "prep_minutes", "due_at", "status")
+
+    def __init__(self, order_id: str, station: str, items: List[dict], prep_minutes: float, due_at: datetime):
+        self.id = f"{order_id}:{station}"
+        self.order_id = order_id
+        self.station = station
+        self.items = items
+        self.prep_minutes = prep_minutes
+        self.due_at = due_at
+        self.status = "pending"
+
+    @property
+    def start_by(self) -> datetime:
+        """datetime: Último momento para empezar sin retrasar el pedido."""
+        return self.due_at - timedelta(minutes=self.prep_minutes)
+
+    def priority(self) -> Tuple[datetime, float, datetime]:
+        """Clave de orden dentro de la cola de la estación."""
+        return (self.start_by, -self.prep_minutes, self.due_at)
+
+    def to_dict(self) -> dict:
+        """Devuelve el ticket en forma serializable a JSON."""
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "station": self.station,
+            "items": self.items,
+            "prep_minutes": self.prep_minutes,
+            "due_at": self.due_at.isoformat(),
+            "start_by": self.start_by.isoformat(),
+            "status": self.status,
+        }
+
+
+def station_for(category: str) -> str:
+    """
+    Devuelve la estación que prepara una categoría del menú.
+
+    Args:
+        category (str): Categoría del producto
+
+    Returns:
+        str: Nombre de la estación
+    """
+    return STATION_BY_CATEGORY.get((category or "").lower(), DEFAULT_STATION)
+
+
+class TicketScheduler:
+    """
+    Colas de prioridad de tickets, una por estación.
+    """
+
+    def __init__(self):
+        self._tickets: Dict[str, Ticket] = {}
+        self._by_order: Dict[str, List[str]] = {}
+        self._heaps: Dict[str, List[Tuple[Tuple[datetime, float, datetime], int, str]]] = {}
+        self._active: Dict[str, int] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def add_order(self, order_id: str, items: Iterable[dict], due_at: datetime) -> List[Ticket]:
+        """
+        Divide un pedido en tickets por estación y los encola.
+
+        Args:
+            order_id (str): ID del pedido
+            items (Iterable[dict]): Productos con ``category``, ``preparation_time``,
+                ``menu_item_id``, ``name``, ``quantity`` y ``special_instructions``
+            due_at (datetime): Momento en que el pedido debería estar listo
+
+        Returns:
+            List[Ticket]: Tickets creados (vacío si el pedido ya estaba encolado)
+        """
+        if order_id in self._by_order:
+            return []
+        grouped: Dict[str, List[dict]] = {}
+        for item in items:
+            grouped.setdefault(station_for(item.get("category")), []).append(item)
+
+        tickets = []
+        for station, station_items in grouped.items():
+            prep_minutes = max(float(item.get("preparation_time") or 0) for item in station_items)
+            ticket = Ticket(
+                order_id,
+                station,
+                [
+                    {
+                        "menu_item_id": item.get("menu_item_id"),
+                        "name": item.get("name"),
+                        "quantity": item.get("quantity", 1),
+                        "special_instructions": item.get("special_instructions") or "",
+                    }
+                    for item in station_items
+                ],
+                prep_minutes,
+                due_at,
+            )
+            self._tickets[ticket.id] = ticket
+            heapq.heappush(self._heaps.setdefault(station, []), (ticket.priority(), next(self._sequence), ticket.id))
+            self._active[station] = self._active.get(station, 0) + 1
+            tickets.append(ticket)
+        self._by_order[order_id] = [ticket.id for ticket in tickets]
+        return tickets
+
+    def set_status(self, ticket_id: str, status: str) -> Optional[Ticket]:
+        """
+        Cambia el estado de un ticket.
+
+        Args:
+            ticket_id (str): ID del ticket
+            status (str): pending, in_progress o done
+
+        Returns:
+            Optional[Ticket]: El ticket actualizado, o None si no existe
+
+        Raises:
+            ValueError: Si el estado no es válido
+        """
+        if status not in TICKET_STATUSES:
+            raise ValueError(f"Invalid ticket status. Must be one of: {list(TICKET_STATUSES)}")
+        ticket = self._tickets.get(ticket_id)
+        if ticket is not None:
+            if ticket.status != "done" and status == "done":
+                self._adjust_active(ticket.station, -1)
+            elif ticket.status == "done" and status != "done":
+                self._adjust_active(ticket.station, 1)
+            ticket.status = status
+        return ticket
+
+    def order_done(self, order_id: str) -> bool:
+        """Indica si todos los tickets de un pedido están terminados."""
+        ticket_ids = self._by_order.get(order_id)
+        if not ticket_ids:
+            return False
+        return all(self._tickets[ticket_id].status == "done" for ticket_id in ticket_ids)
+
+    def remove_order(self, order_id: str) -> List[str]:
+        """
+        Quita todos los tickets de un pedido (listo, cancelado, etc.).
+
+        Args:
+            order_id (str): ID del pedido
+
+        Returns:
+            List[str]: Estaciones afectadas
+        """
+        stations = []
+        for ticket_id in self._by_order.pop(order_id, []):
+            ticket = self._tickets.pop(ticket_id, None)
+            if ticket is not None:
+                if ticket.status != "done":
+                    self._adjust_active(ticket.station, -1)
+                stations.append(ticket.station)
+        return stations
+
+    def _adjust_active(self, station: str, delta: int):
+        count = self._active.get(station, 0) + delta
+        if count > 0:
+            self._active[station] = count
+        else:
+            self._active.pop(station, None)
+
+    def queue(self, station: str, limit: Optional[int] = None) -> List[Ticket]:
+        """
+        Devuelve los tickets activos de una estación en orden de trabajo.
+
+        Descarta del heap los tickets que ya no están activos.
+
+        Args:
+            station (str): Nombre de la estación
+            limit (Optional[int]): Máximo de tickets; None devuelve la cola completa
+
+        Returns:
+            List[Ticket]: Tickets no terminados, el más urgente primero
+        """
+        heap = self._heaps.get(station, [])
+        while heap and heap[0][2] not in self._tickets:
+            heapq.heappop(heap)
+        if len(heap) > 2 * len(self._tickets) + 16:
+            # Too many stale entries left behind: rebuild the heap
+            heap[:] = [entry for entry in heap if entry[2] in self._tickets]
+            heapq.heapify(heap)
+        live = (
+            entry for entry in heap
+            if entry[2] in self._tickets and self._tickets[entry[2]].status != "done"
+        )
+        entries = sorted(live) if limit is None else heapq.nsmallest(limit, live)
+        return [self._tickets[ticket_id] for _, _, ticket_id in entries]
+
+    def active_counts(self) -> Dict[str, int]:
+        """Devuelve la cantidad de tickets no terminados por estación."""
+        return dict(sorted(self._active.items()))
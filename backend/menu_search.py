@@ -0,0 +1,239 @@
+"""
+Búsqueda del menú con un índice invertido en memoria.
+
+Cada producto disponible se separa en términos normalizados (minúsculas y sin
+tildes, así "jamón" y "jamon" son el mismo término) de su nombre, categoría y
+descripción. Una búsqueda resuelve cada palabra de la consulta contra:
+
+- términos exactos (diccionario),
+- términos que empiezan con la palabra (lista ordenada de términos + bisect),
+- términos a una edición de distancia (índice de borrados estilo SymSpell:
+  cada término se guarda también con cada una de sus letras borradas, así un
+  error de tipeo se encuentra con búsquedas de diccionario, sin recorrer el
+  vocabulario).
+
+Todas las palabras de la consulta tienen que coincidir; el puntaje suma el
+peso del campo por la calidad de la coincidencia. El índice se actualiza
+producto por producto en cada escritura del menú, sin reconstruirlo entero;
+las escrituras de otros workers llegan con la reconstrucción periódica que
+hace server.py (``MENU_SEARCH_REFRESH_SECONDS``).
+"""
+
+import bisect
+import heapq
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Field -> weight of a match in that field
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+# Match kind -> score multiplier
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+# Shorter query words only match exactly or by prefix; typos on 1-3 letters match too much
+FUZZY_MIN_LENGTH = 4
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin diacríticos ("Jamón" -> "jamon")."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def deletions(term: str) -> Set[str]:
+    """El término con cada una de sus letras borradas (distancia 1)."""
+    return {term[:position] + term[position + 1:] for position in range(len(term))}
+
+
+def within_one_edit(first: str, second: str) -> bool:
+    """True si los términos difieren en a lo sumo una inserción, borrado, sustitución o transposición."""
+    if first == second:
+        return True
+    if abs(len(first) - len(second)) > 1:
+        return False
+    if len(first) > len(second):
+        first, second = second, first
+    start = 0
+    while start < len(first) and first[start] == second[start]:
+        start += 1
+    if len(first) == len(second):
+        rest = first[start + 1:] == second[start + 1:]
+        swapped = (
+            start + 1 < len(first) and first[start] == second[start + 1] and first[start + 1] == second[start]
+            and first[start + 2:] == second[start + 2:]
+        )
+        return rest or swapped
+    return first[start:] == second[start + 1:]
+
+
+class MenuSearchIndex:
+    """
+    Índice invertido de los productos disponibles del menú.
+
+    Attributes:
+        items (Dict[str, dict]): Productos indexados por ID, tal como se devuelven
+    """
+
+    def __init__(self, items: Iterable[dict] = ()):
+        self.items: Dict[str, dict] = {}
+        # term -> {item_id: best field weight}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: List[str] = []
+        # deletion variant -> terms that produce it (the term itself included)
+        self._variants: Dict[str, Set[str]] = {}
+        # item_id -> terms it contributed, to unindex without re-tokenizing the old version
+        self._item_terms: Dict[str, Dict[str, float]] = {}
+        # (normalized name, item_id) in order, to break score ties without sorting every match
+        self._by_name: List[Tuple[str, str]] = []
+        self._name_keys: Dict[str, Tuple[str, str]] = {}
+        for item in items:
+            self.upsert(item)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _add_term(self, term: str):
+        bisect.insort(self._terms, term)
+        for variant in deletions(term) | {term}:
+            self._variants.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term: str):
+        del self._terms[bisect.bisect_left(self._terms, term)]
+        for variant in deletions(term) | {term}:
+            terms = self._variants[variant]
+            terms.discard(term)
+            if not terms:
+                del self._variants[variant]
+
+    def upsert(self, item: dict):
+        """
+        Indexa un producto nuevo o modificado; si ya no está disponible lo quita.
+
+        Args:
+            item (dict): Documento del producto
+        """
+        self.remove(item["id"])
+        if not item.get("available", True):
+            return
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(item.get(field) or ""):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_term(term)
+            postings[item["id"]] = weight
+        self._item_terms[item["id"]] = weights
+        self.items[item["id"]] = item
+        key = (normalize(item.get("name") or ""), item["id"])
+        self._name_keys[item["id"]] = key
+        bisect.insort(self._by_name, key)
+
+    def remove(self, item_id: str):
+        """Quita un producto del índice (no hace nada si no estaba)."""
+        weights = self._item_terms.pop(item_id, None)
+        if weights is None:
+            return
+        del self.items[item_id]
+        del self._by_name[bisect.bisect_left(self._by_name, self._name_keys.pop(item_id))]
+        for term in weights:
+            postings = self._postings[term]
+            del postings[item_id]
+            if not postings:
+                del self._postings[term]
+                self._drop_term(term)
+
+    def rebuild(self, items: Iterable[dict]):
+        """Reemplaza todo el contenido del índice."""
+        for item_id in list(self.items):
+            self.remove(item_id)
+        for item in items:
+            self.upsert(item)
+
+    def _expand(self, word: str) -> Dict[str, float]:
+        """Términos del índice que coinciden con una palabra de la consulta, con su multiplicador."""
+        matches: Dict[str, float] = {}
+        position = bisect.bisect_left(self._terms, word)
+        while position < len(self._terms) and self._terms[position].startswith(word):
+            term = self._terms[position]
+            matches[term] = EXACT if term == word else PREFIX
+            position += 1
+        if len(word) >= FUZZY_MIN_LENGTH:
+            candidates = set()
+            for variant in deletions(word) | {word}:
+                candidates.update(self._variants.get(variant, ()))
+            for term in candidates:
+                if term not in matches and within_one_edit(word, term):
+                    matches[term] = FUZZY
+        return matches
+
+    def search(self, query: str, limit: int = 20, category: Optional[str] = None) -> List[dict]:
+        """
+        Busca productos que coincidan con todas las palabras de la consulta.
+
+        Args:
+            query (str): Texto buscado
+            limit (int): Máximo de resultados
+            category (Optional[str]): Sólo productos de esta categoría
+
+        Returns:
+            List[dict]: Productos de mayor a menor puntaje (empates por nombre)
+        """
+        expansions = [self._expand(word) for word in dict.fromkeys(tokenize(query))]
+        if not expansions:
+            return []
+        # Rarest word first, so each intersection only walks the surviving candidates
+        expansions.sort(key=lambda matches: sum(len(self._postings[term]) for term in matches))
+        scores: Optional[Dict[str, float]] = None
+        for matches in expansions:
+            word_scores: Dict[str, float] = {}
+            for term, quality in matches.items():
+                postings = self._postings[term]
+                # Key-view intersection runs in C and leaves only the surviving candidates
+                item_ids = postings.keys() if scores is None else postings.keys() & scores.keys()
+                if not word_scores:
+                    word_scores = {item_id: postings[item_id] * quality for item_id in item_ids}
+                    continue
+                for item_id in item_ids:
+                    if postings[item_id] * quality > word_scores.get(item_id, 0.0):
+                        word_scores[item_id] = postings[item_id] * quality
+            scores = word_scores if scores is None else {
+                item_id: scores[item_id] + score for item_id, score in word_scores.items()
+            }
+            if not scores:
+                return []
+        if category is not None:
+            scores = {item_id: score for item_id, score in scores.items()
+                      if self.items[item_id].get("category") == category}
+            if not scores:
+                return []
+        return [self.items[item_id] for item_id in self._top(scores, limit)]
+
+    def _top(self, scores: Dict[str, float], limit: int) -> List[str]:
+        """IDs de los ``limit`` mejores puntajes; los empates van por nombre."""
+        # Scores take few distinct values: find the cutoff on bare floats, then only order what passes it
+        cutoff = heapq.nlargest(limit, scores.values())[-1]
+        ranked = sorted(
+            (item_id for item_id, score in scores.items() if score > cutoff),
+            key=lambda item_id: (-scores[item_id], self._name_keys[item_id]),
+        )
+        ties = [item_id for item_id, score in scores.items() if score == cutoff]
+        wanted = limit - len(ranked)
+        if len(ties) <= wanted:
+            ranked.extend(sorted(ties, key=self._name_keys.__getitem__))
+            return ranked
+        # Many ties (a broad prefix): walk names in order until enough are collected
+        tied = set(ties)
+        for _, item_id in self._by_name:
+            if item_id in tied:
+                ranked.append(item_id)
+                if len(ranked) >= limit:
+                    break
+        return ranked
@@ -0,0 +1,150 @@
+"""
+Importación masiva del menú con diff contra los productos guardados.
+
+Sincronizar el menú de varias sucursales producto por producto significa
+cientos de ``PUT /menu/{id}`` y cientos de invalidaciones. Este módulo lee un
+menú completo (JSON o CSV), lo compara con ``menu_items`` y calcula qué
+productos se crean, cuáles cambian y cuáles se dan de baja (baja lógica,
+``available = False``), para que el servidor aplique todo en una sola
+escritura masiva.
+
+Los productos del archivo se emparejan con los existentes por ``id`` si lo
+traen y existe; si no, por nombre y categoría (sin distinguir mayúsculas),
+que es lo que coincide entre sucursales con IDs distintos.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Fields compared and copied from an imported row
+MENU_FIELDS = ("name", "description", "price", "category", "image_url", "available", "preparation_time")
+# CSV columns where an empty cell means "use the default" rather than an empty string
+CSV_OPTIONAL_FIELDS = ("id", "available", "preparation_time")
+
+
+def parse_menu_rows(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """
+    Lee las filas de un menú en JSON o CSV.
+
+    JSON acepta una lista de productos o ``{"items": [...]}``. CSV necesita una
+    fila de encabezados con los nombres de los campos; las celdas vacías de
+    ``CSV_OPTIONAL_FIELDS`` se omiten para que se apliquen los valores por defecto.
+
+    Args:
+        body (bytes): Cuerpo de la solicitud
+        content_type (str): Content-Type de la solicitud
+
+    Returns:
+        List[Dict[str, Any]]: Filas sin validar
+
+    Raises:
+        ValueError: Si el formato no se reconoce o el contenido no se puede leer
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("The menu file must be UTF-8 encoded")
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ValueError("The CSV menu needs a header row")
+        rows = []
+        for row in reader:
+            cells = {name.strip(): (value or "").strip() for name, value in row.items() if name}
+            rows.append({
+                name: value for name, value in cells.items() if value or name not in CSV_OPTIONAL_FIELDS
+            })
+        return rows
+    if "json" in content_type:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON menu: {exc.msg}")
+        if isinstance(data, dict):
+            data = data.get("items")
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError("The JSON menu must be a list of items or an object with an items list")
+        return data
+    raise ValueError("Send the menu as application/json or text/csv")
+
+
+def item_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    """Clave de emparejamiento por nombre y categoría."""
+    return item["name"].strip().casefold(), item["category"].strip().casefold()
+
+
+class MenuDiff:
+    """
+    Resultado de comparar un menú importado con el guardado.
+
+    Attributes:
+        created (List[dict]): Productos nuevos, ya completos
+        updated (List[Tuple[dict, List[str]]]): Productos que cambian y los campos modificados
+        unchanged (int): Productos idénticos
+        deactivated (List[dict]): Productos disponibles que no vienen en el archivo
+    """
+
+    __slots__ = ("created", "updated", "unchanged", "deactivated")
+
+    def __init__(self):
+        self.created: List[dict] = []
+        self.updated: List[Tuple[dict, List[str]]] = []
+        self.unchanged = 0
+        self.deactivated: List[dict] = []
+
+    @property
+    def upserts(self) -> List[dict]:
+        return self.created + [item for item, _ in self.updated]
+
+    def report(self) -> Dict[str, Any]:
+        """Resumen para la respuesta de la API."""
+        return {
+            "created": [{"id": item["id"], "name": item["name"]} for item in self.created],
+            "updated": [{"id": item["id"], "name": item["name"], "fields": fields} for item, fields in self.updated],
+            "deactivated": [{"id": item["id"], "name": item["name"]} for item in self.deactivated],
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_menu(current: Iterable[dict], incoming: Iterable[dict], new_item: Callable[[dict], dict],
+              deactivate_missing: bool = True) -> MenuDiff:
+    """
+    Compara el menú importado con los productos guardados.
+
+    Args:
+        current (Iterable[dict]): Productos guardados (incluidos los no disponibles)
+        incoming (Iterable[dict]): Filas validadas con ``id`` opcional; los campos de ``MENU_FIELDS``
+            que una fila no trae conservan el valor guardado
+        new_item (Callable[[dict], dict]): Arma el documento de un producto nuevo (ID, fecha de alta)
+        deactivate_missing (bool): Dar de baja los productos disponibles ausentes del archivo
+
+    Returns:
+        MenuDiff: Cambios a aplicar
+
+    Raises:
+        ValueError: Si el archivo repite un producto
+    """
+    by_id = {item["id"]: item for item in current}
+    by_key = {item_key(item): item for item in by_id.values()}
+    diff = MenuDiff()
+    seen = set()
+    for row in incoming:
+        existing: Optional[dict] = by_id.get(row.get("id")) or by_key.get(item_key(row))
+        match = existing["id"] if existing is not None else item_key(row)
+        if match in seen:
+            raise ValueError(f"The menu file lists {row['name']!r} more than once")
+        seen.add(match)
+        values = {name: row[name] for name in MENU_FIELDS if name in row}
+        if existing is None:
+            diff.created.append(new_item({**values, **({"id": row["id"]} if row.get("id") else {})}))
+            continue
+        fields = [name for name in values if existing.get(name) != values[name]]
+        if fields:
+            diff.updated.append(({**existing, **values}, fields))
+        else:
+            diff.unchanged += 1
+    if deactivate_missing:
+        diff.deactivated = [item for item in by_id.values() if item["id"] not in seen and item.get("available")]
+    return diff
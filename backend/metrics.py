@@ -0,0 +1,328 @@
+"""
+Métricas en formato de exposición de texto de Prometheus.
+
+Implementa contadores, gauges e histogramas mínimos (sin dependencias
+externas) y dos fuentes de datos:
+
+- ``HTTPMetricsMiddleware``: middleware ASGI que mide la latencia de cada
+  request por método y ruta (la plantilla, p. ej. ``/api/orders/{order_id}``,
+  para no multiplicar series por ID), cuenta los códigos de estado y lleva
+  los requests en curso.
+- ``MongoCommandMetrics``: listener de monitoreo de comandos de PyMongo que
+  mide cada comando por colección y operación, usando la duración que ya
+  informa el driver.
+
+Registrar una observación es una búsqueda en diccionario y un ``bisect``;
+el texto se arma sólo cuando Prometheus consulta ``/metrics``.
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # PyMongo listeners run on Motor's executor threads
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Devuelve las líneas de la métrica en formato de exposición."""
+
+
+class Counter(_Metric):
+    """
+    Contador monotónico con etiquetas.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        """
+        Incrementa el contador.
+
+        Args:
+            labels (LabelValues): Valores de las etiquetas, en el orden de ``labelnames``
+            amount (float): Cantidad a sumar
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Valor que sube y baja, opcionalmente calculado al momento de la consulta.
+
+    Attributes:
+        callback (Optional[Callable[[], Dict[LabelValues, float]]]): Función que
+            devuelve los valores actuales; si está definida reemplaza a ``set``/``inc``
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, labels: LabelValues = ()):
+        """Fija el valor del gauge."""
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        """Suma ``amount`` al gauge."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0):
+        """Resta ``amount`` al gauge."""
+        self.inc(labels, -amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        if self.callback is not None:
+            items = list(self.callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Histograma acumulativo con buckets fijos.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Límites superiores de los buckets, en segundos
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        """
+        Registra una observación.
+
+        Args:
+            value (float): Valor observado (p. ej. segundos de latencia)
+            labels (LabelValues): Valores de las etiquetas
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas expuestas en ``/metrics``.
+
+    Los métodos ``counter``, ``gauge`` e ``histogram`` devuelven la métrica
+    existente si ya se registró una con el mismo nombre.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Registra (o devuelve) un contador."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        """Registra (o devuelve) un gauge."""
+        return self._get_or_create(Gauge, name, documentation, labelnames, callback=callback)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Registra (o devuelve) un histograma."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Devuelve todas las métricas en formato de texto de Prometheus.
+
+        Returns:
+            str: Cuerpo de la respuesta de ``/metrics``
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class HTTPMetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia, códigos de estado y requests en curso.
+
+    Es un middleware ASGI puro (no ``BaseHTTPMiddleware``), así que no agrega
+    una tarea ni copia el cuerpo de la respuesta.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+        )
+        self.responses = registry.counter(
+            "http_responses_total", "HTTP responses by route and status code", ("method", "route", "status")
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            self.in_flight.dec()
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+            self.latency.observe(duration, (method, route_path))
+            self.responses.inc((method, route_path, str(status_code[0])))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Listener de PyMongo que mide cada comando por colección y operación.
+
+    Se pasa a ``AsyncIOMotorClient(event_listeners=[...])``.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.latency = registry.histogram(
+            "mongodb_command_duration_seconds", "MongoDB command latency", ("collection", "command")
+        )
+        self.failures = registry.counter(
+            "mongodb_command_failures_total", "Failed MongoDB commands", ("collection", "command")
+        )
+        self._pending: Dict[int, Tuple[str, str]] = {}
+
+    @staticmethod
+    def command_labels(event: monitoring.CommandStartedEvent) -> Tuple[str, str]:
+        """
+        Devuelve la colección y la operación de un comando.
+
+        Args:
+            event (monitoring.CommandStartedEvent): Evento de inicio del comando
+
+        Returns:
+            Tuple[str, str]: (colección, operación); la colección es ``-`` en
+            comandos que no actúan sobre una colección (hello, ping...)
+        """
+        command = event.command
+        name = event.command_name
+        target = command.get("collection") if name == "getMore" else command.get(name)
+        collection = target if isinstance(target, str) else "-"
+        return collection, name
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self._pending[event.request_id] = self.command_labels(event)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        labels = self._pending.pop(event.request_id, ("-", event.command_name))
+        self.latency.observe(event.duration_micros / 1e6, labels)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        labels = self._pending.pop(event.request_id, ("-", event.command_name))
+        self.latency.observe(event.duration_micros / 1e6, labels)
+        self.failures.inc(labels)
@@ -0,0 +1,197 @@
+"""
+Perfilado por muestreo y monitoreo del event loop en un worker en ejecución.
+
+- ``SamplingProfiler`` toma, desde un hilo aparte, la pila del hilo del event
+  loop cada pocos milisegundos (``sys._current_frames``) y cuenta las pilas
+  en formato "collapsed" (``a;b;c 42``), que leen directamente
+  ``flamegraph.pl``, speedscope o inferno. No instrumenta llamadas, así que
+  el costo es fijo por muestra y no depende de cuánto código se ejecute.
+- ``LoopMonitor`` mide el retraso del event loop (cuánto tarda en despertar
+  un ``sleep``) y un hilo guardián captura la pila del loop cuando éste queda
+  bloqueado más que el umbral, para señalar llamadas síncronas como bcrypt o
+  un ``json.dumps`` grande.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame, limit: int = 200) -> str:
+    """
+    Convierte una pila en una línea "collapsed", de la raíz a la hoja.
+
+    Args:
+        frame: Frame más interno de la pila
+        limit (int): Profundidad máxima
+
+    Returns:
+        str: Frames separados por ``;``
+    """
+    labels: List[str] = []
+    while frame is not None and len(labels) < limit:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def render_collapsed(counts: Dict[str, int]) -> str:
+    """
+    Renderiza las pilas contadas en formato collapsed, la más frecuente primero.
+
+    Args:
+        counts (Dict[str, int]): Pila -> cantidad de muestras
+
+    Returns:
+        str: Una línea ``pila cantidad`` por pila
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo de uno o todos los hilos del proceso.
+
+    Attributes:
+        thread_id (int): Hilo a muestrear (normalmente el del event loop)
+        interval (float): Segundos entre muestras
+        all_threads (bool): Si se muestrean todos los hilos (p. ej. el executor de Motor)
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, all_threads: bool = False):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.all_threads = all_threads
+
+    def run(self, duration: float) -> Dict[str, int]:
+        """
+        Muestrea durante ``duration`` segundos; bloquea el hilo que lo llama.
+
+        Debe ejecutarse fuera del event loop (``asyncio.to_thread``).
+
+        Args:
+            duration (float): Segundos de muestreo
+
+        Returns:
+            Dict[str, int]: Pila collapsed -> cantidad de muestras
+        """
+        own_thread = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            if self.all_threads:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_thread:
+                        counts[f"{names.get(thread_id, thread_id)};{collapse_stack(frame)}"] += 1
+            else:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    counts[collapse_stack(frame)] += 1
+            time.sleep(self.interval)
+        return dict(counts)
+
+
+class LoopMonitor:
+    """
+    Mide el retraso del event loop y registra los bloqueos largos con su pila.
+
+    Attributes:
+        interval (float): Segundos entre mediciones
+        stall_threshold (float): Segundos de bloqueo desde los que se captura la pila
+        last_lag (float): Último retraso medido, en segundos
+        max_lag (float): Mayor retraso medido desde el inicio
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25, window: int = 600, history: int = 20):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._stalls: Deque[dict] = deque(maxlen=history)
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def run(self):
+        """Corrutina de medición; se lanza como tarea de fondo en el loop a monitorear."""
+        self._loop_thread = threading.get_ident()
+        self._start_watchdog()
+        try:
+            while True:
+                start = time.perf_counter()
+                self._heartbeat = time.monotonic()
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, time.perf_counter() - start - self.interval)
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self._lags.append(lag)
+        finally:
+            self._stopped.set()
+
+    def _start_watchdog(self):
+        if self._watchdog is not None:
+            return
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _watch(self):
+        # One capture per stall: re-armed when the loop ticks again
+        captured_for = None
+        while not self._stopped.wait(self.stall_threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.stall_threshold or captured_for == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            captured_for = heartbeat
+            stack = collapse_stack(frame)
+            self._stalls.append({
+                "detected_at": datetime.utcnow().isoformat(),
+                "blocked_seconds": round(blocked, 3),
+                "stack": stack,
+            })
+            logger.warning("Event loop blocked for %.2fs at %s", blocked, stack.rsplit(";", 1)[-1])
+
+    def stats(self) -> dict:
+        """
+        Devuelve el retraso actual, percentiles de la ventana reciente y los últimos bloqueos.
+
+        Returns:
+            dict: Estadísticas en segundos
+        """
+        lags = sorted(self._lags)
+
+        def percentile(fraction: float) -> float:
+            if not lags:
+                return 0.0
+            return round(lags[min(len(lags) - 1, int(fraction * len(lags)))], 4)
+
+        return {
+            "interval": self.interval,
+            "stall_threshold": self.stall_threshold,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            "p50_lag": percentile(0.5),
+            "p99_lag": percentile(0.99),
+            "samples": len(lags),
+            "stalls": list(self._stalls),
+        }
@@ -0,0 +1,223 @@
+"""
+Agrupación de pedidos listos en viajes de reparto con varias paradas.
+
+Los pedidos en estado ``ready`` se agrupan por ``delivery_zone`` y, dentro de
+cada zona, se arman viajes desde el local con la heurística del vecino más
+cercano respetando la capacidad del repartidor y el desvío máximo permitido
+para cada cliente. Luego cada viaje se mejora con 2-opt sobre el recorrido
+abierto (sin regreso al local).
+
+El desvío de una parada es la distancia recorrida hasta llegar a ella menos la
+distancia directa desde el local: un cliente no debería esperar mucho más de
+lo que tardaría un viaje exclusivo.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dispatch import haversine_km
+
+Point = Tuple[float, float]
+
+
+class Stop:
+    """
+    Parada de un viaje de reparto.
+
+    Attributes:
+        order_id (str): ID del pedido
+        zone (str): Zona de entrega del pedido
+        latitude (Optional[float]): Latitud de entrega
+        longitude (Optional[float]): Longitud de entrega
+    """
+
+    __slots__ = ("order_id", "zone", "latitude", "longitude")
+
+    def __init__(self, order_id: str, zone: str, latitude: Optional[float] = None,
+                 longitude: Optional[float] = None):
+        self.order_id = order_id
+        self.zone = zone
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @property
+    def point(self) -> Optional[Point]:
+        """Optional[Point]: Coordenadas de la parada, o None si no se conocen."""
+        if self.latitude is None or self.longitude is None:
+            return None
+        return (self.latitude, self.longitude)
+
+    @classmethod
+    def from_order(cls, order: dict) -> "Stop":
+        """
+        Construye una parada a partir de un documento de pedido.
+
+        Args:
+            order (dict): Documento del pedido con ``delivery_info``
+
+        Returns:
+            Stop: Parada correspondiente
+        """
+        info = order.get("delivery_info") or {}
+        return cls(order["id"], info.get("delivery_zone", ""), info.get("latitude"), info.get("longitude"))
+
+
+def _distance(a: Point, b: Point) -> float:
+    return haversine_km(a[0], a[1], b[0], b[1])
+
+
+def route_arrivals(origin: Point, route: Sequence[Stop]) -> List[float]:
+    """
+    Calcula la distancia acumulada hasta cada parada de un recorrido.
+
+    Args:
+        origin (Point): Punto de partida (el local)
+        route (Sequence[Stop]): Paradas en orden de visita, todas con coordenadas
+
+    Returns:
+        List[float]: Kilómetros recorridos al llegar a cada parada
+    """
+    arrivals = []
+    travelled = 0.0
+    previous = origin
+    for stop in route:
+        point = stop.point
+        travelled += _distance(previous, point)
+        arrivals.append(travelled)
+        previous = point
+    return arrivals
+
+
+def _within_detour(origin: Point, route: Sequence[Stop], max_detour_km: float) -> bool:
+    for stop, arrival in zip(route, route_arrivals(origin, route)):
+        if arrival - _distance(origin, stop.point) > max_detour_km + 1e-9:
+            return False
+    return True
+
+
+def two_opt(origin: Point, route: List[Stop], max_detour_km: float) -> List[Stop]:
+    """
+    Mejora un recorrido abierto invirtiendo segmentos mientras se acorte.
+
+    Sólo se aceptan movimientos que mantienen el desvío de cada parada dentro
+    del límite, así que el resultado sigue siendo válido si la entrada lo era.
+
+    Args:
+        origin (Point): Punto de partida fijo
+        route (List[Stop]): Recorrido inicial
+        max_detour_km (float): Desvío máximo por parada
+
+    Returns:
+        List[Stop]: Recorrido mejorado
+    """
+    points = [origin] + [stop.point for stop in route]
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n):
+            for j in range(i + 1, n + 1):
+                before = _distance(points[i - 1], points[i])
+                after = _distance(points[i - 1], points[j])
+                if j < n:
+                    before += _distance(points[j], points[j + 1])
+                    after += _distance(points[i], points[j + 1])
+                if after + 1e-9 >= before:
+                    continue
+                candidate = route[:i - 1] + route[i - 1:j][::-1] + route[j:]
+                if not _within_detour(origin, candidate, max_detour_km):
+                    continue
+                route = candidate
+                points = [origin] + [stop.point for stop in route]
+                improved = True
+    return route
+
+
+def _nearest_neighbour_trips(origin: Point, stops: List[Stop], capacity: int,
+                             max_detour_km: float) -> List[List[Stop]]:
+    remaining = list(stops)
+    trips = []
+    while remaining:
+        trip: List[Stop] = []
+        position = origin
+        travelled = 0.0
+        while remaining and len(trip) < capacity:
+            best_index = None
+            best_leg = 0.0
+            for index, stop in enumerate(remaining):
+                leg = _distance(position, stop.point)
+                if best_index is not None and leg >= best_leg:
+                    continue
+                # The first stop of a trip is always direct, so it never exceeds the detour
+                if trip and travelled + leg - _distance(origin, stop.point) > max_detour_km:
+                    continue
+                best_index, best_leg = index, leg
+            if best_index is None:
+                break
+            stop = remaining.pop(best_index)
+            trip.append(stop)
+            travelled += best_leg
+            position = stop.point
+        trips.append(trip)
+    return trips
+
+
+def plan_trips(orders: Sequence[dict], origin: Point, capacity: int = 3,
+               max_detour_km: float = 3.0) -> List[dict]:
+    """
+    Agrupa pedidos listos en viajes por zona con vecino más cercano + 2-opt.
+
+    Los pedidos sin coordenadas se agrupan por zona en orden de llegada, ya
+    que no se puede estimar su recorrido.
+
+    Args:
+        orders (Sequence[dict]): Documentos de pedidos listos para despachar
+        origin (Point): Coordenadas del local
+        capacity (int): Máximo de pedidos por viaje
+        max_detour_km (float): Desvío máximo permitido por parada
+
+    Returns:
+        List[dict]: Un diccionario por viaje con zona, paradas y distancia total
+    """
+    capacity = max(1, capacity)
+    by_zone: Dict[str, List[Stop]] = {}
+    for order in orders:
+        stop = Stop.from_order(order)
+        by_zone.setdefault(stop.zone, []).append(stop)
+
+    trips = []
+    for zone in sorted(by_zone):
+        located = [stop for stop in by_zone[zone] if stop.point is not None]
+        unlocated = [stop for stop in by_zone[zone] if stop.point is None]
+
+        for route in _nearest_neighbour_trips(origin, located, capacity, max_detour_km):
+            route = two_opt(origin, route, max_detour_km)
+            arrivals = route_arrivals(origin, route)
+            trips.append({
+                "zone": zone,
+                "order_ids": [stop.order_id for stop in route],
+                "stops": [
+                    {
+                        "order_id": stop.order_id,
+                        "latitude": stop.latitude,
+                        "longitude": stop.longitude,
+                        "arrival_km": round(arrival, 3),
+                        "detour_km": round(arrival - _distance(origin, stop.point), 3),
+                    }
+                    for stop, arrival in zip(route, arrivals)
+                ],
+                "distance_km": round(arrivals[-1], 3),
+            })
+
+        for start in range(0, len(unlocated), capacity):
+            chunk = unlocated[start:start + capacity]
+            trips.append({
+                "zone": zone,
+                "order_ids": [stop.order_id for stop in chunk],
+                "stops": [
+                    {"order_id": stop.order_id, "latitude": None, "longitude": None,
+                     "arrival_km": None, "detour_km": None}
+                    for stop in chunk
+                ],
+                "distance_km": None,
+            })
+    return trips
@@ -0,0 +1,163 @@
+"""
+Serialización rápida de respuestas construidas desde documentos de MongoDB.
+
+Los documentos que guarda la API ya fueron validados por Pydantic al
+escribirse, así que volver a validarlos en cada lectura (``Order(**doc)`` y
+luego otra vez en ``response_model``) es trabajo repetido. Este módulo
+completa los valores por defecto de los campos que un documento antiguo
+pueda no tener y renderiza el resultado directamente con orjson.
+
+También traduce vistas reducidas (modelos con un subconjunto de campos) o
+listas ``fields=`` en proyecciones de MongoDB, para que los listados lean y
+envíen sólo lo que cada dashboard muestra.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+_defaults_cache: Dict[Type[BaseModel], Dict[str, Any]] = {}
+
+
+def model_defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Devuelve los valores por defecto simples de un modelo (sin ``default_factory``).
+
+    Args:
+        model (Type[BaseModel]): Modelo Pydantic
+
+    Returns:
+        Dict[str, Any]: Nombre de campo -> valor por defecto
+    """
+    defaults = _defaults_cache.get(model)
+    if defaults is None:
+        defaults = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if field.default is not PydanticUndefined and field.default_factory is None
+        }
+        _defaults_cache[model] = defaults
+    return defaults
+
+
+def trusted_documents(model: Type[BaseModel], documents: Iterable[dict],
+                      fields: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Prepara documentos de MongoDB para responder sin volver a validarlos.
+
+    Los documentos deben haberse leído con la proyección ``{"_id": 0}``.
+
+    Args:
+        model (Type[BaseModel]): Modelo con el que se guardaron los documentos
+        documents (Iterable[dict]): Documentos leídos de MongoDB
+        fields (Optional[Iterable[str]]): Campos proyectados; sólo se completan
+            los valores por defecto de esos campos
+
+    Returns:
+        List[dict]: Documentos con los valores por defecto completados
+    """
+    defaults = model_defaults(model)
+    if fields is not None:
+        top_level = {field.split(".", 1)[0] for field in fields}
+        defaults = {name: value for name, value in defaults.items() if name in top_level}
+    if not defaults:
+        return list(documents)
+    return [{**defaults, **document} for document in documents]
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """
+    Construye la proyección de MongoDB que lee exactamente los campos de un modelo.
+
+    Los submodelos se proyectan campo por campo (``delivery_info.customer_name``).
+
+    Args:
+        model (Type[BaseModel]): Modelo de la vista
+
+    Returns:
+        Dict[str, int]: Proyección lista para ``find``
+    """
+    projection = {"_id": 0}
+    for name, field in model.model_fields.items():
+        nested = _nested_model(field.annotation)
+        if nested is None:
+            projection[name] = 1
+            continue
+        for subfield in model_projection(nested):
+            if subfield != "_id":
+                projection[f"{name}.{subfield}"] = 1
+    return projection
+
+
+def fields_projection(model: Type[BaseModel], fields: str, required: Iterable[str] = ("id",)) -> Dict[str, int]:
+    """
+    Convierte un parámetro ``fields=a,b,c.d`` en una proyección validada.
+
+    Args:
+        model (Type[BaseModel]): Modelo completo del documento
+        fields (str): Lista de campos separada por comas (admite un nivel de anidamiento)
+        required (Iterable[str]): Campos que se incluyen siempre
+
+    Returns:
+        Dict[str, int]: Proyección lista para ``find``
+
+    Raises:
+        ValueError: Si algún campo no existe en el modelo
+    """
+    projection = {"_id": 0}
+    for name in required:
+        projection[name] = 1
+    for raw in fields.split(","):
+        name = raw.strip()
+        if not name:
+            continue
+        top, _, sub = name.partition(".")
+        field = model.model_fields.get(top)
+        nested = _nested_model(field.annotation) if field is not None else None
+        if field is None or (sub and (nested is None or sub not in nested.model_fields)):
+            raise ValueError(f"Unknown field: {name}")
+        projection[name] = 1
+    # A parent path already returns its children; MongoDB rejects both at once
+    return {
+        name: value for name, value in projection.items()
+        if "." not in name or name.split(".", 1)[0] not in projection
+    }
+
+
+def json_response(content: Any, status_code: int = 200) -> ORJSONResponse:
+    """
+    Renderiza contenido ya confiable con orjson, sin pasar por ``response_model``.
+
+    Args:
+        content (Any): Contenido serializable (dicts, listas, datetimes...)
+        status_code (int): Código HTTP de la respuesta
+
+    Returns:
+        ORJSONResponse: Respuesta lista para devolver desde un endpoint
+    """
+    return ORJSONResponse(content, status_code=status_code)
+
+
+def dumps(message: Any) -> str:
+    """
+    Serializa un mensaje para WebSocket.
+
+    Soporta datetimes de forma nativa y convierte a texto cualquier otro tipo
+    desconocido (p. ej. el ``ObjectId`` de un documento leído sin proyección).
+
+    Args:
+        message (Any): Mensaje a serializar
+
+    Returns:
+        str: JSON del mensaje
+    """
+    return orjson.dumps(message, default=str).decode()
@@ -23,23 +23,50 @@ Fecha: 2025
 Versión: 1.0.0
 """
 
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, File, Query, Request, UploadFile, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Union
 import uuid
-from datetime import datetime, timedelta
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 import json
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from passlib.hash import bcrypt
 
+from dispatch import CourierIndex
+from routing import plan_trips
+from tracking import LocationTracker, valid_position
+from zones import ZoneRegistry, default_zones_data_path, default_zones_path
+from eta import QUEUED_STATUSES, KitchenLoadModel, eta_from_now, order_work
+from kitchen import TicketScheduler
+from admission import AdmissionController
+from timerwheel import TimerWheel
+from serialization import dumps, fields_projection, json_response, model_projection, trusted_documents
+from boards import SnapshotCache
+from metrics import HTTPMetricsMiddleware, MetricsRegistry, MongoCommandMetrics
+from slowlog import SlowQueryLog
+from tracing import FileSpanExporter, MongoTracingListener, Tracer, TracingMiddleware
+from profiler import LoopMonitor, SamplingProfiler, render_collapsed
+from storage import MemoryStorage, add_customer_order, new_customer
+from storage_mongo import MongoStorage
+from storage_sqlite import SqliteStorage
+from export import EXPORT_FORMATS, export_headers, stream_export
+from menu_sync import diff_menu, parse_menu_rows
+from menu_search import MenuSearchIndex
+from customers import decode_cursor, encode_cursor, normalize_phone, profile_view
+from thumbnails import DIGEST_PATTERN, IMMUTABLE_CACHE_CONTROL, HttpImageSource, ThumbnailStore
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -51,13 +78,155 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Prometheus metrics: request latency, Mongo command timing and socket counts
+metrics_registry = MetricsRegistry()
+
+# Slow-query log: commands above the threshold are explained and kept in a capped collection
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_LOG_SIZE_MB = int(os.environ.get('SLOW_QUERY_LOG_SIZE_MB', '16'))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', '60'))
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, explain_interval=SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS)
+
+# Local tracing: spans are only recorded when an export file is configured
+TRACE_EXPORT_FILE = os.environ.get('TRACE_EXPORT_FILE', '')
+TRACE_SAMPLE_RATIO = float(os.environ.get('TRACE_SAMPLE_RATIO', '1.0'))
+tracer = Tracer(
+    "pizzapp-backend", TRACE_SAMPLE_RATIO,
+    FileSpanExporter(Path(TRACE_EXPORT_FILE)) if TRACE_EXPORT_FILE else None
+)
+
+# On-demand sampling profiler and event-loop lag monitor
+PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', '60'))
+LOOP_STALL_THRESHOLD_SECONDS = float(os.environ.get('LOOP_STALL_THRESHOLD_SECONDS', '0.25'))
+loop_monitor = LoopMonitor(stall_threshold=LOOP_STALL_THRESHOLD_SECONDS)
+profiler_lock = asyncio.Lock()
+metrics_registry.gauge(
+    "event_loop_lag_seconds", "Delay of the last event loop wake-up",
+    callback=lambda: {(): loop_monitor.last_lag}
+)
+
+# Storage backend: mongo (default), sqlite for single-store deployments, memory for demos
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'pizzapp.sqlite3'))
+if STORAGE_BACKEND == 'mongo':
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[
+        MongoCommandMetrics(metrics_registry), slow_query_log, MongoTracingListener(tracer)
+    ])
+    db = client[os.environ['DB_NAME']]
+    storage = MongoStorage(db)
+elif STORAGE_BACKEND == 'sqlite':
+    db = None
+    storage = SqliteStorage(SQLITE_PATH)
+elif STORAGE_BACKEND == 'memory':
+    db = None
+    storage = MemoryStorage()
+else:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}: use mongo, sqlite or memory")
+
+# Hot/cold tiering: finished orders move to orders_archive once they stop changing
+ARCHIVE_AFTER_HOURS = float(os.environ.get('ARCHIVE_AFTER_HOURS', '24'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '300'))
+ARCHIVED_STATUSES = ["delivered", "cancelled"]
+orders_archived = metrics_registry.counter("orders_archived_total", "Orders moved to the cold archive")
+
+# Delivery dispatch configuration
+STORE_LATITUDE = float(os.environ.get('STORE_LATITUDE', '-25.2637'))
+STORE_LONGITUDE = float(os.environ.get('STORE_LONGITUDE', '-57.5759'))
+COURIER_MAX_ORDERS = int(os.environ.get('COURIER_MAX_ORDERS', '3'))
+DISPATCH_MAX_DISTANCE_KM = float(os.environ.get('DISPATCH_MAX_DISTANCE_KM', '15'))
+BATCH_MAX_DETOUR_KM = float(os.environ.get('BATCH_MAX_DETOUR_KM', '3'))
+
+# In-memory spatial index of available couriers, refreshed from live positions
+courier_index = CourierIndex(default_capacity=COURIER_MAX_ORDERS)
+
+# Courier GPS ingestion: recent trail in memory, throttled batched writes to Mongo
+LOCATION_TRAIL_SIZE = int(os.environ.get('LOCATION_TRAIL_SIZE', '20'))
+LOCATION_FLUSH_INTERVAL_SECONDS = float(os.environ.get('LOCATION_FLUSH_INTERVAL_SECONDS', '10'))
+location_tracker = LocationTracker(LOCATION_TRAIL_SIZE, LOCATION_FLUSH_INTERVAL_SECONDS)
+
+# Delivery zone polygons and fee tables, hot-reloaded when the file changes.
+# The bundled file is a read-only seed; runtime edits go to a data file outside the source tree
+DELIVERY_ZONES_SEED_FILE = os.environ.get('DELIVERY_ZONES_SEED_FILE', str(default_zones_path()))
+DELIVERY_ZONES_FILE = os.environ.get('DELIVERY_ZONES_FILE', str(default_zones_data_path()))
+zone_registry = ZoneRegistry(Path(DELIVERY_ZONES_FILE), Path(DELIVERY_ZONES_SEED_FILE))
+
+# Load-aware ETA estimation from the kitchen backlog and courier availability
+KITCHEN_PARALLELISM = int(os.environ.get('KITCHEN_PARALLELISM', '3'))
+DELIVERY_TRAVEL_MINUTES = float(os.environ.get('DELIVERY_TRAVEL_MINUTES', '20'))
+DELIVERY_TRIP_MINUTES = float(os.environ.get('DELIVERY_TRIP_MINUTES', '35'))
+ETA_REVISION_THRESHOLD_MINUTES = float(os.environ.get('ETA_REVISION_THRESHOLD_MINUTES', '2'))
+eta_model = KitchenLoadModel(KITCHEN_PARALLELISM, DELIVERY_TRAVEL_MINUTES, DELIVERY_TRIP_MINUTES)
+
+# Per-station kitchen ticket queues; station screens get the most urgent tickets only
+KITCHEN_QUEUE_LIMIT = int(os.environ.get('KITCHEN_QUEUE_LIMIT', '30'))
+kitchen_scheduler = TicketScheduler()
+
+# Admission control against the in-memory kitchen backlog
+KITCHEN_CAPACITY_MINUTES = float(os.environ.get('KITCHEN_CAPACITY_MINUTES', '180'))
+ADMISSION_SOFT_LIMIT = float(os.environ.get('ADMISSION_SOFT_LIMIT', '0.7'))
+ADMISSION_HARD_LIMIT = float(os.environ.get('ADMISSION_HARD_LIMIT', '1.0'))
+ZONE_THROTTLE_PER_MINUTE = float(os.environ.get('ZONE_THROTTLE_PER_MINUTE', '2'))
+ZONE_THROTTLE_BURST = float(os.environ.get('ZONE_THROTTLE_BURST', '5'))
+admission_controller = AdmissionController(
+    KITCHEN_CAPACITY_MINUTES, ADMISSION_SOFT_LIMIT, ADMISSION_HARD_LIMIT,
+    ZONE_THROTTLE_PER_MINUTE, ZONE_THROTTLE_BURST
+)
+
+# Pre-orders: held as "scheduled" until release_at, driven by a timer wheel
+PREORDER_MIN_LEAD_MINUTES = float(os.environ.get('PREORDER_MIN_LEAD_MINUTES', '60'))
+PREORDER_RELEASE_BUFFER_MINUTES = float(os.environ.get('PREORDER_RELEASE_BUFFER_MINUTES', '10'))
+preorder_wheel = TimerWheel(time.time())
+
+# Order statuses each role works with
+ORDER_STATUSES = ["scheduled", "received", "confirmed", "preparing", "ready", "on_route", "delivered", "cancelled"]
+KITCHEN_VISIBLE_STATUSES = ["received", "confirmed", "preparing", "ready"]
+DELIVERY_VISIBLE_STATUSES = ["ready", "on_route", "delivered"]
+
+# Per-role dashboard boards: one aggregation per role, shared across tablets
+BOARD_CACHE_TTL_SECONDS = float(os.environ.get('BOARD_CACHE_TTL_SECONDS', '5'))
+BOARD_COLUMN_LIMIT = int(os.environ.get('BOARD_COLUMN_LIMIT', '50'))
+board_cache = SnapshotCache(BOARD_CACHE_TTL_SECONDS)
+
+# Public menu snapshots; every menu write bumps the version once
+MENU_CACHE_TTL_SECONDS = float(os.environ.get('MENU_CACHE_TTL_SECONDS', '30'))
+menu_cache = SnapshotCache(MENU_CACHE_TTL_SECONDS, min_age_seconds=0)
+# In-memory menu search index, updated item by item on this worker's menu writes and
+# rebuilt from storage every MENU_SEARCH_REFRESH_SECONDS to pick up other workers' writes
+MENU_SEARCH_MAX_RESULTS = 50
+MENU_SEARCH_REFRESH_SECONDS = float(os.environ.get('MENU_SEARCH_REFRESH_SECONDS', '30'))
+menu_search = MenuSearchIndex()
+menu_search_refresh = SnapshotCache(MENU_SEARCH_REFRESH_SECONDS, min_age_seconds=0)
+
+# Menu image thumbnails: WebP variants in a content-addressed disk cache
+THUMBNAIL_DIR = os.environ.get('THUMBNAIL_DIR', str(ROOT_DIR / 'thumbnails'))
+THUMBNAIL_WIDTHS = [int(width) for width in os.environ.get('THUMBNAIL_WIDTHS', '160,320,640').split(',')]
+THUMBNAIL_DEFAULT_WIDTH = int(os.environ.get('THUMBNAIL_DEFAULT_WIDTH', '320'))
+THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', '80'))
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '2'))
+THUMBNAIL_MAX_SOURCE_BYTES = int(float(os.environ.get('THUMBNAIL_MAX_SOURCE_MB', '10')) * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+thumbnails = ThumbnailStore(
+    Path(THUMBNAIL_DIR), HttpImageSource(max_bytes=THUMBNAIL_MAX_SOURCE_BYTES),
+    THUMBNAIL_WIDTHS, THUMBNAIL_DEFAULT_WIDTH, THUMBNAIL_QUALITY, workers=THUMBNAIL_WORKERS,
+    # Snapshots built before the variants existed still carry the original URLs
+    on_ready=lambda: menu_cache.invalidate()
+)
+
+# Customer history by normalized phone, with a summary profile kept up to date per order
+CUSTOMER_COUNTRY_CODE = os.environ.get('CUSTOMER_COUNTRY_CODE', '595')
+CUSTOMER_HISTORY_PAGE_SIZE = int(os.environ.get('CUSTOMER_HISTORY_PAGE_SIZE', '20'))
+CUSTOMER_HISTORY_MAX_PAGE_SIZE = 100
+CUSTOMER_FAVOURITE_ITEMS = int(os.environ.get('CUSTOMER_FAVOURITE_ITEMS', '5'))
+CUSTOMER_BACKFILL_BATCH_SIZE = 500
+
+# Streaming order export for accounting
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+EXPORT_MAX_BATCH_SIZE = 10000
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -76,6 +245,8 @@ class ConnectionManager:
         active_connections (List[WebSocket]): Conexiones de clientes
         admin_connections (List[WebSocket]): Conexiones de administradores
         delivery_connections (List[WebSocket]): Conexiones de repartidores
+        order_subscribers (Dict[str, List[WebSocket]]): Conexiones de clientes por pedido
+        station_connections (Dict[str, List[WebSocket]]): Conexiones de cocina por estación
     """
     
     def __init__(self):
@@ -83,6 +254,8 @@ class ConnectionManager:
         self.active_connections: List[WebSocket] = []
         self.admin_connections: List[WebSocket] = []
         self.delivery_connections: List[WebSocket] = []
+        self.order_subscribers: Dict[str, List[WebSocket]] = {}
+        self.station_connections: Dict[str, List[WebSocket]] = {}
 
     async def connect(self, websocket: WebSocket, connection_type: str = "client"):
         """
@@ -115,6 +288,92 @@ class ConnectionManager:
         elif websocket in self.active_connections:
             self.active_connections.remove(websocket)
 
+    def subscribe_to_order(self, order_id: str, websocket: WebSocket):
+        """
+        Registra una conexión de cliente como seguidora de un pedido.
+        
+        Args:
+            order_id (str): ID del pedido seguido
+            websocket (WebSocket): Conexión del cliente
+        """
+        self.order_subscribers.setdefault(order_id, []).append(websocket)
+
+    def unsubscribe_from_order(self, order_id: str, websocket: WebSocket):
+        """
+        Quita una conexión de los seguidores de un pedido.
+        
+        Args:
+            order_id (str): ID del pedido seguido
+            websocket (WebSocket): Conexión del cliente
+        """
+        subscribers = self.order_subscribers.get(order_id)
+        if subscribers and websocket in subscribers:
+            subscribers.remove(websocket)
+            if not subscribers:
+                del self.order_subscribers[order_id]
+
+    async def send_to_order_subscribers(self, order_id: str, message: dict):
+        """
+        Envía un mensaje sólo a los clientes que siguen un pedido.
+        
+        Args:
+            order_id (str): ID del pedido
+            message (dict): Mensaje a transmitir
+        """
+        subscribers = self.order_subscribers.get(order_id)
+        if not subscribers:
+            return
+        with tracer.span("websocket.broadcast", {"ws.channel": "order", "ws.recipients": len(subscribers)}):
+            payload = dumps(tracer.inject(message))
+            for connection in list(subscribers):
+                try:
+                    await connection.send_text(payload)
+                except:
+                    self.unsubscribe_from_order(order_id, connection)
+
+    def subscribe_to_station(self, station: str, websocket: WebSocket):
+        """
+        Registra una pantalla de cocina para una estación.
+        
+        Args:
+            station (str): Nombre de la estación
+            websocket (WebSocket): Conexión de la pantalla
+        """
+        self.station_connections.setdefault(station, []).append(websocket)
+
+    def unsubscribe_from_station(self, station: str, websocket: WebSocket):
+        """
+        Quita una pantalla de cocina de una estación.
+        
+        Args:
+            station (str): Nombre de la estación
+            websocket (WebSocket): Conexión de la pantalla
+        """
+        connections = self.station_connections.get(station)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
+                del self.station_connections[station]
+
+    async def send_to_station(self, station: str, message: dict):
+        """
+        Envía un mensaje a las pantallas de una estación de cocina.
+        
+        Args:
+            station (str): Nombre de la estación
+            message (dict): Mensaje a transmitir
+        """
+        connections = self.station_connections.get(station)
+        if not connections:
+            return
+        with tracer.span("websocket.broadcast", {"ws.channel": f"station:{station}", "ws.recipients": len(connections)}):
+            payload = dumps(tracer.inject(message))
+            for connection in list(connections):
+                try:
+                    await connection.send_text(payload)
+                except:
+                    self.unsubscribe_from_station(station, connection)
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """
         Envía un mensaje personal a una conexión específica.
@@ -132,11 +391,13 @@ class ConnectionManager:
         Args:
             message (dict): Mensaje a transmitir
         """
-        for connection in self.admin_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                self.admin_connections.remove(connection)
+        with tracer.span("websocket.broadcast", {"ws.channel": "admin", "ws.recipients": len(self.admin_connections)}):
+            payload = dumps(tracer.inject(message))
+            for connection in list(self.admin_connections):
+                try:
+                    await connection.send_text(payload)
+                except:
+                    self.admin_connections.remove(connection)
 
     async def broadcast_to_delivery(self, message: dict):
         """
@@ -145,11 +406,13 @@ class ConnectionManager:
         Args:
             message (dict): Mensaje a transmitir
         """
-        for connection in self.delivery_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                self.delivery_connections.remove(connection)
+        with tracer.span("websocket.broadcast", {"ws.channel": "delivery", "ws.recipients": len(self.delivery_connections)}):
+            payload = dumps(tracer.inject(message))
+            for connection in list(self.delivery_connections):
+                try:
+                    await connection.send_text(payload)
+                except:
+                    self.delivery_connections.remove(connection)
 
     async def broadcast_to_clients(self, message: dict):
         """
@@ -158,13 +421,34 @@ class ConnectionManager:
         Args:
             message (dict): Mensaje a transmitir
         """
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                self.active_connections.remove(connection)
+        with tracer.span("websocket.broadcast", {"ws.channel": "client", "ws.recipients": len(self.active_connections)}):
+            payload = dumps(tracer.inject(message))
+            for connection in list(self.active_connections):
+                try:
+                    await connection.send_text(payload)
+                except:
+                    self.active_connections.remove(connection)
+
+    def connection_counts(self) -> Dict[tuple, int]:
+        """
+        Cuenta las conexiones abiertas por tipo, para el gauge de ``/metrics``.
+
+        Returns:
+            Dict[tuple, int]: (tipo,) -> cantidad de conexiones
+        """
+        return {
+            ("admin",): len(self.admin_connections),
+            ("delivery",): len(self.delivery_connections),
+            ("client",): len(self.active_connections),
+            ("kitchen",): sum(len(connections) for connections in self.station_connections.values()),
+            ("order_subscription",): sum(len(connections) for connections in self.order_subscribers.values()),
+        }
 
 manager = ConnectionManager()
+metrics_registry.gauge(
+    "websocket_connections", "Open WebSocket connections by type", ("type",),
+    callback=manager.connection_counts
+)
 
 # Authentication Functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -222,7 +506,7 @@ async def get_admin_user(username: str):
     Returns:
         Optional[AdminUser]: Usuario encontrado o None si no existe
     """
-    admin = await db.admin_users.find_one({"username": username})
+    admin = await storage.users.get_by_username(username)
     if admin:
         return AdminUser(**admin)
     return None
@@ -263,18 +547,55 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    with tracer.span("auth.current_user"):
+        admin = await admin_from_token(credentials.credentials)
+        if admin is None:
+            raise credentials_exception
+        return admin
+
+async def admin_from_token(token: str) -> Optional["AdminUser"]:
+    """
+    Valida un token JWT y devuelve su usuario.
+
+    Args:
+        token (str): Token Bearer
+
+    Returns:
+        Optional[AdminUser]: Usuario del token, o None si el token es inválido o el usuario no existe
+    """
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            return None
         token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    
-    admin = await get_admin_user(username=token_data.username)
-    if admin is None:
-        raise credentials_exception
+        return None
+    return await get_admin_user(username=token_data.username)
+
+async def websocket_user(websocket: WebSocket, allowed_roles: List[str]) -> Optional["AdminUser"]:
+    """
+    Autentica una conexión WebSocket con el mismo token que la API REST.
+
+    Los navegadores no pueden mandar cabeceras en un WebSocket, así que el
+    token se acepta también como ``?token=``.
+
+    Args:
+        websocket (WebSocket): Conexión todavía sin aceptar
+        allowed_roles (List[str]): Roles permitidos
+
+    Returns:
+        Optional[AdminUser]: Usuario autenticado con un rol permitido, o None
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):]
+    if not token:
+        return None
+    admin = await admin_from_token(token)
+    if admin is None or admin.role not in allowed_roles:
+        return None
     return admin
 
 # Role-based access control functions
@@ -491,35 +812,523 @@ class Order(BaseModel):
     subtotal: float
     delivery_fee: float
     total: float
-    status: str = "received"  # received, confirmed, preparing, ready, on_route, delivered, cancelled
+    status: str = "received"  # scheduled, received, confirmed, preparing, ready, on_route, delivered, cancelled
     payment_method: str = "cash"  # cash, card, transfer
     estimated_delivery: datetime
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     assigned_delivery_person: Optional[str] = None
     delivery_notes: Optional[str] = ""
+    kitchen_work_minutes: float = 0  # summed preparation_time * quantity
+    kitchen_lead_minutes: float = 0  # slowest item's preparation_time
+    release_at: Optional[datetime] = None  # when a scheduled order is sent to the kitchen
+    customer_key: str = ""  # normalized customer_phone, indexed for the customer history
 
 class OrderCreate(BaseModel):
     items: List[CartItem]
     delivery_info: DeliveryInfo
     payment_method: str = "cash"
     delivery_notes: Optional[str] = ""
+    scheduled_for: Optional[datetime] = None  # requested delivery time for pre-orders
+
+# Slim order views for dashboards; each one becomes a Mongo projection
+class DeliveryInfoSummary(BaseModel):
+    customer_name: str
+    delivery_zone: str
+
+class OrderSummary(BaseModel):
+    """
+    Vista resumida de un pedido para listados (``view=summary``).
+    """
+    id: str
+    status: str
+    delivery_info: DeliveryInfoSummary
+    total: float
+    created_at: datetime
+
+class OrderKitchenView(BaseModel):
+    """
+    Vista de un pedido para la cocina (``view=kitchen``).
+    """
+    id: str
+    status: str
+    items: List[CartItem]
+    delivery_notes: Optional[str] = ""
+    created_at: datetime
+    estimated_delivery: datetime
+
+class OrderDeliveryView(BaseModel):
+    """
+    Vista de un pedido para reparto (``view=delivery``).
+    """
+    id: str
+    status: str
+    delivery_info: DeliveryInfo
+    total: float
+    payment_method: str = "cash"
+    assigned_delivery_person: Optional[str] = None
+    delivery_notes: Optional[str] = ""
+    estimated_delivery: datetime
+
+ORDER_VIEWS = {
+    "summary": OrderSummary,
+    "kitchen": OrderKitchenView,
+    "delivery": OrderDeliveryView,
+}
+
+# Order listings return full orders, a named view or a fields= subset of Order.
+# They are rendered with json_response, so the schema is documented, not enforced.
+ORDER_LIST_RESPONSES = {
+    200: {
+        "model": List[Union[Order, OrderSummary, OrderKitchenView, OrderDeliveryView]],
+        "description": "Full orders, or the projection selected with view= or fields=",
+    }
+}
+
+class CustomerOrdersPage(BaseModel):
+    """
+    Página del historial de pedidos de un cliente (``/api/customers/{phone}/orders``).
+    """
+    customer_key: str
+    orders: List[Order]
+    next_cursor: Optional[str] = None
+
+class OrderBoardCard(BaseModel):
+    """
+    Tarjeta de un pedido en los tableros por rol (``/api/boards/{board}``).
+    """
+    id: str
+    status: str
+    items: List[CartItem]
+    delivery_info: DeliveryInfo
+    total: float
+    payment_method: str = "cash"
+    assigned_delivery_person: Optional[str] = None
+    delivery_notes: Optional[str] = ""
+    created_at: datetime
+    estimated_delivery: datetime
+
+# Board name -> (statuses shown as columns, roles allowed to read it)
+BOARDS = {
+    "kitchen": (KITCHEN_VISIBLE_STATUSES, ["admin", "manager", "kitchen"]),
+    "delivery": (DELIVERY_VISIBLE_STATUSES, ["admin", "manager", "delivery"]),
+    "admin": (ORDER_STATUSES, ["admin", "manager"]),
+}
 
 class OrderStatusUpdate(BaseModel):
     status: str
     assigned_delivery_person: Optional[str] = None
 
+class TicketStatusUpdate(BaseModel):
+    """
+    Modelo para actualizar el estado de un ticket de cocina.
+
+    Attributes:
+        status (str): pending, in_progress o done
+    """
+    status: str
+
 class DeliveryPerson(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     phone: str
     is_available: bool = True
     current_orders: List[str] = []
+    max_orders: int = COURIER_MAX_ORDERS
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class DeliveryPersonCreate(BaseModel):
     name: str
     phone: str
+    max_orders: int = COURIER_MAX_ORDERS
+
+class DeliveryLocationUpdate(BaseModel):
+    """
+    Modelo para reportar la posición actual de un repartidor.
+
+    Attributes:
+        latitude (float): Latitud actual
+        longitude (float): Longitud actual
+        is_available (Optional[bool]): Nueva disponibilidad (opcional)
+    """
+    latitude: float = Field(ge=-90, le=90, allow_inf_nan=False)
+    longitude: float = Field(ge=-180, le=180, allow_inf_nan=False)
+    is_available: Optional[bool] = None
+
+# Delivery dispatch helpers
+async def auto_assign_delivery_person(order: dict) -> Optional[str]:
+    """
+    Asigna el repartidor disponible más cercano con capacidad libre a un pedido.
+
+    El candidato se elige en memoria con el índice espacial y se reserva con
+    una actualización condicional en MongoDB, que sólo agrega el pedido a
+    ``current_orders`` si el repartidor sigue disponible y no alcanzó su
+    capacidad. Si la reserva falla se prueba con el siguiente más cercano.
+
+    Args:
+        order (dict): Documento del pedido a asignar
+
+    Returns:
+        Optional[str]: ID del repartidor asignado o None si no hay candidatos
+    """
+    delivery_info = order.get("delivery_info") or {}
+    latitude = delivery_info.get("latitude")
+    longitude = delivery_info.get("longitude")
+    if latitude is None or longitude is None:
+        latitude, longitude = STORE_LATITUDE, STORE_LONGITUDE
+
+    rejected = set()
+    while True:
+        match = courier_index.nearest(latitude, longitude, DISPATCH_MAX_DISTANCE_KM, exclude=rejected)
+        if match is None:
+            return None
+        courier_id, _ = match
+        capacity = courier_index.get(courier_id).capacity
+        # Reserve the slot locally before awaiting so concurrent handlers skip it
+        courier_index.adjust_load(courier_id, 1)
+        person = await storage.delivery_persons.add_order(courier_id, order["id"], capacity)
+        if person is None:
+            courier_index.adjust_load(courier_id, -1)
+            rejected.add(courier_id)
+            continue
+        courier_index.set_load(courier_id, len(person["current_orders"]))
+        location_tracker.assign_order(courier_id, order["id"])
+        return courier_id
+
+async def release_delivery_person(courier_id: str, order_id: str):
+    """
+    Libera el lugar que ocupaba un pedido en la carga de un repartidor.
+
+    Args:
+        courier_id (str): ID del repartidor asignado
+        order_id (str): ID del pedido finalizado o cancelado
+    """
+    person = await storage.delivery_persons.remove_order(courier_id, order_id)
+    if person is not None:
+        courier_index.set_load(courier_id, len(person.get("current_orders", [])))
+    location_tracker.release_order(courier_id, order_id)
+
+def index_courier(person: dict, latitude: float, longitude: float):
+    """
+    Agrega o actualiza un repartidor en el índice de asignación.
+
+    Args:
+        person (dict): Documento del repartidor (disponibilidad, pedidos y capacidad)
+        latitude (float): Latitud actual
+        longitude (float): Longitud actual
+    """
+    courier_index.upsert(
+        person["id"],
+        latitude,
+        longitude,
+        load=len(person.get("current_orders", [])),
+        capacity=person.get("max_orders", COURIER_MAX_ORDERS),
+        available=person.get("is_available", True),
+    )
+
+async def handle_courier_location(courier_id: str, latitude: float, longitude: float):
+    """
+    Procesa un ping GPS de un repartidor.
+
+    Sólo el primer ping de un repartidor que aún no está en el índice lee su
+    documento; los demás no tocan la base de datos.
+
+    Args:
+        courier_id (str): ID del repartidor
+        latitude (float): Latitud reportada
+        longitude (float): Longitud reportada
+    """
+    fix = location_tracker.record(courier_id, latitude, longitude)
+    if not courier_index.update_position(courier_id, latitude, longitude):
+        # First fix of a courier created after startup (or never located): index it from storage once
+        person = await storage.delivery_persons.get(courier_id)
+        if person is not None:
+            index_courier(person, latitude, longitude)
+
+    orders = location_tracker.orders_for(courier_id)
+    if not orders:
+        return
+    message = {
+        "type": "courier_location",
+        "delivery_person_id": courier_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "timestamp": fix[2]
+    }
+    for order_id in list(orders):
+        await manager.send_to_order_subscribers(order_id, {**message, "order_id": order_id})
+
+async def flush_courier_locations(force: bool = False):
+    """
+    Persiste en una única escritura por lotes las posiciones pendientes de los repartidores.
+
+    Args:
+        force (bool): Escribir todo lo pendiente sin respetar el intervalo
+    """
+    due = location_tracker.due_for_flush(force=force)
+    if not due:
+        return
+    updates = [
+        (courier_id, {
+            "latitude": latitude,
+            "longitude": longitude,
+            "location_updated_at": datetime.utcfromtimestamp(timestamp)
+        })
+        for courier_id, (latitude, longitude, timestamp) in due
+    ]
+    try:
+        await storage.delivery_persons.bulk_update(updates)
+    except Exception:
+        logger.exception("Failed to flush %d courier locations", len(updates))
+        location_tracker.requeue([courier_id for courier_id, _ in due])
+
+# Kitchen ticket helpers
+def station_queue_message(station: str, limit: int = KITCHEN_QUEUE_LIMIT) -> dict:
+    """
+    Arma el mensaje con la cola actual de tickets de una estación.
+
+    Args:
+        station (str): Nombre de la estación
+        limit (int): Máximo de tickets, los más urgentes primero
+
+    Returns:
+        dict: Mensaje ``station_queue`` listo para enviar
+    """
+    return {
+        "type": "station_queue",
+        "station": station,
+        "tickets": [ticket.to_dict() for ticket in kitchen_scheduler.queue(station, limit)]
+    }
+
+async def enqueue_kitchen_tickets(orders: List[dict]) -> List[str]:
+    """
+    Crea los tickets de cocina de pedidos ya guardados, con una sola consulta al menú.
+
+    Args:
+        orders (List[dict]): Documentos de pedidos con ``items`` y ``estimated_delivery``
+
+    Returns:
+        List[str]: Estaciones que recibieron tickets nuevos
+    """
+    menu_ids = {item["menu_item_id"] for order in orders for item in order["items"]}
+    menu = {item["id"]: item for item in await storage.menu.get_many(list(menu_ids))}
+    stations = []
+    for order in orders:
+        ticket_items = [
+            {
+                "menu_item_id": item["menu_item_id"],
+                "name": menu[item["menu_item_id"]]["name"],
+                "category": menu[item["menu_item_id"]]["category"],
+                "preparation_time": menu[item["menu_item_id"]].get("preparation_time"),
+                "quantity": item["quantity"],
+                "special_instructions": item.get("special_instructions")
+            }
+            for item in order["items"] if item["menu_item_id"] in menu
+        ]
+        tickets = kitchen_scheduler.add_order(
+            order["id"], ticket_items,
+            order["estimated_delivery"] - timedelta(minutes=DELIVERY_TRAVEL_MINUTES)
+        )
+        stations.extend(ticket.station for ticket in tickets)
+    return stations
+
+async def push_station_queues(stations: List[str]):
+    """
+    Envía la cola actualizada a las pantallas de las estaciones afectadas.
+
+    Args:
+        stations (List[str]): Estaciones cuya cola cambió
+    """
+    for station in set(stations):
+        await manager.send_to_station(station, station_queue_message(station))
+
+async def revise_queued_etas():
+    """
+    Re-estima los pedidos en cola después de un cambio del backlog de cocina.
+
+    Guarda y envía a quienes siguen cada pedido sólo las revisiones que se
+    apartan del ETA cotizado al menos ``ETA_REVISION_THRESHOLD_MINUTES``.
+    """
+    revisions = eta_model.revise_queued(
+        courier_index.free_slots, len(courier_index), ETA_REVISION_THRESHOLD_MINUTES
+    )
+    for order_id, order_status, revised in revisions:
+        await storage.orders.update(order_id, {"estimated_delivery": revised})
+        await manager.send_to_order_subscribers(order_id, {
+            "type": "eta_update",
+            "order_id": order_id,
+            "status": order_status,
+            "estimated_delivery": revised.isoformat()
+        })
+    if revisions:
+        board_cache.invalidate()
+
+# Pre-order release helpers
+async def release_scheduled_order(order_id: str):
+    """
+    Envía a cocina un pedido programado cuyo temporizador venció.
+
+    La actualización es condicional sobre ``status == "scheduled"``, así que
+    si varios workers lo liberan a la vez (o fue cancelado) sólo uno actúa.
+
+    Args:
+        order_id (str): ID del pedido programado
+    """
+    order = await storage.orders.update_if_status(
+        order_id, "scheduled", {"status": "received", "updated_at": datetime.utcnow()}
+    )
+    if not order:
+        return
+    board_cache.invalidate()
+    eta_model.track(
+        order_id, order["status"],
+        order.get("kitchen_work_minutes", 0), order.get("kitchen_lead_minutes", 0)
+    )
+    # Its ETA is the time the customer asked for; it can still push others back
+    eta_model.quote(order_id, order["estimated_delivery"], fixed=True)
+    await revise_queued_etas()
+    await push_station_queues(await enqueue_kitchen_tickets([order]))
+    await manager.broadcast_to_admins({
+        "type": "new_order",
+        "order": Order(**order).dict()
+    })
+
+async def preorder_release_loop():
+    """Tarea de fondo que avanza la rueda de pre-pedidos una vez por segundo."""
+    while True:
+        await asyncio.sleep(preorder_wheel.tick_seconds)
+        for order_id in preorder_wheel.advance(time.time()):
+            try:
+                await release_scheduled_order(order_id)
+            except Exception:
+                logger.exception("Failed to release scheduled order %s", order_id)
+                preorder_wheel.schedule(order_id, time.time() + 30)
+
+# Order archive helpers
+async def archive_orders() -> int:
+    """
+    Mueve al archivo los pedidos terminados sin cambios desde hace ``ARCHIVE_AFTER_HOURS``.
+
+    Trabaja en lotes de ``ARCHIVE_BATCH_SIZE`` hasta vaciar el atraso, cediendo
+    el loop entre lotes; si se interrumpe, la siguiente pasada retoma desde
+    donde quedó.
+
+    Returns:
+        int: Pedidos archivados en esta pasada
+    """
+    before = datetime.utcnow() - timedelta(hours=ARCHIVE_AFTER_HOURS)
+    archived = 0
+    while True:
+        moved = await storage.orders.archive(ARCHIVED_STATUSES, before, ARCHIVE_BATCH_SIZE)
+        archived += moved
+        orders_archived.inc(amount=moved)
+        if moved < ARCHIVE_BATCH_SIZE:
+            return archived
+        await asyncio.sleep(0)
+
+async def order_archive_loop():
+    """Tarea de fondo que archiva pedidos terminados cada ``ARCHIVE_INTERVAL_SECONDS``."""
+    while True:
+        try:
+            archived = await archive_orders()
+            if archived:
+                logger.info("Archived %d finished orders", archived)
+        except Exception:
+            logger.exception("Failed to archive finished orders")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+# Customer history helpers
+def customer_key_or_400(phone: str) -> str:
+    customer_key = normalize_phone(phone, CUSTOMER_COUNTRY_CODE)
+    if not customer_key:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    return customer_key
+
+async def load_customer_profile(customer_key: str) -> Optional[dict]:
+    """
+    Perfil resumido de un cliente; si todavía no existe lo arma desde su historial.
+
+    Después de armarlo, ``create_order`` lo mantiene al día pedido a pedido. Un
+    pedido creado mientras se armaba el perfil (después de leer el historial y
+    antes de guardarlo) no encuentra perfil que actualizar, así que si el pedido
+    más nuevo es posterior a ``last_order_at`` el perfil se vuelve a armar.
+
+    Args:
+        customer_key (str): Teléfono normalizado
+
+    Returns:
+        Optional[dict]: Perfil guardado, o None si el cliente no tiene pedidos
+    """
+    profile = await storage.customers.get(customer_key)
+    newest = await storage.orders.history(customer_key, 1)
+    if not newest or (
+        profile is not None and profile.get("last_order_at") is not None
+        and profile["last_order_at"] >= newest[0]["created_at"]
+    ):
+        return profile
+    orders, before = [], None
+    while True:
+        page = await storage.orders.history(customer_key, CUSTOMER_HISTORY_MAX_PAGE_SIZE, before)
+        orders.extend(page)
+        if len(page) < CUSTOMER_HISTORY_MAX_PAGE_SIZE:
+            break
+        before = (page[-1]["created_at"], page[-1]["id"])
+    if not orders:
+        return None
+    profile = new_customer(customer_key)
+    # Oldest first, so the latest name and address win
+    for order in reversed(orders):
+        add_customer_order(profile, order)
+    await storage.customers.save(profile)
+    return profile
+
+async def backfill_customer_keys() -> int:
+    """Completa ``customer_key`` en los pedidos guardados antes de que existiera, por lotes."""
+    filled = 0
+    while True:
+        batch = await storage.orders.backfill_customer_keys(
+            lambda phone: normalize_phone(phone, CUSTOMER_COUNTRY_CODE), CUSTOMER_BACKFILL_BATCH_SIZE
+        )
+        filled += batch
+        if batch < CUSTOMER_BACKFILL_BATCH_SIZE:
+            return filled
+        await asyncio.sleep(0)
+
+async def customer_key_backfill_task():
+    """Tarea de fondo de una sola pasada para ``backfill_customer_keys``."""
+    try:
+        filled = await backfill_customer_keys()
+        if filled:
+            logger.info("Backfilled customer keys on %d orders", filled)
+    except Exception:
+        logger.exception("Failed to backfill customer keys")
+
+async def courier_location_flush_loop():
+    """Tarea de fondo que vuelca las posiciones de repartidores periódicamente."""
+    while True:
+        await asyncio.sleep(1)
+        await flush_courier_locations()
+
+async def trace_export_loop():
+    """Tarea de fondo que escribe los spans terminados en el archivo de trazas."""
+    while True:
+        await asyncio.sleep(1)
+        try:
+            await asyncio.to_thread(tracer.exporter.flush)
+        except Exception:
+            logger.exception("Failed to export trace spans")
+
+async def slow_query_log_loop():
+    """Tarea de fondo que explica y guarda las consultas lentas detectadas."""
+    while True:
+        await asyncio.sleep(1)
+        try:
+            await slow_query_log.flush(db)
+        except Exception:
+            logger.exception("Failed to store slow query log entries")
 
 # WebSocket endpoints
 @app.websocket("/ws/admin")
@@ -534,22 +1343,77 @@ async def websocket_admin_endpoint(websocket: WebSocket):
 
 @app.websocket("/ws/delivery/{delivery_person_id}")
 async def websocket_delivery_endpoint(websocket: WebSocket, delivery_person_id: str):
+    """
+    Canal de repartidores: recibe pings GPS con el formato
+    ``{"type": "location", "latitude": ..., "longitude": ...}``.
+
+    Cada ping actualiza el rastro en memoria y el índice de asignación, y se
+    reenvía sólo a los clientes que siguen los pedidos del repartidor. La
+    persistencia en MongoDB la hace ``flush_courier_locations`` en lote.
+
+    Requiere un token de repartidor (o admin/manager), como los endpoints REST
+    de repartidores, y un ``delivery_person_id`` existente.
+    """
+    admin = await websocket_user(websocket, ["admin", "manager", "delivery"])
+    if admin is None or (
+        delivery_person_id not in courier_index and await storage.delivery_persons.get(delivery_person_id) is None
+    ):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
     await manager.connect(websocket, "delivery")
     try:
         while True:
             data = await websocket.receive_text()
-            # Handle delivery person messages if needed
+            try:
+                message = json.loads(data)
+                if message.get("type") != "location":
+                    continue
+                latitude = float(message["latitude"])
+                longitude = float(message["longitude"])
+                # float() accepts "NaN" and "Infinity", which would break the grid index
+                if not valid_position(latitude, longitude):
+                    continue
+            except (ValueError, TypeError, KeyError, AttributeError):
+                continue
+            await handle_courier_location(delivery_person_id, latitude, longitude)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, "delivery")
 
+@app.websocket("/ws/kitchen/{station}")
+async def websocket_kitchen_station_endpoint(websocket: WebSocket, station: str):
+    """
+    Canal de una estación de cocina: envía la cola de tickets de la estación
+    al conectarse y cada vez que cambia.
+
+    Requiere un token de cocina (o admin/manager): los tickets llevan IDs de
+    pedidos, y con un ID el seguimiento público muestra los datos del cliente.
+    """
+    if await websocket_user(websocket, ["admin", "manager", "kitchen"]) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    manager.subscribe_to_station(station, websocket)
+    try:
+        await websocket.send_text(dumps(station_queue_message(station)))
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.unsubscribe_from_station(station, websocket)
+
 @app.websocket("/ws/client/{order_id}")
 async def websocket_client_endpoint(websocket: WebSocket, order_id: str):
     await manager.connect(websocket, "client")
+    manager.subscribe_to_order(order_id, websocket)
     try:
         while True:
             data = await websocket.receive_text()
             # Handle client messages if needed
     except WebSocketDisconnect:
+        manager.unsubscribe_from_order(order_id, websocket)
         manager.disconnect(websocket, "client")
 
 # Authentication endpoints
@@ -583,7 +1447,7 @@ async def create_admin_user(admin_data: AdminUserCreate):
         hashed_password=hashed_password
     )
     
-    await db.admin_users.insert_one(admin_user.dict())
+    await storage.users.insert(admin_user.dict())
     return {"message": "Admin user created successfully"}
 
 @api_router.get("/auth/me", response_model=dict)
@@ -623,7 +1487,7 @@ async def initialize_default_admin():
             hashed_password=hashed_password
         )
         
-        await db.admin_users.insert_one(admin_user.dict())
+        await storage.users.insert(admin_user.dict())
         created_users.append({
             "username": user_data["username"],
             "password": user_data["password"],
@@ -640,63 +1504,295 @@ async def initialize_default_admin():
 @api_router.post("/menu", response_model=MenuItem)
 async def create_menu_item(item: MenuItemCreate, current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
     menu_item = MenuItem(**item.dict())
-    await db.menu_items.insert_one(menu_item.dict())
+    await storage.menu.insert(menu_item.dict())
+    menu_cache.invalidate()
+    menu_search.upsert(menu_item.dict())
     return menu_item
 
+async def menu_snapshot(category: Optional[str] = None) -> List[dict]:
+    """Productos disponibles (de una categoría o todos) desde el snapshot del menú."""
+    async def build():
+        items = trusted_documents(MenuItem, await storage.menu.list(category=category))
+        return [thumbnails.rewrite(item) for item in items]
+    return await menu_cache.get(f"category:{category}" if category else "all", build)
+
 @api_router.get("/menu", response_model=List[MenuItem])
 async def get_menu():
     # Public endpoint - no auth required
-    menu_items = await db.menu_items.find({"available": True}).to_list(1000)
-    return [MenuItem(**item) for item in menu_items]
+    return json_response(await menu_snapshot())
 
 @api_router.get("/menu/category/{category}", response_model=List[MenuItem])
 async def get_menu_by_category(category: str):
     # Public endpoint - no auth required
-    menu_items = await db.menu_items.find({"category": category, "available": True}).to_list(1000)
-    return [MenuItem(**item) for item in menu_items]
+    return json_response(await menu_snapshot(category))
+
+async def refresh_menu_search() -> int:
+    """
+    Reconstruye el índice de búsqueda desde el menú guardado.
+
+    Returns:
+        int: Cantidad de productos indexados
+    """
+    menu_search.rebuild(await storage.menu.list(limit=None))
+    return len(menu_search)
+
+@api_router.get("/menu/search", response_model=List[MenuItem])
+async def search_menu(q: str, limit: int = 20, category: Optional[str] = None):
+    # Public endpoint - ranked, accent-insensitive prefix and typo-tolerant search
+    await menu_search_refresh.get("index", refresh_menu_search)
+    results = menu_search.search(q, max(1, min(limit, MENU_SEARCH_MAX_RESULTS)), category)
+    return json_response([thumbnails.rewrite(item) for item in trusted_documents(MenuItem, results)])
+
+async def read_upload(upload: UploadFile, max_bytes: int) -> bytes:
+    """
+    Lee un archivo subido por partes, cortando en cuanto supera el límite.
+
+    Args:
+        upload (UploadFile): Archivo de un formulario multipart
+        max_bytes (int): Tamaño máximo aceptado
+
+    Returns:
+        bytes: Contenido del archivo
+
+    Raises:
+        HTTPException: 413 si el archivo supera ``max_bytes``
+    """
+    chunks = []
+    size = 0
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail="Image is too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@api_router.post("/menu/{item_id}/image", response_model=MenuItem)
+async def upload_menu_item_image(
+    item_id: str,
+    image: UploadFile = File(...),
+    current_admin: AdminUser = Depends(require_role(["admin", "manager"]))
+):
+    # Multipart "image" field, spooled to disk by the form parser and read back in chunks up to
+    # the size limit; thumbnails are built before the item points at them
+    if not thumbnails.enabled:
+        raise HTTPException(status_code=503, detail="Image processing is not available on this server")
+    if not (image.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=415, detail="Upload an image file (image/jpeg, image/png...)")
+    body = await read_upload(image, THUMBNAIL_MAX_SOURCE_BYTES)
+    try:
+        digest = await thumbnails.store(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    image_url = thumbnails.variant_url(digest, max(thumbnails.widths))
+    if not await storage.menu.update(item_id, {"image_url": image_url}):
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    item = await storage.menu.get(item_id)
+    menu_cache.invalidate()
+    menu_search.upsert(item)
+    return json_response(thumbnails.rewrite(trusted_documents(MenuItem, [item])[0]))
+
+@api_router.get("/images/{digest}/{variant}", include_in_schema=False)
+async def get_menu_image(digest: str, variant: str):
+    # Content-addressed: a variant never changes, so clients may cache it for a year
+    width = variant.removesuffix(".webp")
+    if not DIGEST_PATTERN.match(digest) or not width.isdigit() or int(width) not in thumbnails.widths:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = thumbnails.variant_path(digest, int(width))
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(path, media_type="image/webp", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@api_router.post("/menu/import")
+async def import_menu(
+    request: Request,
+    deactivate_missing: bool = True,
+    dry_run: bool = False,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager"]))
+):
+    # Whole-menu sync from JSON or CSV: diff against stored items, then one bulk write
+    try:
+        rows = parse_menu_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    incoming = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            # Only the columns present in the file are compared; the rest keep their stored value
+            incoming.append({**MenuItemCreate(**row).dict(exclude_unset=True), "id": row.get("id")})
+        except ValidationError as exc:
+            errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+            raise HTTPException(status_code=400, detail=f"Invalid menu item {line}: {errors}")
+
+    current = await storage.menu.list(available_only=False, limit=None)
+    try:
+        diff = diff_menu(current, incoming, lambda values: MenuItem(**values).dict(), deactivate_missing)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    changed = bool(diff.upserts or diff.deactivated)
+    if changed and not dry_run:
+        await storage.menu.sync(diff.upserts, [item["id"] for item in diff.deactivated])
+        menu_cache.invalidate()
+        for item in diff.upserts:
+            menu_search.upsert(item)
+        for item in diff.deactivated:
+            menu_search.remove(item["id"])
+    return {**diff.report(), "dry_run": dry_run, "menu_version": menu_cache.version}
 
 @api_router.put("/menu/{item_id}", response_model=MenuItem)
 async def update_menu_item(item_id: str, item: MenuItemCreate, current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
     updated_item = MenuItem(id=item_id, **item.dict())
-    await db.menu_items.replace_one({"id": item_id}, updated_item.dict())
+    if await storage.menu.replace(item_id, updated_item.dict()):
+        menu_search.upsert(updated_item.dict())
+    menu_cache.invalidate()
     return updated_item
 
 @api_router.delete("/menu/{item_id}")
 async def delete_menu_item(item_id: str, current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
-    await db.menu_items.update_one({"id": item_id}, {"$set": {"available": False}})
+    await storage.menu.update(item_id, {"available": False})
+    menu_cache.invalidate()
+    menu_search.remove(item_id)
     return {"message": "Menu item deleted successfully"}
 
+def resolve_order_projection(view: Optional[str], fields: Optional[str]):
+    """
+    Traduce ``view`` o ``fields`` en la proyección y el modelo de un listado de pedidos.
+
+    Args:
+        view (Optional[str]): Vista con nombre (summary, kitchen, delivery)
+        fields (Optional[str]): Lista de campos separada por comas
+
+    Returns:
+        Tuple[dict, Type[BaseModel], Optional[List[str]]]: Proyección, modelo para
+        completar valores por defecto y campos proyectados (None si es una vista)
+
+    Raises:
+        HTTPException: Si la vista o algún campo no existen
+    """
+    if view and fields:
+        raise HTTPException(status_code=400, detail="Use either view or fields, not both")
+    if view:
+        model = ORDER_VIEWS.get(view)
+        if model is None:
+            raise HTTPException(status_code=400, detail=f"Invalid view. Must be one of: {list(ORDER_VIEWS)}")
+        return model_projection(model), model, None
+    if fields:
+        try:
+            projection = fields_projection(Order, fields)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return projection, Order, [name for name in projection if name != "_id"]
+    return {"_id": 0}, Order, None
+
 # Order Management with role-based access
 @api_router.post("/orders", response_model=Order)
 async def create_order(order_data: OrderCreate):
     # Public endpoint - customers can create orders
+    # Resolve zone first; coordinates take precedence over the client's zone
+    delivery_info = order_data.delivery_info
+    zones = zone_registry.index
+    if delivery_info.latitude is not None and delivery_info.longitude is not None:
+        zone = zones.resolve(delivery_info.latitude, delivery_info.longitude)
+        if zone is None:
+            raise HTTPException(status_code=400, detail="Delivery address is outside the delivery area")
+        delivery_info.delivery_zone = zone.name
+    else:
+        zone = zones.get(delivery_info.delivery_zone)
+
+    # Pre-orders far enough ahead are held until their prep window opens
+    scheduled_for = order_data.scheduled_for
+    if scheduled_for is not None and scheduled_for.tzinfo is not None:
+        scheduled_for = scheduled_for.astimezone(timezone.utc).replace(tzinfo=None)
+    is_preorder = (
+        scheduled_for is not None
+        and scheduled_for > datetime.utcnow() + timedelta(minutes=PREORDER_MIN_LEAD_MINUTES)
+    )
+
+    # Admission control runs before any DB access so rejected orders cost nothing
+    # Throttle by the registry's zone only: the client's zone string is free text
+    admission = admission_controller.evaluate(
+        0 if is_preorder else eta_model.backlog_minutes, KITCHEN_PARALLELISM, zone.name if zone else None
+    )
+    if not admission.accepted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Kitchen is at capacity ({admission.reason}). Please retry later.",
+            headers={"Retry-After": str(admission.retry_after)},
+        )
+
     # Calculate totals
     subtotal = 0
+    preparation = []
+    ticket_items = []
     for cart_item in order_data.items:
-        menu_item = await db.menu_items.find_one({"id": cart_item.menu_item_id})
+        menu_item = await storage.menu.get(cart_item.menu_item_id)
         if menu_item:
             subtotal += menu_item["price"] * cart_item.quantity
+            preparation.append((menu_item.get("preparation_time"), cart_item.quantity))
+            ticket_items.append({
+                "menu_item_id": cart_item.menu_item_id,
+                "name": menu_item["name"],
+                "category": menu_item["category"],
+                "preparation_time": menu_item.get("preparation_time"),
+                "quantity": cart_item.quantity,
+                "special_instructions": cart_item.special_instructions
+            })
     
-    # Calculate delivery fee based on zone
-    delivery_fee = 15000 if order_data.delivery_info.delivery_zone == "centro" else 20000
+    delivery_fee = zone.fee_for(subtotal) if zone else zones.default_fee
     total = subtotal + delivery_fee
     
-    # Calculate estimated delivery time (30-60 minutes)
-    from datetime import timedelta
-    estimated_delivery = datetime.utcnow().replace(microsecond=0) + timedelta(minutes=45)
+    # Estimate delivery time from the current kitchen backlog and courier availability
+    work_minutes, lead_minutes = order_work(preparation)
+    estimated_delivery = eta_from_now(eta_model.estimate_minutes(
+        work_minutes, lead_minutes, courier_index.free_slots, len(courier_index)
+    ) + admission.extra_minutes)
+    order_status = "received"
+    release_at = None
+    if is_preorder:
+        order_status = "scheduled"
+        estimated_delivery = scheduled_for.replace(second=0, microsecond=0)
+        release_at = max(
+            datetime.utcnow(),
+            scheduled_for - timedelta(
+                minutes=lead_minutes + DELIVERY_TRAVEL_MINUTES + PREORDER_RELEASE_BUFFER_MINUTES
+            )
+        ).replace(microsecond=0)
     
     order = Order(
         items=order_data.items,
-        delivery_info=order_data.delivery_info,
+        delivery_info=delivery_info,
         subtotal=subtotal,
         delivery_fee=delivery_fee,
         total=total,
         payment_method=order_data.payment_method,
         estimated_delivery=estimated_delivery,
-        delivery_notes=order_data.delivery_notes
+        delivery_notes=order_data.delivery_notes,
+        kitchen_work_minutes=work_minutes,
+        kitchen_lead_minutes=lead_minutes,
+        status=order_status,
+        release_at=release_at,
+        customer_key=normalize_phone(delivery_info.customer_phone, CUSTOMER_COUNTRY_CODE)
     )
     
-    await db.orders.insert_one(order.dict())
+    document = order.dict()
+    await storage.orders.insert(document)
+    await storage.customers.record_order(document)
+    board_cache.invalidate()
+
+    if is_preorder:
+        preorder_wheel.schedule(order.id, release_at.replace(tzinfo=timezone.utc).timestamp())
+        await manager.broadcast_to_admins({
+            "type": "new_preorder",
+            "order": order.dict()
+        })
+        return order
+
+    eta_model.track(order.id, order.status, work_minutes, lead_minutes)
+    eta_model.quote(order.id, estimated_delivery, admission.extra_minutes)
+    await revise_queued_etas()
+    tickets = kitchen_scheduler.add_order(
+        order.id, ticket_items, estimated_delivery - timedelta(minutes=DELIVERY_TRAVEL_MINUTES)
+    )
+    await push_station_queues([ticket.station for ticket in tickets])
     
     # Broadcast new order to admins
     await manager.broadcast_to_admins({
@@ -706,36 +1802,69 @@ async def create_order(order_data: OrderCreate):
     
     return order
 
-@api_router.get("/orders", response_model=List[Order])
-async def get_orders(current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))):
+@api_router.get("/orders", responses=ORDER_LIST_RESPONSES)
+async def get_orders(
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))
+):
+    # Optional slim views (view=summary|kitchen|delivery) or fields=a,b,delivery_info.c
+    projection, model, projected_fields = resolve_order_projection(view, fields)
+
     # Role-based filtering
     if current_admin.role == "kitchen":
         # Kitchen only sees orders that need preparation
-        orders = await db.orders.find({
-            "status": {"$in": ["received", "confirmed", "preparing", "ready"]}
-        }).sort("created_at", -1).to_list(1000)
+        orders = await storage.orders.find(KITCHEN_VISIBLE_STATUSES, projection)
     elif current_admin.role == "delivery":
         # Delivery only sees orders ready for delivery
-        orders = await db.orders.find({
-            "status": {"$in": ["ready", "on_route", "delivered"]}
-        }).sort("created_at", -1).to_list(1000)
+        orders = await storage.orders.find(DELIVERY_VISIBLE_STATUSES, projection)
     else:
         # Admin and Manager see all orders
-        orders = await db.orders.find().sort("created_at", -1).to_list(1000)
+        orders = await storage.orders.find(projection=projection)
     
-    return [Order(**order) for order in orders]
+    # Stored orders were validated on write: skip re-validation and render with orjson
+    return json_response(trusted_documents(model, orders, projected_fields))
+
+@api_router.get("/orders/export")
+async def export_orders(
+    start: datetime,
+    end: Optional[datetime] = None,
+    export_format: str = Query("ndjson", alias="format"),
+    batch_size: int = EXPORT_BATCH_SIZE,
+    gzip: bool = False,
+    current_admin: AdminUser = Depends(require_role(["admin"]))
+):
+    # Streamed batch by batch from storage (archive included): memory stays flat for any range
+    end = end or datetime.utcnow()
+    # Stored timestamps are naive UTC
+    start, end = (
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+        for value in (start, end)
+    )
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format, use one of: {', '.join(EXPORT_FORMATS)}")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="The export range must end after it starts")
+    batch_size = max(1, min(batch_size, EXPORT_MAX_BATCH_SIZE))
+    media_type, headers = export_headers(
+        export_format, gzip, f"orders-{start:%Y%m%d}-{end:%Y%m%d}"
+    )
+    return StreamingResponse(
+        stream_export(storage.orders.scan(start, end, batch_size), export_format, gzip),
+        media_type=media_type, headers=headers
+    )
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
-    # Public endpoint for order tracking
-    order = await db.orders.find_one({"id": order_id})
+    # Public endpoint for order tracking; old orders are served from the archive
+    order = await storage.orders.get(order_id, include_archive=True)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return Order(**order)
 
 @api_router.put("/orders/{order_id}/status")
 async def update_order_status(order_id: str, status_update: OrderStatusUpdate, current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))):
-    order = await db.orders.find_one({"id": order_id})
+    order = await storage.orders.get(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -772,14 +1901,62 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, c
         "status": status_update.status,
         "updated_at": datetime.utcnow()
     }
-    
-    if status_update.assigned_delivery_person:
-        update_data["assigned_delivery_person"] = status_update.assigned_delivery_person
-    
-    await db.orders.update_one({"id": order_id}, {"$set": update_data})
+
+    assigned_delivery_person = status_update.assigned_delivery_person
+    previous_delivery_person = order.get("assigned_delivery_person")
+    if assigned_delivery_person and assigned_delivery_person != previous_delivery_person:
+        # Manual assignment also counts against the courier's capacity
+        person = await storage.delivery_persons.add_order(assigned_delivery_person, order_id)
+        if person is not None:
+            courier_index.set_load(assigned_delivery_person, len(person.get("current_orders", [])))
+        location_tracker.assign_order(assigned_delivery_person, order_id)
+        if previous_delivery_person:
+            await release_delivery_person(previous_delivery_person, order_id)
+    elif new_status == "ready" and not previous_delivery_person:
+        assigned_delivery_person = await auto_assign_delivery_person(order)
+
+    if assigned_delivery_person:
+        update_data["assigned_delivery_person"] = assigned_delivery_person
+
+    if new_status in ("delivered", "cancelled"):
+        courier_id = assigned_delivery_person or previous_delivery_person
+        if courier_id:
+            await release_delivery_person(courier_id, order_id)
+
+    if current_status == "scheduled" and new_status != "scheduled":
+        # Released or cancelled by hand before its timer fired
+        preorder_wheel.cancel(order_id)
+        if new_status in ("received", "confirmed", "preparing"):
+            await push_station_queues(await enqueue_kitchen_tickets([order]))
+
+    # Revise the ETA incrementally from the new status and current load
+    waiting_for_courier = new_status == "ready" and not (assigned_delivery_person or previous_delivery_person)
+    if eta_model.transition(order_id, new_status, waiting_for_courier) is None:
+        eta_model.track(
+            order_id, new_status,
+            order.get("kitchen_work_minutes", 0), order.get("kitchen_lead_minutes", 0),
+            waiting_for_courier
+        )
+    if current_status == "scheduled" and order.get("estimated_delivery"):
+        eta_model.quote(order_id, order["estimated_delivery"], fixed=True)
+    remaining = eta_model.remaining_minutes(
+        new_status, order.get("kitchen_lead_minutes", 0), courier_index.free_slots, len(courier_index)
+    )
+    eta_revision = None
+    if remaining is not None:
+        revised = eta_from_now(remaining)
+        previous_eta = order.get("estimated_delivery")
+        if previous_eta is None or abs((revised - previous_eta).total_seconds()) >= ETA_REVISION_THRESHOLD_MINUTES * 60:
+            update_data["estimated_delivery"] = revised
+            eta_revision = revised
+
+    await storage.orders.update(order_id, update_data)
+    board_cache.invalidate()
+    # The backlog moved: orders still queued behind (or ahead of) this one get revised ETAs
+    await revise_queued_etas()
     
     # Broadcast status update
-    updated_order = await db.orders.find_one({"id": order_id})
+    updated_order = await storage.orders.get(order_id)
     message = {
         "type": "order_status_update",
         "order_id": order_id,
@@ -789,86 +1966,443 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, c
     
     await manager.broadcast_to_admins(message)
     await manager.broadcast_to_clients(message)
-    if status_update.assigned_delivery_person:
+    if assigned_delivery_person:
         await manager.broadcast_to_delivery(message)
+    if new_status not in ("received", "confirmed", "preparing"):
+        await push_station_queues(kitchen_scheduler.remove_order(order_id))
+    if eta_revision is not None:
+        await manager.send_to_order_subscribers(order_id, {
+            "type": "eta_update",
+            "order_id": order_id,
+            "status": new_status,
+            "estimated_delivery": eta_revision.isoformat()
+        })
     
     return {"message": "Order status updated successfully"}
 
-@api_router.get("/orders/status/{status}", response_model=List[Order])
-async def get_orders_by_status(status: str, current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))):
+@api_router.get("/orders/status/{status}", responses=ORDER_LIST_RESPONSES)
+async def get_orders_by_status(
+    status: str,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))
+):
+    projection, model, projected_fields = resolve_order_projection(view, fields)
+
     # Role-based filtering combined with status filter
-    query = {"status": status}
-    
-    if current_admin.role == "kitchen":
+    if current_admin.role == "kitchen" and status not in KITCHEN_VISIBLE_STATUSES:
         # Kitchen only sees preparation-related statuses
-        if status not in ["received", "confirmed", "preparing", "ready"]:
-            return []
-        orders = await db.orders.find(query).sort("created_at", -1).to_list(1000)
-    elif current_admin.role == "delivery":
+        return []
+    if current_admin.role == "delivery" and status not in DELIVERY_VISIBLE_STATUSES:
         # Delivery only sees delivery-related statuses
-        if status not in ["ready", "on_route", "delivered"]:
-            return []
-        orders = await db.orders.find(query).sort("created_at", -1).to_list(1000)
-    else:
-        # Admin and Manager see all
-        orders = await db.orders.find(query).sort("created_at", -1).to_list(1000)
+        return []
+    orders = await storage.orders.find([status], projection)
     
-    return [Order(**order) for order in orders]
+    return json_response(trusted_documents(model, orders, projected_fields))
+
+# Customer history (staff lookups by phone)
+@api_router.get("/customers/{phone}")
+async def get_customer(
+    phone: str,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager"]))
+):
+    customer_key = customer_key_or_400(phone)
+    profile = await load_customer_profile(customer_key)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No orders found for this phone number")
+    menu_items = {item["id"]: item for item in await storage.menu.get_many(list(profile.get("items", {})))}
+    return profile_view(profile, menu_items, CUSTOMER_FAVOURITE_ITEMS)
+
+@api_router.get("/customers/{phone}/orders", response_model=CustomerOrdersPage)
+async def get_customer_orders(
+    phone: str,
+    limit: int = CUSTOMER_HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager"]))
+):
+    # Keyset pagination on (created_at, id): pass next_cursor back to get the following page
+    customer_key = customer_key_or_400(phone)
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = max(1, min(limit, CUSTOMER_HISTORY_MAX_PAGE_SIZE))
+    orders = await storage.orders.history(customer_key, limit, before)
+    return json_response({
+        "customer_key": customer_key,
+        "orders": trusted_documents(Order, orders),
+        "next_cursor": encode_cursor(orders[-1]) if len(orders) == limit else None,
+    })
+
+# Role dashboards
+async def build_board(board: str) -> dict:
+    """
+    Arma el tablero de un rol con una única consulta agrupada sobre los pedidos.
+
+    Agrupa los pedidos visibles por estado, con el total de cada columna y
+    sólo los ``BOARD_COLUMN_LIMIT`` más recientes de cada una.
+
+    Args:
+        board (str): Nombre del tablero (kitchen, delivery, admin)
+
+    Returns:
+        dict: Tablero con ``columns`` en el orden de estados del rol
+    """
+    statuses, _ = BOARDS[board]
+    groups = await storage.orders.latest_by_status(statuses, model_projection(OrderBoardCard), BOARD_COLUMN_LIMIT)
+    columns = []
+    for order_status in statuses:
+        group = groups.get(order_status, {})
+        columns.append({
+            "status": order_status,
+            "count": group.get("count", 0),
+            "orders": trusted_documents(OrderBoardCard, group.get("orders", [])),
+        })
+    return {
+        "board": board,
+        "generated_at": datetime.utcnow(),
+        "total": sum(column["count"] for column in columns),
+        "columns": columns,
+    }
+
+@api_router.get("/boards/{board}")
+async def get_board(board: str, current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen", "delivery"]))):
+    # Same role filters as get_orders: kitchen and delivery only read their own board
+    if board not in BOARDS:
+        raise HTTPException(status_code=404, detail=f"Board not found. Must be one of: {list(BOARDS)}")
+    _, allowed_roles = BOARDS[board]
+    if current_admin.role not in allowed_roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied. Required roles: {', '.join(allowed_roles)}"
+        )
+    # Every tablet of a role shares one snapshot until orders change or its TTL expires
+    return json_response(await board_cache.get(board, lambda: build_board(board)))
+
+# Kitchen station tickets
+@api_router.get("/kitchen/stations")
+async def get_kitchen_stations(current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen"]))):
+    """
+    Lista las estaciones con tickets activos y cuántos tiene cada una.
+
+    Returns:
+        dict: Cantidad de tickets pendientes por estación
+    """
+    return kitchen_scheduler.active_counts()
+
+@api_router.get("/kitchen/stations/{station}/tickets")
+async def get_station_tickets(
+    station: str,
+    limit: int = Query(KITCHEN_QUEUE_LIMIT, ge=1, le=500),
+    current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen"]))
+):
+    """
+    Devuelve la cola de tickets de una estación en orden de trabajo.
+
+    Args:
+        station (str): Nombre de la estación (horno, parrilla, bebidas, freidora...)
+        limit (int): Máximo de tickets a devolver
+
+    Returns:
+        List[dict]: Tickets no terminados, el más urgente primero
+    """
+    return station_queue_message(station, limit)["tickets"]
+
+@api_router.put("/kitchen/tickets/{ticket_id}/status")
+async def update_ticket_status(ticket_id: str, status_update: TicketStatusUpdate, current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen"]))):
+    """
+    Marca un ticket de cocina como pendiente, en preparación o terminado.
+
+    Args:
+        ticket_id (str): ID del ticket (``{order_id}:{station}``)
+        status_update (TicketStatusUpdate): Nuevo estado del ticket
+
+    Returns:
+        dict: Ticket actualizado y si el pedido completo quedó terminado
+
+    Raises:
+        HTTPException: Si el ticket no existe o el estado es inválido
+    """
+    try:
+        ticket = kitchen_scheduler.set_status(ticket_id, status_update.status)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    order_done = kitchen_scheduler.order_done(ticket.order_id)
+    await push_station_queues([ticket.station])
+    if order_done:
+        await manager.broadcast_to_admins({
+            "type": "order_tickets_done",
+            "order_id": ticket.order_id
+        })
+    return {"ticket": ticket.to_dict(), "order_done": order_done}
+
+@api_router.get("/kitchen/admission")
+async def get_admission_status(current_admin: AdminUser = Depends(require_role(["admin", "manager", "kitchen"]))):
+    """
+    Muestra la carga actual de la cocina y los límites de admisión.
+
+    Returns:
+        dict: Backlog, capacidad, proporción de carga y límites configurados
+    """
+    return {
+        "backlog_minutes": eta_model.backlog_minutes,
+        "capacity_minutes": admission_controller.capacity_minutes,
+        "load": round(admission_controller.load(eta_model.backlog_minutes), 3),
+        "soft_limit": admission_controller.soft_limit,
+        "hard_limit": admission_controller.hard_limit,
+        "ready_waiting": eta_model.ready_waiting
+    }
 
 # Delivery Person Management
 @api_router.post("/delivery-persons", response_model=DeliveryPerson)
 async def create_delivery_person(person_data: DeliveryPersonCreate):
     delivery_person = DeliveryPerson(**person_data.dict())
-    await db.delivery_persons.insert_one(delivery_person.dict())
+    await storage.delivery_persons.insert(delivery_person.dict())
     return delivery_person
 
 @api_router.get("/delivery-persons", response_model=List[DeliveryPerson])
 async def get_delivery_persons():
-    persons = await db.delivery_persons.find().to_list(1000)
-    return [DeliveryPerson(**person) for person in persons]
+    persons = await storage.delivery_persons.list()
+    return json_response(trusted_documents(DeliveryPerson, persons))
 
 @api_router.get("/delivery-persons/available", response_model=List[DeliveryPerson])
 async def get_available_delivery_persons():
-    persons = await db.delivery_persons.find({"is_available": True}).to_list(1000)
-    return [DeliveryPerson(**person) for person in persons]
+    persons = await storage.delivery_persons.list(available_only=True)
+    return json_response(trusted_documents(DeliveryPerson, persons))
+
+@api_router.put("/delivery-persons/{person_id}/location")
+async def update_delivery_person_location(person_id: str, location: DeliveryLocationUpdate, current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
+    """
+    Actualiza la posición de un repartidor y la refleja en el índice de asignación.
+
+    Sólo para admin y manager: las cuentas de reparto no están vinculadas a un
+    repartidor, así que podrían mover a cualquiera. Los repartidores informan
+    su posición por ``/ws/delivery/{delivery_person_id}``.
+
+    Args:
+        person_id (str): ID del repartidor
+        location (DeliveryLocationUpdate): Posición y disponibilidad actual
+
+    Returns:
+        dict: Mensaje de confirmación
+
+    Raises:
+        HTTPException: Si el repartidor no existe
+    """
+    update_data = {
+        "latitude": location.latitude,
+        "longitude": location.longitude,
+        "location_updated_at": datetime.utcnow()
+    }
+    if location.is_available is not None:
+        update_data["is_available"] = location.is_available
+
+    person = await storage.delivery_persons.update(person_id, update_data)
+    if not person:
+        raise HTTPException(status_code=404, detail="Delivery person not found")
+
+    index_courier(person, location.latitude, location.longitude)
+    return {"message": "Delivery person location updated successfully"}
+
+@api_router.get("/delivery-persons/{person_id}/trail")
+async def get_delivery_person_trail(person_id: str, current_admin: AdminUser = Depends(require_role(["admin", "manager", "delivery"]))):
+    """
+    Devuelve el rastro reciente en memoria de un repartidor.
+
+    Args:
+        person_id (str): ID del repartidor
+
+    Returns:
+        dict: Última posición y rastro reciente (del más antiguo al más nuevo)
+    """
+    trail = [
+        {"latitude": latitude, "longitude": longitude, "timestamp": timestamp}
+        for latitude, longitude, timestamp in location_tracker.trail(person_id)
+    ]
+    return {
+        "delivery_person_id": person_id,
+        "latest": trail[-1] if trail else None,
+        "trail": trail
+    }
+
+@api_router.get("/delivery/batches")
+async def get_delivery_batches(
+    capacity: int = COURIER_MAX_ORDERS,
+    max_detour_km: float = BATCH_MAX_DETOUR_KM,
+    current_admin: AdminUser = Depends(require_role(["admin", "manager", "delivery"]))
+):
+    """
+    Propone viajes de reparto con varias paradas para los pedidos listos.
+
+    Agrupa los pedidos ``ready`` sin repartidor asignado por zona y cercanía,
+    respetando la capacidad por viaje y el desvío máximo por cliente.
+
+    Args:
+        capacity (int): Máximo de pedidos por viaje
+        max_detour_km (float): Desvío máximo permitido por parada en km
+
+    Returns:
+        dict: Viajes propuestos y cantidad de pedidos considerados
+    """
+    if capacity < 1 or max_detour_km < 0:
+        raise HTTPException(status_code=400, detail="capacity must be >= 1 and max_detour_km >= 0")
+
+    orders = await storage.orders.find(
+        ["ready"], {"id": 1, "delivery_info": 1}, newest_first=False, unassigned=True
+    )
+
+    trips = plan_trips(orders, (STORE_LATITUDE, STORE_LONGITUDE), capacity, max_detour_km)
+    return {
+        "trips": trips,
+        "total_orders": len(orders),
+        "total_trips": len(trips)
+    }
+
+# Delivery zones
+@api_router.get("/delivery-zones")
+async def get_delivery_zones():
+    """
+    Devuelve las zonas de entrega vigentes con sus polígonos y tarifas.
+
+    Returns:
+        dict: Definición de zonas y tarifa por defecto
+    """
+    # Public endpoint - checkout shows zones and fees
+    return zone_registry.index.to_dict()
+
+@api_router.get("/delivery-zones/resolve")
+async def resolve_delivery_zone(latitude: float, longitude: float, subtotal: float = 0):
+    """
+    Resuelve la zona y la tarifa de envío para unas coordenadas.
+
+    Args:
+        latitude (float): Latitud de entrega
+        longitude (float): Longitud de entrega
+        subtotal (float): Subtotal del pedido para elegir la tarifa
+
+    Returns:
+        dict: Zona y tarifa de envío
+
+    Raises:
+        HTTPException: Si el punto está fuera del área de entrega
+    """
+    zone = zone_registry.index.resolve(latitude, longitude)
+    if zone is None:
+        raise HTTPException(status_code=404, detail="Delivery address is outside the delivery area")
+    return {"delivery_zone": zone.name, "label": zone.label, "delivery_fee": zone.fee_for(subtotal)}
+
+@api_router.put("/delivery-zones")
+async def update_delivery_zones(zones: Dict[str, Any], current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
+    """
+    Reemplaza la definición de zonas y tarifas sin reiniciar el servidor.
+
+    Args:
+        zones (Dict[str, Any]): Objeto con ``zones`` y ``default_fee``
+
+    Returns:
+        dict: Mensaje de confirmación y cantidad de zonas activas
+
+    Raises:
+        HTTPException: Si la definición es inválida
+    """
+    try:
+        index = zone_registry.replace(zones)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except OSError:
+        logger.exception("Failed to write delivery zones to %s", zone_registry.path)
+        raise HTTPException(status_code=503, detail="Delivery zones storage is not writable")
+    return {"message": "Delivery zones updated successfully", "zones": len(index.zones)}
 
 # Analytics endpoints (Admin and Manager only)
 @api_router.get("/analytics/today")
 async def get_today_analytics(current_admin: AdminUser = Depends(require_role(["admin", "manager"]))):
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # Total orders today
-    total_orders = await db.orders.count_documents({
-        "created_at": {"$gte": today}
-    })
-    
-    # Total revenue today
-    revenue_pipeline = [
-        {"$match": {"created_at": {"$gte": today}, "status": {"$ne": "cancelled"}}},
-        {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
-    ]
-    revenue_result = await db.orders.aggregate(revenue_pipeline).to_list(1)
-    total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
-    
-    # Orders by status
-    status_pipeline = [
-        {"$match": {"created_at": {"$gte": today}}},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    status_results = await db.orders.aggregate(status_pipeline).to_list(10)
-    orders_by_status = {result["_id"]: result["count"] for result in status_results}
-    
+    # Order count, revenue (excluding cancellations) and orders by status, archive included
+    stats = await storage.orders.stats_since(today)
+
     return {
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "orders_by_status": orders_by_status,
+        "total_orders": stats["total_orders"],
+        "total_revenue": stats["total_revenue"],
+        "orders_by_status": stats["orders_by_status"],
         "date": today.isoformat()
     }
 
+@api_router.get("/analytics/slow-queries")
+async def get_slow_queries(
+    hours: float = 24,
+    limit: int = 20,
+    current_admin: AdminUser = Depends(require_role(["admin"]))
+):
+    if db is None:
+        raise HTTPException(status_code=404, detail="The slow query log requires the MongoDB storage backend")
+    # Worst offenders first: same collection, command and query shape grouped together
+    since = datetime.utcnow() - timedelta(hours=hours)
+    pipeline = [
+        {"$match": {"ts": {"$gte": since}}},
+        {"$sort": {"ts": -1}},
+        {"$group": {
+            "_id": {"collection": "$collection", "command": "$command", "shape": "$shape"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_documents_returned": {"$max": "$documents_returned"},
+            "last_seen": {"$first": "$ts"},
+            # Not every entry is explained; $max prefers a captured plan over null
+            "plan": {"$max": "$plan"},
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": max(1, min(limit, 200))},
+        {"$project": {
+            "_id": 0, "collection": "$_id.collection", "command": "$_id.command", "shape": "$_id.shape",
+            "count": 1, "total_ms": 1, "max_ms": 1, "avg_ms": 1, "max_documents_returned": 1,
+            "last_seen": 1, "plan": 1,
+        }},
+    ]
+    offenders = await db[slow_query_log.collection_name].aggregate(pipeline).to_list(None)
+    return json_response({
+        "threshold_ms": slow_query_log.threshold_ms,
+        "since": since,
+        "queries": offenders,
+    })
+
+# Live worker diagnostics (Admin only)
+@api_router.get("/diagnostics/profile")
+async def get_cpu_profile(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    all_threads: bool = False,
+    current_admin: AdminUser = Depends(require_role(["admin"]))
+):
+    # Samples this worker only; repeat the call to reach the others behind the balancer
+    if not 0 < seconds <= PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {PROFILER_MAX_SECONDS:g}")
+    if profiler_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    async with profiler_lock:
+        profiler = SamplingProfiler(threading.get_ident(), max(interval_ms, 1) / 1000, all_threads)
+        lag_before = loop_monitor.max_lag
+        counts = await asyncio.to_thread(profiler.run, seconds)
+    filename = f"profile-{os.getpid()}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return PlainTextResponse(render_collapsed(counts), headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Samples": str(sum(counts.values())),
+        "X-Event-Loop-Max-Lag": f"{max(lag_before, loop_monitor.max_lag):.4f}",
+    })
+
+@api_router.get("/diagnostics/event-loop")
+async def get_event_loop_stats(current_admin: AdminUser = Depends(require_role(["admin"]))):
+    return {"pid": os.getpid(), **loop_monitor.stats()}
+
 # User Management (Admin only)
 @api_router.get("/users", response_model=List[dict])
 async def get_all_users(current_admin: AdminUser = Depends(require_role(["admin"]))):
-    users = await db.admin_users.find().to_list(1000)
+    users = await storage.users.list()
     return [{
         "id": user["id"],
         "username": user["username"],
@@ -894,7 +2428,7 @@ async def create_user(user_data: AdminUserCreate, current_admin: AdminUser = Dep
         hashed_password=hashed_password
     )
     
-    await db.admin_users.insert_one(new_user.dict())
+    await storage.users.insert(new_user.dict())
     return {"message": "User created successfully"}
 
 @api_router.put("/users/{user_id}/role")
@@ -903,12 +2437,9 @@ async def update_user_role(user_id: str, new_role: str, current_admin: AdminUser
     if new_role not in valid_roles:
         raise HTTPException(status_code=400, detail=f"Invalid role. Must be one of: {valid_roles}")
     
-    result = await db.admin_users.update_one(
-        {"id": user_id},
-        {"$set": {"role": new_role}}
-    )
+    updated = await storage.users.update(user_id, {"role": new_role})
     
-    if result.matched_count == 0:
+    if not updated:
         raise HTTPException(status_code=404, detail="User not found")
     
     return {"message": "User role updated successfully"}
@@ -968,13 +2499,19 @@ async def initialize_sample_menu():
     ]
     
     # Clear existing menu and add sample items
-    await db.menu_items.delete_many({})
-    for item_data in sample_menu:
-        menu_item = MenuItem(**item_data)
-        await db.menu_items.insert_one(menu_item.dict())
+    await storage.menu.delete_all()
+    menu_items = [MenuItem(**item_data).dict() for item_data in sample_menu]
+    await storage.menu.insert_many(menu_items)
+    menu_cache.invalidate()
+    menu_search.rebuild(menu_items)
     
     return {"message": "Sample menu initialized successfully"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # Prometheus scrape endpoint; rendered on demand from the in-process registry
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -986,6 +2523,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so they wrap every other middleware and see the full request
+app.add_middleware(HTTPMetricsMiddleware, registry=metrics_registry)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -993,6 +2534,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def load_courier_index():
+    """Reconstruye el índice de repartidores y sus pedidos asignados, e inicia el volcado de posiciones."""
+    await storage.setup()
+    for person in await storage.delivery_persons.list(limit=None):
+        for order_id in person.get("current_orders", []):
+            location_tracker.assign_order(person["id"], order_id)
+        if person.get("latitude") is None or person.get("longitude") is None:
+            continue
+        index_courier(person, person["latitude"], person["longitude"])
+    logger.info("Courier index loaded with %d delivery persons", len(courier_index))
+
+    indexed = await menu_search_refresh.get("index", refresh_menu_search)
+    logger.info("Menu search index loaded with %d items", indexed)
+
+    # Oldest first, so the model's queue keeps arrival order
+    active_orders = await storage.orders.find(
+        ["received", "confirmed", "preparing", "ready"],
+        {"id": 1, "status": 1, "assigned_delivery_person": 1, "kitchen_work_minutes": 1, "kitchen_lead_minutes": 1,
+         "estimated_delivery": 1, "release_at": 1},
+        newest_first=False, limit=None
+    )
+    for order in active_orders:
+        eta_model.track(
+            order["id"], order["status"],
+            order.get("kitchen_work_minutes", 0), order.get("kitchen_lead_minutes", 0),
+            order["status"] == "ready" and not order.get("assigned_delivery_person")
+        )
+        if order["status"] in QUEUED_STATUSES and order.get("estimated_delivery"):
+            eta_model.quote(order["id"], order["estimated_delivery"], fixed=order.get("release_at") is not None)
+    logger.info("ETA model loaded with %.0f backlog minutes", eta_model.backlog_minutes)
+
+    kitchen_orders = await storage.orders.find(
+        ["received", "confirmed", "preparing"], {"id": 1, "items": 1, "estimated_delivery": 1},
+        newest_first=False, limit=None
+    )
+    await enqueue_kitchen_tickets(kitchen_orders)
+    logger.info("Kitchen scheduler loaded with %d tickets", len(kitchen_scheduler))
+
+    scheduled_orders = await storage.orders.find(["scheduled"], {"id": 1, "release_at": 1}, limit=None)
+    for order in scheduled_orders:
+        preorder_wheel.schedule(order["id"], order["release_at"].replace(tzinfo=timezone.utc).timestamp())
+    logger.info("Pre-order wheel loaded with %d scheduled orders", len(preorder_wheel))
+
+    if db is not None:
+        await slow_query_log.ensure_collection(db, SLOW_QUERY_LOG_SIZE_MB * 1024 * 1024)
+        app.state.slow_query_task = asyncio.create_task(slow_query_log_loop())
+    if tracer.exporter is not None:
+        app.state.trace_export_task = asyncio.create_task(trace_export_loop())
+    app.state.loop_monitor_task = asyncio.create_task(loop_monitor.run())
+    app.state.location_flush_task = asyncio.create_task(courier_location_flush_loop())
+    app.state.preorder_release_task = asyncio.create_task(preorder_release_loop())
+    app.state.order_archive_task = asyncio.create_task(order_archive_loop())
+    app.state.customer_key_backfill_task = asyncio.create_task(customer_key_backfill_task())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for task_name in ("location_flush_task", "preorder_release_task", "order_archive_task",
+                      "customer_key_backfill_task", "slow_query_task", "trace_export_task", "loop_monitor_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    await flush_courier_locations(force=True)
+    if tracer.exporter is not None:
+        tracer.exporter.flush()
+    thumbnails.close()
+    await storage.close()
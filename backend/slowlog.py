@@ -0,0 +1,289 @@
+"""
+Registro de consultas lentas a MongoDB con captura automática de ``explain``.
+
+``SlowQueryLog`` es un listener de monitoreo de comandos de PyMongo: cualquier
+comando que supere el umbral se encola con la forma de su filtro (los valores
+reemplazados por ``"?"``), su duración y los documentos devueltos. El listener
+sólo encola; una tarea de fondo vacía la cola, ejecuta ``explain`` sobre el
+comando original y guarda las entradas en una colección capped.
+
+Para no duplicar la carga de una consulta que ya es lenta, cada forma se
+explica como mucho una vez por ``explain_interval`` segundos; las entradas
+intermedias se guardan sin plan.
+"""
+
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Command fields that belong to the session/transport, not to the query itself
+_TRANSPORT_FIELDS = {
+    "lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "autocommit",
+    "startTransaction", "writeConcern", "readConcern", "apiVersion", "apiStrict",
+    "apiDeprecationErrors", "comment", "maxTimeMS",
+}
+
+# Commands explained as-is; updates and deletes are explained as the equivalent find
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify"}
+
+
+def query_shape(value: Any) -> Any:
+    """
+    Reemplaza los valores de un filtro o pipeline por ``"?"`` conservando su estructura.
+
+    Las rutas de campo (``"$status"``) se conservan porque son parte de la forma.
+
+    Args:
+        value (Any): Filtro, pipeline o valor
+
+    Returns:
+        Any: Forma normalizada del valor
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return "?"
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Any:
+    """
+    Devuelve la forma de la parte relevante de un comando.
+
+    Args:
+        command_name (str): Nombre del comando (find, aggregate, update...)
+        command (dict): Comando tal como lo envió el driver
+
+    Returns:
+        Any: Forma del filtro, pipeline o sentencias del comando
+    """
+    if command_name == "find":
+        return {
+            "filter": query_shape(command.get("filter", {})),
+            "sort": command.get("sort"),
+            "projection": bool(command.get("projection")),
+        }
+    if command_name == "aggregate":
+        return query_shape(command.get("pipeline", []))
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"filter": query_shape(statements[0].get("q", {}))}
+    if command_name in ("count", "distinct", "findAndModify"):
+        return {"filter": query_shape(command.get("query", {}))}
+    return None
+
+
+def documents_returned(command_name: str, reply: dict) -> Optional[int]:
+    """
+    Cuenta los documentos devueltos o afectados según la respuesta del servidor.
+
+    Args:
+        command_name (str): Nombre del comando
+        reply (dict): Respuesta del servidor
+
+    Returns:
+        Optional[int]: Cantidad de documentos, o None si no aplica
+    """
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    if "n" in reply:
+        return reply["n"]
+    return None
+
+
+def explain_command(command_name: str, command: dict) -> Optional[dict]:
+    """
+    Arma el comando a explicar a partir del original.
+
+    Args:
+        command_name (str): Nombre del comando
+        command (dict): Comando original
+
+    Returns:
+        Optional[dict]: Comando sin campos de sesión, o None si no se puede explicar
+    """
+    if command_name in _EXPLAINABLE:
+        return {key: value for key, value in command.items() if key not in _TRANSPORT_FIELDS}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or []
+        if statements:
+            return {"find": command[command_name], "filter": statements[0].get("q", {})}
+    return None
+
+
+def _winning_plan_stages(plan: dict) -> Tuple[List[str], List[str]]:
+    # SBE plans wrap the classic tree in "queryPlan"
+    node = plan.get("queryPlan", plan)
+    stages, indexes = [], []
+    while node:
+        stages.append(node.get("stage"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        node = node.get("inputStage") or (node.get("inputStages") or [None])[0]
+    return stages, indexes
+
+
+def summarize_explain(explain: dict) -> dict:
+    """
+    Resume la salida de ``explain`` en las cifras que importan para diagnosticar.
+
+    Args:
+        explain (dict): Resultado del comando ``explain``
+
+    Returns:
+        dict: Etapas del plan ganador, índices usados, si hubo COLLSCAN y, con
+        ``executionStats``, documentos y claves examinados
+    """
+    cursor_stage = {}
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            cursor_stage = stage["$cursor"]
+            break
+    planner = explain.get("queryPlanner") or cursor_stage.get("queryPlanner") or {}
+    stats = explain.get("executionStats") or cursor_stage.get("executionStats") or {}
+    stages, indexes = _winning_plan_stages(planner.get("winningPlan", {}))
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Listener que detecta comandos lentos y los guarda con su plan de ejecución.
+
+    Attributes:
+        threshold_ms (float): Duración desde la que un comando se considera lento
+        collection_name (str): Colección capped donde se guardan las entradas
+        explain_interval (float): Segundos mínimos entre dos ``explain`` de la misma forma
+        verbosity (str): Verbosidad de ``explain`` (queryPlanner o executionStats)
+    """
+
+    def __init__(self, threshold_ms: float, collection_name: str = "slow_queries",
+                 explain_interval: float = 60.0, verbosity: str = "executionStats", max_pending: int = 1000):
+        self.threshold_ms = threshold_ms
+        self.collection_name = collection_name
+        self.explain_interval = explain_interval
+        self.verbosity = verbosity
+        self._started: Dict[int, Tuple[str, str, dict]] = {}
+        # Appended from Motor's executor threads, drained on the event loop
+        self._pending: Deque[dict] = deque(maxlen=max_pending)
+        self._explained_at: Dict[str, float] = {}
+
+    def _ignored(self, command_name: str, collection: Any) -> bool:
+        # Never log our own writes and explains, or we would feed ourselves
+        return command_name == "explain" or collection == self.collection_name or not isinstance(collection, str)
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if self.threshold_ms < 0:
+            return
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        if self._ignored(event.command_name, collection):
+            return
+        self._started[event.request_id] = (event.database_name, collection, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        started = self._started.pop(event.request_id, None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        database, collection, command = started
+        self._pending.append({
+            "database": database,
+            "collection": collection,
+            "command_name": event.command_name,
+            "command": command,
+            "duration_ms": round(duration_ms, 2),
+            "documents_returned": documents_returned(event.command_name, event.reply),
+            "ts": datetime.utcnow(),
+        })
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._started.pop(event.request_id, None)
+
+    async def ensure_collection(self, db, size_bytes: int):
+        """
+        Crea la colección capped si no existe.
+
+        Args:
+            db: Base de datos de Motor
+            size_bytes (int): Tamaño máximo de la colección
+        """
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=size_bytes)
+        except CollectionInvalid:
+            pass
+        await db[self.collection_name].create_index("ts")
+
+    async def _explain(self, db, entry: dict, shape_key: str) -> Optional[dict]:
+        now = time.monotonic()
+        if now - self._explained_at.get(shape_key, float("-inf")) < self.explain_interval:
+            return None
+        command = explain_command(entry["command_name"], entry["command"])
+        if command is None:
+            return None
+        self._explained_at[shape_key] = now
+        try:
+            result = await db.client[entry["database"]].command({"explain": command, "verbosity": self.verbosity})
+        except PyMongoError as exc:
+            return {"error": str(exc)}
+        return summarize_explain(result)
+
+    async def flush(self, db) -> int:
+        """
+        Explica y guarda las entradas pendientes.
+
+        Args:
+            db: Base de datos de Motor donde está la colección del registro
+
+        Returns:
+            int: Entradas guardadas
+        """
+        entries = []
+        while self._pending:
+            entry = self._pending.popleft()
+            # Stored as text: filter shapes have "$" and dotted keys that older servers reject
+            shape = json.dumps(command_shape(entry["command_name"], entry["command"]), default=str)
+            shape_key = f'{entry["database"]}.{entry["collection"]}:{entry["command_name"]}:{shape}'
+            plan = await self._explain(db, entry, shape_key)
+            entries.append({
+                "ts": entry["ts"],
+                "database": entry["database"],
+                "collection": entry["collection"],
+                "command": entry["command_name"],
+                "shape": shape,
+                "duration_ms": entry["duration_ms"],
+                "documents_returned": entry["documents_returned"],
+                "plan": plan,
+            })
+            if plan is not None and plan.get("collection_scan"):
+                logger.warning(
+                    "Slow %s on %s (%.0f ms) scans the whole collection: %s",
+                    entry["command_name"], entry["collection"], entry["duration_ms"], shape
+                )
+        if entries:
+            await db[self.collection_name].insert_many(entries, ordered=False)
+        return len(entries)
@@ -0,0 +1,879 @@
+"""
+Capa de almacenamiento intercambiable para menú, pedidos, usuarios y repartidores.
+
+Los handlers usan repositorios con operaciones del dominio (``get``,
+``find``, ``add_order``...) en lugar de colecciones de Motor, así que el mismo
+servidor corre sobre:
+
+- ``MongoStorage`` (storage_mongo.py): MongoDB vía Motor, el backend de producción.
+- ``MemoryStorage``: diccionarios en memoria con índices secundarios, para
+  pruebas, benchmarks y demos.
+- ``SqliteStorage`` (storage_sqlite.py): SQLite embebido en modo WAL, para
+  locales chicos que no quieren mantener un servidor de base de datos.
+
+Los pedidos terminados se pueden mover a un archivo frío (``orders_archive``)
+con ``OrderRepository.archive``; el seguimiento y las analíticas los siguen
+encontrando ahí, mientras los listados operativos sólo leen la parte caliente.
+
+Los pedidos se indexan también por ``customer_key`` (el teléfono normalizado,
+ver customers.py) y fecha, para el historial de cada cliente; el perfil
+resumido de cada cliente vive en ``customers``.
+
+Los documentos entran y salen como dicts con la misma forma que en MongoDB
+(sin ``_id``), y las proyecciones usan la sintaxis de inclusión de Mongo
+(``{"_id": 0, "delivery_info.customer_name": 1}``), así que
+``serialization.model_projection`` sirve igual con todos los backends.
+"""
+
+import bisect
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def copy_document(value: Any) -> Any:
+    """Copia profunda de un documento (dicts, listas y valores inmutables)."""
+    if isinstance(value, dict):
+        return {key: copy_document(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_document(item) for item in value]
+    return value
+
+
+def apply_projection(document: dict, projection: Optional[Dict[str, int]] = None) -> dict:
+    """
+    Aplica una proyección de inclusión estilo Mongo a un documento.
+
+    Args:
+        document (dict): Documento completo
+        projection (Optional[Dict[str, int]]): Campos a incluir (admite rutas con punto);
+            None o sólo ``_id`` devuelve el documento entero
+
+    Returns:
+        dict: Copia del documento con los campos proyectados
+    """
+    paths = [name for name, include in (projection or {}).items() if include and name != "_id"]
+    if not paths:
+        return copy_document(document)
+    result = {}
+    for path in paths:
+        source, target = document, result
+        parts = path.split(".")
+        for part in parts[:-1]:
+            source = source.get(part) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, dict) and parts[-1] in source:
+                target[parts[-1]] = copy_document(source[parts[-1]])
+    return result
+
+
+def set_fields(document: dict, fields: Dict[str, Any]):
+    """Aplica un ``$set`` (admite rutas con punto) sobre el documento en el lugar."""
+    for path, value in fields.items():
+        target = document
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy_document(value)
+
+
+def empty_stats() -> dict:
+    return {"total_orders": 0, "total_revenue": 0, "orders_by_status": {}}
+
+
+def customer_order_changes(order: dict) -> Dict[str, Dict[str, Any]]:
+    """
+    Actualización estilo Mongo que un pedido aplica al perfil de su cliente.
+
+    Args:
+        order (dict): Pedido completo
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Operadores ``$set``, ``$inc``, ``$min`` y ``$max``
+    """
+    info = order["delivery_info"]
+    counts = {"order_count": 1}
+    for item in order["items"]:
+        path = f"items.{item['menu_item_id']}"
+        counts[path] = counts.get(path, 0) + item["quantity"]
+    return {
+        "$set": {
+            "customer_name": info.get("customer_name", ""),
+            "last_address": info.get("delivery_address", ""),
+            "last_zone": info.get("delivery_zone", ""),
+        },
+        "$inc": counts,
+        "$min": {"first_order_at": order["created_at"]},
+        "$max": {"last_order_at": order["created_at"]},
+    }
+
+
+def new_customer(customer_key: str) -> dict:
+    return {"id": customer_key, "order_count": 0, "items": {}}
+
+
+def add_customer_order(profile: dict, order: dict):
+    """Suma un pedido al perfil de su cliente en el lugar (lo mismo que ``customer_order_changes`` en Mongo)."""
+    changes = customer_order_changes(order)
+    set_fields(profile, changes["$set"])
+    for path, amount in changes["$inc"].items():
+        target = profile
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = target.get(parts[-1], 0) + amount
+    for name, value in changes["$min"].items():
+        if profile.get(name) is None or value < profile[name]:
+            profile[name] = value
+    for name, value in changes["$max"].items():
+        if profile.get(name) is None or value > profile[name]:
+            profile[name] = value
+
+
+async def scan_tiers(page: Callable[[bool, Any, int], Awaitable[List[Tuple[Any, dict]]]], start: Any,
+                     batch_size: int) -> AsyncIterator[List[dict]]:
+    """
+    Recorre juntos la parte caliente y el archivo, en lotes por clave ascendente.
+
+    Cada vuelta lee una página de cada parte a partir de la última clave
+    entregada y las mezcla. Un pedido repetido en las dos partes (copiado al
+    archivo y todavía sin borrar) tiene la misma clave y sale una sola vez;
+    uno que ya no está en la página caliente fue copiado antes, así que la
+    página del archivo, leída después, lo trae. Como nunca se vuelve atrás,
+    no hace falta recordar qué pedidos ya salieron.
+
+    Args:
+        page (Callable): ``page(archived, after, limit)`` devuelve hasta ``limit``
+            pares ``(clave, pedido)`` de una parte, con clave mayor que ``after``
+        start (Any): Clave menor que todas las del rango
+        batch_size (int): Pedidos por lote
+
+    Yields:
+        List[dict]: Lote de pedidos completos
+    """
+    after = start
+    while True:
+        # Hot page first: anything missing from it was already copied when the archive page is read
+        hot = await page(False, after, batch_size)
+        archived = await page(True, after, batch_size)
+        # Past the end of a full page a tier may hold keys not read yet
+        ends = [rows[-1][0] for rows in (hot, archived) if len(rows) == batch_size]
+        bound = min(ends) if ends else None
+        batch: Dict[Any, dict] = {}
+        # On equal keys the hot copy comes last and wins
+        for key, order in heapq.merge(archived, hot, key=lambda row: row[0]):
+            if bound is not None and key > bound:
+                break
+            if key not in batch and len(batch) == batch_size:
+                bound = next(reversed(batch))
+                break
+            batch[key] = order
+        if batch:
+            yield list(batch.values())
+        if bound is None:
+            return
+        after = next(reversed(batch))
+
+
+class MenuRepository(ABC):
+    """
+    Productos del menú (colección ``menu_items``).
+    """
+
+    @abstractmethod
+    async def insert(self, item: dict):
+        raise NotImplementedError
+
+    async def insert_many(self, items: Sequence[dict]):
+        for item in items:
+            await self.insert(item)
+
+    @abstractmethod
+    async def get(self, item_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, item_ids: Sequence[str]) -> List[dict]:
+        """Devuelve los productos existentes entre ``item_ids`` (en cualquier orden)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list(self, category: Optional[str] = None, available_only: bool = True,
+                   limit: Optional[int] = 1000) -> List[dict]:
+        """Productos en orden de alta, opcionalmente de una categoría."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def replace(self, item_id: str, item: dict) -> bool:
+        """Reemplaza un producto; devuelve False si no existía."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, item_id: str, fields: Dict[str, Any]) -> bool:
+        """Aplica ``fields`` a un producto; devuelve False si no existía."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_all(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def sync(self, upserts: Sequence[dict], deactivate: Sequence[str]):
+        """
+        Aplica una sincronización del menú en una sola escritura.
+
+        Args:
+            upserts (Sequence[dict]): Productos completos a crear o reemplazar (por ``id``)
+            deactivate (Sequence[str]): IDs a dar de baja lógica (``available = False``)
+        """
+        raise NotImplementedError
+
+
+class UserRepository(ABC):
+    """
+    Usuarios del panel (colección ``admin_users``).
+    """
+
+    @abstractmethod
+    async def insert(self, user: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list(self, limit: Optional[int] = 1000) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        """Aplica ``fields`` a un usuario; devuelve False si no existía."""
+        raise NotImplementedError
+
+
+class DeliveryPersonRepository(ABC):
+    """
+    Repartidores y sus pedidos asignados (colección ``delivery_persons``).
+    """
+
+    @abstractmethod
+    async def insert(self, person: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, person_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list(self, available_only: bool = False, limit: Optional[int] = 1000) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, person_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        """Aplica ``fields`` y devuelve el repartidor actualizado (None si no existe)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_update(self, updates: Sequence[Tuple[str, Dict[str, Any]]]):
+        """Aplica varios pares (id, campos) de una vez; los ids inexistentes se ignoran."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_order(self, person_id: str, order_id: str, capacity: Optional[int] = None) -> Optional[dict]:
+        """
+        Agrega un pedido a la carga de un repartidor de forma atómica.
+
+        Args:
+            person_id (str): ID del repartidor
+            order_id (str): ID del pedido (no se duplica si ya estaba)
+            capacity (Optional[int]): Si se indica, sólo asigna si el repartidor está
+                disponible y tiene menos de ``capacity`` pedidos
+
+        Returns:
+            Optional[dict]: Repartidor actualizado, o None si no existe o no cumple la condición
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def remove_order(self, person_id: str, order_id: str) -> Optional[dict]:
+        """Quita un pedido de la carga y devuelve el repartidor actualizado (None si no existe)."""
+        raise NotImplementedError
+
+
+class OrderRepository(ABC):
+    """
+    Pedidos (colección ``orders``) y su archivo frío (``orders_archive``).
+    """
+
+    @abstractmethod
+    async def insert(self, order: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, order_id: str, projection: Optional[Dict[str, int]] = None,
+                  include_archive: bool = False) -> Optional[dict]:
+        """Busca un pedido; con ``include_archive`` también en el archivo si no está en la parte caliente."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, order_id: str, fields: Dict[str, Any]) -> bool:
+        """Aplica ``fields`` a un pedido; devuelve False si no existía."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_if_status(self, order_id: str, status: str, fields: Dict[str, Any]) -> Optional[dict]:
+        """
+        Aplica ``fields`` sólo si el pedido sigue en ``status`` (atómico entre workers).
+
+        Returns:
+            Optional[dict]: Pedido actualizado, o None si no existe o cambió de estado
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find(self, statuses: Optional[Sequence[str]] = None, projection: Optional[Dict[str, int]] = None,
+                   newest_first: bool = True, limit: Optional[int] = 1000, unassigned: bool = False) -> List[dict]:
+        """
+        Lista pedidos ordenados por ``created_at``.
+
+        Args:
+            statuses (Optional[Sequence[str]]): Estados a incluir (None = todos)
+            projection (Optional[Dict[str, int]]): Proyección de inclusión
+            newest_first (bool): Orden descendente por fecha de creación
+            limit (Optional[int]): Máximo de pedidos (None = sin límite)
+            unassigned (bool): Sólo pedidos sin repartidor asignado
+
+        Returns:
+            List[dict]: Pedidos encontrados
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stats_since(self, since: datetime) -> dict:
+        """
+        Totales de los pedidos creados desde ``since``, incluidos los archivados.
+
+        Returns:
+            dict: ``total_orders``, ``total_revenue`` (sin cancelados) y ``orders_by_status``
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def latest_by_status(self, statuses: Sequence[str], projection: Optional[Dict[str, int]],
+                               limit: int) -> Dict[str, dict]:
+        """
+        Cantidad y pedidos más recientes de cada estado, para los tableros.
+
+        Returns:
+            Dict[str, dict]: ``{estado: {"count": n, "orders": [...]}}`` sólo con estados presentes
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def scan(self, since: datetime, until: datetime, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """
+        Recorre en lotes los pedidos creados en ``[since, until)``, archivo incluido.
+
+        Las dos partes se recorren juntas por ``created_at`` ascendente (ver
+        ``scan_tiers``): un pedido archivado durante el recorrido sale una sola
+        vez, de la parte caliente o del archivo. Sólo hay en memoria una página
+        de cada parte a la vez; sirve para exportaciones de cualquier tamaño.
+
+        Args:
+            since (datetime): Inicio del rango (inclusive)
+            until (datetime): Fin del rango (exclusivo)
+            batch_size (int): Pedidos por lote
+
+        Yields:
+            List[dict]: Lote de pedidos completos
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def archive(self, statuses: Sequence[str], before: datetime, limit: int) -> int:
+        """
+        Mueve al archivo un lote de pedidos terminados.
+
+        Toma hasta ``limit`` pedidos en ``statuses`` cuyo ``updated_at`` es anterior a
+        ``before``, los más antiguos primero. Cada lote es idempotente: si se corta a
+        mitad de camino, el siguiente lo completa sin duplicar pedidos.
+
+        Args:
+            statuses (Sequence[str]): Estados terminales a archivar
+            before (datetime): Sólo pedidos sin cambios desde esta fecha
+            limit (int): Tamaño del lote
+
+        Returns:
+            int: Pedidos que salieron de la parte caliente
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count(self, archived: bool = False) -> int:
+        """Cantidad de pedidos en la parte caliente (o en el archivo)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def history(self, customer_key: str, limit: int,
+                      before: Optional[Tuple[datetime, str]] = None) -> List[dict]:
+        """
+        Pedidos de un cliente, del más nuevo al más viejo, archivo incluido.
+
+        Pagina por ``(created_at, id)``: el cursor es el último pedido de la
+        página anterior, así que cada página es una lectura corta del índice
+        ``(customer_key, created_at)`` sin importar cuán atrás se vaya.
+
+        Args:
+            customer_key (str): Teléfono normalizado del cliente
+            limit (int): Pedidos por página
+            before (Optional[Tuple[datetime, str]]): ``(created_at, id)`` del último pedido ya visto
+
+        Returns:
+            List[dict]: Pedidos completos
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def backfill_customer_keys(self, key_for: Callable[[str], str], limit: int) -> int:
+        """
+        Completa ``customer_key`` en un lote de pedidos guardados antes de que existiera.
+
+        Args:
+            key_for (Callable[[str], str]): Teléfono -> clave del cliente
+            limit (int): Tamaño del lote
+
+        Returns:
+            int: Pedidos completados (menos que ``limit`` cuando no quedan más)
+        """
+        raise NotImplementedError
+
+
+class CustomerRepository(ABC):
+    """
+    Perfiles resumidos de clientes (colección ``customers``), por teléfono normalizado.
+    """
+
+    @abstractmethod
+    async def get(self, customer_key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, profile: dict):
+        """Crea o reemplaza un perfil completo (por ``id``)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def record_order(self, order: dict) -> bool:
+        """
+        Suma un pedido nuevo al perfil de su cliente, si el perfil ya existe.
+
+        Los perfiles que faltan se arman desde el historial al consultarlos, así
+        que un pedido de un cliente sin perfil no crea uno parcial.
+
+        Returns:
+            bool: True si había un perfil que actualizar
+        """
+        raise NotImplementedError
+
+
+class Storage:
+    """
+    Conjunto de repositorios de un backend.
+
+    Attributes:
+        menu (MenuRepository): Productos del menú
+        users (UserRepository): Usuarios del panel
+        delivery_persons (DeliveryPersonRepository): Repartidores
+        orders (OrderRepository): Pedidos
+        customers (CustomerRepository): Perfiles de clientes
+        db: Base de Motor subyacente (sólo en ``MongoStorage``; None en el resto)
+    """
+
+    name = "base"
+    db = None
+
+    menu: MenuRepository
+    users: UserRepository
+    delivery_persons: DeliveryPersonRepository
+    orders: OrderRepository
+    customers: CustomerRepository
+
+    async def setup(self):
+        """Crea tablas e índices que falten."""
+
+    async def close(self):
+        """Libera conexiones y recursos."""
+
+
+class MemoryMenuRepository(MenuRepository):
+
+    def __init__(self):
+        self._items: Dict[str, dict] = {}
+        self._by_category: Dict[str, Dict[str, None]] = {}
+
+    def _index(self, item: dict):
+        self._by_category.setdefault(item.get("category"), {})[item["id"]] = None
+
+    def _unindex(self, item: dict):
+        self._by_category.get(item.get("category"), {}).pop(item["id"], None)
+
+    async def insert(self, item: dict):
+        self._items[item["id"]] = copy_document(item)
+        self._index(item)
+
+    async def get(self, item_id: str) -> Optional[dict]:
+        item = self._items.get(item_id)
+        return copy_document(item) if item is not None else None
+
+    async def get_many(self, item_ids: Sequence[str]) -> List[dict]:
+        return [copy_document(self._items[item_id]) for item_id in set(item_ids) if item_id in self._items]
+
+    async def list(self, category: Optional[str] = None, available_only: bool = True,
+                   limit: Optional[int] = 1000) -> List[dict]:
+        ids = self._items if category is None else self._by_category.get(category, {})
+        items = []
+        for item_id in ids:
+            item = self._items[item_id]
+            if available_only and not item.get("available"):
+                continue
+            items.append(copy_document(item))
+            if limit is not None and len(items) >= limit:
+                break
+        return items
+
+    async def replace(self, item_id: str, item: dict) -> bool:
+        current = self._items.get(item_id)
+        if current is None:
+            return False
+        self._unindex(current)
+        self._items[item_id] = copy_document(item)
+        self._index(item)
+        return True
+
+    async def update(self, item_id: str, fields: Dict[str, Any]) -> bool:
+        item = self._items.get(item_id)
+        if item is None:
+            return False
+        self._unindex(item)
+        set_fields(item, fields)
+        self._index(item)
+        return True
+
+    async def delete_all(self):
+        self._items.clear()
+        self._by_category.clear()
+
+    async def sync(self, upserts: Sequence[dict], deactivate: Sequence[str]):
+        for item in upserts:
+            if not await self.replace(item["id"], item):
+                await self.insert(item)
+        for item_id in deactivate:
+            await self.update(item_id, {"available": False})
+
+
+class MemoryUserRepository(UserRepository):
+
+    def __init__(self):
+        self._users: Dict[str, dict] = {}
+        self._by_username: Dict[str, List[str]] = {}
+
+    async def insert(self, user: dict):
+        self._users[user["id"]] = copy_document(user)
+        self._by_username.setdefault(user["username"], []).append(user["id"])
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        ids = self._by_username.get(username)
+        return copy_document(self._users[ids[0]]) if ids else None
+
+    async def list(self, limit: Optional[int] = 1000) -> List[dict]:
+        return [copy_document(user) for user in list(self._users.values())[:limit]]
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        user = self._users.get(user_id)
+        if user is None:
+            return False
+        if "username" in fields:
+            self._by_username[user["username"]].remove(user_id)
+        set_fields(user, fields)
+        if "username" in fields:
+            self._by_username.setdefault(user["username"], []).append(user_id)
+        return True
+
+
+class MemoryDeliveryPersonRepository(DeliveryPersonRepository):
+
+    def __init__(self):
+        self._persons: Dict[str, dict] = {}
+        self._available: Dict[str, None] = {}
+
+    def _reindex(self, person: dict):
+        if person.get("is_available"):
+            self._available[person["id"]] = None
+        else:
+            self._available.pop(person["id"], None)
+
+    async def insert(self, person: dict):
+        self._persons[person["id"]] = copy_document(person)
+        self._reindex(person)
+
+    async def get(self, person_id: str) -> Optional[dict]:
+        person = self._persons.get(person_id)
+        return copy_document(person) if person is not None else None
+
+    async def list(self, available_only: bool = False, limit: Optional[int] = 1000) -> List[dict]:
+        ids = self._available if available_only else self._persons
+        # Keep insertion order for available couriers too
+        if available_only:
+            ids = [person_id for person_id in self._persons if person_id in ids]
+        return [copy_document(self._persons[person_id]) for person_id in list(ids)[:limit]]
+
+    async def update(self, person_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        person = self._persons.get(person_id)
+        if person is None:
+            return None
+        set_fields(person, fields)
+        self._reindex(person)
+        return copy_document(person)
+
+    async def bulk_update(self, updates: Sequence[Tuple[str, Dict[str, Any]]]):
+        for person_id, fields in updates:
+            await self.update(person_id, fields)
+
+    async def add_order(self, person_id: str, order_id: str, capacity: Optional[int] = None) -> Optional[dict]:
+        person = self._persons.get(person_id)
+        if person is None:
+            return None
+        orders = person.setdefault("current_orders", [])
+        if capacity is not None and (not person.get("is_available") or len(orders) >= capacity):
+            return None
+        if order_id not in orders:
+            orders.append(order_id)
+        return copy_document(person)
+
+    async def remove_order(self, person_id: str, order_id: str) -> Optional[dict]:
+        person = self._persons.get(person_id)
+        if person is None:
+            return None
+        orders = person.get("current_orders", [])
+        if order_id in orders:
+            orders.remove(order_id)
+        return copy_document(person)
+
+
+class MemoryOrderRepository(OrderRepository):
+
+    def __init__(self):
+        self._orders: Dict[str, dict] = {}
+        self._by_status: Dict[str, Dict[str, None]] = {}
+        # (created_at, insertion sequence, id), kept sorted for range scans and newest-first listings
+        self._by_created: List[Tuple[datetime, int, str]] = []
+        self._keys: Dict[str, Tuple[datetime, int, str]] = {}
+        self._sequence = 0
+        self._archived: Dict[str, dict] = {}
+        self._archived_by_created: List[Tuple[datetime, int, str]] = []
+        # customer_key -> ids of its orders, hot and archived
+        self._by_customer: Dict[str, Dict[str, None]] = {}
+
+    def _index(self, order: dict):
+        self._by_status.setdefault(order["status"], {})[order["id"]] = None
+        self._sequence += 1
+        key = (order["created_at"], self._sequence, order["id"])
+        self._keys[order["id"]] = key
+        if not self._by_created or key > self._by_created[-1]:
+            self._by_created.append(key)
+        else:
+            bisect.insort(self._by_created, key)
+
+    def _unindex(self, order: dict):
+        self._by_status.get(order["status"], {}).pop(order["id"], None)
+        key = self._keys.pop(order["id"])
+        position = bisect.bisect_left(self._by_created, key)
+        del self._by_created[position]
+
+    async def insert(self, order: dict):
+        order = copy_document(order)
+        self._orders[order["id"]] = order
+        self._index(order)
+        if order.get("customer_key"):
+            self._by_customer.setdefault(order["customer_key"], {})[order["id"]] = None
+
+    async def get(self, order_id: str, projection: Optional[Dict[str, int]] = None,
+                  include_archive: bool = False) -> Optional[dict]:
+        order = self._orders.get(order_id)
+        if order is None and include_archive:
+            order = self._archived.get(order_id)
+        return apply_projection(order, projection) if order is not None else None
+
+    def _set(self, order: dict, fields: Dict[str, Any]):
+        if "status" in fields or "created_at" in fields:
+            self._unindex(order)
+            set_fields(order, fields)
+            self._index(order)
+        else:
+            set_fields(order, fields)
+
+    async def update(self, order_id: str, fields: Dict[str, Any]) -> bool:
+        order = self._orders.get(order_id)
+        if order is None:
+            return False
+        self._set(order, fields)
+        return True
+
+    async def update_if_status(self, order_id: str, status: str, fields: Dict[str, Any]) -> Optional[dict]:
+        order = self._orders.get(order_id)
+        if order is None or order["status"] != status:
+            return None
+        self._set(order, fields)
+        return copy_document(order)
+
+    def _matching(self, statuses: Optional[Sequence[str]], newest_first: bool, limit: Optional[int],
+                  unassigned: bool) -> List[dict]:
+        def wanted(order: dict) -> bool:
+            return not unassigned or order.get("assigned_delivery_person") is None
+
+        if statuses is None:
+            keys = reversed(self._by_created) if newest_first else iter(self._by_created)
+            orders = []
+            for _, _, order_id in keys:
+                order = self._orders[order_id]
+                if wanted(order):
+                    orders.append(order)
+                    if limit is not None and len(orders) >= limit:
+                        break
+            return orders
+
+        # Status index first, then a partial sort of just the matching orders
+        keys = [
+            self._keys[order_id]
+            for status in set(statuses) for order_id in self._by_status.get(status, {})
+            if wanted(self._orders[order_id])
+        ]
+        if limit is None:
+            keys.sort(reverse=newest_first)
+        else:
+            keys = heapq.nlargest(limit, keys) if newest_first else heapq.nsmallest(limit, keys)
+        return [self._orders[order_id] for _, _, order_id in keys]
+
+    async def find(self, statuses: Optional[Sequence[str]] = None, projection: Optional[Dict[str, int]] = None,
+                   newest_first: bool = True, limit: Optional[int] = 1000, unassigned: bool = False) -> List[dict]:
+        return [
+            apply_projection(order, projection)
+            for order in self._matching(statuses, newest_first, limit, unassigned)
+        ]
+
+    async def stats_since(self, since: datetime) -> dict:
+        stats = empty_stats()
+        by_status = stats["orders_by_status"]
+        for keys, orders in ((self._by_created, self._orders), (self._archived_by_created, self._archived)):
+            start = bisect.bisect_left(keys, (since,))
+            for _, _, order_id in keys[start:]:
+                order = orders[order_id]
+                stats["total_orders"] += 1
+                by_status[order["status"]] = by_status.get(order["status"], 0) + 1
+                if order["status"] != "cancelled":
+                    stats["total_revenue"] += order.get("total", 0)
+        return stats
+
+    async def latest_by_status(self, statuses: Sequence[str], projection: Optional[Dict[str, int]],
+                               limit: int) -> Dict[str, dict]:
+        columns = {}
+        for status in statuses:
+            count = len(self._by_status.get(status, {}))
+            if count:
+                orders = self._matching([status], True, limit, False)
+                columns[status] = {
+                    "count": count,
+                    "orders": [apply_projection(order, projection) for order in orders],
+                }
+        return columns
+
+    async def scan(self, since: datetime, until: datetime, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        async def page(archived: bool, after: tuple, limit: int) -> List[Tuple[tuple, dict]]:
+            keys, orders = (self._archived_by_created, self._archived) if archived else (self._by_created, self._orders)
+            position = bisect.bisect_right(keys, after)
+            return [(key, copy_document(orders[key[2]])) for key in keys[position:position + limit] if key[0] < until]
+
+        async for batch in scan_tiers(page, (since,), batch_size):
+            yield batch
+
+    async def archive(self, statuses: Sequence[str], before: datetime, limit: int) -> int:
+        candidates = [
+            order for status in set(statuses) for order_id in self._by_status.get(status, {})
+            for order in (self._orders[order_id],) if order["updated_at"] < before
+        ]
+        batch = heapq.nsmallest(limit, candidates, key=lambda order: order["updated_at"])
+        for order in batch:
+            key = self._keys[order["id"]]
+            self._unindex(order)
+            del self._orders[order["id"]]
+            self._archived[order["id"]] = order
+            bisect.insort(self._archived_by_created, key)
+        return len(batch)
+
+    async def count(self, archived: bool = False) -> int:
+        return len(self._archived if archived else self._orders)
+
+    async def history(self, customer_key: str, limit: int,
+                      before: Optional[Tuple[datetime, str]] = None) -> List[dict]:
+        orders = [
+            self._orders.get(order_id) or self._archived[order_id]
+            for order_id in self._by_customer.get(customer_key, {})
+        ]
+        if before is not None:
+            orders = [order for order in orders if (order["created_at"], order["id"]) < before]
+        newest = heapq.nlargest(limit, orders, key=lambda order: (order["created_at"], order["id"]))
+        return [copy_document(order) for order in newest]
+
+    async def backfill_customer_keys(self, key_for: Callable[[str], str], limit: int) -> int:
+        missing = list(itertools.islice((
+            order for orders in (self._orders, self._archived) for order in orders.values()
+            if "customer_key" not in order
+        ), limit))
+        for order in missing:
+            order["customer_key"] = key_for(order["delivery_info"].get("customer_phone", ""))
+            if order["customer_key"]:
+                self._by_customer.setdefault(order["customer_key"], {})[order["id"]] = None
+        return len(missing)
+
+
+class MemoryCustomerRepository(CustomerRepository):
+
+    def __init__(self):
+        self._profiles: Dict[str, dict] = {}
+
+    async def get(self, customer_key: str) -> Optional[dict]:
+        profile = self._profiles.get(customer_key)
+        return copy_document(profile) if profile is not None else None
+
+    async def save(self, profile: dict):
+        self._profiles[profile["id"]] = copy_document(profile)
+
+    async def record_order(self, order: dict) -> bool:
+        profile = self._profiles.get(order.get("customer_key") or "")
+        if profile is None:
+            return False
+        add_customer_order(profile, order)
+        return True
+
+
+class MemoryStorage(Storage):
+    """
+    Backend en memoria con índices secundarios (por estado, fecha, cliente,
+    categoría, usuario y disponibilidad). No persiste nada: sirve para pruebas,
+    benchmarks y demos de un solo proceso.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.menu = MemoryMenuRepository()
+        self.users = MemoryUserRepository()
+        self.delivery_persons = MemoryDeliveryPersonRepository()
+        self.orders = MemoryOrderRepository()
+        self.customers = MemoryCustomerRepository()
@@ -0,0 +1,336 @@
+"""
+Backend de almacenamiento sobre MongoDB (Motor).
+
+Traduce las operaciones de los repositorios de ``storage.py`` a las mismas
+consultas que usaban los handlers: actualizaciones condicionales con
+``find_one_and_update`` para que varios workers no se pisen, ``bulk_write``
+para las posiciones de repartidores y agregaciones para tableros y
+analíticas. Los pedidos archivados viven en la colección ``orders_archive``
+y los perfiles de clientes en ``customers``.
+"""
+
+import asyncio
+import heapq
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+
+from storage import (
+    CustomerRepository, DeliveryPersonRepository, MenuRepository, OrderRepository, Storage, UserRepository,
+    customer_order_changes, empty_stats, scan_tiers,
+)
+
+# Customer history index: newest first, id breaks ties between orders of the same millisecond
+HISTORY_SORT = [("created_at", -1), ("id", -1)]
+SCAN_SORT = [("created_at", 1), ("id", 1)]
+
+
+def mongo_projection(projection: Optional[Dict[str, int]]) -> Dict[str, int]:
+    return {"_id": 0, **(projection or {})}
+
+
+class MongoMenuRepository(MenuRepository):
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, item: dict):
+        await self.collection.insert_one(dict(item))
+
+    async def insert_many(self, items: Sequence[dict]):
+        if items:
+            await self.collection.insert_many([dict(item) for item in items])
+
+    async def get(self, item_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": item_id}, {"_id": 0})
+
+    async def get_many(self, item_ids: Sequence[str]) -> List[dict]:
+        return await self.collection.find({"id": {"$in": list(set(item_ids))}}, {"_id": 0}).to_list(None)
+
+    async def list(self, category: Optional[str] = None, available_only: bool = True,
+                   limit: Optional[int] = 1000) -> List[dict]:
+        query = {}
+        if category is not None:
+            query["category"] = category
+        if available_only:
+            query["available"] = True
+        return await self.collection.find(query, {"_id": 0}).to_list(limit)
+
+    async def replace(self, item_id: str, item: dict) -> bool:
+        result = await self.collection.replace_one({"id": item_id}, dict(item))
+        return result.matched_count > 0
+
+    async def update(self, item_id: str, fields: Dict[str, Any]) -> bool:
+        result = await self.collection.update_one({"id": item_id}, {"$set": fields})
+        return result.matched_count > 0
+
+    async def delete_all(self):
+        await self.collection.delete_many({})
+
+    async def sync(self, upserts: Sequence[dict], deactivate: Sequence[str]):
+        operations = [ReplaceOne({"id": item["id"]}, dict(item), upsert=True) for item in upserts]
+        operations += [UpdateOne({"id": item_id}, {"$set": {"available": False}}) for item_id in deactivate]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+
+class MongoUserRepository(UserRepository):
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, user: dict):
+        await self.collection.insert_one(dict(user))
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        return await self.collection.find_one({"username": username}, {"_id": 0})
+
+    async def list(self, limit: Optional[int] = 1000) -> List[dict]:
+        return await self.collection.find({}, {"_id": 0}).to_list(limit)
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        result = await self.collection.update_one({"id": user_id}, {"$set": fields})
+        return result.matched_count > 0
+
+
+class MongoDeliveryPersonRepository(DeliveryPersonRepository):
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, person: dict):
+        await self.collection.insert_one(dict(person))
+
+    async def get(self, person_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": person_id}, {"_id": 0})
+
+    async def list(self, available_only: bool = False, limit: Optional[int] = 1000) -> List[dict]:
+        query = {"is_available": True} if available_only else {}
+        return await self.collection.find(query, {"_id": 0}).to_list(limit)
+
+    async def update(self, person_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"id": person_id}, {"$set": fields}, {"_id": 0}, return_document=ReturnDocument.AFTER,
+        )
+
+    async def bulk_update(self, updates: Sequence[Tuple[str, Dict[str, Any]]]):
+        if updates:
+            await self.collection.bulk_write(
+                [UpdateOne({"id": person_id}, {"$set": fields}) for person_id, fields in updates],
+                ordered=False,
+            )
+
+    async def add_order(self, person_id: str, order_id: str, capacity: Optional[int] = None) -> Optional[dict]:
+        query = {"id": person_id}
+        if capacity is not None:
+            # Capacity check and push in one atomic update, so concurrent workers cannot overbook
+            query["is_available"] = True
+            query[f"current_orders.{capacity - 1}"] = {"$exists": False}
+        return await self.collection.find_one_and_update(
+            query, {"$addToSet": {"current_orders": order_id}}, {"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def remove_order(self, person_id: str, order_id: str) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"id": person_id}, {"$pull": {"current_orders": order_id}}, {"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+class MongoOrderRepository(OrderRepository):
+
+    def __init__(self, collection, archive):
+        self.collection = collection
+        self.archive_collection = archive
+
+    async def insert(self, order: dict):
+        await self.collection.insert_one(dict(order))
+
+    async def get(self, order_id: str, projection: Optional[Dict[str, int]] = None,
+                  include_archive: bool = False) -> Optional[dict]:
+        order = await self.collection.find_one({"id": order_id}, mongo_projection(projection))
+        if order is None and include_archive:
+            order = await self.archive_collection.find_one({"id": order_id}, mongo_projection(projection))
+        return order
+
+    async def update(self, order_id: str, fields: Dict[str, Any]) -> bool:
+        result = await self.collection.update_one({"id": order_id}, {"$set": fields})
+        return result.matched_count > 0
+
+    async def update_if_status(self, order_id: str, status: str, fields: Dict[str, Any]) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"id": order_id, "status": status}, {"$set": fields}, {"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def find(self, statuses: Optional[Sequence[str]] = None, projection: Optional[Dict[str, int]] = None,
+                   newest_first: bool = True, limit: Optional[int] = 1000, unassigned: bool = False) -> List[dict]:
+        query = {}
+        if statuses is not None:
+            query["status"] = {"$in": list(statuses)}
+        if unassigned:
+            query["assigned_delivery_person"] = None
+        cursor = self.collection.find(query, mongo_projection(projection)).sort("created_at", -1 if newest_first else 1)
+        return await cursor.to_list(limit)
+
+    async def stats_since(self, since: datetime) -> dict:
+        pipeline = [
+            {"$match": {"created_at": {"$gte": since}}},
+            {"$group": {
+                "_id": "$status",
+                "count": {"$sum": 1},
+                "revenue": {"$sum": "$total"},
+            }},
+        ]
+        stats = empty_stats()
+        by_status = stats["orders_by_status"]
+        for collection in (self.collection, self.archive_collection):
+            async for group in collection.aggregate(pipeline):
+                stats["total_orders"] += group["count"]
+                by_status[group["_id"]] = by_status.get(group["_id"], 0) + group["count"]
+                if group["_id"] != "cancelled":
+                    stats["total_revenue"] += group["revenue"]
+        return stats
+
+    async def latest_by_status(self, statuses: Sequence[str], projection: Optional[Dict[str, int]],
+                               limit: int) -> Dict[str, dict]:
+        # Counts come from the (status, created_at) index alone; each column then reads only its
+        # newest `limit` orders through the same index, however long delivered/cancelled grow
+        counts = self.collection.aggregate([
+            {"$match": {"status": {"$in": list(statuses)}}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ])
+        columns = {group["_id"]: {"count": group["count"], "orders": []} async for group in counts}
+        pages = await asyncio.gather(*(
+            self.collection.find({"status": status}, mongo_projection(projection))
+            .sort("created_at", -1).to_list(limit)
+            for status in columns
+        ))
+        for column, orders in zip(columns.values(), pages):
+            column["orders"] = orders
+        return columns
+
+    async def scan(self, since: datetime, until: datetime, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        async def page(archived: bool, after: Tuple[datetime, str], limit: int) -> List[Tuple[tuple, dict]]:
+            created_at, order_id = after
+            query = {
+                "created_at": {"$lt": until},
+                "$or": [{"created_at": {"$gt": created_at}}, {"created_at": created_at, "id": {"$gt": order_id}}],
+            }
+            collection = self.archive_collection if archived else self.collection
+            orders = await collection.find(query, {"_id": 0}).sort(SCAN_SORT).to_list(limit)
+            return [((order["created_at"], order["id"]), order) for order in orders]
+
+        async for batch in scan_tiers(page, (since, ""), batch_size):
+            yield batch
+
+    async def archive(self, statuses: Sequence[str], before: datetime, limit: int) -> int:
+        query = {"status": {"$in": list(statuses)}, "updated_at": {"$lt": before}}
+        batch = await self.collection.find(query, {"_id": 0}).sort("updated_at", 1).to_list(limit)
+        if not batch:
+            return 0
+        # Copy first, then delete: an interrupted batch leaves duplicates that the
+        # next run overwrites (the upsert is keyed by id), never lost orders
+        await self.archive_collection.bulk_write(
+            [ReplaceOne({"id": order["id"]}, order, upsert=True) for order in batch], ordered=False,
+        )
+        ids = [order["id"] for order in batch]
+        result = await self.collection.delete_many({**query, "id": {"$in": ids}})
+        if result.deleted_count < len(ids):
+            # Orders touched between the copy and the delete stay hot; drop their stale copies
+            kept = await self.collection.distinct("id", {"id": {"$in": ids}})
+            await self.archive_collection.delete_many({"id": {"$in": kept}})
+        return result.deleted_count
+
+    async def count(self, archived: bool = False) -> int:
+        return await (self.archive_collection if archived else self.collection).count_documents({})
+
+    async def history(self, customer_key: str, limit: int,
+                      before: Optional[Tuple[datetime, str]] = None) -> List[dict]:
+        query: Dict[str, Any] = {"customer_key": customer_key}
+        if before is not None:
+            created_at, order_id = before
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "id": {"$lt": order_id}},
+            ]
+        # One page from each tier, merged: at most 2 * limit documents read
+        pages = [
+            await collection.find(query, {"_id": 0}).sort(HISTORY_SORT).to_list(limit)
+            for collection in (self.collection, self.archive_collection)
+        ]
+        merged = heapq.merge(*pages, key=lambda order: (order["created_at"], order["id"]), reverse=True)
+        return list(merged)[:limit]
+
+    async def backfill_customer_keys(self, key_for: Callable[[str], str], limit: int) -> int:
+        filled = 0
+        for collection in (self.collection, self.archive_collection):
+            orders = await collection.find(
+                {"customer_key": {"$exists": False}}, {"_id": 0, "id": 1, "delivery_info.customer_phone": 1}
+            ).to_list(limit - filled)
+            if orders:
+                await collection.bulk_write([
+                    UpdateOne(
+                        {"id": order["id"]},
+                        {"$set": {"customer_key": key_for(order["delivery_info"].get("customer_phone", ""))}},
+                    )
+                    for order in orders
+                ], ordered=False)
+            filled += len(orders)
+            if filled >= limit:
+                break
+        return filled
+
+
+class MongoCustomerRepository(CustomerRepository):
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, customer_key: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": customer_key}, {"_id": 0})
+
+    async def save(self, profile: dict):
+        await self.collection.replace_one({"id": profile["id"]}, dict(profile), upsert=True)
+
+    async def record_order(self, order: dict) -> bool:
+        if not order.get("customer_key"):
+            return False
+        # A single atomic update, so concurrent orders from the same customer all count
+        result = await self.collection.update_one({"id": order["customer_key"]}, customer_order_changes(order))
+        return result.matched_count > 0
+
+
+class MongoStorage(Storage):
+    """
+    Backend de producción sobre una base de Motor.
+
+    Args:
+        db: Base de datos de Motor (``AsyncIOMotorDatabase`` o compatible)
+    """
+
+    name = "mongo"
+
+    def __init__(self, db):
+        self.db = db
+        self.menu = MongoMenuRepository(db.menu_items)
+        self.users = MongoUserRepository(db.admin_users)
+        self.delivery_persons = MongoDeliveryPersonRepository(db.delivery_persons)
+        self.orders = MongoOrderRepository(db.orders, db.orders_archive)
+        self.customers = MongoCustomerRepository(db.customers)
+
+    async def setup(self):
+        await self.db.orders.create_index([("status", 1), ("created_at", -1)])
+        await self.db.orders.create_index([("status", 1), ("release_at", 1)])
+        await self.db.orders.create_index([("status", 1), ("updated_at", 1)])
+        await self.db.orders_archive.create_index("id", unique=True)
+        for collection in (self.db.orders, self.db.orders_archive):
+            await collection.create_index(SCAN_SORT)
+        for collection in (self.db.orders, self.db.orders_archive):
+            await collection.create_index([("customer_key", 1), *HISTORY_SORT])
+        await self.db.customers.create_index("id", unique=True)
+
+    async def close(self):
+        self.db.client.close()
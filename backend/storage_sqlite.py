@@ -0,0 +1,616 @@
+"""
+Backend de almacenamiento embebido sobre SQLite en modo WAL.
+
+Pensado para un local con un solo servidor: no hace falta un mongod y la base
+es un único archivo. Cada tabla guarda el documento completo como JSON (las
+fechas como ``{"$date": "..."}``) más las columnas indexadas que usan las
+consultas (estado, fecha de creación, categoría, usuario...). Los pedidos
+archivados pasan a la tabla ``orders_archive``, con las mismas columnas, y los
+perfiles de clientes viven en ``customers``.
+
+Todas las operaciones corren en un único hilo dedicado, así que el loop de
+eventos nunca se bloquea en disco y las lecturas-modificaciones-escrituras
+(asignar un pedido a un repartidor, liberar un pre-pedido) son atómicas en el
+proceso; ``BEGIN IMMEDIATE`` las serializa además entre procesos. WAL permite
+que otros procesos lean mientras se escribe.
+"""
+
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from storage import (
+    CustomerRepository, DeliveryPersonRepository, MenuRepository, OrderRepository, Storage, UserRepository,
+    add_customer_order, apply_projection, empty_stats, scan_tiers, set_fields,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_items (
+    id TEXT PRIMARY KEY,
+    category TEXT,
+    available INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS menu_items_category ON menu_items (category, available);
+
+CREATE TABLE IF NOT EXISTS admin_users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS admin_users_username ON admin_users (username);
+
+CREATE TABLE IF NOT EXISTS delivery_persons (
+    id TEXT PRIMARY KEY,
+    is_available INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    assigned_delivery_person TEXT,
+    total REAL NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_status_created_at ON orders (status, created_at);
+CREATE INDEX IF NOT EXISTS orders_status_updated_at ON orders (status, updated_at);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders (created_at);
+
+CREATE TABLE IF NOT EXISTS orders_archive (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    assigned_delivery_person TEXT,
+    total REAL NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_archive_created_at ON orders_archive (created_at);
+
+CREATE TABLE IF NOT EXISTS customers (
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release: (table, column, type), applied to existing files
+MIGRATIONS = [
+    ("orders", "customer_key", "TEXT"),
+    ("orders_archive", "customer_key", "TEXT"),
+]
+
+# Indexes on migrated columns, created once the columns exist
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS orders_customer_created_at ON orders (customer_key, created_at, id);
+CREATE INDEX IF NOT EXISTS orders_archive_customer_created_at ON orders_archive (customer_key, created_at, id);
+"""
+
+ORDER_COLUMNS = "id, status, created_at, updated_at, assigned_delivery_person, total, customer_key, doc"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(value: dict) -> Any:
+    if len(value) == 1 and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def dumps_document(document: dict) -> str:
+    return json.dumps(document, default=_encode, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_document(text: str) -> dict:
+    return json.loads(text, object_hook=_decode)
+
+
+def sortable_time(value: datetime) -> str:
+    """Fecha con formato fijo, para que el orden de texto coincida con el cronológico."""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class SqliteTable:
+    """
+    Tabla de documentos JSON con columnas derivadas para los índices.
+
+    Args:
+        storage (SqliteStorage): Backend dueño de la conexión
+        name (str): Nombre de la tabla
+        columns (Dict[str, Callable[[dict], Any]]): Columna indexada y cómo se obtiene del documento
+    """
+
+    def __init__(self, storage: "SqliteStorage", name: str, columns: Dict[str, Callable[[dict], Any]]):
+        self.storage = storage
+        self.name = name
+        self.columns = columns
+        names = ["id", *columns, "doc"]
+        self._insert_sql = f"INSERT INTO {name} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        self._update_sql = f"UPDATE {name} SET {', '.join(f'{column} = ?' for column in [*columns, 'doc'])} WHERE id = ?"
+
+    def _values(self, document: dict) -> list:
+        return [extract(document) for extract in self.columns.values()] + [dumps_document(document)]
+
+    def insert(self, connection: sqlite3.Connection, document: dict):
+        connection.execute(self._insert_sql, [document["id"], *self._values(document)])
+
+    def write(self, connection: sqlite3.Connection, document: dict):
+        connection.execute(self._update_sql, [*self._values(document), document["id"]])
+
+    def load(self, connection: sqlite3.Connection, document_id: str) -> Optional[dict]:
+        row = connection.execute(f"SELECT doc FROM {self.name} WHERE id = ?", (document_id,)).fetchone()
+        return loads_document(row[0]) if row else None
+
+    def select(self, connection: sqlite3.Connection, where: str = "", params: Sequence[Any] = (),
+               order: str = "rowid", limit: Optional[int] = None) -> List[dict]:
+        sql = f"SELECT doc FROM {self.name}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [loads_document(doc) for doc, in connection.execute(sql, params)]
+
+    def modify(self, connection: sqlite3.Connection, document_id: str,
+               change: Callable[[dict], bool]) -> Optional[dict]:
+        """Lee, modifica y reescribe un documento; ``change`` devuelve False para no escribir."""
+        document = self.load(connection, document_id)
+        if document is None or not change(document):
+            return None
+        self.write(connection, document)
+        return document
+
+    async def run(self, function: Callable, *args):
+        return await self.storage.run(function, *args)
+
+
+class SqliteMenuRepository(MenuRepository):
+
+    def __init__(self, storage: "SqliteStorage"):
+        self.table = SqliteTable(storage, "menu_items", {
+            "category": lambda item: item.get("category"),
+            "available": lambda item: int(bool(item.get("available"))),
+        })
+
+    async def insert(self, item: dict):
+        await self.insert_many([item])
+
+    async def insert_many(self, items: Sequence[dict]):
+        def insert(connection):
+            with transaction(connection):
+                for item in items:
+                    self.table.insert(connection, item)
+        await self.table.run(insert)
+
+    async def get(self, item_id: str) -> Optional[dict]:
+        return await self.table.run(self.table.load, item_id)
+
+    async def get_many(self, item_ids: Sequence[str]) -> List[dict]:
+        ids = list(set(item_ids))
+        if not ids:
+            return []
+        return await self.table.run(self.table.select, f"id IN ({', '.join('?' * len(ids))})", ids)
+
+    async def list(self, category: Optional[str] = None, available_only: bool = True,
+                   limit: Optional[int] = 1000) -> List[dict]:
+        conditions, params = [], []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if available_only:
+            conditions.append("available = 1")
+        return await self.table.run(self.table.select, " AND ".join(conditions), params, "rowid", limit)
+
+    async def replace(self, item_id: str, item: dict) -> bool:
+        def replace(connection):
+            with transaction(connection):
+                if self.table.load(connection, item_id) is None:
+                    return False
+                self.table.write(connection, {**item, "id": item_id})
+                return True
+        return await self.table.run(replace)
+
+    async def update(self, item_id: str, fields: Dict[str, Any]) -> bool:
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, item_id, lambda item: set_fields(item, fields) or True)
+        return await self.table.run(update) is not None
+
+    async def delete_all(self):
+        def delete(connection):
+            with transaction(connection):
+                connection.execute("DELETE FROM menu_items")
+        await self.table.run(delete)
+
+    async def sync(self, upserts: Sequence[dict], deactivate: Sequence[str]):
+        def sync(connection):
+            with transaction(connection):
+                for item in upserts:
+                    # Rewrite in place so existing items keep their position in listings
+                    if self.table.load(connection, item["id"]) is None:
+                        self.table.insert(connection, item)
+                    else:
+                        self.table.write(connection, item)
+                for item_id in deactivate:
+                    self.table.modify(connection, item_id, lambda item: set_fields(item, {"available": False}) or True)
+        await self.table.run(sync)
+
+
+class SqliteUserRepository(UserRepository):
+
+    def __init__(self, storage: "SqliteStorage"):
+        self.table = SqliteTable(storage, "admin_users", {"username": lambda user: user["username"]})
+
+    async def insert(self, user: dict):
+        def insert(connection):
+            with transaction(connection):
+                self.table.insert(connection, user)
+        await self.table.run(insert)
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        users = await self.table.run(self.table.select, "username = ?", [username], "rowid", 1)
+        return users[0] if users else None
+
+    async def list(self, limit: Optional[int] = 1000) -> List[dict]:
+        return await self.table.run(self.table.select, "", (), "rowid", limit)
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, user_id, lambda user: set_fields(user, fields) or True)
+        return await self.table.run(update) is not None
+
+
+class SqliteDeliveryPersonRepository(DeliveryPersonRepository):
+
+    def __init__(self, storage: "SqliteStorage"):
+        self.table = SqliteTable(storage, "delivery_persons", {
+            "is_available": lambda person: int(bool(person.get("is_available"))),
+        })
+
+    async def insert(self, person: dict):
+        def insert(connection):
+            with transaction(connection):
+                self.table.insert(connection, person)
+        await self.table.run(insert)
+
+    async def get(self, person_id: str) -> Optional[dict]:
+        return await self.table.run(self.table.load, person_id)
+
+    async def list(self, available_only: bool = False, limit: Optional[int] = 1000) -> List[dict]:
+        where = "is_available = 1" if available_only else ""
+        return await self.table.run(self.table.select, where, (), "rowid", limit)
+
+    async def update(self, person_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, person_id, lambda person: set_fields(person, fields) or True)
+        return await self.table.run(update)
+
+    async def bulk_update(self, updates: Sequence[Tuple[str, Dict[str, Any]]]):
+        def update(connection):
+            with transaction(connection):
+                for person_id, fields in updates:
+                    self.table.modify(connection, person_id, lambda person: set_fields(person, fields) or True)
+        await self.table.run(update)
+
+    async def add_order(self, person_id: str, order_id: str, capacity: Optional[int] = None) -> Optional[dict]:
+        def add(person: dict) -> bool:
+            orders = person.setdefault("current_orders", [])
+            if capacity is not None and (not person.get("is_available") or len(orders) >= capacity):
+                return False
+            if order_id not in orders:
+                orders.append(order_id)
+            return True
+
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, person_id, add)
+        return await self.table.run(update)
+
+    async def remove_order(self, person_id: str, order_id: str) -> Optional[dict]:
+        def remove(person: dict) -> bool:
+            orders = person.get("current_orders", [])
+            if order_id in orders:
+                orders.remove(order_id)
+            return True
+
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, person_id, remove)
+        return await self.table.run(update)
+
+
+class SqliteOrderRepository(OrderRepository):
+
+    def __init__(self, storage: "SqliteStorage"):
+        columns = {
+            "status": lambda order: order["status"],
+            "created_at": lambda order: sortable_time(order["created_at"]),
+            "updated_at": lambda order: sortable_time(order["updated_at"]),
+            "assigned_delivery_person": lambda order: order.get("assigned_delivery_person"),
+            "total": lambda order: order.get("total", 0),
+            # NULL marks orders stored before customer keys existed, for the backfill
+            "customer_key": lambda order: order.get("customer_key"),
+        }
+        self.table = SqliteTable(storage, "orders", columns)
+        self.archive_table = SqliteTable(storage, "orders_archive", columns)
+
+    async def insert(self, order: dict):
+        def insert(connection):
+            with transaction(connection):
+                self.table.insert(connection, order)
+        await self.table.run(insert)
+
+    async def get(self, order_id: str, projection: Optional[Dict[str, int]] = None,
+                  include_archive: bool = False) -> Optional[dict]:
+        def load(connection):
+            order = self.table.load(connection, order_id)
+            if order is None and include_archive:
+                order = self.archive_table.load(connection, order_id)
+            return order
+
+        order = await self.table.run(load)
+        return apply_projection(order, projection) if order is not None and projection else order
+
+    async def update(self, order_id: str, fields: Dict[str, Any]) -> bool:
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, order_id, lambda order: set_fields(order, fields) or True)
+        return await self.table.run(update) is not None
+
+    async def update_if_status(self, order_id: str, status: str, fields: Dict[str, Any]) -> Optional[dict]:
+        def change(order: dict) -> bool:
+            if order["status"] != status:
+                return False
+            set_fields(order, fields)
+            return True
+
+        def update(connection):
+            with transaction(connection):
+                return self.table.modify(connection, order_id, change)
+        return await self.table.run(update)
+
+    async def find(self, statuses: Optional[Sequence[str]] = None, projection: Optional[Dict[str, int]] = None,
+                   newest_first: bool = True, limit: Optional[int] = 1000, unassigned: bool = False) -> List[dict]:
+        conditions, params = [], []
+        if statuses is not None:
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if unassigned:
+            conditions.append("assigned_delivery_person IS NULL")
+        order = "created_at DESC" if newest_first else "created_at"
+        orders = await self.table.run(self.table.select, " AND ".join(conditions), params, order, limit)
+        return [apply_projection(order, projection) for order in orders] if projection else orders
+
+    async def stats_since(self, since: datetime) -> dict:
+        def stats(connection):
+            return connection.execute(
+                "SELECT status, COUNT(*), SUM(total) FROM ("
+                " SELECT status, total FROM orders WHERE created_at >= ?"
+                " UNION ALL SELECT status, total FROM orders_archive WHERE created_at >= ?"
+                ") GROUP BY status",
+                (sortable_time(since), sortable_time(since)),
+            ).fetchall()
+
+        result = empty_stats()
+        for status, count, revenue in await self.table.run(stats):
+            result["total_orders"] += count
+            result["orders_by_status"][status] = count
+            if status != "cancelled":
+                result["total_revenue"] += revenue
+        return result
+
+    async def latest_by_status(self, statuses: Sequence[str], projection: Optional[Dict[str, int]],
+                               limit: int) -> Dict[str, dict]:
+        placeholders = ", ".join("?" * len(statuses))
+
+        def latest(connection):
+            counts = connection.execute(
+                f"SELECT status, COUNT(*) FROM orders WHERE status IN ({placeholders}) GROUP BY status",
+                list(statuses),
+            ).fetchall()
+            rows = connection.execute(
+                f"SELECT status, doc FROM ("
+                f" SELECT status, doc, created_at,"
+                f" ROW_NUMBER() OVER (PARTITION BY status ORDER BY created_at DESC) AS position"
+                f" FROM orders WHERE status IN ({placeholders})"
+                f") WHERE position <= ? ORDER BY status, created_at DESC",
+                [*statuses, limit],
+            ).fetchall()
+            return counts, rows
+
+        counts, rows = await self.table.run(latest)
+        columns = {status: {"count": count, "orders": []} for status, count in counts}
+        for status, doc in rows:
+            columns[status]["orders"].append(apply_projection(loads_document(doc), projection))
+        return columns
+
+    async def scan(self, since: datetime, until: datetime, batch_size: int = 1000) -> AsyncIterator[List[dict]]:
+        async def page(archived: bool, after: Tuple[str, str], limit: int) -> List[Tuple[tuple, dict]]:
+            table = self.archive_table.name if archived else self.table.name
+            # Keyset pagination on (created_at, id): each page is a short read, no cursor held open
+            rows = await self.table.run(lambda connection: connection.execute(
+                f"SELECT created_at, id, doc FROM {table}"
+                f" WHERE (created_at, id) > (?, ?) AND created_at < ?"
+                f" ORDER BY created_at, id LIMIT ?",
+                [*after, sortable_time(until), int(limit)],
+            ).fetchall())
+            return [((created_at, order_id), loads_document(doc)) for created_at, order_id, doc in rows]
+
+        async for batch in scan_tiers(page, (sortable_time(since), ""), batch_size):
+            yield batch
+
+    async def archive(self, statuses: Sequence[str], before: datetime, limit: int) -> int:
+        placeholders = ", ".join("?" * len(statuses))
+
+        def archive(connection):
+            # Copy and delete in one transaction, so a batch is either fully moved or untouched
+            with transaction(connection):
+                ids = [order_id for order_id, in connection.execute(
+                    f"SELECT id FROM orders WHERE status IN ({placeholders}) AND updated_at < ?"
+                    f" ORDER BY updated_at LIMIT ?",
+                    [*statuses, sortable_time(before), int(limit)],
+                )]
+                if ids:
+                    batch = ", ".join("?" * len(ids))
+                    connection.execute(
+                        f"INSERT OR REPLACE INTO orders_archive ({ORDER_COLUMNS})"
+                        f" SELECT {ORDER_COLUMNS} FROM orders WHERE id IN ({batch})",
+                        ids,
+                    )
+                    connection.execute(f"DELETE FROM orders WHERE id IN ({batch})", ids)
+                return len(ids)
+        return await self.table.run(archive)
+
+    async def count(self, archived: bool = False) -> int:
+        name = self.archive_table.name if archived else self.table.name
+        return await self.table.run(lambda connection: connection.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0])
+
+    async def history(self, customer_key: str, limit: int,
+                      before: Optional[Tuple[datetime, str]] = None) -> List[dict]:
+        condition, params = "customer_key = ?", [customer_key]
+        if before is not None:
+            condition += " AND (created_at, id) < (?, ?)"
+            params += [sortable_time(before[0]), before[1]]
+
+        def history(connection):
+            # Each side is a short backwards walk of its (customer_key, created_at, id) index
+            return connection.execute(
+                f"SELECT doc FROM ("
+                f" SELECT * FROM (SELECT created_at, id, doc FROM orders WHERE {condition}"
+                f" ORDER BY created_at DESC, id DESC LIMIT ?)"
+                f" UNION ALL"
+                f" SELECT * FROM (SELECT created_at, id, doc FROM orders_archive WHERE {condition}"
+                f" ORDER BY created_at DESC, id DESC LIMIT ?)"
+                f") ORDER BY created_at DESC, id DESC LIMIT ?",
+                [*params, int(limit), *params, int(limit), int(limit)],
+            ).fetchall()
+
+        return [loads_document(doc) for doc, in await self.table.run(history)]
+
+    async def backfill_customer_keys(self, key_for: Callable[[str], str], limit: int) -> int:
+        def backfill(connection):
+            filled = 0
+            with transaction(connection):
+                for table in (self.table, self.archive_table):
+                    for order in table.select(connection, "customer_key IS NULL", (), "rowid", limit - filled):
+                        order["customer_key"] = key_for(order["delivery_info"].get("customer_phone", ""))
+                        table.write(connection, order)
+                        filled += 1
+                    if filled >= limit:
+                        break
+            return filled
+        return await self.table.run(backfill)
+
+
+class SqliteCustomerRepository(CustomerRepository):
+
+    def __init__(self, storage: "SqliteStorage"):
+        self.table = SqliteTable(storage, "customers", {})
+
+    async def get(self, customer_key: str) -> Optional[dict]:
+        return await self.table.run(self.table.load, customer_key)
+
+    async def save(self, profile: dict):
+        def save(connection):
+            with transaction(connection):
+                connection.execute(
+                    "INSERT OR REPLACE INTO customers (id, doc) VALUES (?, ?)", (profile["id"], dumps_document(profile))
+                )
+        await self.table.run(save)
+
+    async def record_order(self, order: dict) -> bool:
+        if not order.get("customer_key"):
+            return False
+
+        def record(connection):
+            with transaction(connection):
+                return self.table.modify(
+                    connection, order["customer_key"], lambda profile: add_customer_order(profile, order) or True
+                )
+        return await self.table.run(record) is not None
+
+
+def migrate(connection: sqlite3.Connection):
+    """Agrega a una base existente las columnas (e índices) de ``MIGRATIONS`` que le falten."""
+    for table, column, column_type in MIGRATIONS:
+        columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    connection.executescript(MIGRATED_INDEXES)
+
+
+@contextmanager
+def transaction(connection: sqlite3.Connection):
+    """Transacción de escritura que toma el lock de escritura al empezar."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class SqliteStorage(Storage):
+    """
+    Backend embebido sobre un archivo SQLite.
+
+    Args:
+        path (str): Ruta del archivo (``":memory:"`` para una base temporal)
+        busy_timeout_ms (int): Espera máxima por el lock de escritura de otro proceso
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        # One thread owns the connection; every operation is queued onto it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+        self._connection: Optional[sqlite3.Connection] = None
+        self.menu = SqliteMenuRepository(self)
+        self.users = SqliteUserRepository(self)
+        self.delivery_persons = SqliteDeliveryPersonRepository(self)
+        self.orders = SqliteOrderRepository(self)
+        self.customers = SqliteCustomerRepository(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # Autocommit mode: writes open their own BEGIN IMMEDIATE transaction
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            connection.executescript(SCHEMA)
+            migrate(connection)
+            self._connection = connection
+        return self._connection
+
+    async def run(self, function: Callable, *args):
+        """Ejecuta ``function(connection, *args)`` en el hilo de la base."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: function(self._connect(), *args))
+
+    async def setup(self):
+        await self.run(lambda connection: None)
+
+    async def close(self):
+        def close(connection):
+            connection.close()
+            self._connection = None
+
+        if self._connection is not None:
+            await self.run(close)
+        self._executor.shutdown(wait=True)
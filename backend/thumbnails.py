@@ -0,0 +1,320 @@
+"""
+Miniaturas WebP de las imágenes del menú con caché en disco.
+
+Las tarjetas del menú cargaban la imagen original de Unsplash/Pexels (varios
+cientos de KB por producto). Este módulo baja (o recibe) cada imagen fuente
+una sola vez, genera versiones WebP en varios anchos en un pool de workers y
+las guarda en disco direccionadas por contenido: el nombre de cada archivo es
+el SHA-256 de la imagen fuente, así que nunca cambia y se puede servir con
+caché de un año (``immutable``).
+
+Las respuestas del menú reemplazan ``image_url`` por la variante por defecto y
+agregan ``image_srcset`` con todos los anchos. Si las miniaturas de una URL
+todavía no existen, la respuesta conserva la URL original y la generación
+queda en segundo plano; al terminar se avisa con ``on_ready`` para invalidar
+los snapshots del menú.
+
+Pillow es opcional: sin él el servicio queda deshabilitado y las URLs no se
+tocan.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence
+from urllib.parse import urlparse
+
+import httpx
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# Year-long caching is safe: a variant's URL changes whenever its source does
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def render_thumbnails(source: bytes, widths: Sequence[int], quality: int) -> Dict[int, bytes]:
+    """
+    Genera las variantes WebP de una imagen (corre en el pool de workers).
+
+    Las imágenes más chicas que un ancho no se agrandan: esa variante queda
+    con el ancho original.
+
+    Args:
+        source (bytes): Imagen fuente en cualquier formato que lea Pillow
+        widths (Sequence[int]): Anchos a generar
+        quality (int): Calidad WebP (0-100)
+
+    Returns:
+        Dict[int, bytes]: Ancho pedido -> WebP
+
+    Raises:
+        ValueError: Si los bytes no son una imagen válida
+    """
+    try:
+        image = Image.open(io.BytesIO(source))
+        image.load()
+    except Exception as exc:
+        raise ValueError(f"Unreadable image: {exc}")
+    # Phone photos carry their rotation in EXIF
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    variants = {}
+    for width in widths:
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        else:
+            resized = image
+        output = io.BytesIO()
+        resized.save(output, "WEBP", quality=quality, method=4)
+        variants[width] = output.getvalue()
+    return variants
+
+
+class ImageSource(ABC):
+    """
+    Origen de las imágenes fuente a partir de su URL.
+    """
+
+    @abstractmethod
+    async def fetch(self, url: str) -> bytes:
+        raise NotImplementedError
+
+
+class HttpImageSource(ImageSource):
+    """
+    Descarga imágenes por HTTP con límite de tamaño.
+
+    Args:
+        timeout_seconds (float): Tiempo máximo de la descarga
+        max_bytes (int): Tamaño máximo aceptado
+    """
+
+    def __init__(self, timeout_seconds: float = 10.0, max_bytes: int = 10 * 1024 * 1024):
+        self.timeout_seconds = timeout_seconds
+        self.max_bytes = max_bytes
+
+    async def fetch(self, url: str) -> bytes:
+        async with httpx.AsyncClient(timeout=self.timeout_seconds, follow_redirects=True) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError(f"Image larger than {self.max_bytes} bytes: {url}")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+
+
+class LocalImageSource(ImageSource):
+    """
+    Lee las imágenes de un directorio por el nombre de archivo de la URL (pruebas y demos sin red).
+
+    Args:
+        directory (Path): Directorio con las imágenes
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    async def fetch(self, url: str) -> bytes:
+        path = self.directory / Path(urlparse(url).path).name
+        return await asyncio.to_thread(path.read_bytes)
+
+
+class ThumbnailStore:
+    """
+    Caché de miniaturas en disco, direccionada por el SHA-256 de la imagen fuente.
+
+    Estructura en ``directory``::
+
+        variants/ab/abcd...-320.webp   miniaturas
+        urls/12/1234...                digest de la fuente de cada URL externa
+
+    Args:
+        directory (Path): Raíz de la caché
+        source (ImageSource): Origen de las imágenes externas
+        widths (Sequence[int]): Anchos generados
+        default_width (int): Ancho que reemplaza ``image_url``
+        quality (int): Calidad WebP
+        url_prefix (str): Prefijo público de las variantes (la ruta que las sirve)
+        workers (int): Procesos del pool de generación
+        executor (Optional[Executor]): Pool propio (p. ej. hilos en pruebas) en lugar del de procesos
+        on_ready (Optional[Callable[[], None]]): Se llama cuando una URL externa queda lista
+        retry_seconds (float): Espera antes de reintentar una URL que falló
+    """
+
+    def __init__(self, directory: Path, source: ImageSource, widths: Sequence[int] = (160, 320, 640),
+                 default_width: int = 320, quality: int = 80, url_prefix: str = "/api/images",
+                 workers: int = 2, executor: Optional[Executor] = None,
+                 on_ready: Optional[Callable[[], None]] = None, retry_seconds: float = 600.0):
+        self.directory = Path(directory)
+        self.source = source
+        self.widths = sorted(set(widths))
+        self.default_width = default_width if default_width in self.widths else self.widths[-1]
+        self.quality = quality
+        self.url_prefix = url_prefix.rstrip("/")
+        self.workers = workers
+        self.on_ready = on_ready
+        self.retry_seconds = retry_seconds
+        self.enabled = Image is not None
+        self._executor = executor
+        # source URL -> digest of its image, filled as URLs are resolved
+        self._digests: Dict[str, str] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._failed_at: Dict[str, float] = {}
+
+    def variant_path(self, digest: str, width: int) -> Path:
+        return self.directory / "variants" / digest[:2] / f"{digest}-{width}.webp"
+
+    def variant_url(self, digest: str, width: int) -> str:
+        return f"{self.url_prefix}/{digest}/{width}.webp"
+
+    def _url_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / "urls" / key[:2] / key
+
+    def _own_digest(self, url: str) -> Optional[str]:
+        """Digest de una URL que ya apunta a una variante propia (imágenes subidas)."""
+        if not url.startswith(self.url_prefix + "/"):
+            return None
+        digest = url[len(self.url_prefix) + 1:].split("/", 1)[0]
+        return digest if DIGEST_PATTERN.match(digest) else None
+
+    def rewrite(self, item: dict) -> dict:
+        """
+        Devuelve el producto con ``image_url`` apuntando a su miniatura.
+
+        Si la URL todavía no tiene miniaturas, devuelve el producto sin cambios
+        y agenda la generación en segundo plano.
+
+        Args:
+            item (dict): Producto del menú
+
+        Returns:
+            dict: Copia con ``image_url`` e ``image_srcset``, o el mismo producto
+        """
+        url = item.get("image_url")
+        if not self.enabled or not url:
+            return item
+        digest = self._own_digest(url) or self._digests.get(url)
+        if digest is None:
+            self.schedule(url)
+            return item
+        return {
+            **item,
+            "image_url": self.variant_url(digest, self.default_width),
+            "image_srcset": ", ".join(f"{self.variant_url(digest, width)} {width}w" for width in self.widths),
+        }
+
+    def schedule(self, url: str):
+        """Agenda la generación de una URL externa (una sola vez a la vez, con espera tras un fallo)."""
+        if url in self._pending or urlparse(url).scheme not in ("http", "https"):
+            return
+        failed_at = self._failed_at.get(url)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_seconds:
+            return
+        task = asyncio.create_task(self._resolve(url))
+        self._pending[url] = task
+        task.add_done_callback(lambda _: self._pending.pop(url, None))
+
+    async def ensure(self, url: str) -> Optional[str]:
+        """
+        Resuelve una URL externa a sus miniaturas, bajando la fuente si hace falta.
+
+        Args:
+            url (str): URL de la imagen fuente
+
+        Returns:
+            Optional[str]: Digest de la fuente, o None si no se pudo obtener
+        """
+        if url in self._digests:
+            return self._digests[url]
+        if url in self._pending:
+            return await asyncio.shield(self._pending[url])
+        return await self._resolve(url)
+
+    async def _resolve(self, url: str) -> Optional[str]:
+        record = self._url_path(url)
+        try:
+            digest = await asyncio.to_thread(self._read_record, record)
+            # A pruned cache keeps its URL records: rebuild when the variants are gone
+            if digest is None or not self.variant_path(digest, self.default_width).exists():
+                digest = await self.store(await self.source.fetch(url))
+                await asyncio.to_thread(self._write_file, record, digest.encode())
+        except Exception:
+            logger.exception("Failed to build thumbnails for %s", url)
+            self._failed_at[url] = time.monotonic()
+            return None
+        self._failed_at.pop(url, None)
+        self._digests[url] = digest
+        if self.on_ready is not None:
+            self.on_ready()
+        return digest
+
+    async def store(self, data: bytes) -> str:
+        """
+        Genera (si no existen) las miniaturas de una imagen fuente.
+
+        Args:
+            data (bytes): Imagen fuente
+
+        Returns:
+            str: Digest SHA-256 de la fuente
+
+        Raises:
+            RuntimeError: Si Pillow no está instalado
+            ValueError: Si los bytes no son una imagen válida
+        """
+        if not self.enabled:
+            raise RuntimeError("Thumbnail generation requires Pillow")
+        digest = hashlib.sha256(data).hexdigest()
+        if all(self.variant_path(digest, width).exists() for width in self.widths):
+            return digest
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(self._pool(), render_thumbnails, data, self.widths, self.quality)
+        for width, content in variants.items():
+            await asyncio.to_thread(self._write_file, self.variant_path(digest, width), content)
+        return digest
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            # Resizing and WebP encoding are CPU-bound: keep them off the event loop and the GIL
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @staticmethod
+    def _read_record(path: Path) -> Optional[str]:
+        try:
+            digest = path.read_text().strip()
+        except FileNotFoundError:
+            return None
+        return digest if DIGEST_PATTERN.match(digest) else None
+
+    @staticmethod
+    def _write_file(path: Path, content: bytes):
+        # Write then rename, so a reader never sees a half-written file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporary.write_bytes(content)
+        os.replace(temporary, path)
+
+    def close(self):
+        for task in self._pending.values():
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
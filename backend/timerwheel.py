@@ -0,0 +1,154 @@
+"""
+Rueda de temporizadores jerárquica para liberar pedidos programados.
+
+Cada nivel es un arreglo circular de ranuras; una ranura del nivel ``n`` cubre
+tantos ticks como una vuelta completa del nivel ``n - 1``. Agregar un
+temporizador es O(1) (se calcula la ranura directamente) y avanzar un tick
+también lo es en forma amortizada: sólo se vacía la ranura actual del nivel 0
+y, cuando éste completa una vuelta, se redistribuye una única ranura del
+nivel superior. Con miles de pre-pedidos pendientes, cada tick toca sólo los
+que vencen en ese tick.
+
+Los temporizadores más allá del alcance de todos los niveles esperan en un
+heap de desborde y se incorporan cuando entran en rango. Cancelar o
+reprogramar es diferido: se reemplaza el vencimiento registrado y las
+entradas viejas se descartan al salir de la rueda.
+"""
+
+import heapq
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+
+class TimerWheel:
+    """
+    Rueda jerárquica de temporizadores con resolución de ``tick_seconds``.
+
+    Attributes:
+        tick_seconds (float): Duración de un tick en segundos
+        current_tick (int): Último tick procesado
+    """
+
+    def __init__(self, start_time: float, tick_seconds: float = 1.0,
+                 wheel_sizes: Sequence[int] = (60, 60, 24, 400)):
+        """
+        Inicializa la rueda.
+
+        Args:
+            start_time (float): Momento inicial (unix)
+            tick_seconds (float): Resolución de la rueda en segundos
+            wheel_sizes (Sequence[int]): Ranuras por nivel (por defecto segundos,
+                minutos, horas y días)
+        """
+        self.tick_seconds = tick_seconds
+        self.current_tick = self._to_tick(start_time)
+        self._sizes = list(wheel_sizes)
+        # Ticks covered by one slot of each level
+        self._spans = []
+        span = 1
+        for size in self._sizes:
+            self._spans.append(span)
+            span *= size
+        self._range = span
+        self._wheels: List[List[List[Tuple[int, Hashable]]]] = [[[] for _ in range(size)] for size in self._sizes]
+        self._overflow: List[Tuple[int, int, Hashable]] = []
+        self._overflow_seq = 0
+        self._expiry: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._expiry
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def _place(self, key: Hashable, expiry: int, earliest: int):
+        # Overdue timers go to the earliest tick that will still be processed
+        target = max(expiry, earliest)
+        delta = target - self.current_tick
+        if delta >= self._range:
+            heapq.heappush(self._overflow, (expiry, self._overflow_seq, key))
+            self._overflow_seq += 1
+            return
+        for level, size in enumerate(self._sizes):
+            if delta < self._spans[level] * size:
+                slot = (target // self._spans[level]) % size
+                self._wheels[level][slot].append((expiry, key))
+                return
+
+    def schedule(self, key: Hashable, when: float):
+        """
+        Programa (o reprograma) un temporizador.
+
+        Args:
+            key (Hashable): Identificador del temporizador (p. ej. el ID del pedido)
+            when (float): Momento de vencimiento (unix)
+        """
+        expiry = self._to_tick(when)
+        self._expiry[key] = expiry
+        self._place(key, expiry, self.current_tick + 1)
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancela un temporizador pendiente.
+
+        Args:
+            key (Hashable): Identificador del temporizador
+
+        Returns:
+            bool: True si estaba programado
+        """
+        return self._expiry.pop(key, None) is not None
+
+    def _cascade(self, level: int):
+        if level >= len(self._sizes):
+            while self._overflow and self._overflow[0][0] - self.current_tick < self._range:
+                expiry, _, key = heapq.heappop(self._overflow)
+                if self._expiry.get(key) == expiry:
+                    self._place(key, expiry, self.current_tick)
+            return
+        slot = (self.current_tick // self._spans[level]) % self._sizes[level]
+        if slot == 0:
+            self._cascade(level + 1)
+        entries = self._wheels[level][slot]
+        if not entries:
+            return
+        self._wheels[level][slot] = []
+        for expiry, key in entries:
+            if self._expiry.get(key) == expiry:
+                self._place(key, expiry, self.current_tick)
+
+    def _tick(self) -> List[Hashable]:
+        self.current_tick += 1
+        if self.current_tick % self._sizes[0] == 0:
+            self._cascade(1)
+        slot = self.current_tick % self._sizes[0]
+        entries = self._wheels[0][slot]
+        if not entries:
+            return []
+        self._wheels[0][slot] = []
+        fired = []
+        for expiry, key in entries:
+            if self._expiry.get(key) == expiry and expiry <= self.current_tick:
+                del self._expiry[key]
+                fired.append(key)
+            elif self._expiry.get(key) == expiry:
+                self._place(key, expiry, self.current_tick + 1)
+        return fired
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Avanza la rueda hasta ``now`` y devuelve los temporizadores vencidos.
+
+        Args:
+            now (float): Momento actual (unix)
+
+        Returns:
+            List[Hashable]: Claves vencidas, en orden de vencimiento
+        """
+        target = self._to_tick(now)
+        fired = []
+        while self.current_tick < target:
+            fired.extend(self._tick())
+        return fired
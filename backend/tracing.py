@@ -0,0 +1,328 @@
+"""
+Trazas locales de punta a punta: request → MongoDB → difusión por WebSocket.
+
+Implementa un subconjunto del modelo de OpenTelemetry sin dependencias
+externas: spans con ``trace_id``/``span_id`` en el formato de W3C
+``traceparent``, un span activo por contexto (``contextvars``) y un
+exportador que escribe cada span como una línea JSON con los nombres de
+campo de OTLP, para leerlo a mano o reenviarlo a un colector.
+
+- ``TracingMiddleware`` abre el span raíz de cada request (o continúa la
+  traza de un header ``traceparent`` entrante) y devuelve ``X-Trace-Id``.
+- ``MongoTracingListener`` abre un span hijo por cada comando de MongoDB.
+  Motor copia el contexto al hilo del executor, así que el listener ve el
+  span del handler que emitió la consulta.
+- ``Tracer.inject`` agrega el ``trace_id`` a los mensajes de WebSocket para
+  unir lo que ve la tablet con la traza del servidor.
+
+El muestreo se decide en la raíz: una traza no muestreada sigue propagando
+sus IDs pero no registra ni exporta spans.
+"""
+
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from pymongo import monitoring
+
+# version-trace_id-parent_id-flags, lowercase hex as W3C requires
+_TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+class Span:
+    """
+    Operación medida dentro de una traza.
+
+    Attributes:
+        trace_id (str): ID de la traza (32 dígitos hexadecimales)
+        span_id (str): ID del span (16 dígitos hexadecimales)
+        parent_id (Optional[str]): ID del span padre
+        name (str): Nombre de la operación
+        kind (str): server, client o internal
+        sampled (bool): Si la traza se registra
+        start_ns (int): Inicio en nanosegundos unix
+        end_ns (Optional[int]): Fin en nanosegundos unix
+        attributes (Dict[str, Any]): Atributos de la operación
+        error (Optional[str]): Mensaje de error, si falló
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace_id: str, span_id: str, parent_id: Optional[str], name: str,
+                 kind: str = "internal", sampled: bool = True, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        """Agrega un atributo al span (no hace nada si la traza no se muestrea)."""
+        if self.sampled:
+            self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        """str: Header W3C ``traceparent`` que continúa esta traza."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self, service_name: str) -> dict:
+        """Devuelve el span con los nombres de campo de OTLP/JSON."""
+        return {
+            "resource": {"service.name": service_name},
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(((self.end_ns or self.start_ns) - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Span]:
+    """
+    Interpreta un header ``traceparent`` entrante.
+
+    Args:
+        header (Optional[str]): Valor del header
+
+    Returns:
+        Optional[Span]: Span remoto (sin registrar) que actúa de padre, o None si es inválido
+    """
+    match = _TRACEPARENT.fullmatch(header.strip()) if header else None
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    # Version ff and all-zero IDs are invalid by spec
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return Span(trace_id, parent_id, None, "remote", sampled=bool(int(flags, 16) & 1))
+
+
+class FileSpanExporter:
+    """
+    Exportador que agrega los spans terminados a un archivo JSON Lines.
+
+    Los spans se encolan al terminar y se escriben en lote con ``flush``, para
+    que los handlers no hagan E/S de archivo.
+
+    Attributes:
+        path (Path): Archivo de salida
+    """
+
+    def __init__(self, path: Path, max_pending: int = 10000):
+        self.path = Path(path)
+        # Appended from request handlers and Motor's executor threads
+        self._pending: Deque[dict] = deque(maxlen=max_pending)
+        self._write_lock = threading.Lock()
+
+    def export(self, span: dict):
+        """Encola un span terminado."""
+        self._pending.append(span)
+
+    def flush(self) -> int:
+        """
+        Escribe los spans pendientes.
+
+        Returns:
+            int: Spans escritos
+        """
+        lines = []
+        while self._pending:
+            lines.append(json.dumps(self._pending.popleft(), default=str))
+        if lines:
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as output:
+                    output.write("\n".join(lines) + "\n")
+        return len(lines)
+
+
+class Tracer:
+    """
+    Crea spans, mantiene el span activo y decide el muestreo.
+
+    Attributes:
+        service_name (str): Nombre del servicio en los spans exportados
+        sample_ratio (float): Fracción de trazas raíz que se registran (0 a 1)
+        exporter (Optional[FileSpanExporter]): Destino de los spans; sin exportador no se registra nada
+    """
+
+    def __init__(self, service_name: str, sample_ratio: float = 1.0, exporter: Optional[FileSpanExporter] = None):
+        self.service_name = service_name
+        self.sample_ratio = sample_ratio
+        self.exporter = exporter
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+    def current_span(self) -> Optional[Span]:
+        """Devuelve el span activo en el contexto actual."""
+        return self._current.get()
+
+    def start_span(self, name: str, kind: str = "internal", parent: Optional[Span] = None,
+                   attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """
+        Crea un span hijo del span activo (o de ``parent``) sin activarlo.
+
+        Args:
+            name (str): Nombre de la operación
+            kind (str): server, client o internal
+            parent (Optional[Span]): Padre explícito; por defecto el span activo
+            attributes (Optional[Dict[str, Any]]): Atributos iniciales
+
+        Returns:
+            Span: Span iniciado
+        """
+        parent = parent or self._current.get()
+        if parent is None:
+            sampled = self.exporter is not None and random.random() < self.sample_ratio
+            return Span(os.urandom(16).hex(), os.urandom(8).hex(), None, name, kind, sampled,
+                        attributes if sampled else None)
+        return Span(parent.trace_id, os.urandom(8).hex(), parent.span_id, name, kind, parent.sampled,
+                    attributes if parent.sampled else None)
+
+    def end_span(self, span: Span, end_ns: Optional[int] = None):
+        """
+        Termina un span y lo exporta si la traza se muestrea.
+
+        Args:
+            span (Span): Span a terminar
+            end_ns (Optional[int]): Fin explícito en nanosegundos unix; por defecto ahora
+        """
+        span.end_ns = end_ns or time.time_ns()
+        if span.sampled and self.exporter is not None:
+            self.exporter.export(span.to_dict(self.service_name))
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "internal",
+             parent: Optional[Span] = None) -> Iterator[Span]:
+        """
+        Abre un span y lo deja activo dentro del bloque ``with``.
+
+        Sirve tanto en código síncrono como dentro de corrutinas.
+
+        Args:
+            name (str): Nombre de la operación
+            attributes (Optional[Dict[str, Any]]): Atributos iniciales
+            kind (str): server, client o internal
+            parent (Optional[Span]): Padre explícito; por defecto el span activo
+
+        Yields:
+            Span: El span abierto
+        """
+        span = self.start_span(name, kind, parent, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self._current.reset(token)
+            self.end_span(span)
+
+    def inject(self, message: dict) -> dict:
+        """
+        Agrega el ``trace_id`` del span activo a un mensaje de WebSocket.
+
+        Args:
+            message (dict): Mensaje a enviar (se modifica en el lugar)
+
+        Returns:
+            dict: El mismo mensaje
+        """
+        span = self._current.get()
+        if span is not None:
+            message["trace_id"] = span.trace_id
+        return message
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre el span raíz de cada request HTTP.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        remote_parent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                remote_parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        with self.tracer.span(f"{scope['method']} {scope['path']}", kind="server", parent=remote_parent) as span:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", span.trace_id.encode())]
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                # Name by route template once the router has matched it
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+                    span.set_attribute("http.route", route)
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Listener de PyMongo que registra cada comando como span hijo del span activo.
+
+    Los comandos emitidos fuera de una traza (tareas de fondo, heartbeats) se ignoran.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[int, Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        parent = self.tracer.current_span()
+        if parent is None or not parent.sampled:
+            return
+        target = event.command.get(event.command_name)
+        span = self.tracer.start_span(f"mongodb.{event.command_name}", kind="client", parent=parent, attributes={
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+            "db.collection": target if isinstance(target, str) else event.command.get("collection"),
+        })
+        self._spans[event.request_id] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            self.tracer.end_span(span, span.start_ns + event.duration_micros * 1000)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            span.error = str(event.failure)
+            self.tracer.end_span(span, span.start_ns + event.duration_micros * 1000)
@@ -0,0 +1,132 @@
+"""
+Ingesta de posiciones GPS de repartidores.
+
+Los repartidores envían pings de ubicación por WebSocket con alta frecuencia.
+Este módulo guarda en memoria la última posición y un rastro corto por
+repartidor (buffer circular de tamaño fijo) y decide cuándo persistir en
+MongoDB: como máximo una escritura por repartidor cada ``flush_interval``
+segundos, agrupadas en un único ``bulk_write``.
+
+También mantiene qué pedidos lleva cada repartidor, para que las posiciones
+se envíen sólo a quienes siguen esos pedidos.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+# (latitude, longitude, unix timestamp)
+Fix = Tuple[float, float, float]
+
+
+def valid_position(latitude: float, longitude: float) -> bool:
+    """True si la posición es finita y está dentro del rango de latitud (±90) y longitud (±180)."""
+    return (
+        math.isfinite(latitude) and math.isfinite(longitude)
+        and -90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0
+    )
+
+
+class LocationTracker:
+    """
+    Registro en memoria de posiciones de repartidores con escritura diferida.
+
+    Attributes:
+        trail_size (int): Cantidad de posiciones que se conservan por repartidor
+        flush_interval (float): Segundos mínimos entre escrituras de un repartidor
+    """
+
+    def __init__(self, trail_size: int = 20, flush_interval: float = 10.0):
+        """
+        Inicializa el registro vacío.
+
+        Args:
+            trail_size (int): Tamaño del buffer circular por repartidor
+            flush_interval (float): Segundos mínimos entre escrituras por repartidor
+        """
+        self.trail_size = trail_size
+        self.flush_interval = flush_interval
+        self._trails: Dict[str, Deque[Fix]] = {}
+        self._dirty: Set[str] = set()
+        self._last_flush: Dict[str, float] = {}
+        self._orders: Dict[str, Set[str]] = {}
+
+    def record(self, courier_id: str, latitude: float, longitude: float,
+               timestamp: Optional[float] = None) -> Fix:
+        """
+        Registra un ping de ubicación.
+
+        Args:
+            courier_id (str): ID del repartidor
+            latitude (float): Latitud reportada
+            longitude (float): Longitud reportada
+            timestamp (Optional[float]): Momento del ping (unix); ahora si es None
+
+        Returns:
+            Fix: La posición registrada
+        """
+        fix = (latitude, longitude, timestamp if timestamp is not None else time.time())
+        trail = self._trails.get(courier_id)
+        if trail is None:
+            trail = self._trails[courier_id] = deque(maxlen=self.trail_size)
+        trail.append(fix)
+        self._dirty.add(courier_id)
+        return fix
+
+    def trail(self, courier_id: str) -> List[Fix]:
+        """Devuelve el rastro reciente de un repartidor, del más antiguo al más nuevo."""
+        return list(self._trails.get(courier_id, ()))
+
+    def due_for_flush(self, now: Optional[float] = None, force: bool = False) -> List[Tuple[str, Fix]]:
+        """
+        Extrae las posiciones que corresponde persistir ahora.
+
+        Un repartidor se incluye si tiene pings nuevos y su última escritura
+        fue hace al menos ``flush_interval`` segundos. Los incluidos se marcan
+        como escritos en este momento.
+
+        Args:
+            now (Optional[float]): Momento actual (unix); ahora si es None
+            force (bool): Incluir todos los pendientes sin importar el intervalo
+
+        Returns:
+            List[Tuple[str, Fix]]: Pares (courier_id, última posición)
+        """
+        now = now if now is not None else time.time()
+        due = []
+        for courier_id in list(self._dirty):
+            if not force and now - self._last_flush.get(courier_id, 0.0) < self.flush_interval:
+                continue
+            self._dirty.discard(courier_id)
+            self._last_flush[courier_id] = now
+            due.append((courier_id, self._trails[courier_id][-1]))
+        return due
+
+    def requeue(self, courier_ids: List[str]):
+        """
+        Vuelve a marcar repartidores como pendientes tras una escritura fallida.
+
+        Args:
+            courier_ids (List[str]): IDs cuya escritura no se completó
+        """
+        for courier_id in courier_ids:
+            if courier_id in self._trails:
+                self._dirty.add(courier_id)
+                self._last_flush.pop(courier_id, None)
+
+    def assign_order(self, courier_id: str, order_id: str):
+        """Registra que un repartidor lleva un pedido."""
+        self._orders.setdefault(courier_id, set()).add(order_id)
+
+    def release_order(self, courier_id: str, order_id: str):
+        """Quita un pedido de los que lleva un repartidor."""
+        orders = self._orders.get(courier_id)
+        if orders is not None:
+            orders.discard(order_id)
+            if not orders:
+                del self._orders[courier_id]
+
+    def orders_for(self, courier_id: str) -> Set[str]:
+        """Devuelve los pedidos que lleva un repartidor."""
+        return self._orders.get(courier_id, set())
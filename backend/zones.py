@@ -0,0 +1,273 @@
+"""
+Resolución de zonas de entrega y tarifas a partir de coordenadas.
+
+Las zonas se definen como polígonos (lista de vértices ``[lat, lon]``) con una
+tabla de tarifas por monto del pedido. Al cargarlas se precalculan el
+rectángulo envolvente y las aristas de cada polígono, de modo que resolver un
+punto sea un filtro por rectángulo seguido de ray casting sobre las pocas
+zonas candidatas.
+
+``ZoneRegistry`` envuelve el índice y lo recarga desde el archivo JSON cuando
+cambia en disco, reemplazándolo de forma atómica: las búsquedas en curso
+siguen usando el índice anterior. El archivo incluido con el backend es sólo
+una semilla de lectura: las ediciones en caliente se escriben en un archivo de
+datos aparte, fuera del código fuente.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+
+class Zone:
+    """
+    Zona de entrega con su polígono y tabla de tarifas.
+
+    Attributes:
+        name (str): Identificador de la zona (p. ej. "centro")
+        label (str): Nombre para mostrar
+        polygon (List[Point]): Vértices (lat, lon) en orden
+        fees (List[Tuple[float, float]]): Pares (subtotal mínimo, tarifa) ordenados
+        bbox (Tuple[float, float, float, float]): (min_lat, min_lon, max_lat, max_lon)
+    """
+
+    __slots__ = ("name", "label", "polygon", "fees", "bbox", "_edges")
+
+    def __init__(self, name: str, polygon: Sequence[Sequence[float]], fees: Sequence[Dict[str, float]],
+                 label: Optional[str] = None):
+        if len(polygon) < 3:
+            raise ValueError(f"Zone {name!r} needs at least 3 vertices")
+        if not fees:
+            raise ValueError(f"Zone {name!r} needs at least one fee")
+        self.name = name
+        self.label = label or name
+        self.polygon = [(float(lat), float(lon)) for lat, lon in polygon]
+        self.fees = sorted((float(f.get("min_subtotal", 0)), float(f["fee"])) for f in fees)
+        lats = [lat for lat, _ in self.polygon]
+        lons = [lon for _, lon in self.polygon]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+        # Non-horizontal edges as (lat_low, lat_high, lon_at_lat_low, dlon/dlat)
+        edges = []
+        count = len(self.polygon)
+        for index in range(count):
+            lat1, lon1 = self.polygon[index]
+            lat2, lon2 = self.polygon[(index + 1) % count]
+            if lat1 == lat2:
+                continue
+            if lat1 > lat2:
+                lat1, lon1, lat2, lon2 = lat2, lon2, lat1, lon1
+            edges.append((lat1, lat2, lon1, (lon2 - lon1) / (lat2 - lat1)))
+        self._edges = edges
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """
+        Indica si un punto cae dentro del polígono (ray casting).
+
+        Args:
+            latitude (float): Latitud del punto
+            longitude (float): Longitud del punto
+
+        Returns:
+            bool: True si el punto está dentro de la zona
+        """
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if latitude < min_lat or latitude > max_lat or longitude < min_lon or longitude > max_lon:
+            return False
+        inside = False
+        for lat_low, lat_high, lon_start, slope in self._edges:
+            # Half-open interval so a ray through a vertex is counted once
+            if lat_low <= latitude < lat_high:
+                if longitude < lon_start + (latitude - lat_low) * slope:
+                    inside = not inside
+        return inside
+
+    def fee_for(self, subtotal: float) -> float:
+        """
+        Devuelve la tarifa que corresponde a un subtotal.
+
+        Args:
+            subtotal (float): Subtotal del pedido en Guaraníes
+
+        Returns:
+            float: Tarifa de envío
+        """
+        fee = self.fees[0][1]
+        for min_subtotal, tier_fee in self.fees:
+            if subtotal < min_subtotal:
+                break
+            fee = tier_fee
+        return fee
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Devuelve la definición de la zona en el formato del archivo de zonas."""
+        return {
+            "name": self.name,
+            "label": self.label,
+            "polygon": [[lat, lon] for lat, lon in self.polygon],
+            "fees": [{"min_subtotal": min_subtotal, "fee": fee} for min_subtotal, fee in self.fees],
+        }
+
+
+class ZoneIndex:
+    """
+    Índice inmutable de zonas para resolución punto-en-polígono.
+
+    Attributes:
+        zones (List[Zone]): Zonas en orden de prioridad
+        default_fee (float): Tarifa para zonas desconocidas sin coordenadas
+    """
+
+    def __init__(self, zones: Sequence[Zone], default_fee: float):
+        names = [zone.name for zone in zones]
+        if len(set(names)) != len(names):
+            raise ValueError("Zone names must be unique")
+        self.zones = list(zones)
+        self.default_fee = float(default_fee)
+        self._by_name = {zone.name: zone for zone in self.zones}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ZoneIndex":
+        """
+        Construye el índice desde la definición JSON.
+
+        Args:
+            data (Dict[str, Any]): Objeto con ``zones`` y ``default_fee``
+
+        Returns:
+            ZoneIndex: Índice listo para consultas
+
+        Raises:
+            ValueError: Si la definición es inválida
+        """
+        try:
+            zones = [
+                Zone(item["name"], item["polygon"], item["fees"], item.get("label"))
+                for item in data["zones"]
+            ]
+            return cls(zones, data.get("default_fee", 20000))
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Invalid delivery zone definition: {exc}") from exc
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Devuelve la definición completa en el formato del archivo de zonas."""
+        return {"default_fee": self.default_fee, "zones": [zone.to_dict() for zone in self.zones]}
+
+    def get(self, name: str) -> Optional[Zone]:
+        """Devuelve una zona por nombre o None."""
+        return self._by_name.get(name)
+
+    def resolve(self, latitude: float, longitude: float) -> Optional[Zone]:
+        """
+        Busca la zona que contiene un punto.
+
+        Args:
+            latitude (float): Latitud del punto
+            longitude (float): Longitud del punto
+
+        Returns:
+            Optional[Zone]: Primera zona que contiene el punto o None
+        """
+        for zone in self.zones:
+            if zone.contains(latitude, longitude):
+                return zone
+        return None
+
+
+class ZoneRegistry:
+    """
+    Acceso al índice de zonas vigente con recarga en caliente desde archivo.
+
+    Mientras ``path`` no exista se usa ``seed_path``; la primera edición crea
+    ``path`` y desde entonces se vigila ese archivo. La semilla nunca se escribe.
+
+    Attributes:
+        path (Path): Archivo JSON de datos con la definición vigente (el que se edita)
+        seed_path (Optional[Path]): Definición de solo lectura usada hasta la primera edición
+        check_interval (float): Segundos mínimos entre verificaciones del archivo
+    """
+
+    def __init__(self, path: Path, seed_path: Optional[Path] = None, check_interval: float = 5.0):
+        self.path = Path(path)
+        self.seed_path = Path(seed_path) if seed_path is not None else None
+        self.check_interval = check_interval
+        self._mtime = self._path_mtime()
+        source = self.path if self._mtime is not None or self.seed_path is None else self.seed_path
+        self._index = ZoneIndex.from_dict(json.loads(source.read_text(encoding="utf-8")))
+        self._checked_at = time.monotonic()
+
+    def _path_mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    @property
+    def index(self) -> ZoneIndex:
+        """ZoneIndex: Índice vigente, recargado si el archivo cambió."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload_if_changed()
+        return self._index
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarga el índice si el archivo cambió desde la última carga.
+
+        Un archivo inválido se ignora y se conserva el índice anterior.
+
+        Returns:
+            bool: True si se cargó una nueva versión
+        """
+        try:
+            mtime = self._path_mtime()
+            # Still on the seed (or unchanged): nothing to reload
+            if mtime is None or mtime == self._mtime:
+                return False
+            index = ZoneIndex.from_dict(json.loads(self.path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return False
+        self._index = index
+        self._mtime = mtime
+        return True
+
+    def replace(self, data: Dict[str, Any]) -> ZoneIndex:
+        """
+        Valida una nueva definición, la escribe en el archivo de datos y la activa.
+
+        La escritura es atómica (archivo temporal + rename), así que otros
+        workers que vigilan el mismo archivo nunca leen una versión a medias.
+
+        Args:
+            data (Dict[str, Any]): Nueva definición de zonas
+
+        Returns:
+            ZoneIndex: Índice activado
+
+        Raises:
+            ValueError: Si la definición es inválida
+            OSError: Si no se puede escribir el archivo de datos
+        """
+        index = ZoneIndex.from_dict(data)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(index.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._index = index
+        self._mtime = self.path.stat().st_mtime
+        return index
+
+
+def default_zones_path() -> Path:
+    """Devuelve la ruta del archivo de zonas incluido con el backend (semilla de solo lectura)."""
+    return Path(__file__).parent / "delivery_zones.json"
+
+
+def default_zones_data_path() -> Path:
+    """Devuelve dónde guardar las zonas editadas por defecto: el directorio de datos del usuario."""
+    data_home = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(data_home) / "pizzapp" / "delivery_zones.json"
@@ -0,0 +1,82 @@
+"""
+Benchmark de la agrupación de pedidos en viajes de reparto (backend/routing.py).
+
+Genera pedidos sintéticos listos para despachar alrededor de Asunción y mide
+el tiempo de ``plan_trips`` junto con la distancia ahorrada frente a un viaje
+exclusivo por pedido.
+
+Uso:
+    python benchmarks/bench_routing.py --orders 300 --capacity 3 --runs 20
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from dispatch import haversine_km  # noqa: E402
+from routing import plan_trips  # noqa: E402
+
+STORE = (-25.2637, -57.5759)
+ZONES = {
+    "centro": (-25.2820, -57.6350),
+    "san_lorenzo": (-25.3400, -57.5080),
+    "lambare": (-25.3460, -57.6060),
+    "fernando_de_la_mora": (-25.3200, -57.5400),
+}
+
+
+def synthetic_orders(count: int, seed: int = 42) -> list:
+    """Genera ``count`` pedidos listos repartidos entre las zonas conocidas."""
+    rng = random.Random(seed)
+    zones = list(ZONES)
+    orders = []
+    for index in range(count):
+        zone = rng.choice(zones)
+        lat, lon = ZONES[zone]
+        orders.append({
+            "id": f"order-{index}",
+            "delivery_info": {
+                "delivery_zone": zone,
+                "latitude": lat + rng.gauss(0, 0.012),
+                "longitude": lon + rng.gauss(0, 0.012),
+            },
+        })
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--capacity", type=int, default=3)
+    parser.add_argument("--max-detour-km", type=float, default=3.0)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    orders = synthetic_orders(args.orders)
+    timings = []
+    trips = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        trips = plan_trips(orders, STORE, args.capacity, args.max_detour_km)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    solo_km = sum(
+        haversine_km(STORE[0], STORE[1], o["delivery_info"]["latitude"], o["delivery_info"]["longitude"])
+        for o in orders
+    )
+    batched_km = sum(trip["distance_km"] for trip in trips)
+
+    print(f"orders={args.orders} capacity={args.capacity} max_detour_km={args.max_detour_km}")
+    print(f"trips={len(trips)} (vs {args.orders} single-order trips)")
+    print(f"outbound km: batched={batched_km:.1f} single={solo_km:.1f}")
+    print(f"plan_trips ms: median={statistics.median(timings):.2f} "
+          f"p95={sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} max={max(timings):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark de serialización de listados de pedidos (GET /api/orders).
+
+Compara, para una lista de pedidos tal como la devuelve MongoDB, el camino
+anterior (``[Order(**doc) ...]`` + validación y serialización de
+``response_model`` + ``json.dumps``) contra el camino actual
+(``trusted_documents`` + orjson). Mide sólo CPU, sin base de datos.
+
+Uso:
+    python benchmarks/bench_serialization.py --orders 1000 --runs 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pizzapp_bench")
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+from serialization import json_response, trusted_documents  # noqa: E402
+
+STATUSES = ["received", "confirmed", "preparing", "ready", "on_route", "delivered", "cancelled"]
+ZONES = ["centro", "san_lorenzo", "lambare", "fernando_de_la_mora"]
+
+
+def synthetic_order_documents(count: int, seed: int = 1) -> List[dict]:
+    """Genera documentos de pedidos como los guarda create_order (sin ``_id``)."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    documents = []
+    for index in range(count):
+        created_at = now - timedelta(minutes=index)
+        items = [
+            {"menu_item_id": str(uuid.uuid4()), "quantity": rng.randint(1, 3), "special_instructions": ""}
+            for _ in range(rng.randint(1, 4))
+        ]
+        subtotal = float(rng.randint(2, 20) * 10000)
+        documents.append(server.Order(
+            items=items,
+            delivery_info={
+                "customer_name": f"Cliente {index}",
+                "customer_phone": f"+59598{rng.randint(1000000, 9999999)}",
+                "delivery_address": f"Calle {index} c/ Avenida {rng.randint(1, 99)}",
+                "delivery_zone": rng.choice(ZONES),
+                "latitude": -25.3 + rng.random() * 0.1,
+                "longitude": -57.6 + rng.random() * 0.1,
+            },
+            subtotal=subtotal,
+            delivery_fee=15000.0,
+            total=subtotal + 15000.0,
+            status=rng.choice(STATUSES),
+            estimated_delivery=created_at + timedelta(minutes=45),
+            created_at=created_at,
+            updated_at=created_at,
+        ).dict())
+    return documents
+
+
+async def previous_path(field, documents: List[dict]) -> bytes:
+    """Camino anterior: modelos validados, response_model y json.dumps de Starlette."""
+    content = [server.Order(**document) for document in documents]
+    serialized = await serialize_response(field=field, response_content=content)
+    return json.dumps(serialized, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def current_path(documents: List[dict]) -> bytes:
+    """Camino actual: documentos confiables renderizados con orjson."""
+    return json_response(trusted_documents(server.Order, documents)).body
+
+
+def measure(function, runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.process_time()
+        function()
+        timings.append((time.process_time() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    documents = synthetic_order_documents(args.orders)
+    field = create_response_field(name="Response_get_orders", type_=List[server.Order])
+    loop = asyncio.new_event_loop()
+
+    before = measure(lambda: loop.run_until_complete(previous_path(field, documents)), args.runs)
+    after = measure(lambda: current_path(documents), args.runs)
+
+    print(f"orders={args.orders} runs={args.runs} (CPU ms per request)")
+    print(f"  before: median={statistics.median(before):.2f} min={min(before):.2f}")
+    print(f"  after:  median={statistics.median(after):.2f} min={min(after):.2f}")
+    print(f"  speed-up: x{statistics.median(before) / statistics.median(after):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark comparativo de los backends de almacenamiento (backend/storage*.py).
+
+Carga el mismo conjunto de pedidos sintéticos en cada backend y mide las
+operaciones que usan los handlers más frecuentes: alta de pedidos,
+seguimiento por ID, listado de cocina, tablero, analíticas del día, cambio
+de estado y asignación de repartidores.
+
+El backend en memoria y SQLite (archivo temporal, WAL) corren siempre;
+MongoDB sólo si se pasa ``--mongo-url`` (usa una base descartable que se
+borra al terminar).
+
+Uso:
+    python benchmarks/bench_storage.py --orders 20000 --lookups 2000
+    python benchmarks/bench_storage.py --orders 20000 --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pizzapp_bench")
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+import server  # noqa: E402
+from serialization import model_projection  # noqa: E402
+from storage import MemoryStorage, Storage  # noqa: E402
+from storage_mongo import MongoStorage  # noqa: E402
+from storage_sqlite import SqliteStorage  # noqa: E402
+
+from bench_serialization import synthetic_order_documents  # noqa: E402
+
+
+async def timed(operation: Callable[[int], Awaitable], repeat: int) -> float:
+    """Ejecuta ``operation(i)`` ``repeat`` veces y devuelve microsegundos por llamada."""
+    start = time.perf_counter()
+    for index in range(repeat):
+        await operation(index)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def run_backend(storage: Storage, documents: List[dict], lookups: int, seed: int) -> Dict[str, float]:
+    await storage.setup()
+    rng = random.Random(seed)
+    ids = [document["id"] for document in documents]
+    sample = [rng.choice(ids) for _ in range(lookups)]
+    board = model_projection(server.OrderBoardCard)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    couriers = [server.DeliveryPerson(name=f"Repartidor {index}", phone="+595981000000").dict() for index in range(20)]
+    for courier in couriers:
+        await storage.delivery_persons.insert(courier)
+
+    results = {}
+    results["insert"] = await timed(lambda index: storage.orders.insert(documents[index]), len(documents))
+    results["get"] = await timed(lambda index: storage.orders.get(sample[index]), lookups)
+    results["find_kitchen"] = await timed(
+        lambda index: storage.orders.find(server.KITCHEN_VISIBLE_STATUSES, model_projection(server.OrderKitchenView)),
+        max(1, lookups // 100),
+    )
+    results["board"] = await timed(
+        lambda index: storage.orders.latest_by_status(server.ORDER_STATUSES, board, server.BOARD_COLUMN_LIMIT),
+        max(1, lookups // 100),
+    )
+    results["stats_today"] = await timed(lambda index: storage.orders.stats_since(today), max(1, lookups // 100))
+    results["update_status"] = await timed(
+        lambda index: storage.orders.update(sample[index], {
+            "status": rng.choice(server.ORDER_STATUSES), "updated_at": datetime.utcnow(),
+        }),
+        lookups,
+    )
+
+    async def assign(index: int):
+        courier = couriers[index % len(couriers)]["id"]
+        await storage.delivery_persons.add_order(courier, sample[index], server.COURIER_MAX_ORDERS)
+        await storage.delivery_persons.remove_order(courier, sample[index])
+
+    results["assign_release"] = await timed(assign, lookups)
+    return results
+
+
+async def main_async(args: argparse.Namespace):
+    documents = synthetic_order_documents(args.orders, args.seed)
+    backends = {"memory": lambda: MemoryStorage()}
+    directory = tempfile.TemporaryDirectory()
+    backends["sqlite"] = lambda: SqliteStorage(str(Path(directory.name) / "bench.sqlite3"))
+    if args.mongo_url:
+        database = f"pizzapp_bench_{os.getpid()}"
+        backends["mongo"] = lambda: MongoStorage(AsyncIOMotorClient(args.mongo_url)[database])
+
+    report = {}
+    for name, factory in backends.items():
+        storage = factory()
+        try:
+            report[name] = await run_backend(storage, documents, args.lookups, args.seed)
+        finally:
+            if name == "mongo":
+                await storage.db.client.drop_database(storage.db.name)
+            await storage.close()
+    directory.cleanup()
+
+    operations = list(next(iter(report.values())))
+    print(f"{args.orders} orders, {args.lookups} lookups (microseconds per operation)")
+    header = f"{'operation':<16}" + "".join(f"{name:>12}" for name in report)
+    print(header)
+    print("-" * len(header))
+    for operation in operations:
+        print(f"{operation:<16}" + "".join(f"{report[name][operation]:>12.1f}" for name in report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--mongo-url", help="incluye MongoDB en la comparación")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
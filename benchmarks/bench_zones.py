@@ -0,0 +1,51 @@
+"""
+Benchmark de la resolución de zonas de entrega (backend/zones.py).
+
+Resuelve miles de coordenadas aleatorias alrededor de Gran Asunción contra la
+definición de zonas incluida y reporta el costo por búsqueda.
+
+Uso:
+    python benchmarks/bench_zones.py --lookups 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from zones import ZoneIndex, default_zones_path  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    index = ZoneIndex.from_dict(json.loads(default_zones_path().read_text(encoding="utf-8")))
+    rng = random.Random(args.seed)
+    points = [
+        (rng.uniform(-25.40, -25.23), rng.uniform(-57.70, -57.44))
+        for _ in range(args.lookups)
+    ]
+
+    start = time.perf_counter()
+    hits = {}
+    for latitude, longitude in points:
+        zone = index.resolve(latitude, longitude)
+        name = zone.name if zone else None
+        hits[name] = hits.get(name, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    print(f"lookups={args.lookups} zones={len(index.zones)}")
+    print(f"total={elapsed * 1000:.1f} ms per_lookup={elapsed / args.lookups * 1e6:.2f} us")
+    for name, count in sorted(hits.items(), key=lambda item: -item[1]):
+        print(f"  {name or 'outside'}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Prueba de carga concurrente que imita el tráfico real de los dashboards.
+
+Simula, contra un servidor y un mongod locales:
+
+- Clientes que llegan según un proceso de Poisson (``--order-rate`` pedidos
+  por minuto): navegan el menú, crean un pedido dentro de una zona de entrega
+  real, siguen el pedido por WebSocket y consultan su estado periódicamente.
+- Tablets de cocina y de reparto que refrescan su tablero cada 15 s y avanzan
+  los pedidos de su parte (cada tablet atiende una fracción de los pedidos,
+  como en un local con varias pantallas, para no pisarse). Las de cocina
+  escuchan la cola de su estación y las de reparto mandan pings GPS por
+  ``/ws/delivery/{id}`` cada ``--gps-interval`` segundos, autenticadas con el
+  token de su rol.
+- Dashboards de administración que refrescan su tablero y las analíticas
+  cada 30 s y escuchan ``/ws/admin``.
+
+``--time-scale`` acelera todos los intervalos (15 s de polling con
+``--time-scale 5`` son 3 s). Al final informa, por operación, throughput,
+percentiles de latencia y tasa de errores, y los mensajes de WebSocket
+recibidos.
+
+Requiere ``httpx`` y, para las conexiones WebSocket, ``websockets`` (sin él
+se simula sólo el tráfico HTTP).
+
+Uso:
+    python benchmarks/loadtest.py --base-url http://localhost:8001 --duration 120 \\
+        --order-rate 30 --kitchen-tablets 3 --delivery-tablets 4 --admin-dashboards 2 --time-scale 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Awaitable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from zones import ZoneIndex  # noqa: E402
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - optional dependency
+    websockets = None
+
+ROLE_CREDENTIALS = {
+    "admin": ("admin", "admin123"),
+    "kitchen": ("kitchen", "kitchen123"),
+    "delivery": ("delivery", "delivery123"),
+}
+
+KITCHEN_NEXT_STATUS = {"received": "confirmed", "confirmed": "preparing", "preparing": "ready"}
+DELIVERY_NEXT_STATUS = {"ready": "on_route", "on_route": "delivered"}
+
+
+class LoadStats:
+    """
+    Acumula latencias y errores por operación.
+
+    Attributes:
+        started_at (float): Inicio de la prueba (reloj monotónico)
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.ws_messages: Dict[str, int] = defaultdict(int)
+        self.ws_failures: Dict[str, int] = defaultdict(int)
+        self.ws_sent: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, status_code: Optional[int], ok: bool):
+        self.latencies[operation].append(seconds)
+        if status_code is not None:
+            self.status_codes[operation][status_code] += 1
+        if not ok:
+            self.errors[operation] += 1
+
+    def report(self) -> dict:
+        """Devuelve el resumen por operación."""
+        elapsed = time.monotonic() - self.started_at
+        operations = {}
+        for operation, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+
+            def percentile(fraction: float) -> float:
+                return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+            operations[operation] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(0.50), 1),
+                "p90_ms": round(percentile(0.90), 1),
+                "p99_ms": round(percentile(0.99), 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+                "mean_ms": round(statistics.fmean(samples) * 1000, 1),
+                "error_rate": round(self.errors[operation] / len(samples), 4),
+                "status_codes": dict(self.status_codes[operation]),
+            }
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "operations": operations,
+            "websocket_messages": dict(self.ws_messages),
+            "websocket_failures": dict(self.ws_failures),
+            "websocket_sent": dict(self.ws_sent),
+        }
+
+
+class LoadTest:
+    """
+    Orquesta los actores simulados contra un servidor.
+
+    Attributes:
+        args (argparse.Namespace): Opciones de la línea de comandos
+        stats (LoadStats): Métricas acumuladas
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.stats = LoadStats()
+        self.rng = random.Random(args.seed)
+        self.api = args.base_url.rstrip("/") + "/api"
+        self.ws_base = args.base_url.rstrip("/").replace("http", "ws", 1) + "/ws"
+        self.tokens: Dict[str, str] = {}
+        self.menu: List[dict] = []
+        self.zones: Optional[ZoneIndex] = None
+        self.delivery_person_ids: List[str] = []
+        self.deadline = 0.0
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def interval(self, seconds: float) -> float:
+        return seconds / self.args.time_scale
+
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    def auth(self, role: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[role]}"}
+
+    async def call(self, operation: str, method: str, path: str, expected=(200,), **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, self.api + path, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(operation, time.perf_counter() - start, None, False)
+            return None
+        self.stats.record(operation, time.perf_counter() - start, response.status_code,
+                          response.status_code in expected)
+        return response
+
+    async def setup(self):
+        """Crea usuarios y menú de ejemplo si faltan, inicia sesión y registra repartidores."""
+        await self.client.post(f"{self.api}/auth/init-admin")
+        for role, (username, password) in ROLE_CREDENTIALS.items():
+            response = await self.client.post(f"{self.api}/auth/login", json={"username": username, "password": password})
+            response.raise_for_status()
+            self.tokens[role] = response.json()["access_token"]
+
+        self.menu = (await self.client.get(f"{self.api}/menu")).json()
+        if not self.menu:
+            await self.client.post(f"{self.api}/initialize-menu")
+            self.menu = (await self.client.get(f"{self.api}/menu")).json()
+        self.zones = ZoneIndex.from_dict((await self.client.get(f"{self.api}/delivery-zones")).json())
+
+        for index in range(self.args.delivery_tablets):
+            response = await self.client.post(f"{self.api}/delivery-persons", json={
+                "name": f"Repartidor carga {index}", "phone": f"+59598100{index:04d}"
+            })
+            person_id = response.json()["id"]
+            self.delivery_person_ids.append(person_id)
+            # Park every courier at a random point inside the delivery area
+            latitude, longitude = self.random_point()
+            await self.client.put(f"{self.api}/delivery-persons/{person_id}/location",
+                                  json={"latitude": latitude, "longitude": longitude, "is_available": True},
+                                  headers=self.auth("admin"))
+
+    def random_point(self):
+        zone = self.rng.choice(self.zones.zones)
+        latitudes = [lat for lat, _ in zone.polygon]
+        longitudes = [lon for _, lon in zone.polygon]
+        for _ in range(100):
+            latitude = self.rng.uniform(min(latitudes), max(latitudes))
+            longitude = self.rng.uniform(min(longitudes), max(longitudes))
+            if zone.contains(latitude, longitude):
+                return latitude, longitude
+        return zone.polygon[0]
+
+    def ws_url(self, path: str, role: Optional[str] = None) -> str:
+        """URL de un canal WebSocket, con el token del rol si el canal lo pide."""
+        return self.ws_base + path + (f"?token={self.tokens[role]}" if role else "")
+
+    async def receive(self, channel: str, connection):
+        """Cuenta los mensajes recibidos por una conexión hasta el final de la prueba."""
+        while self.running():
+            try:
+                await asyncio.wait_for(connection.recv(), timeout=max(0.1, self.deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+            self.stats.ws_messages[channel] += 1
+
+    async def listen(self, channel: str, path: str, role: Optional[str] = None):
+        """Mantiene una conexión WebSocket abierta y cuenta los mensajes recibidos."""
+        if websockets is None:
+            return
+        try:
+            async with websockets.connect(self.ws_url(path, role)) as connection:
+                await self.receive(channel, connection)
+        except Exception:
+            self.stats.ws_failures[channel] += 1
+
+    async def courier_pings(self, person_id: str):
+        """Socket de un repartidor: manda su posición cada ``--gps-interval`` segundos."""
+        if websockets is None:
+            return
+        latitude, longitude = self.random_point()
+        try:
+            async with websockets.connect(self.ws_url(f"/delivery/{person_id}", "delivery")) as connection:
+                receiver = asyncio.create_task(self.receive("delivery", connection))
+                try:
+                    while self.running():
+                        # Random walk of up to ~50 m per ping
+                        latitude += self.rng.uniform(-0.0005, 0.0005)
+                        longitude += self.rng.uniform(-0.0005, 0.0005)
+                        await connection.send(json.dumps(
+                            {"type": "location", "latitude": latitude, "longitude": longitude}
+                        ))
+                        self.stats.ws_sent["delivery"] += 1
+                        await asyncio.sleep(self.interval(self.args.gps_interval))
+                finally:
+                    receiver.cancel()
+        except Exception:
+            self.stats.ws_failures["delivery"] += 1
+
+    async def customer_session(self):
+        """Un cliente: mira el menú, pide y sigue su pedido."""
+        await self.call("menu.list", "GET", "/menu")
+        for _ in range(self.rng.randint(0, 2)):
+            category = self.rng.choice(self.menu)["category"]
+            await self.call("menu.category", "GET", f"/menu/category/{category}")
+            await asyncio.sleep(self.interval(self.rng.uniform(2, 8)))
+
+        latitude, longitude = self.random_point()
+        items = [
+            {"menu_item_id": item["id"], "quantity": self.rng.randint(1, 3), "special_instructions": ""}
+            for item in self.rng.sample(self.menu, k=min(len(self.menu), self.rng.randint(1, 4)))
+        ]
+        response = await self.call("orders.create", "POST", "/orders", expected=(200, 503), json={
+            "items": items,
+            "delivery_info": {
+                "customer_name": "Cliente de carga",
+                "customer_phone": f"+59598{self.rng.randint(1000000, 9999999)}",
+                "delivery_address": "Calle de prueba 123",
+                "delivery_zone": "",
+                "latitude": latitude,
+                "longitude": longitude,
+            },
+            "payment_method": self.rng.choice(["cash", "card"]),
+        })
+        if response is None or response.status_code != 200:
+            return
+        order_id = response.json()["id"]
+
+        listener = asyncio.create_task(self.listen("client", f"/client/{order_id}"))
+        for _ in range(self.args.tracking_polls):
+            await asyncio.sleep(self.interval(self.args.tracking_interval))
+            if not self.running():
+                break
+            tracked = await self.call("orders.track", "GET", f"/orders/{order_id}")
+            if tracked is not None and tracked.status_code == 200 and tracked.json()["status"] in ("delivered", "cancelled"):
+                break
+        listener.cancel()
+
+    async def customers(self):
+        """Genera llegadas de clientes a ``--order-rate`` pedidos por minuto."""
+        sessions = set()
+        while self.running():
+            await asyncio.sleep(self.rng.expovariate(self.args.order_rate / 60) / self.args.time_scale)
+            task = asyncio.create_task(self.customer_session())
+            sessions.add(task)
+            task.add_done_callback(sessions.discard)
+        for task in list(sessions):
+            task.cancel()
+
+    async def tablet(self, role: str, index: int, count: int, next_status: Dict[str, str], socket: Awaitable):
+        """Una tablet de cocina o reparto: refresca su tablero, avanza sus pedidos y mantiene su WebSocket."""
+        listener = asyncio.create_task(socket)
+        while self.running():
+            response = await self.call(f"boards.{role}", "GET", f"/boards/{role}", headers=self.auth(role))
+            if response is not None and response.status_code == 200:
+                for column in response.json()["columns"]:
+                    for order in column["orders"]:
+                        # Each tablet owns a slice of the orders, like separate stations
+                        if hash(order["id"]) % count != index or order["status"] not in next_status:
+                            continue
+                        if self.rng.random() > self.args.action_probability:
+                            continue
+                        await self.call(f"orders.status.{role}", "PUT", f"/orders/{order['id']}/status",
+                                        expected=(200, 403), headers=self.auth(role),
+                                        json={"status": next_status[order["status"]]})
+            await asyncio.sleep(self.interval(15))
+        listener.cancel()
+
+    async def admin_dashboard(self):
+        """Un dashboard de administración: tablero, analíticas y ``/ws/admin``."""
+        listener = asyncio.create_task(self.listen("admin", "/admin"))
+        while self.running():
+            await self.call("boards.admin", "GET", "/boards/admin", headers=self.auth("admin"))
+            await self.call("analytics.today", "GET", "/analytics/today", headers=self.auth("admin"))
+            await asyncio.sleep(self.interval(30))
+        listener.cancel()
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.args.max_connections, max_keepalive_connections=self.args.max_connections)
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            self.client = client
+            await self.setup()
+            self.stats = LoadStats()
+            self.deadline = time.monotonic() + self.args.duration
+            actors = [self.customers()]
+            actors += [
+                self.tablet("kitchen", index, self.args.kitchen_tablets, KITCHEN_NEXT_STATUS,
+                            self.listen("kitchen", "/kitchen/horno", "kitchen"))
+                for index in range(self.args.kitchen_tablets)
+            ]
+            actors += [
+                self.tablet("delivery", index, self.args.delivery_tablets, DELIVERY_NEXT_STATUS,
+                            self.courier_pings(self.delivery_person_ids[index]))
+                for index in range(self.args.delivery_tablets)
+            ]
+            actors += [self.admin_dashboard() for _ in range(self.args.admin_dashboards)]
+            await asyncio.gather(*actors)
+        return self.stats.report()
+
+
+def print_report(report: dict):
+    print(f"elapsed: {report['elapsed_seconds']}s")
+    header = f"{'operation':<24}{'reqs':>7}{'rps':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>9}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for operation, row in report["operations"].items():
+        print(f"{operation:<24}{row['requests']:>7}{row['rps']:>8}{row['p50_ms']:>8}{row['p90_ms']:>8}"
+              f"{row['p99_ms']:>8}{row['max_ms']:>9}{row['error_rate'] * 100:>7.1f}%")
+    if report["websocket_messages"] or report["websocket_failures"] or report["websocket_sent"]:
+        print(f"websocket messages: {report['websocket_messages']} sent: {report['websocket_sent']} "
+              f"failures: {report['websocket_failures']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--duration", type=float, default=60, help="segundos de carga")
+    parser.add_argument("--order-rate", type=float, default=20, help="pedidos nuevos por minuto")
+    parser.add_argument("--kitchen-tablets", type=int, default=2)
+    parser.add_argument("--delivery-tablets", type=int, default=3)
+    parser.add_argument("--admin-dashboards", type=int, default=1)
+    parser.add_argument("--tracking-interval", type=float, default=20, help="segundos entre consultas de seguimiento")
+    parser.add_argument("--tracking-polls", type=int, default=10)
+    parser.add_argument("--gps-interval", type=float, default=5, help="segundos entre pings GPS de cada repartidor")
+    parser.add_argument("--action-probability", type=float, default=0.5,
+                        help="probabilidad de que una tablet avance un pedido en cada refresco")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="factor de aceleración de los intervalos")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte en JSON")
+    args = parser.parse_args()
+
+    if websockets is None:
+        print("websockets no está instalado: se omiten las conexiones WebSocket", file=sys.stderr)
+    report = asyncio.run(LoadTest(args).run())
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
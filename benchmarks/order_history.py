@@ -0,0 +1,566 @@
+"""
+Generador de historial de pedidos sintético y reproducción contra la API.
+
+Produce un flujo determinista de pedidos de varios años con los modelos
+``MenuItem``, ``CartItem``, ``DeliveryInfo`` y ``Order`` del backend:
+
+- Volumen diario con crecimiento anual, estacionalidad mensual y semanal
+  (viernes y sábados más cargados) y ruido.
+- Hora del pedido según una curva con picos de almuerzo y cena (hora local,
+  guardada en UTC como hace el servidor).
+- Clientes recurrentes (unos pocos piden muy seguido) con dirección fija
+  dentro de una zona de entrega real; la mezcla de zonas se puede fijar con
+  ``--zone-mix``.
+- Canastas con productos populares más frecuentes, cancelaciones más
+  probables en hora pico, y la línea de tiempo de estados de cada pedido.
+  Los pedidos cuya entrega queda después del final del rango quedan en el
+  estado que les toca en ese momento.
+
+Cada día usa su propio generador aleatorio (semilla + fecha), así que el
+mismo día se reconstruye igual en cualquier proceso y en la reproducción.
+
+``generate`` carga el historial en ``orders`` con ``insert_many`` por lotes,
+repartiendo los días entre ``--processes`` procesos. Requiere que
+``menu_items`` ya tenga el menú (``POST /api/initialize-menu``).
+
+``replay`` reconstruye una ventana del mismo flujo y la envía a un servidor
+en vivo: crea cada pedido con ``POST /api/orders`` y aplica sus cambios de
+estado con ``PUT /api/orders/{id}/status``, respetando los tiempos originales
+divididos por ``--speedup``. Reporta latencias como ``loadtest.py`` y el
+atraso de los eventos respecto del horario previsto.
+
+Uso:
+    python benchmarks/order_history.py generate --mongo-url mongodb://localhost:27017 \\
+        --db-name pizzapp --years 3 --orders-per-day 2000 --processes 8 --drop
+    python benchmarks/order_history.py replay --base-url http://localhost:8001 \\
+        --day 2025-12-19 --from-hour 18 --hours 3 --speedup 30
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+from pymongo import MongoClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# server.py reads these at import time; the tools below connect with their own options
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pizzapp")
+
+from server import CartItem, DeliveryInfo, MenuItem, Order  # noqa: E402
+from zones import Zone, ZoneIndex, default_zones_path  # noqa: E402
+
+from loadtest import LoadStats, print_report  # noqa: E402
+
+# Relative order volume by local hour: lunch peak around 12-13 h, dinner peak around 20-21 h
+HOURLY_WEIGHTS = [
+    0.4, 0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.2, 0.4, 0.6, 1.0, 2.6,
+    4.2, 3.6, 1.6, 0.9, 0.8, 1.1, 2.4, 4.6, 6.0, 5.4, 3.2, 1.4,
+]
+# Monday..Sunday
+WEEKDAY_WEIGHTS = [0.80, 0.78, 0.85, 0.95, 1.30, 1.45, 1.15]
+# January..December: summer holidays dip, winter and December peaks
+MONTH_WEIGHTS = [0.85, 0.90, 1.00, 1.00, 1.05, 1.10, 1.15, 1.05, 1.00, 1.00, 1.05, 1.25]
+PAYMENT_WEIGHTS = {"cash": 0.55, "card": 0.30, "transfer": 0.15}
+FIRST_NAMES = [
+    "María", "José", "Juan", "Ana", "Carlos", "Rosa", "Luis", "Lucía", "Jorge", "Sofía",
+    "Miguel", "Laura", "Diego", "Carmen", "Pedro", "Valeria", "Andrés", "Camila", "Hugo", "Paula",
+]
+LAST_NAMES = [
+    "González", "Benítez", "Martínez", "López", "Giménez", "Villalba", "Duarte", "Ramírez",
+    "Vera", "Ortiz", "Acosta", "Báez", "Rojas", "Cabrera", "Núñez", "Franco",
+]
+STREETS = [
+    "Avda. España", "Avda. Mariscal López", "Eusebio Ayala", "Mcal. Estigarribia", "Brasilia",
+    "Sacramento", "Avda. San Martín", "Perú", "Colón", "Tte. Fariña", "Dr. Morra", "Denis Roa",
+]
+NOTES = ["", "", "", "", "Sin cebolla", "Timbre no funciona, llamar", "Vuelto para 100.000", "Portón negro"]
+
+
+def weighted_choice(rng: random.Random, weights: Dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def parse_weights(text: Optional[str]) -> Dict[str, float]:
+    """Convierte ``"centro=4,lambare=1"`` en ``{"centro": 4.0, "lambare": 1.0}``."""
+    if not text:
+        return {}
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def polygon_area(zone: Zone) -> float:
+    area = 0.0
+    count = len(zone.polygon)
+    for index in range(count):
+        lat1, lon1 = zone.polygon[index]
+        lat2, lon2 = zone.polygon[(index + 1) % count]
+        area += lon1 * lat2 - lon2 * lat1
+    return abs(area) / 2
+
+
+def random_point(rng: random.Random, zone: Zone) -> Tuple[float, float]:
+    min_lat, min_lon, max_lat, max_lon = zone.bbox
+    for _ in range(100):
+        latitude = rng.uniform(min_lat, max_lat)
+        longitude = rng.uniform(min_lon, max_lon)
+        if zone.contains(latitude, longitude):
+            return round(latitude, 6), round(longitude, 6)
+    return zone.polygon[0]
+
+
+class GeneratedOrder:
+    """
+    Pedido generado y su línea de tiempo de estados.
+
+    Attributes:
+        order (Order): Pedido tal como quedaría guardado al final del rango
+        transitions (List[Tuple[datetime, str]]): Cambios de estado posteriores a
+            la creación, en orden, hasta el final del rango
+    """
+
+    __slots__ = ("order", "transitions")
+
+    def __init__(self, order: Order, transitions: List[Tuple[datetime, str]]):
+        self.order = order
+        self.transitions = transitions
+
+
+class OrderStream:
+    """
+    Flujo determinista de pedidos históricos.
+
+    Args:
+        menu (Sequence[MenuItem]): Productos disponibles
+        zones (ZoneIndex): Zonas de entrega
+        start (date): Primer día (hora local)
+        days (int): Cantidad de días
+        orders_per_day (float): Pedidos en un día promedio del primer año
+        seed (int): Semilla
+        growth (float): Crecimiento anual del volumen (0.3 = +30% por año)
+        cancel_rate (float): Fracción promedio de pedidos cancelados
+        customers (int): Tamaño del padrón de clientes
+        zone_mix (Dict[str, float]): Peso por zona; por defecto, proporcional al área
+        utc_offset_hours (float): Diferencia de la hora local con UTC
+        courier_ids (Sequence[str]): Repartidores a asignar en los pedidos despachados
+    """
+
+    def __init__(self, menu: Sequence[MenuItem], zones: ZoneIndex, start: date, days: int,
+                 orders_per_day: float, seed: int = 1, growth: float = 0.25, cancel_rate: float = 0.04,
+                 customers: int = 20000, zone_mix: Optional[Dict[str, float]] = None,
+                 utc_offset_hours: float = -3, courier_ids: Sequence[str] = ()):
+        if not menu:
+            raise ValueError("The menu is empty")
+        # Sort so that the same menu yields the same stream regardless of load order
+        self.menu = sorted(menu, key=lambda item: (item.category, item.name))
+        self.zones = zones
+        self.start = start
+        self.days = days
+        self.orders_per_day = orders_per_day
+        self.seed = seed
+        self.growth = growth
+        self.cancel_rate = cancel_rate
+        self.customers = customers
+        self.utc_offset = timedelta(hours=utc_offset_hours)
+        self.courier_ids = list(courier_ids)
+        self.end = datetime.combine(start + timedelta(days=days), datetime.min.time()) - self.utc_offset
+        mix = zone_mix or {zone.name: polygon_area(zone) for zone in zones.zones}
+        self.zone_mix = {name: weight for name, weight in mix.items() if zones.get(name) and weight > 0}
+        if not self.zone_mix:
+            raise ValueError("No delivery zone left in the zone mix")
+        rng = random.Random(f"{seed}:menu")
+        popularity = list(range(len(self.menu)))
+        rng.shuffle(popularity)
+        # Zipf-like popularity: a few best sellers dominate the baskets
+        self.item_weights = [1 / (rank + 1) ** 0.9 for rank in popularity]
+        self.drinks = [index for index, item in enumerate(self.menu) if item.category == "drinks"]
+        self._customer_cache: Dict[int, dict] = {}
+
+    def day_volume(self, rng: random.Random, day: date) -> int:
+        years = (day - self.start).days / 365.25
+        expected = (
+            self.orders_per_day * (1 + self.growth) ** years
+            * WEEKDAY_WEIGHTS[day.weekday()] / (sum(WEEKDAY_WEIGHTS) / 7)
+            * MONTH_WEIGHTS[day.month - 1] / (sum(MONTH_WEIGHTS) / 12)
+        )
+        return max(0, round(rng.gauss(expected, expected * 0.08)))
+
+    def customer(self, index: int) -> dict:
+        """Datos fijos del cliente ``index`` (los mismos en cualquier proceso)."""
+        customer = self._customer_cache.get(index)
+        if customer is None:
+            rng = random.Random(f"{self.seed}:customer:{index}")
+            zone = self.zones.get(weighted_choice(rng, self.zone_mix))
+            latitude, longitude = random_point(rng, zone)
+            customer = self._customer_cache[index] = {
+                "customer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "customer_phone": f"+5959{rng.choice('6789')}{rng.choice('1256')}{index:06d}",
+                "delivery_address": f"{rng.choice(STREETS)} {rng.randint(100, 4999)}",
+                "delivery_zone": zone.name,
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+        return customer
+
+    def basket(self, rng: random.Random) -> List[CartItem]:
+        lines = min(len(self.menu), 1 + int(rng.expovariate(0.9)))
+        indexes = set()
+        while len(indexes) < lines:
+            indexes.add(rng.choices(range(len(self.menu)), weights=self.item_weights)[0])
+        if self.drinks and rng.random() < 0.45:
+            indexes.add(rng.choice(self.drinks))
+        return [
+            CartItem(
+                menu_item_id=self.menu[index].id,
+                quantity=1 + int(rng.expovariate(1.6)),
+                special_instructions=rng.choice(NOTES) if rng.random() < 0.1 else "",
+            )
+            for index in sorted(indexes)
+        ]
+
+    def build(self, rng: random.Random, created_at: datetime, rush: float) -> GeneratedOrder:
+        items = self.basket(rng)
+        prices = {item.id: item for item in self.menu}
+        subtotal = sum(prices[line.menu_item_id].price * line.quantity for line in items)
+        delivery_info = DeliveryInfo(**self.customer(int(self.customers * rng.random() ** 2.5)))
+        zone = self.zones.get(delivery_info.delivery_zone)
+        delivery_fee = zone.fee_for(subtotal)
+        lead = max(prices[line.menu_item_id].preparation_time for line in items)
+        work = sum(prices[line.menu_item_id].preparation_time * line.quantity for line in items)
+        travel = rng.uniform(10, 30)
+
+        # Status timeline; kitchen and couriers slow down at rush hour
+        moment = created_at
+        timeline = []
+        steps = [
+            ("confirmed", rng.uniform(0.5, 4) * rush),
+            ("preparing", rng.uniform(1, 6) * rush),
+            ("ready", lead * rng.uniform(0.8, 1.4) * rush),
+            ("on_route", rng.uniform(1, 10) * rush),
+            ("delivered", travel),
+        ]
+        cancelled_after = None
+        if rng.random() < self.cancel_rate * rush:
+            cancelled_after = rng.choices([0, 1, 2], weights=[6, 3, 1])[0]
+        for position, (status, minutes) in enumerate(steps):
+            moment += timedelta(minutes=minutes)
+            if position == cancelled_after:
+                timeline.append((moment, "cancelled"))
+                break
+            timeline.append((moment, status))
+        transitions = [(moment, status) for moment, status in timeline if moment < self.end]
+
+        status = transitions[-1][1] if transitions else "received"
+        dispatched = status in ("on_route", "delivered")
+        order = Order(
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            items=items,
+            delivery_info=delivery_info,
+            subtotal=subtotal,
+            delivery_fee=delivery_fee,
+            total=subtotal + delivery_fee,
+            status=status,
+            payment_method=weighted_choice(rng, PAYMENT_WEIGHTS),
+            estimated_delivery=created_at + timedelta(minutes=round(lead * rush + travel + 5)),
+            created_at=created_at,
+            updated_at=transitions[-1][0] if transitions else created_at,
+            assigned_delivery_person=rng.choice(self.courier_ids) if dispatched and self.courier_ids else None,
+            delivery_notes=rng.choice(NOTES),
+            kitchen_work_minutes=work,
+            kitchen_lead_minutes=lead,
+        )
+        return GeneratedOrder(order, transitions)
+
+    def orders_for_day(self, day: date) -> List[GeneratedOrder]:
+        """Pedidos de un día local, ordenados por ``created_at`` (UTC)."""
+        rng = random.Random(f"{self.seed}:{day.isoformat()}")
+        count = self.day_volume(rng, day)
+        peak = max(HOURLY_WEIGHTS)
+        midnight = datetime.combine(day, datetime.min.time())
+        moments = sorted(
+            rng.choices(range(24), weights=HOURLY_WEIGHTS)[0] * 3600 + rng.random() * 3600
+            for _ in range(count)
+        )
+        orders = []
+        for seconds in moments:
+            local = midnight + timedelta(seconds=seconds)
+            created_at = local - self.utc_offset
+            if created_at >= self.end:
+                break
+            rush = 1 + 0.6 * HOURLY_WEIGHTS[local.hour] / peak
+            orders.append(self.build(rng, created_at.replace(microsecond=0), rush))
+        return orders
+
+    def day_range(self) -> List[date]:
+        return [self.start + timedelta(days=offset) for offset in range(self.days)]
+
+    def __iter__(self) -> Iterator[GeneratedOrder]:
+        for day in self.day_range():
+            yield from self.orders_for_day(day)
+
+
+def stream_from_args(args: argparse.Namespace, menu: Sequence[MenuItem], zones: ZoneIndex,
+                     courier_ids: Sequence[str] = ()) -> OrderStream:
+    days = args.days or round(args.years * 365.25)
+    start = args.start or date.today() - timedelta(days=days - 1)
+    return OrderStream(
+        menu, zones, start, days, args.orders_per_day, seed=args.seed, growth=args.growth,
+        cancel_rate=args.cancel_rate, customers=args.customers, zone_mix=parse_weights(args.zone_mix),
+        utc_offset_hours=args.utc_offset, courier_ids=courier_ids,
+    )
+
+
+def load_days(options: dict, days: List[date]) -> int:
+    """
+    Genera e inserta los pedidos de ``days`` (se ejecuta en un proceso hijo).
+
+    Args:
+        options (dict): Conexión, parámetros del flujo y tamaño de lote
+        days (List[date]): Días a cargar
+
+    Returns:
+        int: Pedidos insertados
+    """
+    stream = OrderStream(
+        [MenuItem(**item) for item in options["menu"]],
+        ZoneIndex.from_dict(options["zones"]),
+        **options["stream"],
+    )
+    client = MongoClient(options["mongo_url"])
+    collection = client[options["db_name"]].orders
+    inserted = 0
+    batch = []
+    try:
+        for day in days:
+            for generated in stream.orders_for_day(day):
+                batch.append(generated.order.dict())
+                if len(batch) >= options["batch_size"]:
+                    inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+                    batch = []
+        if batch:
+            inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+    finally:
+        client.close()
+    return inserted
+
+
+def generate(args: argparse.Namespace):
+    zones = ZoneIndex.from_dict(json.loads(Path(args.zones_file).read_text(encoding="utf-8")))
+    client = MongoClient(args.mongo_url)
+    database = client[args.db_name]
+    menu = [MenuItem(**item) for item in database.menu_items.find({}, {"_id": 0})]
+    if not menu:
+        sys.exit("menu_items is empty: load a menu first (POST /api/initialize-menu)")
+    courier_ids = [person["id"] for person in database.delivery_persons.find({}, {"_id": 0, "id": 1})]
+    if args.drop:
+        database.orders.drop()
+    client.close()
+
+    stream = stream_from_args(args, menu, zones, courier_ids)
+    options = {
+        "mongo_url": args.mongo_url,
+        "db_name": args.db_name,
+        "batch_size": args.batch_size,
+        "menu": [item.dict() for item in menu],
+        "zones": zones.to_dict(),
+        "stream": {
+            "start": stream.start, "days": stream.days, "orders_per_day": stream.orders_per_day,
+            "seed": stream.seed, "growth": stream.growth, "cancel_rate": stream.cancel_rate,
+            "customers": stream.customers, "zone_mix": stream.zone_mix,
+            "utc_offset_hours": stream.utc_offset.total_seconds() / 3600, "courier_ids": stream.courier_ids,
+        },
+    }
+    days = stream.day_range()
+    chunks = [days[index:index + args.chunk_days] for index in range(0, len(days), args.chunk_days)]
+    print(f"{stream.days} days from {stream.start} in {len(chunks)} chunks, {args.processes} processes")
+
+    started = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = [executor.submit(load_days, options, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            total += future.result()
+            elapsed = time.perf_counter() - started
+            print(f"[{done}/{len(chunks)}] {total} orders, {total / elapsed:,.0f} orders/s", flush=True)
+    print(f"loaded {total} orders in {time.perf_counter() - started:.1f}s")
+
+
+class Replay:
+    """
+    Reproduce una ventana del flujo contra un servidor en vivo.
+
+    Attributes:
+        args (argparse.Namespace): Opciones de la línea de comandos
+        stats (LoadStats): Latencias y errores por operación
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.stats = LoadStats()
+        self.api = args.base_url.rstrip("/") + "/api"
+        self.client: Optional[httpx.AsyncClient] = None
+        self.token = ""
+        self.lags: List[float] = []
+        self.semaphore = asyncio.Semaphore(args.max_in_flight)
+
+    async def call(self, operation: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, f"{self.api}{path}", **kwargs)
+            except httpx.HTTPError:
+                self.stats.record(operation, time.perf_counter() - start, None, False)
+                return None
+            self.stats.record(operation, time.perf_counter() - start, response.status_code, response.is_success)
+            return response
+
+    async def window(self) -> List[GeneratedOrder]:
+        zones = ZoneIndex.from_dict((await self.client.get(f"{self.api}/delivery-zones")).json())
+        menu = [MenuItem(**item) for item in (await self.client.get(f"{self.api}/menu")).json()]
+        stream = stream_from_args(self.args, menu, zones)
+        day = self.args.day or stream.start + timedelta(days=stream.days - 1)
+        begin = datetime.combine(day, datetime.min.time()) + timedelta(hours=self.args.from_hour) - stream.utc_offset
+        finish = begin + timedelta(hours=self.args.hours)
+        orders = stream.orders_for_day(day)
+        if self.args.from_hour + self.args.hours > 24:
+            orders += stream.orders_for_day(day + timedelta(days=1))
+        return [generated for generated in orders if begin <= generated.order.created_at < finish]
+
+    async def create(self, generated: GeneratedOrder, created: asyncio.Future):
+        order = generated.order
+        response = await self.call("create_order", "POST", "/orders", json={
+            "items": [item.dict() for item in order.items],
+            "delivery_info": order.delivery_info.dict(),
+            "payment_method": order.payment_method,
+            "delivery_notes": order.delivery_notes,
+        })
+        created.set_result(response.json()["id"] if response is not None and response.is_success else None)
+
+    async def advance(self, status: str, created: asyncio.Future):
+        order_id = await created
+        if order_id is not None:
+            await self.call(f"status:{status}", "PUT", f"/orders/{order_id}/status", json={"status": status},
+                            headers={"Authorization": f"Bearer {self.token}"})
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.args.max_in_flight)
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as self.client:
+            login = await self.client.post(f"{self.api}/auth/login", json={
+                "username": self.args.username, "password": self.args.password,
+            })
+            login.raise_for_status()
+            self.token = login.json()["access_token"]
+            orders = await self.window()
+            if not orders:
+                return {"orders": 0, **self.stats.report()}
+
+            # One heap of (due time, sequence, kind, payload) over creations and status changes
+            origin = orders[0].order.created_at
+            events = []
+            for sequence, generated in enumerate(orders):
+                created = asyncio.get_running_loop().create_future()
+                events.append(((generated.order.created_at - origin).total_seconds(), sequence, "create",
+                               (generated, created)))
+                for moment, status in generated.transitions:
+                    events.append(((moment - origin).total_seconds(), sequence, status, created))
+            heapq.heapify(events)
+            print(f"replaying {len(orders)} orders and {len(events) - len(orders)} status changes "
+                  f"from {origin:%Y-%m-%d %H:%M} UTC at {self.args.speedup:g}x", flush=True)
+
+            self.stats.started_at = time.monotonic()
+            tasks = []
+            while events:
+                offset, _, kind, payload = heapq.heappop(events)
+                due = self.stats.started_at + offset / self.args.speedup
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.lags.append(max(0.0, time.monotonic() - due))
+                if kind == "create":
+                    tasks.append(asyncio.create_task(self.create(*payload)))
+                else:
+                    tasks.append(asyncio.create_task(self.advance(kind, payload)))
+            await asyncio.gather(*tasks)
+
+        ordered = sorted(self.lags)
+        return {
+            "orders": len(orders),
+            "schedule_lag_ms": {
+                "p50": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p99": round(ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000, 1),
+                "max": round(ordered[-1] * 1000, 1),
+            },
+            **self.stats.report(),
+        }
+
+
+def replay(args: argparse.Namespace):
+    report = asyncio.run(Replay(args).run())
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print_report(report)
+    if report["orders"]:
+        lag = report["schedule_lag_ms"]
+        print(f"schedule lag: p50 {lag['p50']}ms p99 {lag['p99']}ms max {lag['max']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    stream_options = argparse.ArgumentParser(add_help=False)
+    stream_options.add_argument("--start", type=date.fromisoformat, help="primer día (por defecto, hoy menos el rango)")
+    stream_options.add_argument("--years", type=float, default=3)
+    stream_options.add_argument("--days", type=int, help="cantidad de días (reemplaza --years)")
+    stream_options.add_argument("--orders-per-day", type=float, default=300, help="promedio diario del primer año")
+    stream_options.add_argument("--growth", type=float, default=0.25, help="crecimiento anual del volumen")
+    stream_options.add_argument("--cancel-rate", type=float, default=0.04)
+    stream_options.add_argument("--customers", type=int, default=20000)
+    stream_options.add_argument("--zone-mix", help='pesos por zona, p. ej. "centro=4,lambare=1"')
+    stream_options.add_argument("--utc-offset", type=float, default=-3, help="hora local menos UTC")
+    stream_options.add_argument("--seed", type=int, default=1)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("generate", parents=[stream_options], help="carga el historial en MongoDB")
+    load.add_argument("--mongo-url", default=os.environ["MONGO_URL"])
+    load.add_argument("--db-name", default=os.environ["DB_NAME"])
+    load.add_argument("--zones-file", default=str(default_zones_path()))
+    load.add_argument("--batch-size", type=int, default=5000)
+    load.add_argument("--chunk-days", type=int, default=7, help="días por tarea de carga")
+    load.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    load.add_argument("--drop", action="store_true", help="vacía la colección orders antes de cargar")
+    load.set_defaults(handler=generate)
+
+    live = commands.add_parser("replay", parents=[stream_options], help="reproduce una ventana contra la API")
+    live.add_argument("--base-url", default="http://localhost:8001")
+    live.add_argument("--username", default="admin")
+    live.add_argument("--password", default="admin123")
+    live.add_argument("--day", type=date.fromisoformat, help="día local a reproducir (por defecto, el último)")
+    live.add_argument("--from-hour", type=float, default=18)
+    live.add_argument("--hours", type=float, default=3)
+    live.add_argument("--speedup", type=float, default=10, help="factor de aceleración del tiempo")
+    live.add_argument("--max-in-flight", type=int, default=100)
+    live.add_argument("--timeout", type=float, default=30)
+    live.add_argument("--json", action="store_true", help="imprime el reporte en JSON")
+    live.set_defaults(handler=replay)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
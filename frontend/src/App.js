@@ -1259,6 +1259,8 @@ const TrackOrder = () => {
 
 const KitchenDashboard = () => {
   const [orders, setOrders] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [totalOrders, setTotalOrders] = useState(0);
   const [loading, setLoading] = useState(true);
   const [selectedStatus, setSelectedStatus] = useState('all');
   const { adminUser } = useAuth();
@@ -1283,10 +1285,13 @@ const KitchenDashboard = () => {
 
   const fetchOrders = async () => {
     try {
-      const response = await axios.get(`${API}/orders`, {
+      const response = await axios.get(`${API}/boards/kitchen`, {
         headers: getAuthHeaders()
       });
-      setOrders(response.data);
+      // One pre-aggregated board per role: cards grouped by status plus full counts
+      setOrders(response.data.columns.flatMap(column => column.orders));
+      setStatusCounts(Object.fromEntries(response.data.columns.map(column => [column.status, column.count])));
+      setTotalOrders(response.data.total);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching orders:', error);
@@ -1359,11 +1364,11 @@ const KitchenDashboard = () => {
                 : 'bg-white text-gray-700 hover:bg-gray-100'
             }`}
           >
-            Todos ({orders.length})
+            Todos ({totalOrders})
           </button>
           
           {Object.entries(kitchenStatuses).map(([status, config]) => {
-            const count = orders.filter(order => order.status === status).length;
+            const count = statusCounts[status] || 0;
             return (
               <button
                 key={status}
@@ -1473,6 +1478,7 @@ const KitchenDashboard = () => {
 
 const DeliveryDashboard = () => {
   const [orders, setOrders] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
   const [loading, setLoading] = useState(true);
   const [selectedStatus, setSelectedStatus] = useState('ready');
   const { adminUser } = useAuth();
@@ -1496,10 +1502,12 @@ const DeliveryDashboard = () => {
 
   const fetchOrders = async () => {
     try {
-      const response = await axios.get(`${API}/orders`, {
+      const response = await axios.get(`${API}/boards/delivery`, {
         headers: getAuthHeaders()
       });
-      setOrders(response.data);
+      // One pre-aggregated board per role: cards grouped by status plus full counts
+      setOrders(response.data.columns.flatMap(column => column.orders));
+      setStatusCounts(Object.fromEntries(response.data.columns.map(column => [column.status, column.count])));
       setLoading(false);
     } catch (error) {
       console.error('Error fetching orders:', error);
@@ -1565,7 +1573,7 @@ const DeliveryDashboard = () => {
         {/* Status Filter */}
         <div className="flex flex-wrap gap-2 mb-6">
           {Object.entries(deliveryStatuses).map(([status, config]) => {
-            const count = orders.filter(order => order.status === status).length;
+            const count = statusCounts[status] || 0;
             return (
               <button
                 key={status}
@@ -1676,6 +1684,8 @@ const DeliveryDashboard = () => {
 
 const AdminDashboard = () => {
   const [orders, setOrders] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({});
+  const [totalOrders, setTotalOrders] = useState(0);
   const [loading, setLoading] = useState(true);
   const [selectedStatus, setSelectedStatus] = useState('all');
   const [analytics, setAnalytics] = useState(null);
@@ -1711,10 +1721,13 @@ const AdminDashboard = () => {
 
   const fetchOrders = async () => {
     try {
-      const response = await axios.get(`${API}/orders`, {
+      const response = await axios.get(`${API}/boards/admin`, {
         headers: getAuthHeaders()
       });
-      setOrders(response.data);
+      // One pre-aggregated board per role: cards grouped by status plus full counts
+      setOrders(response.data.columns.flatMap(column => column.orders));
+      setStatusCounts(Object.fromEntries(response.data.columns.map(column => [column.status, column.count])));
+      setTotalOrders(response.data.total);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching orders:', error);
@@ -1836,11 +1849,11 @@ const AdminDashboard = () => {
                 : 'bg-white text-gray-700 hover:bg-gray-100'
             }`}
           >
-            Todos ({orders.length})
+            Todos ({totalOrders})
           </button>
           
           {Object.entries(orderStatuses).map(([status, config]) => {
-            const count = orders.filter(order => order.status === status).length;
+            const count = statusCounts[status] || 0;
             return (
               <button
                 key={status}
@@ -0,0 +1,163 @@
+"""
+Fixtures compartidas: la app montada en proceso sobre una base en memoria.
+
+``server.db`` se reemplaza por ``MemoryMotorClient`` y ``server.storage`` por
+un ``MongoStorage`` sobre esa base, así que se ejercita el backend de
+producción. El estado en memoria de cada worker (índice de repartidores,
+modelo de ETA, colas de cocina, rueda de pre-pedidos, cachés, índice de
+búsqueda, miniaturas, zonas editadas y conexiones WebSocket) se recrea en cada prueba, así
+que ninguna depende de otra, de la red ni de un mongod.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pizzapp_test")
+
+import server  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+from boards import SnapshotCache  # noqa: E402
+from dispatch import CourierIndex  # noqa: E402
+from eta import KitchenLoadModel  # noqa: E402
+from kitchen import TicketScheduler  # noqa: E402
+from menu_search import MenuSearchIndex  # noqa: E402
+from storage_mongo import MongoStorage  # noqa: E402
+from thumbnails import LocalImageSource, ThumbnailStore  # noqa: E402
+from timerwheel import TimerWheel  # noqa: E402
+from tracking import LocationTracker  # noqa: E402
+from zones import ZoneRegistry, default_zones_path  # noqa: E402
+
+from tests.memory_motor import MemoryMotorClient  # noqa: E402
+
+ROLE_PASSWORDS = {
+    "admin": "admin123",
+    "manager": "manager123",
+    "kitchen": "kitchen123",
+    "delivery": "delivery123",
+}
+
+SAMPLE_MENU = [
+    {"name": "Pizza Margherita", "price": 45000, "category": "pizzas", "preparation_time": 20},
+    {"name": "Pizza Pepperoni", "price": 55000, "category": "pizzas", "preparation_time": 22},
+    {"name": "Hamburguesa Clásica", "price": 35000, "category": "burgers", "preparation_time": 15},
+    {"name": "Papas Fritas", "price": 15000, "category": "sides", "preparation_time": 8},
+    {"name": "Coca-Cola 500ml", "price": 8000, "category": "drinks", "preparation_time": 1},
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def password_hashes():
+    # bcrypt is deliberately slow: hash each role's password once per session
+    return {role: server.get_password_hash(password) for role, password in ROLE_PASSWORDS.items()}
+
+
+@pytest.fixture
+def memory_db(monkeypatch, tmp_path):
+    """Base en memoria y estado de worker limpio para una prueba (imágenes locales, sin red)."""
+    db = MemoryMotorClient()[os.environ["DB_NAME"]]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "storage", MongoStorage(db))
+    monkeypatch.setattr(server, "courier_index", CourierIndex(default_capacity=server.COURIER_MAX_ORDERS))
+    monkeypatch.setattr(server, "location_tracker", LocationTracker(
+        server.LOCATION_TRAIL_SIZE, server.LOCATION_FLUSH_INTERVAL_SECONDS
+    ))
+    monkeypatch.setattr(server, "eta_model", KitchenLoadModel(
+        server.KITCHEN_PARALLELISM, server.DELIVERY_TRAVEL_MINUTES, server.DELIVERY_TRIP_MINUTES
+    ))
+    monkeypatch.setattr(server, "kitchen_scheduler", TicketScheduler())
+    monkeypatch.setattr(server, "admission_controller", AdmissionController(
+        server.KITCHEN_CAPACITY_MINUTES, server.ADMISSION_SOFT_LIMIT, server.ADMISSION_HARD_LIMIT,
+        server.ZONE_THROTTLE_PER_MINUTE, server.ZONE_THROTTLE_BURST
+    ))
+    monkeypatch.setattr(server, "preorder_wheel", TimerWheel(time.time()))
+    monkeypatch.setattr(server, "board_cache", SnapshotCache(server.BOARD_CACHE_TTL_SECONDS))
+    monkeypatch.setattr(server, "menu_cache", SnapshotCache(server.MENU_CACHE_TTL_SECONDS, min_age_seconds=0))
+    monkeypatch.setattr(server, "menu_search", MenuSearchIndex())
+    monkeypatch.setattr(server, "menu_search_refresh", SnapshotCache(server.MENU_SEARCH_REFRESH_SECONDS, min_age_seconds=0))
+    thumbnails = ThumbnailStore(
+        tmp_path / "thumbnails", LocalImageSource(tmp_path / "images"), [80, 160], 160,
+        executor=ThreadPoolExecutor(max_workers=2), on_ready=lambda: server.menu_cache.invalidate()
+    )
+    monkeypatch.setattr(server, "thumbnails", thumbnails)
+    monkeypatch.setattr(server, "manager", server.ConnectionManager())
+    monkeypatch.setattr(server, "zone_registry", ZoneRegistry(tmp_path / "delivery_zones.json", default_zones_path()))
+    yield db
+    thumbnails.close()
+
+
+@pytest.fixture
+def seeded_db(memory_db, password_hashes):
+    """Base en memoria con un usuario por rol y el menú de ejemplo."""
+    memory_db.admin_users.delegate.insert_many([
+        server.AdminUser(
+            username=role, email=f"{role}@pizzapp.com", role=role, hashed_password=password_hashes[role]
+        ).dict()
+        for role in ROLE_PASSWORDS
+    ])
+    menu_items = [server.MenuItem(description=item["name"], image_url="", **item).dict() for item in SAMPLE_MENU]
+    memory_db.menu_items.delegate.insert_many([dict(item) for item in menu_items])
+    server.menu_search.rebuild(menu_items)
+    return memory_db
+
+
+@pytest.fixture
+def menu(seeded_db):
+    """Productos del menú de ejemplo por nombre."""
+    return {item["name"]: item for item in seeded_db.menu_items.delegate.find({}, {"_id": 0})}
+
+
+@pytest.fixture
+def auth_headers():
+    """Devuelve los headers de autorización de un rol (sin pasar por bcrypt)."""
+    def headers(role: str) -> dict:
+        return {"Authorization": f"Bearer {server.create_access_token({'sub': role})}"}
+    return headers
+
+
+@pytest.fixture
+async def api(seeded_db):
+    """Cliente HTTP que llama a la app por ASGI, sin red ni servidor."""
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+def order_payload(*items, zone: str = "centro", **extra) -> dict:
+    """
+    Arma el cuerpo de ``POST /api/orders``.
+
+    Args:
+        *items: Pares (menu_item_id, cantidad)
+        zone (str): Zona de entrega
+        **extra: Campos adicionales de ``OrderCreate``
+
+    Returns:
+        dict: Cuerpo JSON del pedido
+    """
+    return {
+        "items": [
+            {"menu_item_id": item_id, "quantity": quantity, "special_instructions": ""}
+            for item_id, quantity in items
+        ],
+        "delivery_info": {
+            "customer_name": "Cliente de prueba",
+            "customer_phone": "+595981000000",
+            "delivery_address": "Calle de prueba 123",
+            "delivery_zone": zone,
+        },
+        **extra,
+    }
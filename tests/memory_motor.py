@@ -0,0 +1,162 @@
+"""
+Sustituto en memoria de Motor para pruebas y benchmarks en proceso.
+
+Envuelve ``mongomock`` con la misma interfaz asíncrona que usa ``server.py``
+(``await db.orders.find_one(...)``, ``db.orders.find(...).sort(...).to_list(n)``,
+``async for`` sobre cursores y agregaciones), así que basta con reemplazar
+``server.db`` para ejecutar los handlers sin un mongod.
+
+Las operaciones se ejecutan en el mismo hilo (no hay E/S real), lo que hace
+que los tiempos medidos reflejen el costo de la aplicación y no el de la red.
+"""
+
+from itertools import islice
+from typing import Any, Iterable, Optional
+
+import mongomock
+from pymongo.errors import CollectionInvalid
+
+# Collection methods that Motor exposes as coroutines
+_ASYNC_METHODS = {
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "count_documents", "estimated_document_count", "distinct",
+    "find_one_and_replace", "find_one_and_delete", "bulk_write",
+    "create_index", "create_indexes", "drop_index", "drop_indexes", "index_information", "drop",
+}
+
+
+class MemoryCursor:
+    """
+    Cursor asíncrono sobre un cursor (o iterable) de mongomock.
+    """
+
+    def __init__(self, cursor: Iterable[dict]):
+        self._cursor = cursor
+        self._iterator = None
+
+    def sort(self, *args, **kwargs) -> "MemoryCursor":
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._cursor.limit(limit)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._cursor.skip(skip)
+        return self
+
+    def batch_size(self, batch_size: int) -> "MemoryCursor":
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        """Devuelve hasta ``length`` documentos (todos si es None)."""
+        return list(islice(self._cursor, length))
+
+    def __aiter__(self):
+        self._iterator = iter(self._cursor)
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class MemoryCollection:
+    """
+    Colección con la interfaz de ``AsyncIOMotorCollection``.
+    """
+
+    def __init__(self, collection: mongomock.Collection):
+        self.delegate = collection
+        self.name = collection.name
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.delegate, name)
+        if name not in _ASYNC_METHODS:
+            return attribute
+
+        async def method(*args, **kwargs):
+            return attribute(*args, **kwargs)
+
+        return method
+
+    async def find_one_and_update(self, filter: dict, update: dict, *args, **kwargs) -> Optional[dict]:
+        # mongomock re-reads the updated document with the original filter, so updates that
+        # stop matching it (e.g. filling the last capacity slot) return None; pin the _id first
+        match = self.delegate.find_one(filter, {"_id": 1})
+        if match is None:
+            return None
+        return self.delegate.find_one_and_update({"_id": match["_id"]}, update, *args, **kwargs)
+
+    def find(self, *args, **kwargs) -> MemoryCursor:
+        return MemoryCursor(self.delegate.find(*args, **kwargs))
+
+    def aggregate(self, pipeline: list, **kwargs) -> MemoryCursor:
+        return MemoryCursor(self.delegate.aggregate(pipeline))
+
+
+class MemoryDatabase:
+    """
+    Base de datos con la interfaz de ``AsyncIOMotorDatabase``.
+
+    Attributes:
+        client (MemoryMotorClient): Cliente al que pertenece
+    """
+
+    def __init__(self, client: "MemoryMotorClient", database: mongomock.Database):
+        self.client = client
+        self.delegate = database
+        self.name = database.name
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryCollection(self.delegate[name])
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def create_collection(self, name: str, **options) -> MemoryCollection:
+        # mongomock rejects capped options; size limits do not matter in memory
+        if name in self.delegate.list_collection_names():
+            raise CollectionInvalid(f"collection {name} already exists")
+        self.delegate.create_collection(name)
+        return self[name]
+
+    async def list_collection_names(self, **kwargs) -> list:
+        return self.delegate.list_collection_names()
+
+    async def drop_collection(self, name: str):
+        self._collections.pop(name, None)
+        self.delegate.drop_collection(name)
+
+    async def command(self, command, **kwargs) -> dict:
+        if command in ("ping", {"ping": 1}):
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command not supported in memory: {command!r}")
+
+
+class MemoryMotorClient:
+    """
+    Cliente con la interfaz de ``AsyncIOMotorClient`` respaldado por mongomock.
+    """
+
+    def __init__(self):
+        self.delegate = mongomock.MongoClient()
+        self._databases = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = MemoryDatabase(self, self.delegate[name])
+        return database
+
+    def close(self):
+        self.delegate.close()
@@ -0,0 +1,60 @@
+"""
+Pruebas del control de admisión y sus token buckets por zona.
+"""
+
+from admission import AdmissionController
+
+
+def controller(**overrides) -> AdmissionController:
+    options = {"soft_limit": 0.5, "hard_limit": 1.0, "zone_rate_per_minute": 6.0, "zone_burst": 2.0}
+    return AdmissionController(100, **{**options, **overrides})
+
+
+def test_unknown_zones_share_one_bucket():
+    admission = controller()
+
+    decisions = [admission.evaluate(60, 2, None, now=0.0) for _ in range(3)]
+
+    assert [decision.reason for decision in decisions] == ["high_load", "high_load", "zone_throttled"]
+    assert admission.evaluate(60, 2, "centro", now=0.0).accepted
+    assert len(admission._buckets) == 2
+
+
+def test_below_soft_limit_accepts_without_touching_buckets():
+    admission = controller()
+
+    decision = admission.evaluate(49, 2, "centro", now=0.0)
+
+    assert (decision.accepted, decision.extra_minutes, decision.reason) == (True, 0.0, "ok")
+    assert admission._buckets == {}
+
+
+def test_extra_minutes_grow_with_load_between_limits():
+    admission = controller(zone_burst=10.0)
+
+    assert admission.evaluate(50, 2, "centro", now=0.0).extra_minutes == 0
+    assert admission.evaluate(75, 2, "centro", now=0.0).extra_minutes == 10
+    assert admission.evaluate(90, 2, "centro", now=0.0).extra_minutes == 16
+
+
+def test_bucket_refills_at_zone_rate_up_to_burst():
+    admission = controller()
+    assert admission.evaluate(60, 2, "centro", now=0.0).accepted
+    assert admission.evaluate(60, 2, "centro", now=0.0).accepted
+
+    throttled = admission.evaluate(60, 2, "centro", now=4.0)
+    assert (throttled.accepted, throttled.retry_after) == (False, 6)
+    assert admission.evaluate(60, 2, "centro", now=10.0).accepted
+    assert not admission.evaluate(60, 2, "centro", now=10.0).accepted
+
+    # A long pause refills only up to the burst size
+    assert [admission.evaluate(60, 2, "centro", now=600.0).accepted for _ in range(3)] == [True, True, False]
+
+
+def test_hard_limit_rejects_with_drain_time():
+    admission = controller()
+
+    assert admission.evaluate(100, 2, "centro", now=0.0).retry_after == 30
+    rejected = admission.evaluate(160, 2, "centro", now=0.0)
+    assert (rejected.accepted, rejected.reason, rejected.retry_after) == (False, "overloaded", 1800)
+    assert admission._buckets == {}
@@ -0,0 +1,497 @@
+"""
+Pruebas de la API en proceso, sobre la base en memoria.
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import server
+from tests.conftest import order_payload
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_login_returns_bearer_token(api):
+    response = await api.post("/api/auth/login", json={"username": "kitchen", "password": "kitchen123"})
+
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+
+async def test_login_rejects_wrong_password(api):
+    response = await api.post("/api/auth/login", json={"username": "kitchen", "password": "wrong"})
+
+    assert response.status_code == 401
+
+
+async def test_create_order_prices_items_from_menu_and_zone(api, menu):
+    pizza, soda = menu["Pizza Margherita"], menu["Coca-Cola 500ml"]
+
+    response = await api.post("/api/orders", json=order_payload((pizza["id"], 2), (soda["id"], 1)))
+
+    assert response.status_code == 200
+    order = response.json()
+    subtotal = pizza["price"] * 2 + soda["price"]
+    assert order["subtotal"] == subtotal
+    assert order["delivery_fee"] == server.zone_registry.index.get("centro").fee_for(subtotal)
+    assert order["total"] == order["subtotal"] + order["delivery_fee"]
+    assert order["status"] == "received"
+
+
+async def test_created_order_is_publicly_trackable(api, menu):
+    created = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+
+    response = await api.get(f"/api/orders/{created['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["id"] == created["id"]
+
+
+async def test_archived_order_is_still_trackable_and_counted(api, menu, auth_headers, monkeypatch):
+    monkeypatch.setattr(server, "ARCHIVE_AFTER_HOURS", 1)
+    order = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+    await server.storage.orders.update(order["id"], {
+        "status": "delivered", "updated_at": datetime.utcnow() - timedelta(hours=2),
+    })
+
+    assert await server.archive_orders() == 1
+
+    assert await server.storage.orders.find(["delivered"]) == []
+    tracked = await api.get(f"/api/orders/{order['id']}")
+    assert tracked.status_code == 200
+    assert tracked.json()["status"] == "delivered"
+    analytics = (await api.get("/api/analytics/today", headers=auth_headers("admin"))).json()
+    assert analytics["orders_by_status"] == {"delivered": 1}
+
+
+async def test_export_streams_orders_as_ndjson(api, menu, auth_headers):
+    created = [
+        (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], quantity)))).json()
+        for quantity in (1, 2, 3)
+    ]
+    start = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+
+    response = await api.get(
+        "/api/orders/export", params={"start": start, "batch_size": 2}, headers=auth_headers("admin")
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [order["id"] for order in created]
+
+
+async def test_export_streams_gzipped_csv(api, menu, auth_headers):
+    order = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 2)))).json()
+    start = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+
+    response = await api.get(
+        "/api/orders/export", params={"start": start, "format": "csv", "gzip": "true"},
+        headers=auth_headers("admin")
+    )
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.csv.gz"')
+    (row,) = csv.DictReader(io.StringIO(gzip.decompress(response.content).decode()))
+    assert row["id"] == order["id"]
+    assert row["item_count"] == "2"
+    assert float(row["total"]) == order["total"]
+
+
+async def test_export_is_admin_only_and_validates_format(api, auth_headers):
+    params = {"start": datetime.utcnow().isoformat()}
+
+    assert (await api.get("/api/orders/export", params=params, headers=auth_headers("manager"))).status_code == 403
+    response = await api.get("/api/orders/export", params={**params, "format": "xml"}, headers=auth_headers("admin"))
+    assert response.status_code == 400
+
+
+async def test_unknown_order_returns_404(api):
+    response = await api.get("/api/orders/does-not-exist")
+
+    assert response.status_code == 404
+
+
+async def test_far_future_order_is_held_as_scheduled(api, menu):
+    scheduled_for = (datetime.utcnow() + timedelta(days=1)).isoformat()
+
+    response = await api.post("/api/orders", json=order_payload(
+        (menu["Pizza Pepperoni"]["id"], 1), scheduled_for=scheduled_for
+    ))
+
+    assert response.json()["status"] == "scheduled"
+    assert response.json()["id"] in server.preorder_wheel
+
+
+async def test_kitchen_only_lists_kitchen_statuses(api, menu, auth_headers):
+    first = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+    second = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+    await api.put(f"/api/orders/{second['id']}/status", json={"status": "delivered"}, headers=auth_headers("admin"))
+
+    response = await api.get("/api/orders", headers=auth_headers("kitchen"))
+
+    assert [order["id"] for order in response.json()] == [first["id"]]
+
+
+async def test_orders_summary_view_returns_only_view_fields(api, menu, auth_headers):
+    await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))
+
+    response = await api.get("/api/orders", params={"view": "summary"}, headers=auth_headers("admin"))
+
+    (order,) = response.json()
+    assert set(order) == set(server.OrderSummary.model_fields)
+    assert set(order["delivery_info"]) == {"customer_name", "delivery_zone"}
+
+
+async def test_order_listings_document_every_projection(api):
+    schema = (await api.get("/openapi.json")).json()
+
+    for path in ("/api/orders", "/api/orders/status/{status}"):
+        items = schema["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"]
+        assert {ref["$ref"].rsplit("/", 1)[-1] for ref in items["anyOf"]} == {
+            "Order", "OrderSummary", "OrderKitchenView", "OrderDeliveryView",
+        }
+
+
+async def test_kitchen_cannot_mark_order_delivered(api, menu, auth_headers):
+    order = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+
+    response = await api.put(
+        f"/api/orders/{order['id']}/status", json={"status": "delivered"}, headers=auth_headers("kitchen")
+    )
+
+    assert response.status_code == 403
+
+
+async def test_ready_order_is_assigned_to_nearest_available_courier(api, menu, auth_headers):
+    couriers = []
+    for name, latitude in (("Lejos", -25.30), ("Cerca", server.STORE_LATITUDE)):
+        courier = (await api.post("/api/delivery-persons", json={"name": name, "phone": "+595981111111"})).json()
+        await api.put(
+            f"/api/delivery-persons/{courier['id']}/location",
+            json={"latitude": latitude, "longitude": server.STORE_LONGITUDE},
+            headers=auth_headers("manager"),
+        )
+        couriers.append(courier)
+    order = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+
+    for status in ("confirmed", "preparing", "ready"):
+        await api.put(f"/api/orders/{order['id']}/status", json={"status": status}, headers=auth_headers("kitchen"))
+
+    tracked = (await api.get(f"/api/orders/{order['id']}")).json()
+    assert tracked["assigned_delivery_person"] == couriers[1]["id"]
+
+
+def test_courier_socket_requires_token_and_known_courier(seeded_db):
+    courier = server.DeliveryPerson(name="Ana", phone="+595981111111").dict()
+    seeded_db.delivery_persons.delegate.insert_one(dict(courier))
+    client = TestClient(server.app)
+    kitchen = server.create_access_token({"sub": "kitchen"})
+    delivery = server.create_access_token({"sub": "delivery"})
+
+    for url in (f"/ws/delivery/{courier['id']}", f"/ws/delivery/{courier['id']}?token={kitchen}",
+                f"/ws/delivery/made-up?token={delivery}"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url):
+                pass
+        assert closed.value.code == 1008
+    assert server.location_tracker.trail("made-up") == []
+
+
+def test_courier_socket_skips_invalid_positions_and_unregisters(seeded_db):
+    courier = server.DeliveryPerson(name="Ana", phone="+595981111111").dict()
+    seeded_db.delivery_persons.delegate.insert_one(dict(courier))
+    server.courier_index.upsert(courier["id"], -25.28, -57.63)
+    token = server.create_access_token({"sub": "delivery"})
+
+    with TestClient(server.app).websocket_connect(f"/ws/delivery/{courier['id']}?token={token}") as socket:
+        for latitude, longitude in (("NaN", 1), ("Infinity", 1), (-25.3, "-inf"), (91, 0), (-25.3, 181)):
+            socket.send_text(json.dumps({"type": "location", "latitude": latitude, "longitude": longitude}))
+        socket.send_text(json.dumps({"type": "location", "latitude": -25.3, "longitude": -57.6}))
+        # The socket keeps working after the bad pings
+        socket.send_text(json.dumps({"type": "location", "latitude": -25.31, "longitude": -57.6}))
+        assert len(server.manager.delivery_connections) == 1
+
+    assert [fix[:2] for fix in server.location_tracker.trail(courier["id"])] == [(-25.3, -57.6), (-25.31, -57.6)]
+    assert server.manager.delivery_connections == []
+
+
+def test_courier_created_after_startup_becomes_assignable_from_socket_pings(menu, auth_headers):
+    client = TestClient(server.app)
+    courier = client.post("/api/delivery-persons", json={"name": "Ana", "phone": "+595981111111"}).json()
+    token = server.create_access_token({"sub": "delivery"})
+
+    with client.websocket_connect(f"/ws/delivery/{courier['id']}?token={token}") as socket:
+        socket.send_text(json.dumps(
+            {"type": "location", "latitude": server.STORE_LATITUDE, "longitude": server.STORE_LONGITUDE}
+        ))
+    order = client.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1))).json()
+    for status in ("confirmed", "preparing", "ready"):
+        client.put(f"/api/orders/{order['id']}/status", json={"status": status}, headers=auth_headers("kitchen"))
+
+    assert client.get(f"/api/orders/{order['id']}").json()["assigned_delivery_person"] == courier["id"]
+    assert server.courier_index.get(courier["id"]).load == 1
+
+
+def test_kitchen_station_socket_requires_kitchen_token(seeded_db):
+    client = TestClient(server.app)
+    delivery = server.create_access_token({"sub": "delivery"})
+
+    for url in ("/ws/kitchen/horno", f"/ws/kitchen/horno?token={delivery}", "/ws/kitchen/horno?token=garbage"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url):
+                pass
+        assert closed.value.code == 1008
+
+    kitchen = server.create_access_token({"sub": "kitchen"})
+    with client.websocket_connect(f"/ws/kitchen/horno?token={kitchen}") as socket:
+        assert socket.receive_json() == {"type": "station_queue", "station": "horno", "tickets": []}
+    assert not server.manager.station_connections.get("horno")
+
+
+def test_queued_order_gets_revised_eta_when_the_order_ahead_starts_cooking(menu, auth_headers):
+    client = TestClient(server.app)
+    first = client.post("/api/orders", json=order_payload((menu["Pizza Margherita"]["id"], 3))).json()
+    second = client.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1))).json()
+    client.put(f"/api/orders/{first['id']}/status", json={"status": "confirmed"}, headers=auth_headers("kitchen"))
+
+    with client.websocket_connect(f"/ws/client/{second['id']}") as socket:
+        client.put(f"/api/orders/{first['id']}/status", json={"status": "preparing"}, headers=auth_headers("kitchen"))
+        messages = [socket.receive_json() for _ in range(2)]
+
+    update = next(message for message in messages if message["type"] == "eta_update")
+    assert (update["order_id"], update["status"]) == (second["id"], "received")
+    # Half of the 60 pizza minutes left the queue, over 3 stations: 10 minutes earlier, give or take rounding
+    earlier = datetime.fromisoformat(second["estimated_delivery"]) - datetime.fromisoformat(update["estimated_delivery"])
+    assert timedelta(minutes=9) <= earlier <= timedelta(minutes=11)
+    stored = client.get(f"/api/orders/{second['id']}").json()["estimated_delivery"]
+    assert datetime.fromisoformat(stored) == datetime.fromisoformat(update["estimated_delivery"])
+
+
+async def test_location_update_rejects_out_of_range_coordinates(api, auth_headers):
+    courier = (await api.post("/api/delivery-persons", json={"name": "Ana", "phone": "+595981111111"})).json()
+    url = f"/api/delivery-persons/{courier['id']}/location"
+
+    response = await api.put(url, json={"latitude": 95, "longitude": -57.6}, headers=auth_headers("manager"))
+
+    assert response.status_code == 422
+
+
+async def test_delivery_staff_cannot_move_couriers_over_rest(api, auth_headers):
+    courier = (await api.post("/api/delivery-persons", json={"name": "Ana", "phone": "+595981111111"})).json()
+    url = f"/api/delivery-persons/{courier['id']}/location"
+
+    response = await api.put(url, json={"latitude": -25.3, "longitude": -57.6}, headers=auth_headers("delivery"))
+
+    assert response.status_code == 403
+    assert courier["id"] not in server.courier_index
+
+
+async def test_kitchen_board_groups_orders_by_status(api, menu, auth_headers):
+    for _ in range(3):
+        await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))
+
+    board = (await api.get("/api/boards/kitchen", headers=auth_headers("kitchen"))).json()
+
+    assert [column["status"] for column in board["columns"]] == server.KITCHEN_VISIBLE_STATUSES
+    assert board["total"] == 3
+    assert board["columns"][0]["count"] == 3
+
+
+async def test_board_snapshot_is_refreshed_after_status_change(api, menu, auth_headers, monkeypatch):
+    monkeypatch.setattr(server.board_cache, "min_age_seconds", 0)
+    order = (await api.post("/api/orders", json=order_payload((menu["Papas Fritas"]["id"], 1)))).json()
+    await api.get("/api/boards/kitchen", headers=auth_headers("kitchen"))
+
+    await api.put(f"/api/orders/{order['id']}/status", json={"status": "confirmed"}, headers=auth_headers("kitchen"))
+    board = (await api.get("/api/boards/kitchen", headers=auth_headers("kitchen"))).json()
+
+    counts = {column["status"]: column["count"] for column in board["columns"]}
+    assert counts["received"] == 0
+    assert counts["confirmed"] == 1
+
+
+async def test_delivery_staff_cannot_read_kitchen_board(api, auth_headers):
+    response = await api.get("/api/boards/kitchen", headers=auth_headers("delivery"))
+
+    assert response.status_code == 403
+
+
+def menu_rows(menu: dict) -> list:
+    fields = ("name", "description", "price", "category", "image_url", "available", "preparation_time")
+    return [{field: item[field] for field in fields} for item in menu.values()]
+
+
+async def test_menu_import_diffs_and_applies_changes_once(api, menu, auth_headers):
+    await api.get("/api/menu")
+    rows = [row for row in menu_rows(menu) if row["name"] != "Coca-Cola 500ml"]
+    next(row for row in rows if row["name"] == "Papas Fritas")["price"] = 18000
+    rows.append({"name": "Empanada", "description": "Carne", "price": 7000, "category": "sides", "image_url": ""})
+
+    response = await api.post("/api/menu/import", json=rows, headers=auth_headers("manager"))
+
+    report = response.json()
+    assert [item["name"] for item in report["created"]] == ["Empanada"]
+    assert report["updated"] == [{"id": menu["Papas Fritas"]["id"], "name": "Papas Fritas", "fields": ["price"]}]
+    assert report["deactivated"] == [{"id": menu["Coca-Cola 500ml"]["id"], "name": "Coca-Cola 500ml"}]
+    assert report["unchanged"] == 3
+    assert report["menu_version"] == 1
+    listed = {item["name"]: item for item in (await api.get("/api/menu")).json()}
+    assert "Coca-Cola 500ml" not in listed
+    assert listed["Papas Fritas"]["price"] == 18000
+    assert listed["Papas Fritas"]["id"] == menu["Papas Fritas"]["id"]
+
+
+async def test_menu_import_accepts_csv_dry_run(api, menu, auth_headers):
+    body = "name,description,price,category,image_url\nPizza Margherita,Nueva,45000,PIZZAS,\n"
+
+    response = await api.post(
+        "/api/menu/import", content=body.encode(), params={"dry_run": "true", "deactivate_missing": "false"},
+        headers={**auth_headers("admin"), "Content-Type": "text/csv"}
+    )
+
+    report = response.json()
+    assert report["updated"][0]["fields"] == ["description", "category"]
+    assert report["deactivated"] == []
+    assert report["menu_version"] == 0
+    assert (await api.get("/api/menu/category/pizzas")).json()[0]["description"] == "Pizza Margherita"
+
+
+async def test_menu_import_rejects_invalid_rows(api, auth_headers):
+    response = await api.post(
+        "/api/menu/import", json=[{"name": "Sin precio", "category": "sides"}], headers=auth_headers("admin")
+    )
+
+    assert response.status_code == 400
+    assert "Invalid menu item 1" in response.json()["detail"]
+
+
+async def test_menu_search_is_accent_insensitive_prefix_and_typo_tolerant(api, menu):
+    async def names(query: str) -> list:
+        response = await api.get("/api/menu/search", params={"q": query})
+        return [item["name"] for item in response.json()]
+
+    assert await names("hamburguesa clasica") == ["Hamburguesa Clásica"]
+    assert await names("PIZ") == ["Pizza Margherita", "Pizza Pepperoni"]
+    assert await names("peperoni") == ["Pizza Pepperoni"]
+    assert await names("pizza marg") == ["Pizza Margherita"]
+    assert await names("sushi") == []
+
+
+async def test_menu_search_follows_menu_writes(api, menu, auth_headers):
+    item = {"name": "Empanada de Jamón", "description": "Jamón y queso", "price": 7000, "category": "sides",
+            "image_url": ""}
+    created = (await api.post("/api/menu", json=item, headers=auth_headers("manager"))).json()
+    fries = menu["Papas Fritas"]
+    await api.delete(f"/api/menu/{fries['id']}", headers=auth_headers("manager"))
+
+    found = (await api.get("/api/menu/search", params={"q": "jamon", "category": "sides"})).json()
+
+    assert [result["id"] for result in found] == [created["id"]]
+    assert (await api.get("/api/menu/search", params={"q": "papas"})).json() == []
+
+
+async def test_menu_search_picks_up_other_workers_writes_on_refresh(api, menu, monkeypatch):
+    assert [item["name"] for item in (await api.get("/api/menu/search", params={"q": "papas"})).json()] == ["Papas Fritas"]
+    # Another worker hides the item: this worker's index only learns about it from storage
+    await server.storage.menu.update(menu["Papas Fritas"]["id"], {"available": False})
+    assert len((await api.get("/api/menu/search", params={"q": "papas"})).json()) == 1
+
+    monkeypatch.setattr(server.menu_search_refresh, "ttl_seconds", 0)
+
+    assert (await api.get("/api/menu/search", params={"q": "papas"})).json() == []
+
+
+async def test_customer_history_matches_phone_formats_and_paginates(api, menu, auth_headers):
+    pizza, fries = menu["Pizza Margherita"]["id"], menu["Papas Fritas"]["id"]
+    created = []
+    for phone in ("+595981000000", "0981 000-000", "595 981 000000"):
+        payload = order_payload((pizza, 1))
+        payload["delivery_info"]["customer_phone"] = phone
+        created.append((await api.post("/api/orders", json=payload)).json())
+    other = order_payload((fries, 1))
+    other["delivery_info"]["customer_phone"] = "0971 000-000"
+    await api.post("/api/orders", json=other)
+
+    url = "/api/customers/0981000000/orders"
+    first = (await api.get(url, params={"limit": 2}, headers=auth_headers("manager"))).json()
+    second = (await api.get(url, params={"limit": 2, "cursor": first["next_cursor"]},
+                            headers=auth_headers("manager"))).json()
+
+    assert first["customer_key"] == "595981000000"
+    # Orders created within the same millisecond are ordered by id, so compare pages as a whole
+    paged = [order["id"] for order in first["orders"] + second["orders"]]
+    assert len(paged) == 3 and set(paged) == {order["id"] for order in created}
+    assert second["next_cursor"] is None
+    assert set(first) == set(server.CustomerOrdersPage.model_fields)
+    assert all(set(order) == set(server.Order.model_fields) for order in first["orders"])
+
+
+async def test_customer_profile_is_built_once_then_updated_per_order(api, menu, auth_headers):
+    pizza, fries = menu["Pizza Margherita"]["id"], menu["Papas Fritas"]["id"]
+    await api.post("/api/orders", json=order_payload((pizza, 1), (fries, 1)))
+    await api.post("/api/orders", json=order_payload((fries, 2)))
+
+    profile = (await api.get("/api/customers/+595981000000", headers=auth_headers("manager"))).json()
+    assert profile["order_count"] == 2
+    assert [(item["name"], item["quantity"]) for item in profile["favourite_items"]] == [
+        ("Papas Fritas", 3), ("Pizza Margherita", 1),
+    ]
+
+    payload = order_payload((pizza, 4), zone="lambare")
+    payload["delivery_info"]["delivery_address"] = "Nueva dirección 456"
+    await api.post("/api/orders", json=payload)
+
+    stored = await server.storage.customers.get("595981000000")
+    assert stored["order_count"] == 3
+    profile = (await api.get("/api/customers/0981000000", headers=auth_headers("manager"))).json()
+    assert (profile["last_address"], profile["last_zone"]) == ("Nueva dirección 456", "lambare")
+    assert profile["favourite_items"][0] == {
+        "menu_item_id": pizza, "name": "Pizza Margherita", "quantity": 5, "available": True,
+    }
+
+
+async def test_customer_profile_recovers_order_created_while_it_was_built(api, menu, auth_headers, monkeypatch):
+    fries = menu["Papas Fritas"]["id"]
+    await api.post("/api/orders", json=order_payload((fries, 1)))
+    save = server.storage.customers.save
+
+    async def save_after_racing_order(profile):
+        # Lands after the history read and before the profile exists: record_order has nothing to update
+        monkeypatch.setattr(server.storage.customers, "save", save)
+        await api.post("/api/orders", json=order_payload((fries, 2)))
+        await save(profile)
+
+    monkeypatch.setattr(server.storage.customers, "save", save_after_racing_order)
+    url = "/api/customers/0981000000"
+    assert (await api.get(url, headers=auth_headers("manager"))).json()["order_count"] == 1
+
+    profile = (await api.get(url, headers=auth_headers("manager"))).json()
+
+    assert profile["order_count"] == 2
+    assert profile["favourite_items"][0]["quantity"] == 3
+
+
+async def test_customer_lookup_validates_phone_cursor_and_role(api, auth_headers):
+    headers = auth_headers("manager")
+
+    assert (await api.get("/api/customers/12/orders", headers=headers)).status_code == 400
+    assert (await api.get("/api/customers/0981000000/orders", params={"cursor": "nope"},
+                          headers=headers)).status_code == 400
+    assert (await api.get("/api/customers/0981000000", headers=headers)).status_code == 404
+    assert (await api.get("/api/customers/0981000000/orders", headers=auth_headers("kitchen"))).status_code == 403
+
+
+async def test_metrics_endpoint_reports_route_latency(api):
+    await api.get("/api/menu")
+
+    response = await api.get("/metrics")
+
+    assert 'route="/api/menu"' in response.text
@@ -0,0 +1,129 @@
+"""
+Microbenchmarks de los caminos calientes de la API (pytest-benchmark).
+
+Corren en proceso sobre la base en memoria, así que miden el costo de la
+aplicación y no el de la red o de MongoDB. Para comparar contra una rama:
+
+    pytest tests/test_benchmarks.py --benchmark-autosave
+    pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+import server
+from admission import AdmissionController
+from menu_search import MenuSearchIndex
+from serialization import json_response, trusted_documents
+from tests.conftest import order_payload
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def run():
+    """Ejecuta una corrutina hasta terminar en un loop propio de la prueba."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def stored_orders(count: int):
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    return [
+        server.Order(
+            items=[{"menu_item_id": str(uuid.uuid4()), "quantity": rng.randint(1, 3)} for _ in range(rng.randint(1, 4))],
+            delivery_info={
+                "customer_name": f"Cliente {index}",
+                "customer_phone": "+595981000000",
+                "delivery_address": f"Calle {index}",
+                "delivery_zone": "centro",
+            },
+            subtotal=90000.0,
+            delivery_fee=15000.0,
+            total=105000.0,
+            status=rng.choice(server.ORDER_STATUSES),
+            estimated_delivery=now + timedelta(minutes=45),
+            created_at=now - timedelta(minutes=index),
+        ).dict()
+        for index in range(count)
+    ]
+
+
+def large_menu(count: int):
+    rng = random.Random(2)
+    words = ["jamón", "queso", "muzzarella", "pepperoni", "napolitana", "cebolla", "palmito", "choclo",
+             "pollo", "catupiry", "rúcula", "tomate", "albahaca", "panceta", "huevo", "aceituna"]
+    categories = ["pizzas", "hamburguesas", "empanadas", "bebidas", "postres", "acompañamientos"]
+    return [
+        server.MenuItem(
+            name=f"{rng.choice(['Pizza', 'Empanada', 'Lomito', 'Hamburguesa'])} {' '.join(rng.sample(words, 2))} {index}",
+            description=" ".join(rng.sample(words, 6)),
+            price=rng.randrange(8000, 90000, 1000),
+            category=rng.choice(categories),
+            image_url="",
+        ).dict()
+        for index in range(count)
+    ]
+
+
+class FakeWebSocket:
+    async def send_text(self, payload: str):
+        pass
+
+
+def test_create_order_pricing(benchmark, run, menu, monkeypatch):
+    # Thousands of rounds would otherwise fill the kitchen and trip admission control
+    monkeypatch.setattr(server, "admission_controller", AdmissionController(float("inf")))
+    order = server.OrderCreate(**order_payload(
+        (menu["Pizza Margherita"]["id"], 2), (menu["Papas Fritas"]["id"], 1), (menu["Coca-Cola 500ml"]["id"], 2)
+    ))
+
+    created = benchmark(lambda: run(server.create_order(order)))
+
+    assert created.subtotal == menu["Pizza Margherita"]["price"] * 2 + menu["Papas Fritas"]["price"] + menu["Coca-Cola 500ml"]["price"] * 2
+
+
+def test_get_orders_serialization(benchmark):
+    documents = stored_orders(1000)
+
+    body = benchmark(lambda: json_response(trusted_documents(server.Order, documents)).body)
+
+    assert body.startswith(b"[{")
+
+
+def test_get_current_admin(benchmark, run, seeded_db):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=server.create_access_token({"sub": "kitchen"}))
+
+    admin = benchmark(lambda: run(server.get_current_admin(credentials)))
+
+    assert admin.role == "kitchen"
+
+
+def test_create_access_token(benchmark):
+    token = benchmark(server.create_access_token, {"sub": "admin"}, timedelta(minutes=30))
+
+    assert token.count(".") == 2
+
+
+def test_connection_manager_broadcast(benchmark, run, memory_db):
+    server.manager.admin_connections.extend(FakeWebSocket() for _ in range(200))
+    message = {"type": "order_status_update", "order_id": "x", "status": "ready", "order": stored_orders(1)[0]}
+
+    benchmark(lambda: run(server.manager.broadcast_to_admins(message)))
+
+    assert len(server.manager.admin_connections) == 200
+
+
+def test_menu_search(benchmark):
+    index = MenuSearchIndex(large_menu(600))
+
+    results = benchmark(index.search, "pizza jamon quso", 20)
+
+    assert results[0]["name"].startswith("Pizza")
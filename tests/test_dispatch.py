@@ -0,0 +1,73 @@
+"""
+Pruebas del índice espacial de repartidores.
+"""
+
+import dispatch
+from dispatch import CourierIndex, haversine_km
+
+STORE = (-25.2637, -57.5759)
+
+
+def test_empty_index_has_no_nearest():
+    index = CourierIndex()
+
+    assert index.nearest(*STORE) is None
+    assert index.free_slots == 0
+
+
+def test_nearest_skips_couriers_without_capacity():
+    index = CourierIndex(default_capacity=2)
+    index.upsert("full", STORE[0], STORE[1], load=2)
+    index.upsert("off", STORE[0] + 0.001, STORE[1], available=False)
+    index.upsert("free", STORE[0] + 0.02, STORE[1])
+
+    courier_id, distance = index.nearest(*STORE)
+
+    assert courier_id == "free"
+    assert distance == haversine_km(*STORE, STORE[0] + 0.02, STORE[1])
+    assert index.free_slots == 2
+    index.adjust_load("free", 2)
+    assert index.nearest(*STORE) is None
+    assert index.free_slots == 0
+    index.adjust_load("full", -5)
+    assert index.nearest(*STORE)[0] == "full"
+    assert index.get("full").load == 0
+
+
+def test_nearest_respects_exclude_and_max_distance():
+    index = CourierIndex()
+    index.upsert("near", STORE[0] + 0.01, STORE[1])
+    # About 11 km north of the store
+    index.upsert("far", STORE[0] + 0.1, STORE[1])
+
+    assert index.nearest(*STORE, exclude=["near"])[0] == "far"
+    assert index.nearest(*STORE, max_distance_km=5, exclude=["near"]) is None
+    assert index.nearest(*STORE, max_distance_km=5)[0] == "near"
+
+
+def test_moving_courier_changes_cell():
+    index = CourierIndex()
+    index.upsert("c1", STORE[0] + 0.1, STORE[1])
+    assert index.nearest(*STORE, max_distance_km=1) is None
+
+    assert index.update_position("c1", *STORE)
+    assert index.nearest(*STORE, max_distance_km=1)[0] == "c1"
+    assert not index.update_position("missing", *STORE)
+    assert len(index._cells) == 1
+
+
+def test_nearest_stops_once_outer_rings_cannot_win(monkeypatch):
+    index = CourierIndex(cell_size_deg=0.01)
+    index.upsert("near", STORE[0] + 0.005, STORE[1])
+    index.upsert("far", STORE[0] + 0.09, STORE[1])
+    scanned = []
+    ring_cells = dispatch._ring_cells
+
+    def recording_ring_cells(cx, cy, ring):
+        scanned.append(ring)
+        return ring_cells(cx, cy, ring)
+
+    monkeypatch.setattr(dispatch, "_ring_cells", recording_ring_cells)
+
+    assert index.nearest(*STORE, max_distance_km=50)[0] == "near"
+    assert max(scanned) <= 2
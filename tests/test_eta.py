@@ -0,0 +1,76 @@
+"""
+Pruebas del modelo de carga de cocina y de las revisiones de ETA.
+"""
+
+from datetime import datetime, timedelta
+
+from eta import KitchenLoadModel, eta_from_now, order_work
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+def test_backlog_totals_drive_the_estimate():
+    model = KitchenLoadModel(parallelism=2, travel_minutes=20, trip_minutes=30)
+    model.track("queued", "received", 20, 10)
+    # Half of a preparing order's work is still ahead
+    model.track("oven", "preparing", 10, 10)
+    model.track("ready", "ready", 5, 5, waiting=True)
+
+    assert order_work([(10, 2), (None, 1)]) == (35, 15)
+    assert model.backlog_minutes == 25
+    assert model.ready_waiting == 1
+    # 25 / 2 queued + max(6, 8 / 2) cooking + one trip shared by 2 couriers + travel
+    assert model.estimate_minutes(8, 6, free_slots=1, couriers=2) == 12.5 + 6 + 15 + 20
+    assert model.estimate_minutes(8, 6, free_slots=2, couriers=2) == 12.5 + 6 + 20
+
+    assert model.transition("oven", "ready") == (10, 10)
+    assert model.transition("missing", "ready") is None
+    model.track("ready", "on_route", 5, 5)
+    assert (model.backlog_minutes, model.ready_waiting) == (20, 0)
+    assert model.remaining_minutes("preparing", 10, free_slots=1, couriers=2) == 30
+    assert model.remaining_minutes("confirmed", 10, free_slots=1, couriers=2) is None
+    assert eta_from_now(29.6, NOW + timedelta(seconds=40)) == NOW + timedelta(minutes=30)
+
+
+def test_queued_etas_follow_the_backlog_both_ways():
+    model = KitchenLoadModel(parallelism=1, travel_minutes=20)
+    for order_id in ("a", "b"):
+        minutes = model.estimate_minutes(10, 10, free_slots=1, couriers=1)
+        model.track(order_id, "received", 10, 10)
+        model.quote(order_id, eta_from_now(minutes, NOW))
+
+    assert model.revise_queued(1, 1, 2, NOW) == []
+
+    # A pre-order due earlier jumps the queue and pushes both back by its 16 minutes
+    model.track("pre", "received", 16, 16)
+    model.quote("pre", NOW + timedelta(minutes=25), fixed=True)
+    assert model.revise_queued(1, 1, 2, NOW) == [
+        ("a", "received", NOW + timedelta(minutes=46)), ("b", "received", NOW + timedelta(minutes=56)),
+    ]
+    assert model.revise_queued(1, 1, 2, NOW) == []
+
+    # Once it is in the oven only half of it is left ahead
+    model.transition("pre", "preparing")
+    assert model.revise_queued(1, 1, 10, NOW) == []
+    assert model.revise_queued(1, 1, 2, NOW) == [
+        ("a", "received", NOW + timedelta(minutes=38)), ("b", "received", NOW + timedelta(minutes=48)),
+    ]
+
+    # Orders that leave the queue stop being revised
+    model.transition("a", "preparing")
+    assert model.revise_queued(1, 1, 2, NOW) == [("b", "received", NOW + timedelta(minutes=43))]
+
+
+def test_quotes_keep_their_margin_and_skip_unknown_orders():
+    model = KitchenLoadModel(parallelism=1, travel_minutes=20)
+    model.track("a", "received", 10, 10)
+    model.quote("a", NOW + timedelta(minutes=35), extra_minutes=5)
+    model.quote("missing", NOW)
+    model.track("done", "delivered", 10, 10)
+    model.quote("done", NOW)
+
+    assert model.revise_queued(1, 1, 2, NOW) == []
+    model.track("late", "received", 30, 30)
+    model.track("a", "cancelled", 10, 10)
+    assert model.revise_queued(1, 1, 2, NOW) == []
+    assert [order_id for order_id, _, _ in model.queued_minutes(1, 1)] == ["late"]
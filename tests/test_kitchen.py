@@ -0,0 +1,73 @@
+"""
+Pruebas del planificador de tickets de cocina por estación.
+"""
+
+from datetime import datetime, timedelta
+
+from kitchen import DEFAULT_STATION, TicketScheduler, station_for
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+def item(category: str, preparation_time: float, name: str = "item") -> dict:
+    return {"category": category, "preparation_time": preparation_time, "menu_item_id": name, "name": name}
+
+
+def test_orders_split_into_one_ticket_per_station():
+    scheduler = TicketScheduler()
+
+    tickets = scheduler.add_order(
+        "o1",
+        [item("Pizzas", 15), item("pizzas", 20), item("bebidas", 1), item("postres", 5)],
+        NOW,
+    )
+
+    by_station = {ticket.station: ticket for ticket in tickets}
+    assert set(by_station) == {"horno", "bebidas", DEFAULT_STATION}
+    assert by_station["horno"].id == "o1:horno"
+    assert by_station["horno"].prep_minutes == 20
+    assert len(by_station["horno"].items) == 2
+    assert scheduler.add_order("o1", [item("pizzas", 15)], NOW) == []
+    assert station_for(None) == DEFAULT_STATION
+
+
+def test_queue_orders_by_latest_start_then_longest_prep():
+    scheduler = TicketScheduler()
+    scheduler.add_order("late", [item("pizzas", 10)], NOW + timedelta(minutes=40))
+    scheduler.add_order("short", [item("pizzas", 10)], NOW + timedelta(minutes=20))
+    # Same start_by as "short" but longer prep: goes first
+    scheduler.add_order("long", [item("pizzas", 20)], NOW + timedelta(minutes=30))
+
+    assert [ticket.order_id for ticket in scheduler.queue("horno")] == ["long", "short", "late"]
+    assert [ticket.order_id for ticket in scheduler.queue("horno", limit=2)] == ["long", "short"]
+
+
+def test_done_and_removed_tickets_leave_queue_and_counts():
+    scheduler = TicketScheduler()
+    for minutes in range(5):
+        scheduler.add_order(f"o{minutes}", [item("pizzas", 10), item("bebidas", 1)], NOW + timedelta(minutes=minutes))
+
+    scheduler.set_status("o0:horno", "done")
+    scheduler.set_status("o1:horno", "in_progress")
+    assert scheduler.remove_order("o2") == ["horno", "bebidas"]
+
+    assert [ticket.order_id for ticket in scheduler.queue("horno", limit=1)] == ["o1"]
+    assert scheduler.active_counts() == {"bebidas": 4, "horno": 3}
+
+    scheduler.set_status("o0:horno", "pending")
+    assert scheduler.active_counts()["horno"] == 4
+    scheduler.set_status("o0:horno", "done")
+    scheduler.remove_order("o0")
+    assert scheduler.active_counts() == {"bebidas": 3, "horno": 3}
+
+
+def test_order_done_needs_every_station():
+    scheduler = TicketScheduler()
+    scheduler.add_order("o1", [item("pizzas", 10), item("bebidas", 1)], NOW)
+
+    scheduler.set_status("o1:horno", "done")
+    assert not scheduler.order_done("o1")
+    scheduler.set_status("o1:bebidas", "done")
+    assert scheduler.order_done("o1")
+    assert not scheduler.order_done("missing")
+    assert scheduler.active_counts() == {}
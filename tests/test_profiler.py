@@ -0,0 +1,69 @@
+"""
+Pruebas del perfilador por muestreo y del monitor del event loop.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from profiler import LoopMonitor, SamplingProfiler, collapse_stack, render_collapsed
+
+pytestmark = pytest.mark.anyio
+
+
+def spin_until(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_collapsed_stacks_run_from_root_to_leaf():
+    stack = collapse_stack(sys._getframe())
+
+    assert stack.split(";")[-1].startswith("test_collapsed_stacks_run_from_root_to_leaf (test_profiler.py:")
+    assert collapse_stack(sys._getframe(), limit=1).count(";") == 0
+    assert render_collapsed({"a;b": 2, "a;c": 5}) == "a;c 5\na;b 2\n"
+
+
+@pytest.mark.parametrize("all_threads", [False, True])
+def test_short_profile_collapses_the_sampled_thread_stacks(all_threads):
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_until, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        counts = SamplingProfiler(worker.ident, interval=0.002, all_threads=all_threads).run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    spinning = {stack: count for stack, count in counts.items() if "spin_until (test_profiler.py:" in stack}
+    assert sum(spinning.values()) >= 10
+    assert all(stack.startswith("spinner;") == all_threads for stack in spinning)
+    # The profiler's own thread never shows up in its samples
+    assert not any("run (profiler.py:" in stack for stack in counts)
+    first = render_collapsed(counts).splitlines()[0]
+    assert int(first.rsplit(" ", 1)[1]) == max(counts.values())
+
+
+async def test_loop_monitor_records_a_blocking_sleep():
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    # A synchronous call on the loop thread: every coroutine waits for it
+    time.sleep(0.3)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    stats = monitor.stats()
+    assert stats["max_lag"] >= 0.25
+    assert stats["p99_lag"] == stats["max_lag"]
+    assert stats["samples"] >= 3
+    assert len(stats["stalls"]) == 1
+    stall = stats["stalls"][0]
+    assert stall["blocked_seconds"] >= 0.1
+    assert "test_loop_monitor_records_a_blocking_sleep (test_profiler.py:" in stall["stack"]
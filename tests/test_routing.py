@@ -0,0 +1,65 @@
+"""
+Pruebas de la agrupación de pedidos en viajes (vecino más cercano + 2-opt).
+"""
+
+from routing import Stop, plan_trips, route_arrivals, two_opt
+
+ORIGIN = (0.0, 0.0)
+
+
+def order(order_id: str, latitude=None, longitude=None, zone: str = "centro") -> dict:
+    return {
+        "id": order_id,
+        "delivery_info": {"delivery_zone": zone, "latitude": latitude, "longitude": longitude},
+    }
+
+
+def test_two_opt_uncrosses_route():
+    route = [Stop("a", "centro", 0.01, 0.0), Stop("c", "centro", 0.03, 0.0), Stop("b", "centro", 0.02, 0.0)]
+
+    improved = two_opt(ORIGIN, route, max_detour_km=10)
+
+    assert [stop.order_id for stop in improved] == ["a", "b", "c"]
+    assert route_arrivals(ORIGIN, improved)[-1] < route_arrivals(ORIGIN, route)[-1]
+
+
+def test_two_opt_rejects_moves_that_break_detour_limit():
+    # Visiting the far stop first is longer, but reversing would push "far" past the limit
+    route = [Stop("far", "centro", 0.03, 0.0), Stop("near", "centro", 0.0, 0.01)]
+
+    assert [stop.order_id for stop in two_opt(ORIGIN, route, max_detour_km=10)] == ["near", "far"]
+    assert [stop.order_id for stop in two_opt(ORIGIN, route, max_detour_km=0.5)] == ["far", "near"]
+
+
+def test_nearest_neighbour_fills_trips_up_to_capacity():
+    orders = [order(f"o{i}", 0.01 * i, 0.0) for i in range(1, 6)]
+
+    trips = plan_trips(orders, ORIGIN, capacity=2, max_detour_km=10)
+
+    assert [trip["order_ids"] for trip in trips] == [["o1", "o2"], ["o3", "o4"], ["o5"]]
+    assert all(stop["detour_km"] == 0 for trip in trips for stop in trip["stops"])
+
+
+def test_opposite_directions_split_when_detour_too_large():
+    orders = [order("north", 0.01, 0.0), order("south", -0.01, 0.0)]
+
+    assert len(plan_trips(orders, ORIGIN, capacity=3, max_detour_km=1)) == 2
+    together = plan_trips(orders, ORIGIN, capacity=3, max_detour_km=3)
+    assert len(together) == 1
+    assert together[0]["stops"][1]["detour_km"] > 1
+
+
+def test_zones_and_unlocated_orders_are_planned_apart():
+    orders = [
+        order("a", 0.01, 0.0, zone="norte"),
+        order("b", 0.011, 0.0, zone="sur"),
+        order("x", zone="norte"),
+        order("y", zone="norte"),
+    ]
+
+    trips = plan_trips(orders, ORIGIN, capacity=3)
+
+    assert [(trip["zone"], trip["order_ids"]) for trip in trips] == [
+        ("norte", ["a"]), ("norte", ["x", "y"]), ("sur", ["b"]),
+    ]
+    assert trips[1]["distance_km"] is None
@@ -0,0 +1,137 @@
+"""
+Pruebas del registro de consultas lentas: formas de consulta y resumen de ``explain``.
+"""
+
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from slowlog import SlowQueryLog, command_shape, documents_returned, explain_command, query_shape, summarize_explain
+
+pytestmark = pytest.mark.anyio
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+    "executionStats": {"totalDocsExamined": 5000, "totalKeysExamined": 0, "executionTimeMillis": 42},
+}
+
+
+def test_query_shape_replaces_literals_and_keeps_structure():
+    query = {
+        "status": {"$in": ["received", "confirmed"]},
+        "created_at": {"$gte": "2024-01-01", "$lt": 5},
+        "$or": [{"id": "abc"}, {"customer_key": "595981000000"}],
+        "deleted": None,
+    }
+
+    assert query_shape(query) == {
+        "status": {"$in": "?"},
+        "created_at": {"$gte": "?", "$lt": "?"},
+        "$or": [{"id": "?"}, {"customer_key": "?"}],
+        "deleted": "?",
+    }
+    # Field paths are part of the shape; two queries differing only in values share it
+    assert query_shape([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]) == [
+        {"$group": {"_id": "$status", "n": {"$sum": "?"}}}
+    ]
+    assert query_shape({"id": "x"}) == query_shape({"id": "y"})
+
+
+def test_command_shape_extracts_the_query_part_of_each_command():
+    find = {"find": "orders", "filter": {"status": "ready"}, "sort": {"created_at": -1},
+            "projection": {"id": 1}, "lsid": {"id": "session"}, "$db": "pizzapp"}
+
+    assert command_shape("find", find) == {"filter": {"status": "?"}, "sort": {"created_at": -1}, "projection": True}
+    assert command_shape("aggregate", {"pipeline": [{"$match": {"status": "ready"}}]}) == [{"$match": {"status": "?"}}]
+    assert command_shape("update", {"updates": [{"q": {"id": "o1"}, "u": {"$set": {"status": "ready"}}}]}) == {
+        "filter": {"id": "?"}
+    }
+    assert command_shape("delete", {"deletes": []}) == {"filter": {}}
+    assert command_shape("distinct", {"key": "id", "query": {"id": {"$in": ["a"]}}}) == {"filter": {"id": {"$in": "?"}}}
+    assert command_shape("insert", {"documents": [{}]}) is None
+
+    assert explain_command("find", find) == {"find": "orders", "filter": {"status": "ready"},
+                                             "sort": {"created_at": -1}, "projection": {"id": 1}}
+    assert explain_command("update", {"update": "orders", "updates": [{"q": {"id": "o1"}}]}) == {
+        "find": "orders", "filter": {"id": "o1"}
+    }
+    assert explain_command("insert", {"insert": "orders"}) is None
+
+
+def test_documents_returned_reads_cursor_and_write_replies():
+    assert documents_returned("find", {"cursor": {"firstBatch": [{}, {}]}}) == 2
+    assert documents_returned("getMore", {"cursor": {"nextBatch": [{}]}}) == 1
+    assert documents_returned("update", {"n": 3}) == 3
+    assert documents_returned("findAndModify", {"value": None}) == 0
+    assert documents_returned("ping", {"ok": 1}) is None
+
+
+def test_summarize_explain_flags_collection_scans():
+    summary = summarize_explain(COLLSCAN_EXPLAIN)
+
+    assert summary == {
+        "stages": ["SORT", "COLLSCAN"], "indexes": [], "collection_scan": True,
+        "docs_examined": 5000, "keys_examined": 0, "execution_ms": 42,
+    }
+
+    # Aggregations nest the plan in their $cursor stage; SBE plans wrap it in queryPlan
+    indexed = summarize_explain({"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"queryPlan": {
+        "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1_created_at_-1"},
+    }}}}}, {"$group": {}}]})
+    assert indexed["stages"] == ["FETCH", "IXSCAN"]
+    assert indexed["indexes"] == ["status_1_created_at_-1"]
+    assert not indexed["collection_scan"]
+    assert indexed["docs_examined"] is None
+
+
+class FakeDatabase:
+    """Base mínima: responde ``explain`` con un plan fijo y guarda lo insertado."""
+
+    def __init__(self, explain: dict):
+        self.explain = explain
+        self.explained = []
+        self.inserted = []
+        self.client = {"pizzapp": self}
+
+    async def command(self, command: dict) -> dict:
+        self.explained.append(command)
+        return self.explain
+
+    def __getitem__(self, name: str):
+        return SimpleNamespace(insert_many=self.insert_many)
+
+    async def insert_many(self, documents, ordered=True):
+        self.inserted.extend(documents)
+
+
+def run_command(log: SlowQueryLog, request_id: int, command: dict, duration_ms: float, reply: dict):
+    name = next(iter(command))
+    log.started(SimpleNamespace(command_name=name, command=command, database_name="pizzapp", request_id=request_id))
+    log.succeeded(SimpleNamespace(command_name=name, request_id=request_id, duration_micros=duration_ms * 1000,
+                                  reply=reply))
+
+
+async def test_slow_commands_are_logged_with_one_explain_per_shape(caplog):
+    log = SlowQueryLog(threshold_ms=50, explain_interval=60)
+    db = FakeDatabase(COLLSCAN_EXPLAIN)
+    reply = {"cursor": {"firstBatch": [{}]}}
+    run_command(log, 1, {"find": "orders", "filter": {"status": "ready"}, "lsid": {}}, 120, reply)
+    run_command(log, 2, {"find": "orders", "filter": {"status": "received"}}, 80, reply)
+    run_command(log, 3, {"find": "orders", "filter": {"status": "ready"}}, 10, reply)
+    # The log's own writes never feed back into it
+    run_command(log, 4, {"insert": "slow_queries", "documents": []}, 500, {"n": 0})
+
+    with caplog.at_level(logging.WARNING, logger="slowlog"):
+        assert await log.flush(db) == 2
+
+    first, second = db.inserted
+    assert (first["duration_ms"], first["documents_returned"]) == (120, 1)
+    assert json.loads(first["shape"]) == {"filter": {"status": "?"}, "sort": None, "projection": False}
+    assert first["plan"]["collection_scan"]
+    # Same shape within the interval: stored without a second explain
+    assert second["plan"] is None
+    assert db.explained == [{"explain": {"find": "orders", "filter": {"status": "ready"}}, "verbosity": "executionStats"}]
+    assert "scans the whole collection" in caplog.text
+    assert await log.flush(db) == 0
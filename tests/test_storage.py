@@ -0,0 +1,444 @@
+"""
+Suite de conformidad de los backends de almacenamiento.
+
+Cada prueba corre contra Mongo (Motor sobre la base en memoria), el backend
+en memoria y SQLite, y espera exactamente el mismo comportamiento.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from storage import CustomerRepository, MemoryStorage, add_customer_order, new_customer
+from storage_mongo import MongoStorage
+from storage_sqlite import SqliteStorage
+from tests.memory_motor import MemoryMotorClient
+
+pytestmark = pytest.mark.anyio
+
+# MongoDB keeps datetimes to the millisecond: fixed timestamps keep round trips exact
+NOW = datetime(2025, 3, 14, 12, 0, 0)
+
+
+@pytest.fixture(params=["mongo", "memory", "sqlite"])
+async def storage(request, tmp_path):
+    if request.param == "mongo":
+        backend = MongoStorage(MemoryMotorClient()["conformance"])
+    elif request.param == "memory":
+        backend = MemoryStorage()
+    else:
+        backend = SqliteStorage(str(tmp_path / "pizzapp.sqlite3"))
+    await backend.setup()
+    yield backend
+    await backend.close()
+
+
+def make_order(status: str = "received", minutes_ago: int = 0, total: float = 50000, **extra) -> dict:
+    extra.setdefault("updated_at", NOW)
+    return server.Order(
+        items=[{"menu_item_id": "item-1", "quantity": 1}],
+        delivery_info={
+            "customer_name": "Cliente",
+            "customer_phone": "+595981000000",
+            "delivery_address": "Calle 1",
+            "delivery_zone": "centro",
+        },
+        subtotal=total - 15000,
+        delivery_fee=15000,
+        total=total,
+        status=status,
+        estimated_delivery=NOW + timedelta(minutes=45),
+        created_at=NOW - timedelta(minutes=minutes_ago),
+        **extra,
+    ).dict()
+
+
+def menu_item(name: str, category: str = "pizzas", **extra) -> dict:
+    return server.MenuItem(
+        name=name, description=name, price=45000, category=category, image_url="", created_at=NOW, **extra
+    ).dict()
+
+
+async def test_menu_lists_available_items_in_insertion_order(storage):
+    items = [menu_item("B"), menu_item("A", "drinks"), menu_item("C", available=False)]
+    await storage.menu.insert_many(items)
+
+    listed = await storage.menu.list()
+
+    assert [item["name"] for item in listed] == ["B", "A"]
+    assert [item["name"] for item in await storage.menu.list(category="drinks")] == ["A"]
+    assert len(await storage.menu.list(available_only=False)) == 3
+
+
+async def test_menu_get_round_trips_document(storage):
+    item = menu_item("Pizza")
+    await storage.menu.insert(item)
+
+    assert await storage.menu.get(item["id"]) == item
+    assert await storage.menu.get("missing") is None
+
+
+async def test_menu_get_many_skips_unknown_ids(storage):
+    first, second = menu_item("A"), menu_item("B")
+    await storage.menu.insert_many([first, second])
+
+    found = await storage.menu.get_many([first["id"], second["id"], first["id"], "missing"])
+
+    assert sorted(item["name"] for item in found) == ["A", "B"]
+
+
+async def test_menu_update_and_replace(storage):
+    item = menu_item("Pizza")
+    await storage.menu.insert(item)
+
+    assert await storage.menu.update(item["id"], {"available": False})
+    assert await storage.menu.list() == []
+    assert await storage.menu.replace(item["id"], {**item, "name": "Pizza 2", "category": "drinks"})
+    assert [found["name"] for found in await storage.menu.list(category="drinks")] == ["Pizza 2"]
+    assert not await storage.menu.update("missing", {"available": False})
+    assert not await storage.menu.replace("missing", item)
+
+
+async def test_menu_delete_all(storage):
+    await storage.menu.insert_many([menu_item("A"), menu_item("B")])
+
+    await storage.menu.delete_all()
+
+    assert await storage.menu.list(available_only=False) == []
+
+
+async def test_menu_sync_upserts_and_deactivates(storage):
+    kept, renamed, dropped = menu_item("A"), menu_item("B"), menu_item("C")
+    await storage.menu.insert_many([kept, renamed, dropped])
+    added = menu_item("D", "drinks")
+
+    await storage.menu.sync([{**renamed, "name": "B2"}, added], [dropped["id"]])
+
+    assert [item["name"] for item in await storage.menu.list()] == ["A", "B2", "D"]
+    assert (await storage.menu.get(dropped["id"]))["available"] is False
+    assert await storage.menu.get(added["id"]) == added
+
+
+async def test_users_lookup_and_update(storage):
+    user = server.AdminUser(username="kitchen", email="k@pizzapp.com", hashed_password="x", role="kitchen",
+                            created_at=NOW).dict()
+    await storage.users.insert(user)
+
+    assert await storage.users.get_by_username("kitchen") == user
+    assert await storage.users.get_by_username("nobody") is None
+    assert await storage.users.update(user["id"], {"role": "manager"})
+    assert (await storage.users.get_by_username("kitchen"))["role"] == "manager"
+    assert not await storage.users.update("missing", {"role": "admin"})
+    assert [found["username"] for found in await storage.users.list()] == ["kitchen"]
+
+
+async def test_delivery_persons_filter_by_availability(storage):
+    busy = server.DeliveryPerson(name="A", phone="1", is_available=False).dict()
+    free = server.DeliveryPerson(name="B", phone="2").dict()
+    await storage.delivery_persons.insert(busy)
+    await storage.delivery_persons.insert(free)
+
+    assert [person["name"] for person in await storage.delivery_persons.list()] == ["A", "B"]
+    assert [person["name"] for person in await storage.delivery_persons.list(available_only=True)] == ["B"]
+
+    updated = await storage.delivery_persons.update(busy["id"], {"is_available": True, "latitude": -25.3})
+    assert updated["latitude"] == -25.3
+    assert len(await storage.delivery_persons.list(available_only=True)) == 2
+    assert await storage.delivery_persons.update("missing", {"is_available": True}) is None
+    assert (await storage.delivery_persons.get(busy["id"]))["is_available"] is True
+    assert await storage.delivery_persons.get("missing") is None
+
+
+async def test_delivery_persons_bulk_update(storage):
+    person = server.DeliveryPerson(name="A", phone="1").dict()
+    await storage.delivery_persons.insert(person)
+
+    await storage.delivery_persons.bulk_update([
+        (person["id"], {"latitude": -25.3, "longitude": -57.6, "location_updated_at": NOW}),
+        ("missing", {"latitude": 0.0}),
+    ])
+
+    (stored,) = await storage.delivery_persons.list()
+    assert (stored["latitude"], stored["longitude"], stored["location_updated_at"]) == (-25.3, -57.6, NOW)
+
+
+async def test_add_order_respects_capacity_and_availability(storage):
+    person = server.DeliveryPerson(name="A", phone="1").dict()
+    await storage.delivery_persons.insert(person)
+
+    assert (await storage.delivery_persons.add_order(person["id"], "o1", capacity=2))["current_orders"] == ["o1"]
+    assert (await storage.delivery_persons.add_order(person["id"], "o1", capacity=2))["current_orders"] == ["o1"]
+    assert (await storage.delivery_persons.add_order(person["id"], "o2", capacity=2))["current_orders"] == ["o1", "o2"]
+    assert await storage.delivery_persons.add_order(person["id"], "o3", capacity=2) is None
+    # Manual assignment ignores capacity
+    assert len((await storage.delivery_persons.add_order(person["id"], "o3"))["current_orders"]) == 3
+
+    released = await storage.delivery_persons.remove_order(person["id"], "o1")
+    assert released["current_orders"] == ["o2", "o3"]
+    await storage.delivery_persons.update(person["id"], {"is_available": False})
+    assert await storage.delivery_persons.add_order(person["id"], "o4", capacity=5) is None
+    assert await storage.delivery_persons.add_order("missing", "o4") is None
+    assert await storage.delivery_persons.remove_order("missing", "o4") is None
+
+
+async def test_order_get_round_trips_and_projects(storage):
+    order = make_order()
+    await storage.orders.insert(order)
+
+    assert await storage.orders.get(order["id"]) == order
+    assert await storage.orders.get(order["id"], {"id": 1, "delivery_info.customer_name": 1}) == {
+        "id": order["id"], "delivery_info": {"customer_name": "Cliente"},
+    }
+    assert await storage.orders.get("missing") is None
+
+
+async def test_order_update_changes_status_index(storage):
+    order = make_order()
+    await storage.orders.insert(order)
+
+    assert await storage.orders.update(order["id"], {"status": "ready", "assigned_delivery_person": "c1"})
+
+    assert await storage.orders.find(["received"]) == []
+    (found,) = await storage.orders.find(["ready"])
+    assert found["assigned_delivery_person"] == "c1"
+    assert not await storage.orders.update("missing", {"status": "ready"})
+
+
+async def test_update_if_status_is_conditional(storage):
+    order = make_order("scheduled")
+    await storage.orders.insert(order)
+
+    released = await storage.orders.update_if_status(order["id"], "scheduled", {"status": "received"})
+
+    assert released["status"] == "received"
+    assert await storage.orders.update_if_status(order["id"], "scheduled", {"status": "received"}) is None
+    assert await storage.orders.update_if_status("missing", "scheduled", {"status": "received"}) is None
+
+
+async def test_find_sorts_filters_and_limits(storage):
+    orders = [
+        make_order("received", minutes_ago=30),
+        make_order("ready", minutes_ago=20),
+        make_order("received", minutes_ago=10),
+        make_order("ready", minutes_ago=5, assigned_delivery_person="c1"),
+    ]
+    for order in orders:
+        await storage.orders.insert(order)
+
+    def ids(found):
+        return [order["id"] for order in found]
+
+    assert ids(await storage.orders.find()) == ids(orders[::-1])
+    assert ids(await storage.orders.find(newest_first=False, limit=2)) == ids(orders[:2])
+    assert ids(await storage.orders.find(["received"])) == [orders[2]["id"], orders[0]["id"]]
+    assert ids(await storage.orders.find(["ready", "received"], limit=3)) == ids(orders[:0:-1])
+    assert ids(await storage.orders.find(["ready"], unassigned=True)) == [orders[1]["id"]]
+    assert await storage.orders.find(["received"], {"id": 1, "status": 1}, limit=1) == [
+        {"id": orders[2]["id"], "status": "received"},
+    ]
+
+
+async def test_stats_since_excludes_cancelled_revenue(storage):
+    for order in (
+        make_order("delivered", minutes_ago=10, total=100000),
+        make_order("cancelled", minutes_ago=20, total=70000),
+        make_order("received", minutes_ago=30, total=50000),
+        make_order("delivered", minutes_ago=600, total=90000),
+    ):
+        await storage.orders.insert(order)
+
+    stats = await storage.orders.stats_since(NOW - timedelta(hours=1))
+
+    assert stats == {
+        "total_orders": 3,
+        "total_revenue": 150000,
+        "orders_by_status": {"delivered": 1, "cancelled": 1, "received": 1},
+    }
+    assert await storage.orders.stats_since(NOW + timedelta(hours=1)) == {
+        "total_orders": 0, "total_revenue": 0, "orders_by_status": {},
+    }
+
+
+async def test_latest_by_status_counts_and_truncates_columns(storage):
+    received = [make_order("received", minutes_ago=minutes) for minutes in (1, 2, 3)]
+    for order in [*received, make_order("ready", minutes_ago=4), make_order("delivered", minutes_ago=5)]:
+        await storage.orders.insert(order)
+
+    columns = await storage.orders.latest_by_status(["received", "ready", "on_route"], {"id": 1, "status": 1}, 2)
+
+    assert set(columns) == {"received", "ready"}
+    assert columns["received"]["count"] == 3
+    assert columns["received"]["orders"] == [{"id": order["id"], "status": "received"} for order in received[:2]]
+    assert columns["ready"]["count"] == 1
+
+
+async def test_returned_documents_are_copies(storage):
+    order = make_order(id=str(uuid.uuid4()))
+    await storage.orders.insert(order)
+
+    found = await storage.orders.get(order["id"])
+    found["delivery_info"]["customer_name"] = "Otro"
+    order["status"] = "cancelled"
+
+    stored = await storage.orders.get(order["id"])
+    assert stored["delivery_info"]["customer_name"] == "Cliente"
+    assert stored["status"] == "received"
+
+
+async def test_archive_moves_old_terminal_orders_in_batches(storage):
+    old = [make_order("delivered", updated_at=NOW - timedelta(days=2, minutes=minutes)) for minutes in (1, 2, 3)]
+    recent = make_order("delivered")
+    active = make_order("preparing", updated_at=NOW - timedelta(days=2))
+    for order in [*old, recent, active]:
+        await storage.orders.insert(order)
+
+    statuses, before = ["delivered", "cancelled"], NOW - timedelta(days=1)
+    assert await storage.orders.archive(statuses, before, 2) == 2
+    assert await storage.orders.archive(statuses, before, 2) == 1
+    assert await storage.orders.archive(statuses, before, 2) == 0
+
+    assert await storage.orders.count() == 2
+    assert await storage.orders.count(archived=True) == 3
+    assert [order["id"] for order in await storage.orders.find(["delivered"])] == [recent["id"]]
+
+
+async def test_archived_orders_are_found_by_get_and_stats(storage):
+    order = make_order("delivered", minutes_ago=10, total=80000, updated_at=NOW - timedelta(days=2))
+    await storage.orders.insert(order)
+    await storage.orders.insert(make_order("received", minutes_ago=5, total=50000))
+
+    await storage.orders.archive(["delivered"], NOW - timedelta(days=1), 100)
+
+    assert await storage.orders.get(order["id"]) is None
+    assert await storage.orders.get(order["id"], include_archive=True) == order
+    assert await storage.orders.get(order["id"], {"id": 1, "status": 1}, include_archive=True) == {
+        "id": order["id"], "status": "delivered",
+    }
+    assert await storage.orders.stats_since(NOW - timedelta(hours=1)) == {
+        "total_orders": 2,
+        "total_revenue": 130000,
+        "orders_by_status": {"delivered": 1, "received": 1},
+    }
+
+
+async def test_scan_yields_range_in_batches_across_tiers(storage):
+    orders = [make_order("delivered", minutes_ago=minutes) for minutes in (50, 40, 30, 20, 10)]
+    archived = make_order("delivered", minutes_ago=5, updated_at=NOW - timedelta(days=2))
+    for order in [*orders, archived, make_order(minutes_ago=120)]:
+        await storage.orders.insert(order)
+    await storage.orders.archive(["delivered"], NOW - timedelta(days=1), 10)
+
+    batches = [batch async for batch in storage.orders.scan(NOW - timedelta(hours=1), NOW - timedelta(minutes=15), 2)]
+
+    assert [[order["id"] for order in batch] for batch in batches] == [
+        [orders[0]["id"], orders[1]["id"]], [orders[2]["id"], orders[3]["id"]],
+    ]
+    everything = [order async for batch in storage.orders.scan(NOW - timedelta(hours=1), NOW, 4) for order in batch]
+    assert [order["id"] for order in everything] == [order["id"] for order in orders] + [archived["id"]]
+    assert everything[-1] == archived
+
+
+async def test_scan_merges_tiers_in_creation_order(storage):
+    # Odd minutes finished long ago and go to the archive; both tiers interleave by created_at
+    orders = [
+        make_order("delivered", minutes_ago=minutes,
+                   updated_at=NOW - timedelta(days=2) if minutes % 2 else NOW)
+        for minutes in (50, 45, 40, 35, 30)
+    ]
+    for order in orders:
+        await storage.orders.insert(order)
+    assert await storage.orders.archive(["delivered"], NOW - timedelta(days=1), 10) == 2
+
+    batches = [batch async for batch in storage.orders.scan(NOW - timedelta(hours=1), NOW, 2)]
+
+    assert [[order["id"] for order in batch] for batch in batches] == [
+        [orders[0]["id"], orders[1]["id"]], [orders[2]["id"], orders[3]["id"]], [orders[4]["id"]],
+    ]
+
+
+async def test_scan_keeps_orders_archived_between_batches(storage):
+    # The newest orders finished first, so they are archived before the scan reaches them
+    orders = [make_order("delivered", minutes_ago=minutes, updated_at=NOW - timedelta(days=2, minutes=60 - minutes))
+              for minutes in (50, 40, 30, 20)]
+    for order in orders:
+        await storage.orders.insert(order)
+
+    exported = []
+    async for batch in storage.orders.scan(NOW - timedelta(hours=1), NOW, 2):
+        exported.extend(batch)
+        # The archive loop runs while the export streams
+        await storage.orders.archive(["delivered"], NOW - timedelta(days=1), 1)
+
+    assert len(exported) == len(orders)
+    assert {order["id"] for order in exported} == {order["id"] for order in orders}
+
+
+async def test_history_pages_customer_orders_newest_first_across_archive(storage):
+    orders = [make_order("delivered", minutes_ago=minutes, customer_key="595981000000") for minutes in (40, 30, 20)]
+    archived = make_order("delivered", minutes_ago=50, customer_key="595981000000", updated_at=NOW - timedelta(days=2))
+    # Same creation time as orders[1]: the id breaks the tie
+    twin = make_order(minutes_ago=30, customer_key="595981000000")
+    other = make_order(minutes_ago=10, customer_key="595971000000")
+    for order in [*orders, archived, twin, other]:
+        await storage.orders.insert(order)
+    await storage.orders.archive(["delivered"], NOW - timedelta(days=1), 10)
+
+    expected = [orders[2], *sorted([orders[1], twin], key=lambda order: order["id"], reverse=True), orders[0], archived]
+    first = await storage.orders.history("595981000000", 2)
+    second = await storage.orders.history("595981000000", 2, (first[-1]["created_at"], first[-1]["id"]))
+    last = await storage.orders.history("595981000000", 2, (second[-1]["created_at"], second[-1]["id"]))
+
+    assert [order["id"] for order in first + second + last] == [order["id"] for order in expected]
+    assert last == [archived]
+    assert await storage.orders.history("595000000000", 2) == []
+
+
+async def test_backfill_customer_keys_indexes_old_orders(storage):
+    old = [make_order(minutes_ago=minutes) for minutes in (3, 2, 1)]
+    for order in old:
+        del order["customer_key"]
+        await storage.orders.insert(order)
+
+    assert await storage.orders.backfill_customer_keys(lambda phone: phone.lstrip("+"), 2) == 2
+    assert await storage.orders.backfill_customer_keys(lambda phone: phone.lstrip("+"), 2) == 1
+    assert await storage.orders.backfill_customer_keys(lambda phone: phone.lstrip("+"), 2) == 0
+
+    history = await storage.orders.history("595981000000", 10)
+    assert [order["id"] for order in history] == [order["id"] for order in reversed(old)]
+    assert history[0]["customer_key"] == "595981000000"
+
+
+async def test_customer_profile_only_records_orders_once_it_exists(storage):
+    first = make_order(minutes_ago=10, customer_key="595981000000")
+    assert await storage.customers.record_order(first) is False
+    assert await storage.customers.get("595981000000") is None
+
+    profile = new_customer("595981000000")
+    add_customer_order(profile, first)
+    await storage.customers.save(profile)
+    second = make_order(minutes_ago=5, customer_key="595981000000")
+    second["items"] = [{"menu_item_id": "item-1", "quantity": 2}, {"menu_item_id": "item-2", "quantity": 1}]
+    second["delivery_info"]["delivery_address"] = "Calle 2"
+    assert await storage.customers.record_order(second) is True
+
+    assert await storage.customers.get("595981000000") == {
+        "id": "595981000000",
+        "customer_name": "Cliente",
+        "last_address": "Calle 2",
+        "last_zone": "centro",
+        "order_count": 2,
+        "items": {"item-1": 3, "item-2": 1},
+        "first_order_at": first["created_at"],
+        "last_order_at": second["created_at"],
+    }
+
+
+def test_incomplete_repository_fails_on_creation():
+    class PartialCustomers(CustomerRepository):
+        async def get(self, customer_key):
+            return None
+
+    with pytest.raises(TypeError, match="record_order"):
+        PartialCustomers()
@@ -0,0 +1,108 @@
+"""
+Pruebas del servicio de miniaturas, con imágenes locales en lugar de la red.
+"""
+
+import io
+
+import pytest
+
+import server
+
+Image = pytest.importorskip("PIL.Image")
+
+pytestmark = pytest.mark.anyio
+
+SOURCE_URL = "https://images.example.com/photos/pizza.jpg"
+
+
+def image_bytes(width: int = 400, height: int = 300, format: str = "JPEG") -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(output, format)
+    return output.getvalue()
+
+
+@pytest.fixture
+def pizza(menu, tmp_path):
+    """Producto del menú con una imagen externa servida desde el directorio local."""
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "pizza.jpg").write_bytes(image_bytes())
+    item = menu["Pizza Margherita"]
+    server.db.menu_items.delegate.update_one({"id": item["id"]}, {"$set": {"image_url": SOURCE_URL}})
+    return item
+
+
+async def test_menu_switches_to_thumbnails_once_generated(api, pizza):
+    first = {item["id"]: item for item in (await api.get("/api/menu")).json()}
+    assert first[pizza["id"]]["image_url"] == SOURCE_URL
+
+    digest = await server.thumbnails.ensure(SOURCE_URL)
+
+    item = {item["id"]: item for item in (await api.get("/api/menu")).json()}[pizza["id"]]
+    assert item["image_url"] == f"/api/images/{digest}/160.webp"
+    assert item["image_srcset"] == f"/api/images/{digest}/80.webp 80w, /api/images/{digest}/160.webp 160w"
+    response = await api.get(item["image_url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "immutable" in response.headers["cache-control"]
+    assert Image.open(io.BytesIO(response.content)).size == (160, 120)
+
+
+async def test_identical_sources_share_one_cache_entry(api, pizza, tmp_path):
+    (tmp_path / "images" / "copy.jpg").write_bytes((tmp_path / "images" / "pizza.jpg").read_bytes())
+
+    first = await server.thumbnails.ensure(SOURCE_URL)
+    second = await server.thumbnails.ensure("https://cdn.example.com/copy.jpg")
+
+    assert first == second
+    assert len(list((tmp_path / "thumbnails" / "variants").rglob("*.webp"))) == 2
+
+
+async def test_missing_source_keeps_original_url(api, pizza, tmp_path):
+    (tmp_path / "images" / "pizza.jpg").unlink()
+
+    assert await server.thumbnails.ensure(SOURCE_URL) is None
+
+    item = {item["id"]: item for item in (await api.get("/api/menu")).json()}[pizza["id"]]
+    assert item["image_url"] == SOURCE_URL
+
+
+async def test_uploaded_image_replaces_item_image(api, menu, auth_headers):
+    item = menu["Papas Fritas"]
+
+    response = await api.post(
+        f"/api/menu/{item['id']}/image", files={"image": ("fries.png", image_bytes(50, 50, "PNG"), "image/png")},
+        headers=auth_headers("manager")
+    )
+
+    assert response.status_code == 200
+    assert response.json()["image_url"].endswith("/160.webp")
+    listed = (await api.get("/api/menu/category/sides")).json()[0]
+    assert listed["image_url"] == response.json()["image_url"]
+    thumbnail = await api.get(listed["image_url"])
+    # Smaller sources are not upscaled
+    assert Image.open(io.BytesIO(thumbnail.content)).size == (50, 50)
+
+
+async def test_upload_rejects_non_images(api, menu, auth_headers):
+    url = f"/api/menu/{menu['Papas Fritas']['id']}/image"
+    headers = auth_headers("manager")
+
+    assert (await api.post(url, files={"image": ("a.txt", b"hello", "text/plain")}, headers=headers)).status_code == 415
+    assert (await api.post(url, files={"image": ("a.png", b"hello", "image/png")}, headers=headers)).status_code == 400
+    assert (await api.post(url, content=b"hello", headers={**headers, "Content-Type": "image/png"})).status_code == 422
+    assert (await api.get(f"/api/images/{'0' * 64}/160.webp")).status_code == 404
+    assert (await api.get("/api/images/../etc/160.webp")).status_code == 404
+
+
+async def test_upload_stops_reading_past_size_limit(api, menu, auth_headers, monkeypatch):
+    monkeypatch.setattr(server, "THUMBNAIL_MAX_SOURCE_BYTES", 1000)
+    monkeypatch.setattr(server, "UPLOAD_CHUNK_BYTES", 256)
+    item = menu["Papas Fritas"]
+
+    response = await api.post(
+        f"/api/menu/{item['id']}/image", files={"image": ("big.png", b"x" * 1001, "image/png")},
+        headers=auth_headers("manager")
+    )
+
+    assert response.status_code == 413
+    assert (await api.get("/api/menu/category/sides")).json()[0]["image_url"] == item["image_url"]
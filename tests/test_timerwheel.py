@@ -0,0 +1,59 @@
+"""
+Pruebas de la rueda jerárquica de temporizadores.
+"""
+
+import random
+
+from timerwheel import TimerWheel
+
+
+def fire_ticks(wheel: TimerWheel, until: int) -> dict:
+    fired = {}
+    for tick in range(wheel.current_tick + 1, until + 1):
+        for key in wheel.advance(tick):
+            assert key not in fired
+            fired[key] = tick
+    return fired
+
+
+def test_timers_cascade_through_every_level_and_overflow():
+    # Levels of 4 slots cover 4, 16 and 64 ticks; later timers wait in the overflow heap
+    wheel = TimerWheel(0, wheel_sizes=(4, 4, 4))
+    expiries = {f"t{expiry}": expiry for expiry in (1, 3, 4, 5, 15, 16, 17, 63, 64, 65, 200)}
+    for key, expiry in expiries.items():
+        wheel.schedule(key, expiry)
+
+    assert fire_ticks(wheel, 250) == expiries
+    assert len(wheel) == 0
+
+
+def test_random_timers_fire_exactly_on_their_tick():
+    rng = random.Random(7)
+    wheel = TimerWheel(10, wheel_sizes=(4, 4, 4))
+    expiries = {}
+    for index in range(300):
+        expiries[index] = rng.randint(11, 400)
+        wheel.schedule(index, expiries[index] + rng.random() * 0.99)
+
+    assert fire_ticks(wheel, 400) == expiries
+
+
+def test_reschedule_and_cancel_drop_old_entries():
+    wheel = TimerWheel(0, wheel_sizes=(4, 4, 4))
+    wheel.schedule("moved", 30)
+    wheel.schedule("cancelled", 20)
+    wheel.advance(10)
+    wheel.schedule("moved", 12)
+
+    assert wheel.cancel("cancelled")
+    assert not wheel.cancel("cancelled")
+    assert fire_ticks(wheel, 100) == {"moved": 12}
+
+
+def test_overdue_timers_fire_on_next_tick():
+    wheel = TimerWheel(100, tick_seconds=10)
+    wheel.schedule("late", 50)
+
+    assert wheel.advance(109) == []
+    assert wheel.advance(110) == ["late"]
+    assert "late" not in wheel
@@ -0,0 +1,132 @@
+"""
+Pruebas de las trazas locales: ``traceparent``, muestreo y propagación hacia MongoDB.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from tracing import FileSpanExporter, MongoTracingListener, Tracer, parse_traceparent
+
+pytestmark = pytest.mark.anyio
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def exported(exporter: FileSpanExporter) -> list:
+    exporter.flush()
+    if not exporter.path.exists():
+        return []
+    return [json.loads(line) for line in exporter.path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_traceparent_keeps_ids_and_sampled_flag():
+    sampled = parse_traceparent(f" 00-{TRACE_ID}-{PARENT_ID}-01 ")
+    unsampled = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")
+
+    assert (sampled.trace_id, sampled.span_id, sampled.sampled) == (TRACE_ID, PARENT_ID, True)
+    assert not unsampled.sampled
+    assert sampled.traceparent == f"00-{TRACE_ID}-{PARENT_ID}-01"
+    assert unsampled.traceparent.endswith("-00")
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "garbage",
+    f"00-{TRACE_ID}-{PARENT_ID}",
+    f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID}-1",
+    f"00-{TRACE_ID.upper()}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID[:-2]}zz-01",
+    f"00-0x{TRACE_ID[2:]}-{PARENT_ID}-01",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+])
+def test_malformed_or_all_zero_traceparent_is_rejected(header):
+    assert parse_traceparent(header) is None
+
+
+def test_sampling_is_decided_at_the_root_and_inherited(tmp_path):
+    exporter = FileSpanExporter(tmp_path / "spans.jsonl")
+    never = Tracer("test", sample_ratio=0, exporter=exporter)
+    always = Tracer("test", sample_ratio=1, exporter=exporter)
+
+    with never.span("dropped") as root:
+        with never.span("child", {"key": "value"}) as child:
+            assert never.current_span() is child
+    assert not root.sampled and child.attributes == {}
+    # A sampled remote parent wins over the local ratio, and the other way round
+    with never.span("continued", parent=parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")) as remote:
+        pass
+    with always.span("skipped", parent=parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")) as skipped:
+        pass
+    assert remote.sampled and not skipped.sampled
+    # Without an exporter nothing is ever sampled
+    assert not Tracer("test", sample_ratio=1).start_span("root").sampled
+
+    spans = exported(exporter)
+    assert [(span["name"], span["traceId"], span["parentSpanId"]) for span in spans] == [
+        ("continued", TRACE_ID, PARENT_ID),
+    ]
+    assert never.current_span() is None
+
+
+def test_inject_tags_messages_with_the_active_trace():
+    tracer = Tracer("test", exporter=None)
+
+    assert tracer.inject({"type": "ping"}) == {"type": "ping"}
+    with tracer.span("broadcast") as span:
+        assert tracer.inject({"type": "ping"}) == {"type": "ping", "trace_id": span.trace_id}
+
+
+def command_event(request_id: int, command: dict, **extra) -> SimpleNamespace:
+    return SimpleNamespace(
+        command_name=next(iter(command)), command=command, database_name="pizzapp", request_id=request_id, **extra
+    )
+
+
+async def test_mongo_spans_are_children_of_the_handler_span_across_awaits(tmp_path):
+    exporter = FileSpanExporter(tmp_path / "spans.jsonl")
+    tracer = Tracer("test", exporter=exporter)
+    listener = MongoTracingListener(tracer)
+
+    async def handler():
+        with tracer.span("GET /api/orders") as root:
+            await asyncio.sleep(0)
+            # Motor runs the driver in its executor with a copy of the caller's context
+            await asyncio.to_thread(listener.started, command_event(1, {"find": "orders", "filter": {}}))
+            await asyncio.sleep(0)
+            await asyncio.to_thread(listener.succeeded, command_event(1, {"find": "orders"}, duration_micros=1500))
+        return root
+
+    root = await handler()
+    # Outside any request there is no parent, so background commands are not traced
+    listener.started(command_event(2, {"ping": 1}))
+    listener.succeeded(command_event(2, {"ping": 1}, duration_micros=10))
+
+    spans = {span["name"]: span for span in exported(exporter)}
+    assert set(spans) == {"GET /api/orders", "mongodb.find"}
+    find = spans["mongodb.find"]
+    assert (find["traceId"], find["parentSpanId"], find["kind"]) == (root.trace_id, root.span_id, "client")
+    assert find["attributes"]["db.collection"] == "orders"
+    assert find["durationMs"] == 1.5
+
+
+async def test_requests_continue_incoming_traces(api, monkeypatch, tmp_path):
+    exporter = FileSpanExporter(tmp_path / "spans.jsonl")
+    monkeypatch.setattr(server.tracer, "exporter", exporter)
+
+    response = await api.get("/api/menu", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    untraced = await api.get("/api/menu", headers={"traceparent": f"00-{'0' * 32}-{PARENT_ID}-01"})
+
+    assert response.headers["x-trace-id"] == TRACE_ID
+    assert untraced.headers["x-trace-id"] != "0" * 32
+    request_span = next(span for span in exported(exporter) if span["traceId"] == TRACE_ID and span["kind"] == "server")
+    assert request_span["parentSpanId"] == PARENT_ID
+    assert request_span["name"] == "GET /api/menu"
@@ -0,0 +1,108 @@
+"""
+Pruebas de la resolución de zonas de entrega y de su registro editable.
+"""
+
+import json
+
+import pytest
+
+import server
+from zones import Zone, ZoneIndex, ZoneRegistry, default_zones_path
+
+pytestmark = pytest.mark.anyio
+
+SQUARE = {
+    "default_fee": 20000,
+    "zones": [
+        {"name": "centro", "polygon": [[0, 0], [0, 1], [1, 1], [1, 0]], "fees": [{"min_subtotal": 0, "fee": 10000}]},
+    ],
+}
+
+
+def moved(offset: float) -> dict:
+    zone = {**SQUARE["zones"][0], "polygon": [[lat + offset, lon + offset] for lat, lon in SQUARE["zones"][0]["polygon"]]}
+    return {**SQUARE, "zones": [zone]}
+
+
+def square(name: str, lat: float, lon: float) -> Zone:
+    return Zone(name, [[lat, lon], [lat, lon + 1], [lat + 1, lon + 1], [lat + 1, lon]], [{"fee": 1}])
+
+
+class ExplodingEdges:
+    def __iter__(self):
+        raise AssertionError("bounding box should have rejected the point")
+
+
+def test_bounding_box_rejects_points_before_ray_casting():
+    zone = square("centro", 0, 0)
+    zone._edges = ExplodingEdges()
+
+    assert not zone.contains(1.5, 0.5)
+    assert not zone.contains(0.5, -0.1)
+
+
+def test_concave_polygon_excludes_the_notch():
+    # L shape: the top-right quarter of the 2x2 square is missing
+    zone = Zone("ele", [[0, 0], [0, 2], [1, 2], [1, 1], [2, 1], [2, 0]], [{"fee": 1}])
+
+    assert zone.contains(0.5, 1.5)
+    assert zone.contains(1.5, 0.5)
+    assert not zone.contains(1.5, 1.5)
+
+
+def test_ray_through_a_vertex_is_counted_once():
+    diamond = Zone("rombo", [[0, 1], [1, 2], [2, 1], [1, 0]], [{"fee": 1}])
+
+    assert diamond.contains(1, 0.5)
+    assert diamond.contains(1, 1.5)
+    assert not diamond.contains(0.5, 0.2)
+    assert not diamond.contains(1.5, 1.8)
+
+
+def test_shared_edges_and_vertices_resolve_to_exactly_one_zone():
+    zones = [square(f"z{lat}{lon}", lat, lon) for lat in (0, 1) for lon in (0, 1)]
+
+    for point in [(1, 0.5), (0.5, 1), (1, 1), (1.5, 1), (1, 1.5)]:
+        assert sum(zone.contains(*point) for zone in zones) == 1, point
+    # Points on the outer south and west borders belong to the zone; north and east do not
+    assert zones[0].contains(0, 0.5) and zones[0].contains(0.5, 0)
+    assert not zones[3].contains(2, 1.5) and not zones[3].contains(1.5, 2)
+
+
+def test_resolve_prefers_first_zone_and_picks_fee_tier():
+    inner = Zone("inner", [[0, 0], [0, 1], [1, 1], [1, 0]], [{"min_subtotal": 0, "fee": 10}, {"min_subtotal": 100, "fee": 0}])
+    index = ZoneIndex([inner, square("outer", 0, 0)], default_fee=50)
+
+    assert index.resolve(0.5, 0.5).name == "inner"
+    assert index.resolve(5, 5) is None
+    assert (inner.fee_for(99), inner.fee_for(100)) == (10, 0)
+    with pytest.raises(ValueError):
+        ZoneIndex([inner, inner], default_fee=50)
+
+
+def test_registry_writes_edits_to_data_file_and_leaves_seed_alone(tmp_path):
+    seed = tmp_path / "seed.json"
+    seed.write_text(json.dumps(SQUARE))
+    data = tmp_path / "data" / "delivery_zones.json"
+    registry = ZoneRegistry(data, seed)
+    assert registry.index.resolve(0.5, 0.5).name == "centro"
+
+    registry.replace(moved(10))
+
+    assert json.loads(seed.read_text()) == SQUARE
+    assert registry.index.resolve(10.5, 10.5).name == "centro"
+    # Another worker starting later picks up the edited file, not the seed
+    assert ZoneRegistry(data, seed).index.resolve(10.5, 10.5) is not None
+    assert ZoneRegistry(data, seed).index.resolve(0.5, 0.5) is None
+
+
+async def test_zone_update_endpoint_does_not_touch_bundled_file(api, auth_headers):
+    bundled = default_zones_path().read_bytes()
+    current = server.zone_registry.index.to_dict()
+
+    response = await api.put("/api/delivery-zones", json=current, headers=auth_headers("admin"))
+
+    assert response.status_code == 200
+    assert default_zones_path().read_bytes() == bundled
+    assert server.zone_registry.path.exists()
+    assert ZoneIndex.from_dict(json.loads(server.zone_registry.path.read_text())).to_dict() == current